@@ -37,7 +37,7 @@ class KISAuth:
             json.dump(token_info, f, indent=2)
 
     @kis_retry
-    @rate_limited
+    @rate_limited("auth")
     def _issue_token(self):
         path = "/oauth2/tokenP"
         url = f"{self._base_url}{path}"
@@ -62,6 +62,22 @@ class KISAuth:
         logger.info("새로운 접근 토큰이 발급되었습니다.")
         return token_info
 
+    @kis_retry
+    @rate_limited("auth")
+    def issue_approval_key(self) -> str:
+        """실시간(WebSocket) 접속키를 발급합니다."""
+        url = f"{self._base_url}/oauth2/Approval"
+        headers = {"content-type": "application/json"}
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": self._app_key,
+            "secretkey": self._app_secret,
+        }
+        response = kis_post(url, headers=headers, json=body)
+        if response.status_code != 200:
+            raise AuthenticationError(f"실시간 접속키 발급 실패: {response.text}")
+        return response.json()["approval_key"]
+
     @property
     def access_token(self):
         expire_time = datetime.strptime(self._token_info["expire_time"], "%Y-%m-%d %H:%M:%S.%f")
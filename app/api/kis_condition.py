@@ -138,18 +138,23 @@ def get_target_stocks_by_condition() -> list[str]:
         codes.append(code)
 
     # 동전주 제외: 현재가가 min_price 미만인 종목은 제외하고, 상위부터 가격 확인해 max_count개까지 채움
+    # (멀티종목 시세 한도인 30종목씩 묶어서 조회)
     filtered = []
-    for code in codes:
+    for start in range(0, len(codes), 30):
         if len(filtered) >= max_count:
             break
-        try:
-            price = kis_market.get_current_price(code)
-            if price >= min_price:
+        chunk = codes[start:start + 30]
+        prices = kis_market.get_current_prices(chunk)
+        for code in chunk:
+            if len(filtered) >= max_count:
+                break
+            price = prices.get(code)
+            if price is None:
+                logger.debug(f"현재가 조회 실패로 종목 제외: {code}")
+            elif price >= min_price:
                 filtered.append(code)
             else:
                 logger.debug(f"조건검색 종목 제외(동전주): {code} 현재가 {price:.0f}")
-        except Exception as e:
-            logger.debug(f"현재가 조회 실패로 종목 제외: {code} - {e}")
 
     logger.info(f"조건검색 대상 종목 수: {len(filtered)} (원본 {len(rows)}건, 블랙리스트·동전주 필터 후)")
     return filtered
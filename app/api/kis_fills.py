@@ -0,0 +1,238 @@
+"""
+주문 체결 추적.
+- 매수 주문을 주문번호(ODNO) 기준 OrderTicket으로 등록하고, 체결 수량/평균 체결가가 모이면 ticket.future를 완료한다.
+- 1순위: 실시간 체결통보(H0STCNI0, 모의 H0STCNI9). kis_realtime 피드가 복호화한 레코드를 on_notice로 전달.
+- 폴백: 주식일별주문체결조회(inquire-daily-ccld)를 매매 사이클마다 1회 호출해 미완료 주문 전체를 갱신.
+- 제한 시간 안에 전량 체결되지 않으면 그때까지의 체결 수량으로 완료(expired) 처리.
+  단, OrderManager가 관리하는 주문(managed)은 만료 시 잔량 취소까지 OrderManager가 맡는다.
+- 정정 주문은 새 주문번호로 재접수되므로 rekey()로 추적 키를 옮기고, 원주문 체결분은 누적값으로 이월한다.
+"""
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from app.api import kis_order
+from app.core.logger import logger
+
+# 체결통보 레코드 필드 인덱스 (^ 구분)
+_N_ORDER_NO = 2
+_N_SIDE = 4           # 01 매도, 02 매수
+_N_SYMBOL = 8
+_N_FILL_QTY = 9
+_N_FILL_PRICE = 10
+_N_REJECTED = 12      # RFUS_YN
+_N_FILLED = 13        # CNTG_YN: 1 접수/정정/취소/거부, 2 체결
+
+
+def _norm_odno(odno) -> str:
+    return str(odno or "").strip().lstrip("0")
+
+
+class OrderTicket:
+    """주문 1건의 체결 현황. future는 filled/expired/rejected/cancelled 시 자기 자신으로 완료된다."""
+
+    __slots__ = (
+        "odno", "origin_odno", "org_no", "symbol", "side", "quantity", "price", "submitted_at", "placed_at",
+        "deadline", "filled_qty", "_notional", "_carried_qty", "_carried_notional", "reprices", "managed",
+        "status", "future",
+    )
+
+    def __init__(self, odno: str, symbol: str, side: str, quantity: int, price: int, timeout: float):
+        self.odno = odno
+        self.origin_odno = odno
+        self.org_no = ""
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.price = price
+        self.submitted_at = time.time()
+        self.placed_at = self.submitted_at
+        self.deadline = self.submitted_at + max(0.0, timeout)
+        self.filled_qty = 0
+        self._notional = 0.0
+        self._carried_qty = 0
+        self._carried_notional = 0.0
+        self.reprices = 0
+        self.managed = False
+        self.status = "open"
+        self.future: Future = Future()
+
+    @property
+    def avg_price(self) -> float | None:
+        if self.filled_qty <= 0 or self._notional <= 0:
+            return None
+        return self._notional / self.filled_qty
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def to_dict(self) -> dict:
+        return {
+            "odno": self.odno,
+            "originOdno": self.origin_odno,
+            "symbol": self.symbol,
+            "side": self.side,
+            "quantity": self.quantity,
+            "price": self.price,
+            "filledQty": self.filled_qty,
+            "avgPrice": self.avg_price,
+            "status": self.status,
+            "reprices": self.reprices,
+            "submittedAt": self.submitted_at,
+        }
+
+
+class FillTracker:
+    """미완료 주문 테이블 + 체결통보/체결조회 반영."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open: dict[str, OrderTicket] = {}
+        self._notices = 0
+        self._polls = 0
+
+    def track(self, odno: str, symbol: str, side: str, quantity: int, price: int, timeout: float) -> OrderTicket:
+        """주문번호로 체결 추적을 시작합니다."""
+        ticket = OrderTicket(str(odno or ""), symbol, side, quantity, price, timeout)
+        key = _norm_odno(odno)
+        if key:
+            with self._lock:
+                self._open[key] = ticket
+        else:
+            logger.warning(f"[{symbol}] 주문번호 없는 주문 → 체결조회 매칭 불가, 제한 시간 후 잔고로 확인")
+            with self._lock:
+                self._open[f"_{id(ticket)}"] = ticket
+        return ticket
+
+    def track_order(self, order_response: dict, symbol: str, side: str, quantity: int, price: int, timeout: float) -> OrderTicket:
+        """place_order 응답(output.ODNO)으로 체결 추적을 시작합니다."""
+        output = (order_response or {}).get("output") or {}
+        return self.track(output.get("ODNO", ""), symbol, side, quantity, price, timeout)
+
+    def get(self, odno: str) -> OrderTicket | None:
+        """현재 또는 최초 주문번호로 미완료 주문을 찾습니다."""
+        key = _norm_odno(odno)
+        with self._lock:
+            ticket = self._open.get(key)
+            if ticket is None:
+                ticket = next((t for t in self._open.values() if _norm_odno(t.origin_odno) == key), None)
+        return ticket
+
+    def rekey(self, ticket: OrderTicket, new_odno: str) -> None:
+        """정정 재접수로 바뀐 주문번호로 추적을 옮깁니다 (기존 체결분은 이월)."""
+        with self._lock:
+            for key in [k for k, t in self._open.items() if t is ticket]:
+                del self._open[key]
+            ticket._carried_qty = ticket.filled_qty
+            ticket._carried_notional = ticket._notional
+            ticket.odno = str(new_odno)
+            ticket.placed_at = time.time()
+            if ticket.status == "open":
+                self._open[_norm_odno(new_odno) or f"_{id(ticket)}"] = ticket
+
+    def open_tickets(self) -> list[OrderTicket]:
+        with self._lock:
+            return list(self._open.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            open_orders = [t.to_dict() for t in self._open.values()]
+        return {"open": open_orders, "notices": self._notices, "polls": self._polls}
+
+    # --- 체결 반영 ---
+    def on_notice(self, fields: list[str]) -> None:
+        """실시간 체결통보 1건 (복호화된 ^ 구분 필드)."""
+        if len(fields) <= _N_FILLED:
+            return
+        self._notices += 1
+        with self._lock:
+            ticket = self._open.get(_norm_odno(fields[_N_ORDER_NO]))
+        if ticket is None:
+            return
+        if fields[_N_REJECTED] == "Y":
+            self.finish(ticket, "rejected")
+            return
+        if fields[_N_FILLED] != "2":
+            return
+        try:
+            qty = int(fields[_N_FILL_QTY] or 0)
+            price = float(fields[_N_FILL_PRICE] or 0)
+        except ValueError:
+            return
+        with self._lock:
+            ticket.filled_qty += qty
+            ticket._notional += qty * price
+            complete = ticket.filled_qty >= ticket.quantity
+        logger.debug(f"[{ticket.symbol}] 체결통보: {qty}주 @ {price:.0f} (누적 {ticket.filled_qty}/{ticket.quantity})")
+        if complete:
+            self.finish(ticket, "filled")
+
+    def poll(self) -> None:
+        """미완료 주문이 있으면 당일 주문체결조회 1회로 모두 갱신하고, 제한 시간 지난 주문을 만료 처리."""
+        tickets = self.open_tickets()
+        if not tickets:
+            return
+        try:
+            rows = kis_order.get_daily_fills()
+            self._polls += 1
+        except Exception as e:
+            logger.warning(f"주문체결 조회 실패 (다음 사이클 재시도): {e}")
+            rows = []
+        by_odno = {_norm_odno(r.get("odno")): r for r in rows}
+        for ticket in tickets:
+            row = by_odno.get(_norm_odno(ticket.odno))
+            if row is not None:
+                self._apply_row(ticket, row)
+        now = time.time()
+        for ticket in tickets:
+            if not ticket.done and not ticket.managed and now >= ticket.deadline:
+                self.finish(ticket, "expired")
+
+    def _apply_row(self, ticket: OrderTicket, row: dict) -> None:
+        try:
+            filled = int(row.get("tot_ccld_qty") or 0)
+            avg = float(row.get("avg_prvs") or 0)
+            remaining = int(row.get("rmn_qty") or 0)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            # 체결통보로 이미 더 많이 반영됐으면 유지 (조회 시점 차이). 정정 전 원주문 체결분은 이월값에 더함
+            total = ticket._carried_qty + filled
+            if total > ticket.filled_qty:
+                ticket.filled_qty = total
+                ticket._notional = ticket._carried_notional + filled * (avg if avg > 0 else float(ticket.price or 0))
+        if ticket.filled_qty >= ticket.quantity:
+            self.finish(ticket, "filled")
+        elif row.get("cncl_yn") == "Y" or (remaining == 0 and ticket.filled_qty > 0):
+            self.finish(ticket, "cancelled")
+
+    def finish(self, ticket: OrderTicket, status: str) -> None:
+        """추적을 끝내고 ticket.future를 완료합니다 (이미 끝났으면 무시)."""
+        with self._lock:
+            if ticket.status != "open":
+                return
+            ticket.status = status
+            for key in [k for k, t in self._open.items() if t is ticket]:
+                del self._open[key]
+        logger.info(
+            f"[{ticket.symbol}] 주문 {ticket.odno} {status}: 체결 {ticket.filled_qty}/{ticket.quantity}주"
+            + (f" @ {ticket.avg_price:.0f}" if ticket.avg_price else "")
+        )
+        ticket.future.set_result(ticket)
+
+    def wait(self, ticket: OrderTicket, timeout: float, poll_interval: float = 1.5) -> OrderTicket:
+        """ticket 완료를 최대 timeout초 기다립니다 (체결통보가 없으면 poll_interval마다 체결조회)."""
+        deadline = time.time() + max(0.0, timeout)
+        while not ticket.done:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                ticket.future.result(timeout=min(poll_interval, remaining))
+            except FutureTimeoutError:
+                self.poll()
+        return ticket
+
+
+fill_tracker = FillTracker()
@@ -2,13 +2,26 @@
 한국투자증권 OpenAPI용 HTTP 세션.
 서버 인증서가 약한 RSA 키를 사용하여 발생하는 SSL 검증 오류를 우회합니다.
 stale connection 방지를 위해 연결 끊김 시 자동 재시도합니다.
+동기(requests) 세션과 함께, 동일한 SSL 설정을 쓰는 async(httpx) keep-alive 클라이언트를 제공합니다.
 """
+import asyncio
+import concurrent.futures
 import ssl
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 
+def _create_kis_ssl_context() -> ssl.SSLContext:
+    """약한 인증서(EE certificate key too weak)를 허용하는 SECLEVEL=1 SSL 컨텍스트."""
+    ctx = ssl.create_default_context()
+    try:
+        ctx.set_ciphers("DEFAULT@SECLEVEL=1")
+    except ssl.SSLError:
+        pass  # 구버전 OpenSSL은 SECLEVEL 미지원
+    return ctx
+
+
 class _KISHTTPSAdapter(HTTPAdapter):
     """약한 인증서(EE certificate key too weak) 허용 + 연결 끊김 자동 재시도 어댑터."""
 
@@ -26,12 +39,7 @@ class _KISHTTPSAdapter(HTTPAdapter):
         super().__init__(**kwargs)
 
     def init_poolmanager(self, *args, **kwargs):
-        ctx = ssl.create_default_context()
-        try:
-            ctx.set_ciphers("DEFAULT@SECLEVEL=1")
-        except ssl.SSLError:
-            pass  # 구버전 OpenSSL은 SECLEVEL 미지원
-        kwargs["ssl_context"] = ctx
+        kwargs["ssl_context"] = _create_kis_ssl_context()
         return super().init_poolmanager(*args, **kwargs)
 
 
@@ -50,3 +58,84 @@ def kis_post(url: str, **kwargs) -> requests.Response:
     """KIS API POST 요청 (약한 인증서 호환 + 연결 끊김 자동 재시도)."""
     kwargs.setdefault("timeout", (10, 30))
     return _kis_session.post(url, **kwargs)
+
+
+# --- async 클라이언트 (httpx, HTTP/1.1 keep-alive 연결 풀) ---
+# httpx 연결 풀은 생성된 이벤트 루프에 묶이므로 루프별로 하나씩 만든다 (보통은 FastAPI 앱 루프 1개).
+_async_client = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+# 스레드(스케줄러 잡)에서 async 조회를 위임할 앱 이벤트 루프
+_app_loop: asyncio.AbstractEventLoop | None = None
+
+_ASYNC_MAX_CONNECTIONS = 20
+_ASYNC_MAX_KEEPALIVE = 10
+
+
+def _get_async_client():
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        import httpx
+
+        transport = httpx.AsyncHTTPTransport(
+            verify=_create_kis_ssl_context(),
+            http2=False,
+            retries=3,  # 연결 단계 실패(stale connection 등) 자동 재시도
+            limits=httpx.Limits(
+                max_connections=_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=_ASYNC_MAX_KEEPALIVE,
+                keepalive_expiry=30.0,
+            ),
+        )
+        _async_client = httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(30.0, connect=10.0))
+        _async_client_loop = loop
+    return _async_client
+
+
+async def kis_get_async(url: str, **kwargs):
+    """KIS API GET 요청 (async, 공용 keep-alive 연결 풀)."""
+    return await _get_async_client().get(url, **kwargs)
+
+
+async def kis_post_async(url: str, **kwargs):
+    """KIS API POST 요청 (async, 공용 keep-alive 연결 풀)."""
+    return await _get_async_client().post(url, **kwargs)
+
+
+async def close_async_client() -> None:
+    """앱 종료 시 async 클라이언트 연결 풀을 정리합니다."""
+    global _async_client, _async_client_loop
+    if _async_client is not None:
+        await _async_client.aclose()
+    _async_client = None
+    _async_client_loop = None
+
+
+def bind_event_loop(loop: asyncio.AbstractEventLoop | None) -> None:
+    """스레드에서 run_on_app_loop로 async 조회를 위임할 앱 이벤트 루프를 등록합니다."""
+    global _app_loop
+    _app_loop = loop
+
+
+def run_on_app_loop(coro, timeout: float = 30.0):
+    """
+    동기 스레드에서 코루틴을 앱 이벤트 루프에 제출하고 결과를 기다립니다.
+    앱 루프가 없거나(스크립트 실행 등) 현재 스레드가 그 루프 자체면 RuntimeError.
+    """
+    loop = _app_loop
+    if loop is None or not loop.is_running():
+        coro.close()
+        raise RuntimeError("앱 이벤트 루프가 등록되지 않았습니다.")
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("앱 이벤트 루프 스레드에서는 run_on_app_loop를 사용할 수 없습니다.")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
@@ -1,14 +1,688 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone, time as dtime
+
 from app.api.kis_auth import kis_auth
-from app.api.kis_http import kis_get
+from app.api.kis_http import kis_get, kis_get_async, run_on_app_loop
 from app.api.kis_retry import kis_retry, rate_limited
+from app.core.config import settings
 from app.core.logger import logger
 from app.core.exceptions import APIRequestError
+from app.db import bar_store, minute_store
+
+KST = timezone(timedelta(hours=9))
+
+
+class _InFlight:
+    """동일 키에 대해 진행 중인 요청 1건 (single-flight). 후행 호출자는 event를 기다려 결과를 공유한다."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+
+class MarketDataCache:
+    """
+    시세 응답 캐시: (endpoint, symbol, params) 키별 TTL 보관 + single-flight 중복 요청 병합.
+    한 매매 사이클 안에서 매매 루프·전략·지표·상태 API가 같은 종목을 반복 조회해도
+    KIS 호출은 1회로 합쳐진다 (전역 레이트 리미트 대기 시간 절감).
+    """
+
+    _PRUNE_THRESHOLD = 2000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[tuple, tuple[float, object]] = {}  # key -> (만료 epoch, 값)
+        self._inflight: dict[tuple, _InFlight] = {}
+        self._async_inflight: dict[tuple, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def peek(self, key: tuple):
+        """만료 전 캐시 값을 반환 (없으면 None). API 호출·통계 집계 없음."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                return entry[1]
+        return None
+
+    def put(self, key: tuple, value, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            if len(self._entries) > self._PRUNE_THRESHOLD:
+                now = time.time()
+                for k in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                    del self._entries[k]
+
+    def get_or_fetch(self, key: tuple, fetch, expires_at):
+        """
+        캐시 hit이면 즉시 반환, miss면 fetch()를 1회만 실행한다.
+        같은 키로 동시에 들어온 호출자는 진행 중인 요청 결과(또는 예외)를 공유한다.
+        :param expires_at: fetch 결과 -> 만료 epoch 를 계산하는 callable
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._hits += 1
+                return entry[1]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlight()
+                self._inflight[key] = call
+                self._misses += 1
+            else:
+                self._coalesced += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            value = fetch()
+            call.value = value
+            self.put(key, value, expires_at(value))
+            return value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    async def get_or_fetch_async(self, key: tuple, fetch, expires_at):
+        """
+        get_or_fetch의 async 버전. fetch는 코루틴을 반환하는 callable.
+        같은 키의 동시 호출은 하나의 태스크를 공유한다 (취소는 공유 태스크에 전파되지 않음).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._hits += 1
+                return entry[1]
+            task = self._async_inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch_async(key, fetch, expires_at))
+                self._async_inflight[key] = task
+                self._misses += 1
+            else:
+                self._coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fetch_async(self, key: tuple, fetch, expires_at):
+        try:
+            value = await fetch()
+            self.put(key, value, expires_at(value))
+            return value
+        finally:
+            with self._lock:
+                self._async_inflight.pop(key, None)
+
+    def invalidate(self, symbol: str | None = None) -> None:
+        """symbol 지정 시 해당 종목 캐시만, 미지정 시 전체 캐시를 비운다."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                return
+            for k in [k for k in self._entries if k[1] == symbol]:
+                del self._entries[k]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "entries": len(self._entries),
+                "hitRate": round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+_market_cache = MarketDataCache()
+
+_QUOTE_ENDPOINT = "inquire-price"
+_DAILY_ENDPOINT = "inquire-daily-price"
+_DAILY_PARAMS = (("fid_org_adj_prc", "1"), ("fid_period_div_code", "D"))
+# 당일 봉을 실시간 시세로 덮어쓸 필드 (일봉 키 <- 현재가 응답 키)
+_TODAY_BAR_OVERLAY = (
+    ("stck_clpr", "stck_prpr"),
+    ("stck_oprc", "stck_oprc"),
+    ("stck_hgpr", "stck_hgpr"),
+    ("stck_lwpr", "stck_lwpr"),
+    ("acml_vol", "acml_vol"),
+)
+
+
+# 일봉: 호출자에게 기본으로 돌려주는 봉 수(KIS 일봉 API 1회 응답 크기)와 로컬 저장소에서 읽어 두는 최대 봉 수
+_DAILY_DEFAULT_ROWS = 30
+_DAILY_STORE_ROWS = 120
+# 이 시각(KST) 이후면 당일 봉을 확정된 것으로 보고 저장소에 반영
+_DAILY_FINAL_AFTER = dtime(15, 40)
+
+
+def _quote_key(symbol: str) -> tuple:
+    return (_QUOTE_ENDPOINT, symbol, ())
+
+
+def _daily_key(symbol: str) -> tuple:
+    return (_DAILY_ENDPOINT, symbol, _DAILY_PARAMS)
+
+
+def _quote_expiry(_value) -> float:
+    return time.time() + max(0.0, settings.MARKET_QUOTE_CACHE_TTL)
+
+
+def _daily_expiry(bars: list) -> float:
+    """
+    일봉 캐시 만료 시각: 과거 봉은 다음 세션(다음 09:00 KST)까지 바뀌지 않으므로 그때까지 보관.
+    장중인데 응답에 당일 봉이 아직 없으면 짧게만 캐시하고 재조회한다.
+    """
+    now = datetime.now(KST)
+    today = now.strftime("%Y%m%d")
+    has_today = bool(bars) and str(bars[0].get("stck_bsop_date", "")) == today
+    if not has_today and now.weekday() < 5 and dtime(9, 0) <= now.time() <= dtime(15, 30):
+        return time.time() + max(settings.MARKET_QUOTE_CACHE_TTL, 30.0)
+    next_open = now.replace(hour=9, minute=0, second=0, microsecond=0)
+    if now >= next_open:
+        next_open += timedelta(days=1)
+    return next_open.timestamp()
+
+
+def _overlay_today_bar(symbol: str, bars: list) -> list:
+    """캐시된 일봉 사본을 만들고, 당일 봉은 최신 현재가 캐시(있으면)로 갱신한다."""
+    rows = [dict(row) for row in bars]
+    if not rows:
+        return rows
+    quote = _market_cache.peek(_quote_key(symbol))
+    if not quote or str(rows[0].get("stck_bsop_date", "")) != datetime.now(KST).strftime("%Y%m%d"):
+        return rows
+    for bar_key, quote_key in _TODAY_BAR_OVERLAY:
+        val = quote.get(quote_key)
+        try:
+            if val is not None and float(val) > 0:
+                rows[0][bar_key] = val
+        except (TypeError, ValueError):
+            continue
+    return rows
+
+
+def _last_closed_session(now: datetime | None = None) -> str:
+    """봉이 확정된 가장 최근 거래일(YYYYMMDD) 추정: 평일 장 마감 후면 오늘, 아니면 직전 평일. 휴장일은 동기화 기준일로 흡수."""
+    now = now or datetime.now(KST)
+    day = now.date()
+    if now.weekday() < 5 and now.time() >= _DAILY_FINAL_AFTER:
+        return day.strftime("%Y%m%d")
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.strftime("%Y%m%d")
+
+
+def _today_bar(quote: dict) -> dict:
+    """현재가 응답으로 당일 봉(장중 미확정)을 만든다."""
+    return {
+        "stck_bsop_date": datetime.now(KST).strftime("%Y%m%d"),
+        "stck_oprc": quote.get("stck_oprc", "0"),
+        "stck_hgpr": quote.get("stck_hgpr", "0"),
+        "stck_lwpr": quote.get("stck_lwpr", "0"),
+        "stck_clpr": quote.get("stck_prpr", "0"),
+        "acml_vol": quote.get("acml_vol", "0"),
+    }
+
+
+def _needs_today_bar(rows: list) -> bool:
+    """장중(평일 09:00 이후, 당일 봉 미확정)이고 저장된 봉에 당일 봉이 없으면 True."""
+    now = datetime.now(KST)
+    today = now.strftime("%Y%m%d")
+    if now.weekday() >= 5 or now.time() < dtime(9, 0) or _last_closed_session(now) == today:
+        return False
+    return not rows or str(rows[0].get("stck_bsop_date", "")) != today
+
+
+def _stored_daily_bars(symbol: str) -> list | None:
+    """로컬 저장소가 최근 확정 거래일까지 동기화돼 있으면 저장된 봉(최신순), 아니면 None."""
+    try:
+        through = bar_store.synced_through(symbol)
+        if not through or through < _last_closed_session():
+            return None
+        return bar_store.load_bars(symbol, _DAILY_STORE_ROWS) or None
+    except Exception as e:
+        logger.debug(f"[{symbol}] 일봉 저장소 조회 실패 (API 조회): {e}")
+        return None
+
+
+def _save_daily_bars(symbol: str, rows: list) -> None:
+    """API 일봉 응답 중 확정된 봉을 저장소에 반영하고 동기화 기준일을 갱신."""
+    try:
+        bar_store.save_bars(symbol, rows, _last_closed_session())
+    except Exception as e:
+        logger.debug(f"[{symbol}] 일봉 저장소 반영 실패: {e}")
+
+
+def _load_daily_ohlcv(symbol: str) -> list:
+    """일봉 로드: 저장소(동기화된 경우) + 장중이면 현재가로 당일 봉 합성, 아니면 API 조회 후 저장소 백필."""
+    stored = _stored_daily_bars(symbol)
+    if stored is None:
+        rows = _fetch_daily_ohlcv(symbol)
+        _save_daily_bars(symbol, rows)
+        return rows
+    if _needs_today_bar(stored):
+        try:
+            stored = [_today_bar(get_quote(symbol))] + stored
+        except Exception as e:
+            logger.debug(f"[{symbol}] 당일 봉 합성용 현재가 조회 실패: {e}")
+    return stored
+
+
+async def _load_daily_ohlcv_async(symbol: str) -> list:
+    """_load_daily_ohlcv의 async 버전 (저장소 조회는 스레드풀에서 실행)."""
+    loop = asyncio.get_running_loop()
+    stored = await loop.run_in_executor(None, _stored_daily_bars, symbol)
+    if stored is None:
+        rows = await _fetch_daily_ohlcv_async(symbol)
+        await loop.run_in_executor(None, _save_daily_bars, symbol, rows)
+        return rows
+    if _needs_today_bar(stored):
+        try:
+            stored = [_today_bar(await get_quote_async(symbol))] + stored
+        except Exception as e:
+            logger.debug(f"[{symbol}] 당일 봉 합성용 현재가 조회 실패: {e}")
+    return stored
+
+
+def sync_daily_bars(symbols: list[str]) -> int:
+    """
+    장 마감 후 호출: 저장소가 최근 확정 거래일까지 동기화되지 않은 종목만 일봉 API로 새 봉을 추가하고 캐시도 교체.
+    동기화한 종목 수를 반환합니다.
+    """
+    through = _last_closed_session()
+    synced = 0
+    for symbol in dict.fromkeys(symbols):
+        try:
+            if (bar_store.synced_through(symbol) or "") >= through:
+                continue
+            rows = _fetch_daily_ohlcv(symbol)
+        except Exception as e:
+            logger.debug(f"[{symbol}] 일봉 동기화 실패: {e}")
+            continue
+        _save_daily_bars(symbol, rows)
+        _market_cache.put(_daily_key(symbol), rows, _daily_expiry(rows))
+        synced += 1
+    return synced
+
+
+def _previous_day(day: str) -> str:
+    return (datetime.strptime(day, "%Y%m%d") - timedelta(days=1)).strftime("%Y%m%d")
+
+
+def sync_daily_history(symbols: list[str], years: float = 10, max_requests: int = 5000) -> dict:
+    """
+    과거 일봉 백필: 종목마다 최근 years년 일봉을 기간별 시세 API로 최신 → 과거 방향 페이지(최대 100봉) 단위로 채움.
+    페이지마다 저장하고 확인한 가장 이른 날짜(history_from)를 기록 → 중단돼도 다음 실행이 이어서 진행하고,
+    다 채운 종목(상장일 이전까지 확인한 종목 포함)은 다시 호출하지 않습니다.
+    호출은 시세 레이트 리미터를 거치고 max_requests를 다 쓰면 멈춥니다. 반환: {"symbols", "rows", "requests", "complete"}.
+    """
+    through = _last_closed_session()
+    start = (datetime.strptime(through, "%Y%m%d") - timedelta(days=round(years * 365.25))).strftime("%Y%m%d")
+    completed = rows = requests = 0
+    for symbol in dict.fromkeys(symbols):
+        try:
+            covered = bar_store.history_from(symbol)
+        except Exception as e:
+            logger.debug(f"[{symbol}] 과거 일봉 백필 기준일 조회 실패: {e}")
+            continue
+        if covered and covered <= start:
+            continue
+        end = _previous_day(covered) if covered else through
+        while True:
+            if requests >= max_requests:
+                logger.info(f"과거 일봉 백필 요청 한도 도달 ({requests}회): {completed}종목 완료 {rows}행 저장, 다음 실행에서 이어서 진행")
+                return {"symbols": completed, "rows": rows, "requests": requests, "complete": False}
+            try:
+                page = _fetch_daily_history(symbol, start, end)
+            except Exception as e:
+                logger.debug(f"[{symbol}] 과거 일봉 백필 실패 (~{end}): {e}")
+                requests += 1
+                break  # 다음 종목으로 (이 종목은 다음 실행에서 같은 날짜부터 재시도)
+            requests += 1
+            dates = sorted(str(r["stck_bsop_date"]) for r in page)
+            # 페이지가 덜 찼거나 start에 닿았으면 더 과거 봉 없음 (상장일 이전 등)
+            exhausted = not dates or len(page) < _HISTORY_PAGE_ROWS or dates[0] <= start
+            saved = bar_store.save_history(symbol, page, through, start if exhausted else dates[0])
+            if page and not saved:
+                break  # 저장 실패: history_from이 그대로이므로 다음 실행에서 같은 날짜부터 재시도 (구간 누락 방지)
+            rows += saved
+            if exhausted:
+                completed += 1
+                break
+            end = _previous_day(dates[0])
+    return {"symbols": completed, "rows": rows, "requests": requests, "complete": True}
+
+
+def _weekdays(through: str, count: int) -> list[str]:
+    """through 이하 최근 평일 count개 (오래된순). 휴장일은 분봉 조회가 빈 결과로 끝나 저장 기준일로 흡수됨."""
+    days, day = [], datetime.strptime(through, "%Y%m%d")
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.strftime("%Y%m%d"))
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def _minute_backfill_days(symbol: str, lookback_days: int, through: str) -> tuple[list[str], list[str]]:
+    """
+    분봉 동기화 대상 거래일 (최근 평일 lookback_days개 기준, 일봉 저장소와 무관):
+    (분봉 저장 since 이전 과거분(최신→과거순), through 이후 신규분(오래된순)). 저장된 분봉이 없으면 전부 신규분.
+    """
+    calendar = _weekdays(through, lookback_days)
+    meta = minute_store.read_meta(symbol)
+    if not meta["through"]:
+        return [], calendar
+    older = [d for d in reversed(calendar) if d < meta["since"]]
+    newer = [d for d in calendar if meta["through"] < d]
+    return older, newer
+
+
+def sync_minute_bars(symbols: list[str], lookback_days: int = 250, max_requests: int = 2000) -> dict:
+    """
+    분봉 백필/증분 동기화. through 이후 신규분은 오래된 날부터 하루 단위로 append하고,
+    lookback_days가 늘었거나 백필이 덜 된 since 이전 과거분은 since 직전부터 과거 방향으로 모아 prepend합니다
+    (중단되면 그때까지 모은 날만 저장 → 다음 실행이 이어서 진행).
+    호출은 시세 레이트 리미터를 거치고, max_requests를 다 쓰면 멈춥니다. 반환: {"days", "rows", "requests", "complete"}.
+    """
+    through = _last_closed_session()
+    days_done = rows = requests = 0
+
+    def _limit_reached() -> dict:
+        logger.info(f"분봉 동기화 요청 한도 도달 ({requests}회): {days_done}일 {rows}행 저장, 다음 실행에서 이어서 진행")
+        return {"days": days_done, "rows": rows, "requests": requests, "complete": False}
+
+    for symbol in dict.fromkeys(symbols):
+        older, newer = _minute_backfill_days(symbol, lookback_days, through)
+        failed = False
+        for day in newer:
+            if requests >= max_requests:
+                return _limit_reached()
+            try:
+                bars, calls = get_minute_bars(symbol, day)
+            except Exception as e:
+                logger.debug(f"[{symbol}] {day} 분봉 동기화 실패: {e}")
+                requests += 1
+                failed = True
+                break  # 다음 종목으로 (이 종목은 다음 실행에서 같은 날부터 재시도)
+            requests += calls
+            rows += minute_store.append_day(symbol, day, bars)
+            days_done += 1
+        if failed:
+            continue
+        pending: list[tuple[str, list[dict]]] = []
+        limit_hit = False
+        for day in older:
+            if requests >= max_requests:
+                limit_hit = True
+                break
+            try:
+                bars, calls = get_minute_bars(symbol, day)
+            except Exception as e:
+                logger.debug(f"[{symbol}] {day} 분봉 백필 실패: {e}")
+                requests += 1
+                break
+            requests += calls
+            pending.append((day, bars))
+        if pending:
+            rows += minute_store.prepend_days(symbol, pending)
+            days_done += len(pending)
+        if limit_hit:
+            return _limit_reached()
+    return {"days": days_done, "rows": rows, "requests": requests, "complete": True}
+
+
+def get_cache_stats() -> dict:
+    """시세 캐시 hit/miss/coalesced 카운터를 반환합니다."""
+    return _market_cache.stats()
+
+
+def invalidate_cache(symbol: str | None = None) -> None:
+    """시세 캐시를 비웁니다 (symbol 미지정 시 전체)."""
+    _market_cache.invalidate(symbol)
+
+
+def put_stream_quote(symbol: str, quote: dict) -> None:
+    """실시간(WebSocket) 체결 시세를 현재가 캐시에 반영합니다. REALTIME_QUOTE_TTL 동안 REST 조회를 생략."""
+    key = _quote_key(symbol)
+    merged = dict(_market_cache.peek(key) or {})
+    merged.update(quote)
+    _market_cache.put(key, merged, time.time() + max(0.0, settings.REALTIME_QUOTE_TTL))
+
+
+def peek_quote(symbol: str) -> dict | None:
+    """캐시에 있는 현재가 응답만 반환합니다 (만료 전, API 호출 없음)."""
+    return _market_cache.peek(_quote_key(symbol))
+
+
+def get_quote(symbol: str) -> dict:
+    """현재가 조회 응답(output) 전체를 반환합니다. TTL 캐시 + 동시 요청 병합 적용."""
+    return _market_cache.get_or_fetch(_quote_key(symbol), lambda: _fetch_quote(symbol), _quote_expiry)
 
 
-@kis_retry
-@rate_limited
 def get_current_price(symbol: str) -> float:
-    """주식 현재가를 조회합니다."""
+    """주식 현재가를 조회합니다 (캐시 적용)."""
+    return float(get_quote(symbol)["stck_prpr"])
+
+
+def get_current_prices(symbols: list[str]) -> dict[str, float]:
+    """
+    여러 종목 현재가를 한 번에 조회합니다 {symbol: price}. 조회 실패 종목은 결과에서 제외.
+    캐시 → 멀티종목 시세(30종목 단위 1회 호출) → 실패/누락 종목은 개별 조회(동시) 순으로 채운다.
+    """
+    unique = list(dict.fromkeys(symbols))
+    prices, missing = _cached_prices(unique)
+    if len(missing) >= 2 and _multi_price_available():
+        for chunk in _chunks(missing, _MULTI_PRICE_MAX):
+            try:
+                prices.update(_store_multi_quotes(_fetch_multi_quotes(chunk)))
+            except Exception as e:
+                _disable_multi_price(e)
+                break
+        missing = [s for s in missing if s not in prices]
+    if missing:
+        prefetch_quotes(missing)
+        for symbol in missing:
+            try:
+                prices[symbol] = get_current_price(symbol)
+            except Exception as e:
+                logger.debug(f"[{symbol}] 현재가 조회 실패: {e}")
+    return prices
+
+
+def get_daily_ohlcv(symbol: str, days: int = 30):
+    """
+    일봉 데이터를 조회합니다 (OHLCV, 최신순 최소 30개·저장소에 있으면 days개까지).
+    과거 봉은 로컬 저장소와 다음 세션까지의 메모리 캐시에서 읽고, 당일 봉은 최신 현재가 캐시로 덮어써 반환합니다.
+    반환값은 호출자별 사본입니다.
+    """
+    bars = _market_cache.get_or_fetch(_daily_key(symbol), lambda: _load_daily_ohlcv(symbol), _daily_expiry)
+    return _overlay_today_bar(symbol, bars[:max(days, _DAILY_DEFAULT_ROWS)])
+
+
+async def get_quote_async(symbol: str) -> dict:
+    """get_quote의 async 버전 (동일 캐시 공유, 동시 요청은 하나의 태스크로 병합)."""
+    return await _market_cache.get_or_fetch_async(_quote_key(symbol), lambda: _fetch_quote_async(symbol), _quote_expiry)
+
+
+async def get_current_price_async(symbol: str) -> float:
+    """get_current_price의 async 버전."""
+    return float((await get_quote_async(symbol))["stck_prpr"])
+
+
+async def get_daily_ohlcv_async(symbol: str, days: int = 30):
+    """get_daily_ohlcv의 async 버전."""
+    bars = await _market_cache.get_or_fetch_async(_daily_key(symbol), lambda: _load_daily_ohlcv_async(symbol), _daily_expiry)
+    return _overlay_today_bar(symbol, bars[:max(days, _DAILY_DEFAULT_ROWS)])
+
+
+async def get_current_prices_async(symbols: list[str]) -> dict[str, float]:
+    """get_current_prices의 async 버전 (멀티종목 청크·개별 폴백 모두 동시 실행). 실패한 종목은 결과에서 제외."""
+    unique = list(dict.fromkeys(symbols))
+    prices, missing = _cached_prices(unique)
+    if len(missing) >= 2 and _multi_price_available():
+        chunks = list(_chunks(missing, _MULTI_PRICE_MAX))
+        results = await asyncio.gather(*(_fetch_multi_quotes_async(c) for c in chunks), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                _disable_multi_price(result)
+                continue
+            prices.update(_store_multi_quotes(result))
+        missing = [s for s in missing if s not in prices]
+    results = await asyncio.gather(*(get_current_price_async(s) for s in missing), return_exceptions=True)
+    for symbol, result in zip(missing, results):
+        if isinstance(result, BaseException):
+            logger.debug(f"[{symbol}] 현재가 동시 조회 실패: {result}")
+            continue
+        prices[symbol] = result
+    return prices
+
+
+def prefetch_quotes(symbols: list[str], timeout: float = 30.0) -> None:
+    """
+    동기 스레드(매매 루프 등)에서 호출: 캐시에 없는 종목 현재가를 앱 이벤트 루프에서 동시 조회해 채운다.
+    이후 get_current_price는 캐시 hit. 앱 루프가 없으면 아무것도 하지 않는다 (개별 조회로 폴백).
+    """
+    pending = [s for s in dict.fromkeys(symbols) if _market_cache.peek(_quote_key(s)) is None]
+    if len(pending) < 2:
+        return
+    try:
+        run_on_app_loop(get_current_prices_async(pending), timeout=timeout)
+    except Exception as e:
+        logger.debug(f"현재가 동시 조회 생략 (개별 조회로 폴백): {e}")
+
+
+def prefetch_daily_ohlcv(symbols: list[str], timeout: float = 30.0) -> None:
+    """
+    prefetch_quotes의 일봉 버전: 캐시에 없는 종목 일봉을 앱 이벤트 루프에서 동시 조회해 채운다 (레이트 리미터 범위 내).
+    이후 get_daily_ohlcv는 캐시 hit. 앱 루프가 없으면 아무것도 하지 않는다.
+    """
+    pending = [s for s in dict.fromkeys(symbols) if _market_cache.peek(_daily_key(s)) is None]
+    if len(pending) < 2:
+        return
+
+    async def _gather():
+        await asyncio.gather(*(get_daily_ohlcv_async(s) for s in pending), return_exceptions=True)
+
+    try:
+        run_on_app_loop(_gather(), timeout=timeout)
+    except Exception as e:
+        logger.debug(f"일봉 동시 조회 생략 (개별 조회로 폴백): {e}")
+
+
+# 멀티종목 시세(관심종목 시세조회): 요청당 최대 30종목. 실패 시 일정 시간 개별 조회만 사용
+_MULTI_PRICE_MAX = 30
+_MULTI_PRICE_RETRY_AFTER = 300.0
+_multi_price_disabled_until = 0.0
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _cached_prices(symbols: list[str]) -> tuple[dict[str, float], list[str]]:
+    """캐시에 있는 현재가와 캐시에 없는 종목 목록을 반환."""
+    prices: dict[str, float] = {}
+    missing: list[str] = []
+    for symbol in symbols:
+        quote = _market_cache.peek(_quote_key(symbol))
+        if quote is not None:
+            prices[symbol] = float(quote["stck_prpr"])
+        else:
+            missing.append(symbol)
+    return prices, missing
+
+
+def _multi_price_available() -> bool:
+    return time.time() >= _multi_price_disabled_until
+
+
+def _disable_multi_price(error: BaseException) -> None:
+    global _multi_price_disabled_until
+    _multi_price_disabled_until = time.time() + _MULTI_PRICE_RETRY_AFTER
+    logger.warning(f"멀티종목 시세 조회 실패, {_MULTI_PRICE_RETRY_AFTER:.0f}초간 개별 조회로 폴백: {error}")
+
+
+def _store_multi_quotes(quotes: dict[str, dict]) -> dict[str, float]:
+    """멀티종목 시세 결과를 현재가 캐시에 넣고 {symbol: price}를 반환."""
+    expires_at = _quote_expiry(None)
+    for symbol, quote in quotes.items():
+        _market_cache.put(_quote_key(symbol), quote, expires_at)
+    return {symbol: float(quote["stck_prpr"]) for symbol, quote in quotes.items()}
+
+
+def _multi_price_request(symbols: list[str]) -> tuple[str, dict, dict]:
+    path = "/uapi/domestic-stock/v1/quotations/intstock-multprice"
+    url = f"{kis_auth.base_url}{path}"
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {kis_auth.access_token}",
+        "appKey": kis_auth._app_key,
+        "appSecret": kis_auth._app_secret,
+        "tr_id": "FHKST11300006",
+        "custtype": "P",
+    }
+    params = {}
+    for i, symbol in enumerate(symbols, start=1):
+        params[f"FID_COND_MRKT_DIV_CODE_{i}"] = "J"
+        params[f"FID_INPUT_ISCD_{i}"] = symbol
+    return url, headers, params
+
+
+def _parse_multi_price_response(response) -> dict[str, dict]:
+    """멀티종목 응답을 {symbol: inquire-price 형식 quote}로 변환 (현재가 캐시와 같은 키 사용)."""
+    if response.status_code != 200:
+        raise APIRequestError(f"멀티종목 시세 조회 실패: {response.text}")
+    data = response.json()
+    if data.get("rt_cd", "0") != "0":
+        raise APIRequestError(f"멀티종목 시세 조회 실패: {data.get('msg1', '')}")
+    quotes: dict[str, dict] = {}
+    for row in data.get("output") or []:
+        symbol = (row.get("inter_shrn_iscd") or "").strip()
+        try:
+            if not symbol or float(row.get("inter2_prpr") or 0) <= 0:
+                continue
+        except (TypeError, ValueError):
+            continue
+        quotes[symbol] = {
+            "stck_prpr": row["inter2_prpr"],
+            "stck_oprc": row.get("inter2_oprc"),
+            "stck_hgpr": row.get("inter2_hgpr"),
+            "stck_lwpr": row.get("inter2_lwpr"),
+            "acml_vol": row.get("acml_vol"),
+        }
+    return quotes
+
+
+# 재시도 없음: 실패 시 호출부가 개별 조회로 폴백
+@rate_limited
+def _fetch_multi_quotes(symbols: list[str]) -> dict[str, dict]:
+    """멀티종목 시세 API(intstock-multprice)를 호출합니다 (최대 30종목)."""
+    url, headers, params = _multi_price_request(symbols)
+    return _parse_multi_price_response(kis_get(url, headers=headers, params=params))
+
+
+@rate_limited
+async def _fetch_multi_quotes_async(symbols: list[str]) -> dict[str, dict]:
+    """_fetch_multi_quotes의 async 버전."""
+    url, headers, params = _multi_price_request(symbols)
+    return _parse_multi_price_response(await kis_get_async(url, headers=headers, params=params))
+
+
+def _quote_request(symbol: str) -> tuple[str, dict, dict]:
     path = "/uapi/domestic-stock/v1/quotations/inquire-price"
     url = f"{kis_auth.base_url}{path}"
     headers = {
@@ -22,14 +696,25 @@ def get_current_price(symbol: str) -> float:
         "fid_cond_mrkt_div_code": "J",
         "fid_input_iscd": symbol,
     }
+    return url, headers, params
+
+
+def _parse_quote_response(response) -> dict:
+    if response.status_code == 200:
+        data = response.json()["output"]
+        float(data["stck_prpr"])  # 응답 형식 검증 (누락 시 재시도 대상)
+        return data
+    raise APIRequestError(f"현재가 조회 실패: {response.text}")
 
+
+@kis_retry
+@rate_limited
+def _fetch_quote(symbol: str) -> dict:
+    """주식 현재가 API(inquire-price)를 호출합니다."""
+    url, headers, params = _quote_request(symbol)
     try:
         response = kis_get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json()["output"]
-            return float(data["stck_prpr"])
-        else:
-            raise APIRequestError(f"현재가 조회 실패: {response.text}")
+        return _parse_quote_response(response)
     except APIRequestError:
         raise
     except Exception as e:
@@ -40,8 +725,20 @@ def get_current_price(symbol: str) -> float:
 
 @kis_retry
 @rate_limited
-def get_daily_ohlcv(symbol: str, days: int = 30):
-    """일봉 데이터를 조회합니다 (OHLCV)."""
+async def _fetch_quote_async(symbol: str) -> dict:
+    """주식 현재가 API(inquire-price)를 async 클라이언트로 호출합니다."""
+    url, headers, params = _quote_request(symbol)
+    try:
+        response = await kis_get_async(url, headers=headers, params=params)
+        return _parse_quote_response(response)
+    except APIRequestError:
+        raise
+    except Exception as e:
+        logger.debug(f"현재가 조회 중 에러(async): {e}")
+        raise APIRequestError(str(e))
+
+
+def _daily_request(symbol: str) -> tuple[str, dict, dict]:
     path = "/uapi/domestic-stock/v1/quotations/inquire-daily-price"
     url = f"{kis_auth.base_url}{path}"
     headers = {
@@ -57,18 +754,28 @@ def get_daily_ohlcv(symbol: str, days: int = 30):
         "fid_org_adj_prc": "1",  # 수정주가
         "fid_period_div_code": "D"  # 일봉
     }
+    return url, headers, params
+
 
+def _parse_daily_response(response) -> list:
+    if response.status_code == 200:
+        data = response.json()
+        # KIS API: 일봉 데이터는 output에 배열로 반환 (output2 아님)
+        out = data.get("output2") or data.get("output")
+        if out is None:
+            raise APIRequestError("일봉 데이터 응답에 output/output2 없음")
+        return out if isinstance(out, list) else [out]
+    raise APIRequestError(f"일봉 데이터 조회 실패: {response.text}")
+
+
+@kis_retry
+@rate_limited
+def _fetch_daily_ohlcv(symbol: str):
+    """일봉 API(inquire-daily-price)를 호출합니다."""
+    url, headers, params = _daily_request(symbol)
     try:
         response = kis_get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            # KIS API: 일봉 데이터는 output에 배열로 반환 (output2 아님)
-            out = data.get("output2") or data.get("output")
-            if out is None:
-                raise APIRequestError("일봉 데이터 응답에 output/output2 없음")
-            return out if isinstance(out, list) else [out]
-        else:
-            raise APIRequestError(f"일봉 데이터 조회 실패: {response.text}")
+        return _parse_daily_response(response)
     except APIRequestError:
         raise
     except Exception as e:
@@ -76,6 +783,158 @@ def get_daily_ohlcv(symbol: str, days: int = 30):
         raise APIRequestError(str(e))
 
 
+@kis_retry
+@rate_limited
+async def _fetch_daily_ohlcv_async(symbol: str):
+    """일봉 API(inquire-daily-price)를 async 클라이언트로 호출합니다."""
+    url, headers, params = _daily_request(symbol)
+    try:
+        response = await kis_get_async(url, headers=headers, params=params)
+        return _parse_daily_response(response)
+    except APIRequestError:
+        raise
+    except Exception as e:
+        logger.debug(f"일봉 데이터 조회 중 에러(async): {e}")
+        raise APIRequestError(str(e))
+
+
+# --- 과거 일봉 (국내주식기간별시세 FHKST03010100: 지정 기간 중 최신 최대 100봉, 최신순) ---
+_HISTORY_PAGE_ROWS = 100
+
+
+def _history_request(symbol: str, start: str, end: str) -> tuple[str, dict, dict]:
+    path = "/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+    url = f"{kis_auth.base_url}{path}"
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {kis_auth.access_token}",
+        "appKey": kis_auth._app_key,
+        "appSecret": kis_auth._app_secret,
+        "tr_id": "FHKST03010100",
+        "custtype": "P",
+    }
+    params = {
+        "FID_COND_MRKT_DIV_CODE": "J",
+        "FID_INPUT_ISCD": symbol,
+        "FID_INPUT_DATE_1": start,
+        "FID_INPUT_DATE_2": end,
+        "FID_PERIOD_DIV_CODE": "D",
+        "FID_ORG_ADJ_PRC": "0",  # 0: 수정주가 (inquire-daily-price와 코드 의미가 반대)
+    }
+    return url, headers, params
+
+
+def _parse_history_response(response) -> list[dict]:
+    """기간별 시세 응답 → 일봉 행 리스트 (inquire-daily-price와 같은 키, 빈 행 제외)."""
+    if response.status_code != 200:
+        raise APIRequestError(f"과거 일봉 조회 실패: {response.text}")
+    data = response.json()
+    if data.get("rt_cd") not in (None, "0"):
+        raise APIRequestError(f"과거 일봉 조회 실패: {data.get('msg1')}")
+    return [row for row in data.get("output2") or [] if row.get("stck_bsop_date")]
+
+
+@kis_retry
+@rate_limited
+def _fetch_daily_history(symbol: str, start: str, end: str) -> list[dict]:
+    """기간별 시세 API 1회 호출: start~end(YYYYMMDD) 중 최신 최대 100봉."""
+    url, headers, params = _history_request(symbol, start, end)
+    try:
+        return _parse_history_response(kis_get(url, headers=headers, params=params))
+    except APIRequestError:
+        raise
+    except Exception as e:
+        logger.debug(f"과거 일봉 조회 중 에러: {e}")
+        raise APIRequestError(str(e))
+
+
+# --- 분봉 (주식일별분봉조회 FHKST03010230: 지정 일자·시각 이전 최대 120분, 최신순) ---
+_MINUTE_SESSION_START = "090000"
+_MINUTE_SESSION_END = "153000"
+
+
+def _minute_request(symbol: str, day: str, before: str) -> tuple[str, dict, dict]:
+    path = "/uapi/domestic-stock/v1/quotations/inquire-time-dailychartprice"
+    url = f"{kis_auth.base_url}{path}"
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {kis_auth.access_token}",
+        "appKey": kis_auth._app_key,
+        "appSecret": kis_auth._app_secret,
+        "tr_id": "FHKST03010230",
+        "custtype": "P",
+    }
+    params = {
+        "FID_COND_MRKT_DIV_CODE": "J",
+        "FID_INPUT_ISCD": symbol,
+        "FID_INPUT_DATE_1": day,
+        "FID_INPUT_HOUR_1": before,
+        "FID_PW_DATA_INCU_YN": "N",  # 지정 일자만
+        "FID_FAKE_TICK_INCU_YN": "",
+    }
+    return url, headers, params
+
+
+def _parse_minute_response(response, day: str) -> list[dict]:
+    """분봉 응답 → [{"hhmm", "open", "high", "low", "close", "volume"}] (최신순, day 외 행 제외)."""
+    if response.status_code != 200:
+        raise APIRequestError(f"분봉 조회 실패: {response.text}")
+    data = response.json()
+    if data.get("rt_cd") not in (None, "0"):
+        raise APIRequestError(f"분봉 조회 실패: {data.get('msg1')}")
+    bars = []
+    for row in data.get("output2") or []:
+        if str(row.get("stck_bsop_date")) != day or not row.get("stck_cntg_hour"):
+            continue
+        bars.append({
+            "hhmm": int(str(row["stck_cntg_hour"])[:4]),
+            "open": int(float(row["stck_oprc"])),
+            "high": int(float(row["stck_hgpr"])),
+            "low": int(float(row["stck_lwpr"])),
+            "close": int(float(row["stck_prpr"])),
+            "volume": int(float(row.get("cntg_vol") or 0)),
+        })
+    return bars
+
+
+@kis_retry
+@rate_limited
+def _fetch_minute_page(symbol: str, day: str, before: str) -> list[dict]:
+    """분봉 API 1회 호출: day의 before(HHMMSS) 이하 최대 120분."""
+    url, headers, params = _minute_request(symbol, day, before)
+    try:
+        return _parse_minute_response(kis_get(url, headers=headers, params=params), day)
+    except APIRequestError:
+        raise
+    except Exception as e:
+        logger.debug(f"분봉 조회 중 에러: {e}")
+        raise APIRequestError(str(e))
+
+
+def get_minute_bars(symbol: str, day: str) -> tuple[list[dict], int]:
+    """
+    하루치 분봉(시각 오름차순)과 호출 횟수. 15:30부터 120분씩 거슬러 올라가며 09:00까지 페이지 조회.
+    (일별분봉 TR은 실전 계정에서 과거 약 1년까지 제공)
+    """
+    bars: dict[int, dict] = {}
+    before, calls = _MINUTE_SESSION_END, 0
+    while True:
+        page = _fetch_minute_page(symbol, day, before)
+        calls += 1
+        new = [b for b in page if b["hhmm"] not in bars]
+        for b in new:
+            bars[b["hhmm"]] = b
+        if not new:
+            break
+        earliest = min(b["hhmm"] for b in new)
+        if f"{earliest:04d}00" <= _MINUTE_SESSION_START:
+            break
+        h, m = divmod(earliest, 100)
+        h, m = (h, m - 1) if m else (h - 1, 59)
+        before = f"{h:02d}{m:02d}00"
+    return [bars[k] for k in sorted(bars)], calls
+
+
 @kis_retry
 @rate_limited
 def get_index_price(index_code: str = "1001") -> float:
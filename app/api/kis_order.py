@@ -1,4 +1,7 @@
+import asyncio
+import threading
 import time
+from datetime import datetime, timedelta, timezone
 
 from app.api.kis_auth import kis_auth
 from app.api.kis_http import kis_get, kis_post
@@ -7,6 +10,8 @@ from app.core.config import settings
 from app.core.logger import logger
 from app.core.exceptions import OrderError, APIRequestError
 
+KST = timezone(timedelta(hours=9))
+
 
 def _balance_tr_id() -> str:
     """잔고조회 tr_id: 모의투자 VTTC8434R, 실전 TTTC8434R"""
@@ -35,7 +40,7 @@ def _get_account_parts():
 
 
 @kis_retry
-@rate_limited
+@rate_limited("trading")
 def place_order(symbol: str, quantity: int, price: int, order_type: str):
     """시장가/지정가 주문을 실행합니다."""
     path = "/uapi/domestic-stock/v1/trading/order-cash"
@@ -70,6 +75,7 @@ def place_order(symbol: str, quantity: int, price: int, order_type: str):
         res = response.json()
         if res["rt_cd"] == "0":
             logger.debug(f'주문 성공: {res["msg1"]}')
+            invalidate_account_snapshot()
             return res
         else:
             msg1 = res.get("msg1", "주문 실패")
@@ -78,49 +84,16 @@ def place_order(symbol: str, quantity: int, price: int, order_type: str):
                     "파생ETF는 계좌에서 '선택확인서' 신청 후 거래 가능합니다. "
                     "해당 종목을 .env의 BLACKLIST_SYMBOLS에 추가하면 자동매매 대상에서 제외됩니다."
                 )
+            price_str = f"{price:,}원" if price and price > 0 else "시장가"
+            side = "매수" if order_type == "BUY" else "매도"
             try:
-                path_balance = "/uapi/domestic-stock/v1/trading/inquire-balance"
-                url_balance = f"{kis_auth.base_url}{path_balance}"
-                cano, acnt_prdt_cd = _get_account_parts()
-                headers_balance = {
-                    "Content-Type": "application/json",
-                    "authorization": f"Bearer {kis_auth.access_token}",
-                    "appKey": kis_auth._app_key,
-                    "appSecret": kis_auth._app_secret,
-                    "tr_id": _balance_tr_id(),
-                }
-                base_params = {
-                    "CANO": cano,
-                    "ACNT_PRDT_CD": acnt_prdt_cd,
-                    "AFHR_FLPR_YN": "N",
-                    "OFL_YN": "",
-                    "UNPR_DVSN": "01",
-                    "FUND_STTL_ICLD_YN": "N",
-                    "FNCG_AMT_AUTO_RDPT_YN": "N",
-                    "PRCS_DVSN": "01",
-                    "CTX_AREA_FK100": "",
-                    "CTX_AREA_NK100": "",
-                }
-                bal = None
-                for inqr_dvsn in ("02", "01"):  # 02=요약(계좌 전체), 01=주식별; 요약이 더 정확할 수 있음
-                    params_balance = {**base_params, "INQR_DVSN": inqr_dvsn}
-                    resp = kis_get(url_balance, headers=headers_balance, params=params_balance)
-                    bal = resp.json()
-                    if bal.get("rt_cd") == "0":
-                        break
-                price_str = f"{price:,}원" if price and price > 0 else "시장가"
-                side = "매수" if order_type == "BUY" else "매도"
-                if bal and bal.get("rt_cd") == "0":
-                    summary = _parse_balance_summary(bal)
-                    logger.warning(
-                        f"주문 실패: {msg1}. 주문 시도: {symbol} {quantity}주 @ {price_str} ({side}). "
-                        f"예수금: {summary['deposit']:,}원, 주문가능금액({summary['orderable_source']}): {summary['orderable']:,}원"
-                    )
-                else:
-                    logger.warning(f"주문 실패: {msg1}. 주문 시도: {symbol} {quantity}주 @ {price_str} ({side}). (잔고 조회 실패)")
+                snapshot = get_account_snapshot()
+                logger.warning(
+                    f"주문 실패: {msg1}. 주문 시도: {symbol} {quantity}주 @ {price_str} ({side}). "
+                    f"예수금: {snapshot.summary['deposit']:,}원, "
+                    f"주문가능금액({snapshot.summary['orderable_source']}): {snapshot.summary['orderable']:,}원"
+                )
             except Exception as e2:
-                price_str = f"{price:,}원" if price and price > 0 else "시장가"
-                side = "매수" if order_type == "BUY" else "매도"
                 logger.warning(f"주문 실패: {msg1}. 주문 시도: {symbol} {quantity}주 @ {price_str} ({side}). 잔고 조회 중 오류: {e2}")
             raise OrderError(f'주문 실패: {msg1}')
     except (OrderError, APIRequestError):
@@ -130,59 +103,65 @@ def place_order(symbol: str, quantity: int, price: int, order_type: str):
         raise APIRequestError(str(e))
 
 
-def get_holding_quantity(symbol: str) -> int:
+@kis_retry
+@rate_limited("trading")
+def revise_cancel_order(odno: str, org_no: str, quantity: int = 0, price: int = 0, cancel: bool = False) -> dict:
     """
-    KIS 잔고에서 특정 종목의 실제 보유수량을 조회한다. 미보유면 0.
-    매수 직후 동기화 확인, 매도 직전 수량 가드용 헬퍼.
+    주식주문(정정취소) order-rvsecncl. quantity=0이면 잔량 전부 정정/취소.
+    정정은 새 주문번호(output.ODNO)로 재접수되므로 호출 측에서 추적 키를 바꿔야 합니다.
     """
+    path = "/uapi/domestic-stock/v1/trading/order-rvsecncl"
+    url = f"{kis_auth.base_url}{path}"
+    tr_id = "VTTC0803U" if settings.MOCK_TRADE else "TTTC0803U"
+    cano, acnt_prdt_cd = _get_account_parts()
+
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {kis_auth.access_token}",
+        "appKey": kis_auth._app_key,
+        "appSecret": kis_auth._app_secret,
+        "tr_id": tr_id,
+        "custtype": "P",
+    }
+    body = {
+        "CANO": cano,
+        "ACNT_PRDT_CD": acnt_prdt_cd,
+        "KRX_FWDG_ORD_ORGNO": org_no,
+        "ORGN_ODNO": odno,
+        "ORD_DVSN": "00" if price > 0 else "01",
+        "RVSE_CNCL_DVSN_CD": "02" if cancel else "01",  # 01 정정, 02 취소
+        "ORD_QTY": str(quantity),
+        "ORD_UNPR": str(price),
+        "QTY_ALL_ORD_YN": "N" if quantity > 0 else "Y",
+    }
+
+    action = "취소" if cancel else "정정"
     try:
-        holdings = get_balance()
+        response = kis_post(url, headers=headers, json=body)
+        res = response.json()
     except Exception as e:
-        logger.warning(f"[{symbol}] 보유수량 조회 실패 (0 반환): {e}")
-        return 0
-    if not holdings:
-        return 0
-    for item in holdings:
-        if item.get("pdno") == symbol:
-            try:
-                return int(item.get("hldg_qty", 0) or 0)
-            except (TypeError, ValueError):
-                return 0
-    return 0
+        logger.error(f"주문 {action} 중 에러 발생: {e}")
+        raise APIRequestError(str(e))
+    if res.get("rt_cd") != "0":
+        raise OrderError(f'주문 {action} 실패 ({odno}): {res.get("msg1", "")}')
+    logger.debug(f'주문 {action} 성공 ({odno}): {res.get("msg1", "")}')
+    invalidate_account_snapshot()
+    return res
 
 
-def wait_for_holding_at_least(
-    symbol: str,
-    min_qty: int,
-    timeout: float = 15.0,
-    interval: float = 1.5,
-) -> int:
+def get_holding_quantity(symbol: str, max_age: float | None = None) -> int:
     """
-    KIS 잔고에 symbol의 보유수량이 min_qty 이상이 될 때까지 폴링한다.
-    매수 체결 직후 KIS 잔고 반영 지연으로 인한 후속 매도 실패를 방지하기 위함.
-    timeout 안에 도달하지 못하면 마지막 조회 수량을 그대로 반환 (오류 발생시키지 않음).
+    KIS 잔고에서 특정 종목의 실제 보유수량을 조회한다. 미보유면 0.
+    매수 직후 동기화 확인, 매도 직전 수량 가드용 헬퍼. (계좌 스냅샷 공유)
     """
-    if min_qty <= 0:
-        return get_holding_quantity(symbol)
-    deadline = time.time() + max(timeout, 0)
-    last_qty = 0
-    while True:
-        last_qty = get_holding_quantity(symbol)
-        if last_qty >= min_qty:
-            return last_qty
-        if time.time() >= deadline:
-            logger.warning(
-                f"[{symbol}] 보유수량 동기화 timeout: KIS={last_qty} < 기대={min_qty} "
-                f"({timeout:.0f}초 대기). 후속 매도는 실제 보유수량으로 클램프됨."
-            )
-            return last_qty
-        time.sleep(interval)
+    try:
+        return get_account_snapshot(max_age).quantity(symbol)
+    except Exception as e:
+        logger.warning(f"[{symbol}] 보유수량 조회 실패 (0 반환): {e}")
+        return 0
 
 
-@kis_retry
-@rate_limited
-def get_balance():
-    """주식 잔고를 조회합니다."""
+def _balance_request(inqr_dvsn: str = "01", ctx_fk: str = "", ctx_nk: str = "") -> tuple[str, dict, dict]:
     path = "/uapi/domestic-stock/v1/trading/inquire-balance"
     url = f"{kis_auth.base_url}{path}"
     cano, acnt_prdt_cd = _get_account_parts()
@@ -194,33 +173,167 @@ def get_balance():
         "appSecret": kis_auth._app_secret,
         "tr_id": _balance_tr_id(),
     }
+    if ctx_fk or ctx_nk:
+        headers["tr_cont"] = "N"  # 연속조회
     params = {
         "CANO": cano,
         "ACNT_PRDT_CD": acnt_prdt_cd,
         "AFHR_FLPR_YN": "N",
         "OFL_YN": "",
-        "INQR_DVSN": "01",
+        "INQR_DVSN": inqr_dvsn,
         "UNPR_DVSN": "01",
         "FUND_STTL_ICLD_YN": "N",
         "FNCG_AMT_AUTO_RDPT_YN": "N",
         "PRCS_DVSN": "01",
-        "CTX_AREA_FK100": "",
-        "CTX_AREA_NK100": ""
+        "CTX_AREA_FK100": ctx_fk,
+        "CTX_AREA_NK100": ctx_nk
     }
+    return url, headers, params
+
+
+class AccountSnapshot:
+    """
+    잔고조회(inquire-balance) 1회 결과: 종목별 보유(output1, 연속조회 포함) + 예수금/주문가능금액 요약(output2).
+    보유수량·평균단가·예수금·주문가능금액 조회가 모두 이 스냅샷을 공유한다.
+    """
+
+    __slots__ = ("holdings", "positions", "summary", "fetched_at")
+
+    def __init__(self, holdings: list, balance_response: dict):
+        self.holdings = holdings
+        self.positions = {item["pdno"]: item for item in holdings if item.get("pdno")}
+        self.summary = _parse_balance_summary(balance_response)
+        self.summary["cash"] = _parse_cash_from_balance_response(balance_response)
+        self.fetched_at = time.time()
+
+    def position(self, symbol: str) -> dict | None:
+        return self.positions.get(symbol)
+
+    def quantity(self, symbol: str) -> int:
+        item = self.positions.get(symbol)
+        if not item:
+            return 0
+        try:
+            return int(item.get("hldg_qty", 0) or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    @property
+    def cash(self) -> int:
+        return self.summary["cash"]
 
+    @property
+    def orderable(self) -> int:
+        return self.summary["orderable"]
+
+
+_BALANCE_MAX_PAGES = 10
+
+
+@kis_retry
+@rate_limited("trading")
+def _fetch_balance_page(inqr_dvsn: str = "01", ctx_fk: str = "", ctx_nk: str = "") -> tuple[dict, str]:
+    """잔고조회 1페이지. (응답 본문, 응답 헤더 tr_cont) 반환."""
+    url, headers, params = _balance_request(inqr_dvsn, ctx_fk, ctx_nk)
     try:
         response = kis_get(url, headers=headers, params=params)
         res = response.json()
-        if res["rt_cd"] == "0":
-            return res["output1"]
-        else:
-            raise APIRequestError(f'잔고 조회 실패: {res["msg1"]}')
-    except APIRequestError:
-        raise
     except Exception as e:
         # retry 데코레이터가 WARNING으로 재시도 사실을 출력하므로 여기서는 DEBUG로만 남긴다
         logger.debug(f"잔고 조회 중 에러: {e}")
         raise APIRequestError(str(e))
+    if res.get("rt_cd") != "0":
+        raise APIRequestError(f'잔고 조회 실패: {res.get("msg1", "")}')
+    return res, response.headers.get("tr_cont", "")
+
+
+def _fetch_account_snapshot() -> AccountSnapshot:
+    """잔고를 연속조회(CTX_AREA_FK100/NK100)까지 모두 받아 스냅샷을 만든다."""
+    holdings: list = []
+    res, tr_cont = _fetch_balance_page()
+    holdings.extend(res.get("output1") or [])
+    summary_res = res
+    for _ in range(_BALANCE_MAX_PAGES - 1):
+        if tr_cont not in ("F", "M"):
+            break
+        res, tr_cont = _fetch_balance_page(
+            ctx_fk=(res.get("ctx_area_fk100") or "").strip(),
+            ctx_nk=(res.get("ctx_area_nk100") or "").strip(),
+        )
+        holdings.extend(res.get("output1") or [])
+        if res.get("output2"):
+            summary_res = res
+    return AccountSnapshot(holdings, summary_res)
+
+
+class _AccountSnapshotCache:
+    """스냅샷 TTL 캐시. 동시 호출자는 진행 중인 1회 조회를 공유하고, 주문 시 무효화된다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._snapshot: AccountSnapshot | None = None
+        self._generation = 0
+
+    def _fresh(self, max_age: float) -> AccountSnapshot | None:
+        snapshot = self._snapshot
+        if snapshot is not None and time.time() - snapshot.fetched_at <= max_age:
+            return snapshot
+        return None
+
+    def get(self, max_age: float) -> AccountSnapshot:
+        snapshot = self._fresh(max_age)
+        if snapshot is not None:
+            return snapshot
+        with self._fetch_lock:
+            # 대기하는 동안 다른 스레드가 새로 받아왔으면 그대로 사용
+            snapshot = self._fresh(max_age)
+            if snapshot is not None:
+                return snapshot
+            with self._lock:
+                generation = self._generation
+            snapshot = _fetch_account_snapshot()
+            with self._lock:
+                # 조회 중에 주문이 나갔으면 캐시에 넣지 않음 (이번 호출자에게만 반환)
+                if generation == self._generation:
+                    self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+
+_account_cache = _AccountSnapshotCache()
+
+
+def get_account_snapshot(max_age: float | None = None) -> AccountSnapshot:
+    """계좌 스냅샷을 반환합니다. max_age(초, 기본 ACCOUNT_SNAPSHOT_TTL)보다 오래됐으면 재조회."""
+    if max_age is None:
+        max_age = settings.ACCOUNT_SNAPSHOT_TTL
+    return _account_cache.get(max(0.0, max_age))
+
+
+async def get_account_snapshot_async(max_age: float | None = None) -> AccountSnapshot:
+    """get_account_snapshot의 async 버전. 같은 스냅샷 캐시를 스레드풀에서 조회 (동기 호출자와 1회 조회 공유)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_account_snapshot, max_age)
+
+
+def invalidate_account_snapshot() -> None:
+    """주문 접수 등으로 잔고가 바뀌었을 때 스냅샷을 버립니다."""
+    _account_cache.invalidate()
+
+
+def get_balance(max_age: float | None = None):
+    """주식 잔고(output1 종목 목록)를 조회합니다. (계좌 스냅샷 공유)"""
+    return get_account_snapshot(max_age).holdings
+
+
+async def get_balance_async(max_age: float | None = None):
+    """get_balance의 async 버전 (계좌 스냅샷 공유)."""
+    return (await get_account_snapshot_async(max_age)).holdings
 
 
 def _parse_cash_from_balance_response(res: dict) -> int:
@@ -274,55 +387,14 @@ def _parse_balance_summary(res: dict) -> dict:
     return {"deposit": deposit, "orderable": orderable, "orderable_source": source}
 
 
-@kis_retry
-@rate_limited
 def get_cash_balance():
-    """계좌의 현금 예수금을 조회합니다. 요약(02)이 비면 주식별(01)로 재조회."""
-    path = "/uapi/domestic-stock/v1/trading/inquire-balance"
-    url = f"{kis_auth.base_url}{path}"
-    cano, acnt_prdt_cd = _get_account_parts()
-    headers = {
-        "Content-Type": "application/json",
-        "authorization": f"Bearer {kis_auth.access_token}",
-        "appKey": kis_auth._app_key,
-        "appSecret": kis_auth._app_secret,
-        "tr_id": _balance_tr_id(),
-    }
-    base_params = {
-        "CANO": cano,
-        "ACNT_PRDT_CD": acnt_prdt_cd,
-        "AFHR_FLPR_YN": "N",
-        "OFL_YN": "",
-        "UNPR_DVSN": "01",
-        "FUND_STTL_ICLD_YN": "N",
-        "FNCG_AMT_AUTO_RDPT_YN": "N",
-        "PRCS_DVSN": "01",
-        "CTX_AREA_FK100": "",
-        "CTX_AREA_NK100": "",
-    }
-
-    # 모의투자에서는 INQR_DVSN "02"(요약)가 INVALID_CHECK_INQR_DVSN 오류를 일으킬 수 있어 "01"(주식별) 먼저 시도
-    try:
-        params_01 = {**base_params, "INQR_DVSN": "01"}
-        response = kis_get(url, headers=headers, params=params_01)
-        res = response.json()
-        if res.get("rt_cd") != "0":
-            raise APIRequestError(res.get("msg1", "예수금 조회 실패"))
-        cash = _parse_cash_from_balance_response(res)
-        if cash > 0:
-            return cash
-        params_02 = {**base_params, "INQR_DVSN": "02"}
-        response = kis_get(url, headers=headers, params=params_02)
-        res = response.json()
-        if res.get("rt_cd") != "0":
-            raise APIRequestError(res.get("msg1", "예수금 조회 실패"))
-        cash = _parse_cash_from_balance_response(res)
+    """계좌의 현금 예수금을 조회합니다 (계좌 스냅샷). 주식별(01) 응답에 예수금이 없으면 요약(02)으로 재조회."""
+    cash = get_account_snapshot().cash
+    if cash > 0:
         return cash
-    except APIRequestError:
-        raise
-    except Exception as e:
-        logger.debug(f"예수금 조회 중 에러: {e}")
-        raise APIRequestError(str(e))
+    # 모의투자에서는 INQR_DVSN "02"(요약)가 INVALID_CHECK_INQR_DVSN 오류를 일으킬 수 있어 "01"(주식별)을 기본으로 사용
+    res, _ = _fetch_balance_page(inqr_dvsn="02")
+    return _parse_cash_from_balance_response(res)
 
 
 def _psbl_order_tr_id() -> str:
@@ -331,7 +403,7 @@ def _psbl_order_tr_id() -> str:
 
 
 @kis_retry
-@rate_limited
+@rate_limited("trading")
 def get_orderable_cash_balance() -> int:
     """
     매수가능금액 전용 API(inquire-psbl-order)로 주문가능현금을 조회합니다.
@@ -393,8 +465,25 @@ def _get_orderable_from_psbl_order_api() -> int:
 
 
 def _get_orderable_from_balance_api() -> int:
-    """기존 잔고조회 API(inquire-balance)에서 주문가능금액을 추출한다 (폴백용)."""
-    path = "/uapi/domestic-stock/v1/trading/inquire-balance"
+    """잔고조회 스냅샷에서 주문가능금액을 추출한다 (폴백용). 없으면 예수금."""
+    snapshot = get_account_snapshot()
+    if snapshot.orderable > 0:
+        return snapshot.orderable
+    return snapshot.cash
+
+
+def _daily_ccld_tr_id() -> str:
+    """주식일별주문체결조회 tr_id: 모의투자 VTTC8001R, 실전 TTTC8001R (3개월 이내)"""
+    return "VTTC8001R" if settings.MOCK_TRADE else "TTTC8001R"
+
+
+_DAILY_CCLD_MAX_PAGES = 5
+
+
+@kis_retry
+@rate_limited("trading")
+def _fetch_daily_fills_page(ctx_fk: str = "", ctx_nk: str = "") -> tuple[dict, str]:
+    path = "/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
     url = f"{kis_auth.base_url}{path}"
     cano, acnt_prdt_cd = _get_account_parts()
     headers = {
@@ -402,37 +491,48 @@ def _get_orderable_from_balance_api() -> int:
         "authorization": f"Bearer {kis_auth.access_token}",
         "appKey": kis_auth._app_key,
         "appSecret": kis_auth._app_secret,
-        "tr_id": _balance_tr_id(),
+        "tr_id": _daily_ccld_tr_id(),
     }
-    base_params = {
+    if ctx_fk or ctx_nk:
+        headers["tr_cont"] = "N"  # 연속조회
+    today = datetime.now(KST).strftime("%Y%m%d")
+    params = {
         "CANO": cano,
         "ACNT_PRDT_CD": acnt_prdt_cd,
-        "AFHR_FLPR_YN": "N",
-        "OFL_YN": "",
-        "UNPR_DVSN": "01",
-        "FUND_STTL_ICLD_YN": "N",
-        "FNCG_AMT_AUTO_RDPT_YN": "N",
-        "PRCS_DVSN": "01",
-        "CTX_AREA_FK100": "",
-        "CTX_AREA_NK100": "",
+        "INQR_STRT_DT": today,
+        "INQR_END_DT": today,
+        "SLL_BUY_DVSN_CD": "00",  # 전체
+        "INQR_DVSN": "00",        # 역순
+        "PDNO": "",
+        "CCLD_DVSN": "00",        # 체결+미체결 전체
+        "ORD_GNO_BRNO": "",
+        "ODNO": "",
+        "INQR_DVSN_3": "00",
+        "INQR_DVSN_1": "",
+        "CTX_AREA_FK100": ctx_fk,
+        "CTX_AREA_NK100": ctx_nk,
     }
-
     try:
-        for inqr_dvsn in ("01", "02"):
-            params = {**base_params, "INQR_DVSN": inqr_dvsn}
-            response = kis_get(url, headers=headers, params=params)
-            res = response.json()
-            if res.get("rt_cd") != "0":
-                continue
-            orderable = _parse_orderable_from_balance_response(res)
-            if orderable > 0:
-                return orderable
-            cash = _parse_cash_from_balance_response(res)
-            if cash > 0:
-                return cash
-        return 0
-    except APIRequestError:
-        raise
+        response = kis_get(url, headers=headers, params=params)
+        res = response.json()
     except Exception as e:
-        logger.debug(f"주문가능현금 조회 중 에러: {e}")
+        logger.debug(f"일별 주문체결 조회 중 에러: {e}")
         raise APIRequestError(str(e))
+    if res.get("rt_cd") != "0":
+        raise APIRequestError(f'일별 주문체결 조회 실패: {res.get("msg1", "")}')
+    return res, response.headers.get("tr_cont", "")
+
+
+def get_daily_fills() -> list[dict]:
+    """당일 주문별 체결 현황(inquire-daily-ccld output1: odno, pdno, ord_qty, tot_ccld_qty, avg_prvs, rmn_qty, cncl_yn 등)."""
+    res, tr_cont = _fetch_daily_fills_page()
+    rows = list(res.get("output1") or [])
+    for _ in range(_DAILY_CCLD_MAX_PAGES - 1):
+        if tr_cont not in ("F", "M"):
+            break
+        res, tr_cont = _fetch_daily_fills_page(
+            ctx_fk=(res.get("ctx_area_fk100") or "").strip(),
+            ctx_nk=(res.get("ctx_area_nk100") or "").strip(),
+        )
+        rows.extend(res.get("output1") or [])
+    return rows
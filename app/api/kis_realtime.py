@@ -0,0 +1,311 @@
+"""
+한국투자증권 실시간 WebSocket 시세 (국내주식 실시간체결가 H0STCNT0).
+- target_symbols + 보유 종목을 구독하고, 종목별 최신 체결가/시가/고가/저가/누적거래량 테이블을 유지합니다.
+- 체결 이벤트는 현재가 캐시(kis_market)에 반영되어 REST 조회를 대체하고, 등록된 리스너를 호출합니다.
+- 연결이 끊기거나 틱이 오래 없으면 캐시가 만료되어 기존 REST 조회로 자동 폴백합니다.
+- enable_fill_notices()로 체결통보(H0STCNI0, 모의 H0STCNI9)도 같은 세션에서 구독합니다.
+  체결통보는 AES-256-CBC로 암호화되어 오며, 구독 응답의 key/iv로 복호화해 핸들러에 전달합니다 (pycryptodome 필요).
+- url / approval_key_provider 를 주입하면 로컬 가짜 WebSocket 서버로도 구동할 수 있습니다.
+"""
+import asyncio
+import base64
+import json
+import time
+
+from app.api import kis_market
+from app.core.config import settings
+from app.core.logger import logger
+
+TR_ID_TRADE = "H0STCNT0"
+TR_ID_NOTICE = "H0STCNI0"
+TR_ID_NOTICE_MOCK = "H0STCNI9"
+# H0STCNT0 응답 필드 인덱스 (^ 구분, 레코드당 46개 필드)
+_FIELD_COUNT = 46
+_IDX_SYMBOL = 0
+_IDX_TIME = 1
+_IDX_PRICE = 2
+_IDX_OPEN = 7
+_IDX_HIGH = 8
+_IDX_LOW = 9
+_IDX_TRADE_VOL = 12
+_IDX_ACML_VOL = 13
+
+# KIS는 세션당 실시간 등록 41건 제한
+MAX_SUBSCRIPTIONS = 41
+_RECONNECT_MAX_DELAY = 60.0
+
+
+def _default_url() -> str:
+    if settings.KIS_WS_URL:
+        return settings.KIS_WS_URL
+    return "ws://ops.koreainvestment.com:31000" if settings.MOCK_TRADE else "ws://ops.koreainvestment.com:21000"
+
+
+async def _default_approval_key() -> str:
+    from app.api.kis_auth import kis_auth
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, kis_auth.issue_approval_key)
+
+
+def _notice_tr_id() -> str:
+    return TR_ID_NOTICE_MOCK if settings.MOCK_TRADE else TR_ID_NOTICE
+
+
+def decrypt_notice(key: str, iv: str, payload: str) -> str:
+    """체결통보 본문(base64, AES-256-CBC)을 복호화한다. pycryptodome 미설치 시 ImportError."""
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import unpad
+
+    cipher = AES.new(key.encode("utf-8"), AES.MODE_CBC, iv.encode("utf-8"))
+    return unpad(cipher.decrypt(base64.b64decode(payload)), AES.block_size).decode("utf-8")
+
+
+def parse_trade_message(text: str) -> list[dict]:
+    """'0|H0STCNT0|002|f^f^...' 형식의 체결 메시지를 틱 dict 리스트로 변환한다."""
+    parts = text.split("|", 3)
+    if len(parts) < 4 or parts[1] != TR_ID_TRADE:
+        return []
+    try:
+        count = max(int(parts[2]), 1)
+    except ValueError:
+        count = 1
+    fields = parts[3].split("^")
+    width = len(fields) // count if len(fields) >= count * _FIELD_COUNT else _FIELD_COUNT
+    ticks = []
+    for i in range(count):
+        rec = fields[i * width:(i + 1) * width]
+        if len(rec) <= _IDX_ACML_VOL:
+            break
+        try:
+            ticks.append({
+                "symbol": rec[_IDX_SYMBOL],
+                "time": rec[_IDX_TIME],
+                "price": float(rec[_IDX_PRICE]),
+                "open": float(rec[_IDX_OPEN]),
+                "high": float(rec[_IDX_HIGH]),
+                "low": float(rec[_IDX_LOW]),
+                "trade_volume": int(rec[_IDX_TRADE_VOL]),
+                "volume": int(rec[_IDX_ACML_VOL]),
+            })
+        except (TypeError, ValueError):
+            continue
+    return ticks
+
+
+class RealtimePriceFeed:
+    """KIS 실시간 체결가 구독 + 종목별 최신 시세 테이블."""
+
+    def __init__(self, url: str | None = None, approval_key_provider=None):
+        self._url = url or _default_url()
+        self._approval_key_provider = approval_key_provider or _default_approval_key
+        self._ticks: dict[str, dict] = {}
+        self._listeners: list = []
+        self._desired: list[str] = []
+        self._subscribed: set[str] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._resync: asyncio.Event | None = None
+        self._stopped = False
+        self._tick_count = 0
+        self._notice_tr_id: str | None = None
+        self._notice_key: str = ""
+        self._notice_handler = None
+        self._notice_subscribed = False
+        self._notice_cipher: dict[str, tuple[str, str]] = {}
+        self._notice_count = 0
+        self._notice_warned = False
+        self.connected = False
+
+    # --- 외부 API (스레드 안전) ---
+    def add_listener(self, callback) -> None:
+        """callback(symbol, tick)을 이벤트 루프 스레드에서 호출합니다. 빠르게 반환해야 합니다."""
+        self._listeners.append(callback)
+
+    def enable_fill_notices(self, hts_id: str, handler) -> None:
+        """체결통보를 구독합니다. handler(fields)는 복호화된 ^ 구분 필드 리스트로 이벤트 루프 스레드에서 호출됩니다."""
+        if not hts_id:
+            return
+        self._notice_tr_id = _notice_tr_id()
+        self._notice_key = hts_id
+        self._notice_handler = handler
+        if self._loop is not None and self._resync is not None:
+            self._loop.call_soon_threadsafe(self._resync.set)
+
+    def set_symbols(self, symbols: list[str]) -> None:
+        """구독 종목을 갱신합니다 (앞쪽 우선, 최대 MAX_SUBSCRIPTIONS)."""
+        desired = list(dict.fromkeys(symbols))[:MAX_SUBSCRIPTIONS]
+        if desired == self._desired:
+            return
+        self._desired = desired
+        if self._loop is not None and self._resync is not None:
+            self._loop.call_soon_threadsafe(self._resync.set)
+
+    def get_tick(self, symbol: str, max_age: float | None = None) -> dict | None:
+        """최신 틱을 반환합니다. max_age(초)보다 오래됐으면 None."""
+        tick = self._ticks.get(symbol)
+        if tick is None:
+            return None
+        if max_age is not None and time.time() - tick["received_at"] > max_age:
+            return None
+        return tick
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "subscribed": sorted(self._subscribed),
+            "ticks": self._tick_count,
+            "fillNotices": self._notice_subscribed,
+            "notices": self._notice_count,
+        }
+
+    def stop(self) -> None:
+        self._stopped = True
+        if self._loop is not None and self._resync is not None:
+            self._loop.call_soon_threadsafe(self._resync.set)
+
+    # --- 실행 루프 ---
+    async def run(self) -> None:
+        """연결 → 구독 → 수신을 반복합니다. 끊기면 지수 백오프로 재접속."""
+        import websockets
+
+        self._loop = asyncio.get_running_loop()
+        self._resync = asyncio.Event()
+        delay = 1.0
+        while not self._stopped:
+            try:
+                approval_key = await self._approval_key_provider()
+                async with websockets.connect(self._url, ping_interval=None) as ws:
+                    self.connected = True
+                    self._subscribed = set()
+                    self._notice_subscribed = False
+                    delay = 1.0
+                    logger.info(f"실시간 시세 WebSocket 연결: {self._url}")
+                    await self._serve(ws, approval_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"실시간 시세 WebSocket 오류, {delay:.0f}초 후 재접속 (REST 폴백): {e}")
+            finally:
+                self.connected = False
+            if self._stopped:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _RECONNECT_MAX_DELAY)
+
+    async def _serve(self, ws, approval_key: str) -> None:
+        await self._sync_subscriptions(ws, approval_key)
+        recv_task = asyncio.ensure_future(ws.recv())
+        resync_task = asyncio.ensure_future(self._resync.wait())
+        try:
+            while not self._stopped:
+                done, _ = await asyncio.wait({recv_task, resync_task}, return_when=asyncio.FIRST_COMPLETED)
+                if resync_task in done:
+                    self._resync.clear()
+                    await self._sync_subscriptions(ws, approval_key)
+                    resync_task = asyncio.ensure_future(self._resync.wait())
+                if recv_task in done:
+                    message = recv_task.result()
+                    if isinstance(message, bytes):
+                        message = message.decode("utf-8", errors="replace")
+                    await self._handle_message(ws, message)
+                    recv_task = asyncio.ensure_future(ws.recv())
+        finally:
+            recv_task.cancel()
+            resync_task.cancel()
+
+    async def _sync_subscriptions(self, ws, approval_key: str) -> None:
+        desired = set(self._desired)
+        for symbol in sorted(self._subscribed - desired):
+            await ws.send(self._subscription_message(approval_key, TR_ID_TRADE, symbol, subscribe=False))
+            self._subscribed.discard(symbol)
+        for symbol in self._desired:
+            if symbol not in self._subscribed:
+                await ws.send(self._subscription_message(approval_key, TR_ID_TRADE, symbol, subscribe=True))
+                self._subscribed.add(symbol)
+        if self._notice_tr_id and not self._notice_subscribed:
+            await ws.send(self._subscription_message(approval_key, self._notice_tr_id, self._notice_key, subscribe=True))
+            self._notice_subscribed = True
+
+    @staticmethod
+    def _subscription_message(approval_key: str, tr_id: str, tr_key: str, subscribe: bool) -> str:
+        return json.dumps({
+            "header": {
+                "approval_key": approval_key,
+                "custtype": "P",
+                "tr_type": "1" if subscribe else "2",
+                "content-type": "utf-8",
+            },
+            "body": {"input": {"tr_id": tr_id, "tr_key": tr_key}},
+        })
+
+    async def _handle_message(self, ws, message: str) -> None:
+        if not message:
+            return
+        if message[0] == "1":
+            self._on_notice_message(message)
+            return
+        if message[0] == "0":
+            for tick in parse_trade_message(message):
+                self._on_tick(tick)
+            return
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            logger.debug(f"실시간 시세: 알 수 없는 메시지 {message[:100]}")
+            return
+        header = data.get("header", {})
+        if header.get("tr_id") == "PINGPONG":
+            await ws.send(message)
+            return
+        body = data.get("body", {})
+        if body.get("rt_cd") not in (None, "0"):
+            logger.warning(f"실시간 시세 구독 오류 [{header.get('tr_key', '')}]: {body.get('msg1', '')}")
+            return
+        output = body.get("output") or {}
+        if output.get("key") and output.get("iv"):
+            self._notice_cipher[header.get("tr_id", "")] = (output["key"], output["iv"])
+
+    def _on_notice_message(self, message: str) -> None:
+        """'1|H0STCNI0|001|<암호문>' 체결통보를 복호화해 핸들러로 전달."""
+        parts = message.split("|", 3)
+        if len(parts) < 4 or self._notice_handler is None:
+            return
+        cipher = self._notice_cipher.get(parts[1])
+        if cipher is None:
+            logger.debug(f"체결통보 복호화 키 없음 ({parts[1]}), 무시")
+            return
+        try:
+            text = decrypt_notice(cipher[0], cipher[1], parts[3])
+        except ImportError:
+            if not self._notice_warned:
+                self._notice_warned = True
+                logger.warning("pycryptodome 미설치 → 체결통보 복호화 불가, 체결조회 폴링으로 대체")
+            return
+        except Exception as e:
+            logger.warning(f"체결통보 복호화 실패: {e}")
+            return
+        self._notice_count += 1
+        try:
+            self._notice_handler(text.split("^"))
+        except Exception as e:
+            logger.error(f"체결통보 핸들러 에러: {e}")
+
+    def _on_tick(self, tick: dict) -> None:
+        symbol = tick["symbol"]
+        tick["received_at"] = time.time()
+        self._tick_count += 1
+        self._ticks[symbol] = tick
+        kis_market.put_stream_quote(symbol, {
+            "stck_prpr": str(int(tick["price"])),
+            "stck_oprc": str(int(tick["open"])),
+            "stck_hgpr": str(int(tick["high"])),
+            "stck_lwpr": str(int(tick["low"])),
+            "acml_vol": str(tick["volume"]),
+        })
+        for callback in self._listeners:
+            try:
+                callback(symbol, tick)
+            except Exception as e:
+                logger.error(f"[{symbol}] 실시간 시세 리스너 에러: {e}")
+
+
+realtime_feed = RealtimePriceFeed()
@@ -1,3 +1,4 @@
+import asyncio
 import time
 import threading
 from functools import wraps
@@ -10,6 +11,7 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from app.core.config import settings
 from app.core.exceptions import APIRequestError
 from app.core.logger import logger
 
@@ -40,20 +42,127 @@ kis_retry = retry(
     reraise=True,
 )
 
-# 레이트 리미터: 요청 간 최소 0.25초 간격
-_rate_lock = threading.Lock()
-_last_request_time = 0.0
+class TokenBucket:
+    """
+    토큰 버킷 레이트 리미터 (rate: 초당 보충 토큰, burst: 최대 보유 토큰).
+    락은 토큰 예약 계산에만 잡고, 대기(sleep)는 락 밖에서 하므로 한 호출자의 대기가
+    다른 버킷·다른 호출자를 막지 않는다. 토큰은 음수까지 선예약되어 대기 순서가 보장된다.
+    """
 
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = max(float(rate), 0.01)
+        self.capacity = max(float(burst), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._acquired = 0
+        self._delayed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """토큰 1개를 예약하고, 사용 전 대기해야 할 시간(초)을 반환한다."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self._acquired += 1
+            if wait > 0:
+                self._delayed += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            return wait
+
+    def acquire(self) -> None:
+        """동기 호출자용: 토큰을 얻을 때까지 대기."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """asyncio 호출자용: 이벤트 루프를 막지 않고 대기."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            tokens = self._tokens
+            return {
+                "rate": self.rate,
+                "burst": self.capacity,
+                "tokens": round(tokens, 3),
+                "nextWait": round((1.0 - tokens) / self.rate, 3) if tokens < 1 else 0.0,
+                "acquired": self._acquired,
+                "delayed": self._delayed,
+                "totalWait": round(self._total_wait, 3),
+                "avgWait": round(self._total_wait / self._acquired, 4) if self._acquired else 0.0,
+                "maxWait": round(self._max_wait, 3),
+            }
+
+
+# 모의투자 서버는 초당 허용 건수가 작아 기존 전역 게이트(0.25초 = 초당 4건)를 총량 상한으로 유지
+_MOCK_TOTAL_RATE = 4.0
+
+
+def _build_buckets() -> dict[str, TokenBucket]:
+    """tr_id 계열별 버킷: quotation(시세 FH*/HH*), trading(주문·잔고 TTTC*/VTTC*), auth(토큰 발급)."""
+    budgets = {
+        "quotation": (settings.KIS_QUOTATION_RATE_PER_SEC, settings.KIS_QUOTATION_BURST),
+        "trading": (settings.KIS_TRADING_RATE_PER_SEC, settings.KIS_TRADING_BURST),
+        "auth": (settings.KIS_AUTH_RATE_PER_SEC, settings.KIS_AUTH_BURST),
+    }
+    scale = 1.0
+    if settings.MOCK_TRADE:
+        total = sum(rate for rate, _ in budgets.values())
+        if total > _MOCK_TOTAL_RATE:
+            scale = _MOCK_TOTAL_RATE / total
+    return {
+        name: TokenBucket(name, rate * scale, burst if scale >= 1.0 else 1)
+        for name, (rate, burst) in budgets.items()
+    }
+
+
+_buckets: dict[str, TokenBucket] = _build_buckets()
+
+
+def get_bucket(name: str) -> TokenBucket:
+    """이름으로 레이트 리미터 버킷을 반환합니다 (quotation | trading | auth)."""
+    return _buckets[name]
+
+
+def get_rate_limiter_stats() -> dict:
+    """버킷별 잔여 토큰·대기 시간 지표를 반환합니다."""
+    return {name: bucket.stats() for name, bucket in _buckets.items()}
+
+
+def rate_limited(bucket="quotation"):
+    """
+    버킷별 토큰 버킷 레이트 리미터 데코레이터. 동기/async 함수 모두 지원.
+    사용: @rate_limited (quotation) 또는 @rate_limited("trading")
+    """
+    if callable(bucket):
+        return _limit(bucket, "quotation")
+    return lambda func: _limit(func, bucket)
+
+
+def _limit(func, bucket_name: str):
+    limiter = _buckets[bucket_name]
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            await limiter.acquire_async()
+            return await func(*args, **kwargs)
+        return async_wrapper
 
-def rate_limited(func):
-    """요청 간 0.25초 간격을 보장하는 레이트 리미터 데코레이터"""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        global _last_request_time
-        with _rate_lock:
-            elapsed = time.time() - _last_request_time
-            if elapsed < 0.25:
-                time.sleep(0.25 - elapsed)
-            _last_request_time = time.time()
+        limiter.acquire()
         return func(*args, **kwargs)
     return wrapper
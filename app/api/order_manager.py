@@ -0,0 +1,235 @@
+"""
+주문 관리: 접수 → 체결 추적 → 정정(재호가)/취소 → 종료까지 주문 1건의 수명을 관리.
+- 미완료 주문 장부는 메모리(FillTracker의 OrderTicket) + SQLite(open_orders)에 함께 유지, 재시작 시 resume()으로 복구.
+- 지정가 주문이 ORDER_REPRICE_AFTER초 넘게 미체결이면 reprice_fn이 주는 새 호가로 잔량 정정 (최대 ORDER_MAX_REPRICES회).
+- 제한 시간이 지나면 잔량을 취소하고 그때까지의 체결 수량으로 종료 → 미체결 잔량이 나중에 체결되는 유령 포지션 방지.
+"""
+import threading
+import time
+from datetime import datetime
+
+from app.api import kis_order
+from app.api.kis_fills import FillTracker, OrderTicket, fill_tracker
+from app.core.config import settings
+from app.core.exceptions import OrderError, APIRequestError
+from app.core.logger import logger
+from app.db import models, session
+
+# 취소가 거부되고 체결조회로도 종료가 확인되지 않는 주문을 강제 종료하기까지의 유예(초)
+_EXPIRE_GRACE = 60.0
+
+
+class OrderManager:
+    """주문 접수/정정/취소 + 미완료 주문 장부."""
+
+    def __init__(self, tracker: FillTracker = fill_tracker):
+        self._tracker = tracker
+        self._lock = threading.Lock()
+        self._book: dict[str, OrderTicket] = {}  # origin_odno -> ticket (미완료만)
+
+    # --- 접수/정정/취소 ---
+    def submit(self, symbol: str, side: str, quantity: int, price: int, timeout: float) -> OrderTicket:
+        """주문을 접수하고 체결 추적을 시작합니다. 거부되면 kis_order.place_order의 예외를 그대로 올립니다."""
+        res = kis_order.place_order(symbol=symbol, quantity=quantity, price=price, order_type=side)
+        output = res.get("output") or {}
+        ticket = self._tracker.track(output.get("ODNO", ""), symbol, side, quantity, price, timeout)
+        ticket.org_no = output.get("KRX_FWDG_ORD_ORGNO", "")
+        self._adopt(ticket)
+        logger.debug(f"[{symbol}] 주문 접수 {ticket.odno}: {side} {quantity}주 @ {price or '시장가'}")
+        return ticket
+
+    def amend(self, odno: str, price: int) -> bool:
+        """미체결 잔량을 새 가격으로 정정합니다. 성공 시 추적 키를 새 주문번호로 옮깁니다."""
+        ticket = self.get(odno)
+        if ticket is None or ticket.done:
+            return False
+        try:
+            res = kis_order.revise_cancel_order(ticket.odno, ticket.org_no, price=price)
+        except (OrderError, APIRequestError) as e:
+            # 이미 전량 체결/취소된 주문 등 → 다음 체결조회에서 정리
+            logger.warning(f"[{ticket.symbol}] 주문 정정 실패 {ticket.odno}: {e}")
+            return False
+        output = res.get("output") or {}
+        new_odno = output.get("ODNO") or ticket.odno
+        old_price = ticket.price
+        self._tracker.rekey(ticket, new_odno)
+        ticket.org_no = output.get("KRX_FWDG_ORD_ORGNO") or ticket.org_no
+        ticket.price = price
+        ticket.reprices += 1
+        self._persist(ticket)
+        logger.info(f"[{ticket.symbol}] 주문 정정 {ticket.origin_odno}: {old_price} → {price} (주문번호 {new_odno})")
+        return True
+
+    def cancel(self, odno: str, status: str = "cancelled") -> bool:
+        """미체결 잔량을 취소하고, 최신 체결 수량을 반영한 뒤 주문을 종료합니다."""
+        ticket = self.get(odno)
+        if ticket is None or ticket.done:
+            return False
+        try:
+            kis_order.revise_cancel_order(ticket.odno, ticket.org_no, cancel=True)
+        except (OrderError, APIRequestError) as e:
+            logger.warning(f"[{ticket.symbol}] 주문 취소 실패 {ticket.odno}: {e}")
+            self._tracker.poll()
+            return False
+        # 취소 접수 직전까지의 체결분 반영 (전량 체결됐으면 여기서 filled로 종료)
+        self._tracker.poll()
+        self._tracker.finish(ticket, status)
+        return True
+
+    # --- 매매 사이클 ---
+    def maintain(self, reprice_fn=None) -> None:
+        """
+        사이클마다 1회: 체결조회 갱신 → 제한 시간 지난 주문 잔량 취소 → 오래된 지정가 주문 재호가.
+        reprice_fn(ticket) -> 새 지정가(int) 또는 None(유지).
+        """
+        self._tracker.poll()
+        now = time.time()
+        reprice_after = settings.ORDER_REPRICE_AFTER
+        max_reprices = settings.ORDER_MAX_REPRICES
+        for ticket in self.open_orders():
+            if ticket.done:
+                continue
+            if now >= ticket.deadline:
+                if not self.cancel(ticket.odno, status="expired"):
+                    if not ticket.done and now >= ticket.deadline + _EXPIRE_GRACE:
+                        # 취소도 안 되고 체결조회로도 확인 안 되는 주문 → 체결분만으로 종료
+                        self._tracker.finish(ticket, "expired")
+                continue
+            if (
+                reprice_fn is not None
+                and ticket.price > 0
+                and reprice_after > 0
+                and ticket.reprices < max_reprices
+                and now - ticket.placed_at >= reprice_after
+            ):
+                try:
+                    new_price = reprice_fn(ticket)
+                except Exception as e:
+                    logger.debug(f"[{ticket.symbol}] 재호가 계산 실패: {e}")
+                    continue
+                if new_price and new_price != ticket.price:
+                    self.amend(ticket.odno, int(new_price))
+
+    # --- 조회 ---
+    def get(self, odno: str) -> OrderTicket | None:
+        ticket = self._tracker.get(odno)
+        if ticket is not None:
+            return ticket
+        with self._lock:
+            return self._book.get(str(odno or ""))
+
+    def open_orders(self) -> list[OrderTicket]:
+        with self._lock:
+            return [t for t in self._book.values() if not t.done]
+
+    def recent_orders(self, limit: int = 50) -> list[dict]:
+        """DB 장부의 최근 주문 (종료된 주문 포함)."""
+        db = session.SessionLocal()
+        try:
+            rows = (
+                db.query(models.OpenOrder)
+                .order_by(models.OpenOrder.created_at.desc())
+                .limit(limit)
+                .all()
+            )
+            return [_row_to_dict(r) for r in rows]
+        finally:
+            db.close()
+
+    # --- 복구 ---
+    def resume(self) -> dict[str, OrderTicket]:
+        """재시작 시 DB 장부의 미완료 주문을 다시 추적합니다. {origin_odno: ticket}"""
+        db = session.SessionLocal()
+        try:
+            rows = db.query(models.OpenOrder).filter(models.OpenOrder.status == "open").all()
+            records = [_row_to_dict(r) for r in rows]
+        except Exception as e:
+            logger.error(f"주문 장부 복구 실패: {e}")
+            return {}
+        finally:
+            db.close()
+        resumed = {}
+        now = datetime.utcnow()
+        for rec in records:
+            remaining = (rec["expiresAt"] - now).total_seconds() if rec["expiresAt"] else 0.0
+            ticket = self._tracker.track(rec["odno"], rec["symbol"], rec["side"], rec["quantity"], rec["price"], remaining)
+            ticket.origin_odno = rec["originOdno"]
+            ticket.org_no = rec["orgNo"]
+            ticket.reprices = rec["reprices"]
+            # 정정 전 원주문 체결분은 이월값으로, 현재 주문번호 체결분은 다음 체결조회에서 다시 반영
+            ticket._carried_qty = ticket.filled_qty = rec["carriedQty"]
+            ticket._carried_notional = ticket._notional = rec["carriedNotional"]
+            self._adopt(ticket)
+            resumed[ticket.origin_odno] = ticket
+        if resumed:
+            logger.info(f"미완료 주문 {len(resumed)}건 복구: {sorted(resumed)}")
+        return resumed
+
+    # --- 내부 ---
+    def _adopt(self, ticket: OrderTicket) -> None:
+        ticket.managed = True
+        with self._lock:
+            self._book[ticket.origin_odno] = ticket
+        self._persist(ticket)
+        ticket.future.add_done_callback(lambda _f: self._on_done(ticket))
+
+    def _on_done(self, ticket: OrderTicket) -> None:
+        with self._lock:
+            self._book.pop(ticket.origin_odno, None)
+        self._persist(ticket)
+
+    def _persist(self, ticket: OrderTicket) -> None:
+        """주문 장부 행을 origin_odno 기준으로 갱신(없으면 추가)합니다."""
+        if not ticket.origin_odno:
+            return
+        db = session.SessionLocal()
+        try:
+            row = db.query(models.OpenOrder).filter(models.OpenOrder.origin_odno == ticket.origin_odno).first()
+            if row is None:
+                row = models.OpenOrder(
+                    origin_odno=ticket.origin_odno,
+                    symbol=ticket.symbol,
+                    side=ticket.side,
+                    quantity=ticket.quantity,
+                    expires_at=datetime.utcfromtimestamp(ticket.deadline) if ticket.deadline != float("inf") else None,
+                )
+                db.add(row)
+            row.odno = ticket.odno
+            row.org_no = ticket.org_no
+            row.price = ticket.price
+            row.filled_qty = ticket.filled_qty
+            row.avg_price = ticket.avg_price or 0.0
+            row.status = ticket.status
+            row.reprices = ticket.reprices
+            row.carried_qty = ticket._carried_qty
+            row.carried_notional = ticket._carried_notional
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"[{ticket.symbol}] 주문 장부 저장 실패 {ticket.origin_odno}: {e}")
+        finally:
+            db.close()
+
+
+def _row_to_dict(r: models.OpenOrder) -> dict:
+    return {
+        "originOdno": r.origin_odno,
+        "odno": r.odno,
+        "orgNo": r.org_no or "",
+        "symbol": r.symbol,
+        "side": r.side,
+        "quantity": r.quantity or 0,
+        "price": r.price or 0,
+        "filledQty": r.filled_qty or 0,
+        "avgPrice": r.avg_price or 0.0,
+        "status": r.status,
+        "reprices": r.reprices or 0,
+        "carriedQty": r.carried_qty or 0,
+        "carriedNotional": r.carried_notional or 0.0,
+        "expiresAt": r.expires_at,
+        "createdAt": r.created_at.isoformat() if r.created_at else None,
+        "updatedAt": r.updated_at.isoformat() if r.updated_at else None,
+    }
+
+
+order_manager = OrderManager()
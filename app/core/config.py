@@ -51,7 +51,7 @@ class Settings(BaseSettings):
 
     # 일별 리스크 관리
     DAILY_LOSS_LIMIT_PCT: float = -4.0   # 당일 실현손실이 총자산 대비 이 % 이하면 신규 매수 중단
-    MAX_CONSECUTIVE_LOSSES: int = 4      # 이 횟수 연패 시 슬롯 축소 + 예산 축소
+    MAX_CONSECUTIVE_LOSSES: int = 4      # 당일 이 횟수 연패 시 슬롯 1개 축소 + 예산 축소 (0=미적용)
     BUDGET_CUT_ON_STREAK: float = 0.7    # 연패 시 적용할 예산 비율 (0.7 = 70%)
     MAX_DAILY_TRADES: int = 10           # 당일 체결 건수(BUY+SELL) 이하면 신규 매수 허용 (초과 시 신규 매수만 중단)
     SAME_DAY_REENTRY: bool = False       # True=당일 매도 종목 재매수 허용, False=차단
@@ -105,6 +105,66 @@ class Settings(BaseSettings):
     # 폴백 모드에서 RSI가 이 값 이상이면 매수 거부 (과매수 방어)
     LLM_FALLBACK_RSI_BLOCK: float = 75.0
 
+    # KIS API 레이트 리미터 (토큰 버킷): 초당 요청 수 / 순간 허용 burst. 세 버킷 합이 KIS 초당 한도 이하가 되도록 설정
+    # 모의투자(MOCK_TRADE=True)에서는 합계가 초당 4건을 넘지 않도록 자동 축소
+    KIS_QUOTATION_RATE_PER_SEC: float = 10.0   # 시세 조회 (inquire-price, 일봉, 거래량 순위 등)
+    KIS_QUOTATION_BURST: int = 5
+    KIS_TRADING_RATE_PER_SEC: float = 5.0      # 주문·잔고·주문가능금액 조회
+    KIS_TRADING_BURST: int = 3
+    KIS_AUTH_RATE_PER_SEC: float = 1.0         # 접근 토큰 발급
+    KIS_AUTH_BURST: int = 1
+
+    # 시세 캐시: 현재가 응답 재사용 시간(초). 한 사이클 안의 루프·전략·상태 API 중복 조회를 1회로 병합
+    MARKET_QUOTE_CACHE_TTL: float = 3.0
+
+    # 계좌 스냅샷: 잔고조회 응답 재사용 시간(초). 보유수량·평단·예수금·주문가능금액 조회가 공유, 주문 시 무효화
+    ACCOUNT_SNAPSHOT_TTL: float = 2.0
+    # 매수 체결 대기 한도(초): 체결통보/체결조회로 전량 체결을 기다리는 최대 시간, 지나면 체결된 수량만 포지션 등록
+    BUY_FILL_TIMEOUT: float = 30.0
+    # 미체결 지정가 주문 재호가: 접수(또는 직전 정정) 후 N초 미체결이면 현재가+BUY_PRICE_TICK_OFFSET호가로 잔량 정정
+    ORDER_REPRICE_AFTER: float = 10.0
+    ORDER_MAX_REPRICES: int = 2  # 주문당 최대 정정 횟수 (0이면 재호가 안 함)
+
+    # 실시간 시세 (KIS WebSocket 체결가 H0STCNT0): 체결 이벤트로 종목별 평가를 즉시 실행, REST는 폴백
+    USE_REALTIME_FEED: bool = False
+    KIS_WS_URL: str = ""                  # 비우면 실전/모의 기본 주소 (테스트 시 로컬 가짜 서버 주소)
+    REALTIME_QUOTE_TTL: float = 5.0       # 마지막 체결 후 이 시간(초) 동안 REST 현재가 조회 생략
+    REALTIME_EVAL_MIN_INTERVAL: float = 1.0  # 같은 종목 이벤트 평가 최소 간격(초)
+
+    # 종목별 평가 엔진 스레드 수 (종목마다 독립 태스크, 같은 종목은 종목별 락으로 직렬화)
+    ENGINE_MAX_WORKERS: int = 4
+    # 파라미터 스윕 프로세스 수 (0이면 CPU 코어 수). 가격 행렬은 공유 메모리로 워커가 함께 읽음
+    SWEEP_WORKERS: int = 0
+    # 분봉 저장소 (DATA_DIR/minute_bars, 종목별 memmap 열 파일): 매일 16:00 대상·보유 종목 분봉 백필/증분 동기화
+    USE_MINUTE_BAR_SYNC: bool = False
+    MINUTE_BAR_BACKFILL_DAYS: int = 250    # 백필할 최근 평일 수 (늘리면 저장분 이전 날짜도 과거 방향으로 채움)
+    MINUTE_BAR_MAX_REQUESTS: int = 20000   # 실행당 분봉 API 최대 호출 수 (하루치 ≈ 4회, 남은 백필은 다음 실행에서)
+    # 과거 일봉 백필 (기간별 시세, 요청당 최대 100봉): 매일 17:00 대상·보유 + DAILY_HISTORY_SYMBOLS 종목의 장기 일봉을
+    # 과거 방향으로 채움 (유니버스 백테스트·스윕·워크포워드 재튜닝용). 전 종목 유니버스는 POST /api/backtest/daily-history로도 채울 수 있음
+    USE_DAILY_HISTORY_SYNC: bool = False
+    DAILY_HISTORY_YEARS: float = 10.0        # 종목당 확보할 과거 기간 (년, 10년 ≈ 25회 호출)
+    DAILY_HISTORY_MAX_REQUESTS: int = 5000   # 실행당 최대 호출 수 (남은 백필은 다음 실행에서)
+    DAILY_HISTORY_SYMBOLS: str = ""          # 추가 백필 종목 (쉼표 구분, 비우면 대상·보유 종목만)
+    # 주간 재튜닝: 토요일 06:00 기본 전략 워크포워드 → out-of-sample 손실이 아니면 최근 창 최적 파라미터를 StrategyConfig에 기록
+    USE_WEEKLY_RETUNE: bool = False
+    WALK_FORWARD_IN_SAMPLE_DAYS: int = 250     # 폴드 in-sample 거래일 수
+    WALK_FORWARD_OUT_OF_SAMPLE_DAYS: int = 20  # 폴드 out-of-sample 거래일 수 (= 폴드 간격)
+    RETUNE_CANDIDATES: int = 40                # 폴드당 파라미터 후보 수 (TPE)
+    # 의사결정 로그(DecisionLog): 판단 경로는 큐에 넣기만 하고 백그라운드 스레드가 배치로 INSERT
+    DECISION_LOG_BATCH_SIZE: int = 200     # 한 트랜잭션에 쓰는 최대 행 수
+    DECISION_LOG_FLUSH_MS: int = 500       # 배치를 모으는 최대 대기 시간 (ms)
+    DECISION_LOG_QUEUE_SIZE: int = 10000   # 대기 큐 크기 (가득 차면 새 로그는 버리고 dropped 집계)
+    DECISION_LOG_COLLAPSE_HOLD: bool = True  # 같은 종목·전략의 연속된 동일 HOLD를 한 행(repeat_count)으로 합침
+    # SQLite 성능 프로파일 (연결마다 PRAGMA): WAL이면 조회(get_status)와 매매 스레드 쓰기가 서로 막지 않음
+    SQLITE_JOURNAL_MODE: str = "WAL"       # 비우면 SQLite 기본(DELETE)
+    SQLITE_SYNCHRONOUS: str = "NORMAL"     # WAL + NORMAL: 커밋마다 fsync 안 함 (체크포인트 때만)
+    SQLITE_CACHE_MB: int = 64              # 연결당 페이지 캐시
+    SQLITE_MMAP_MB: int = 256              # 메모리 매핑 읽기 크기 (0이면 끔)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000     # 쓰기 잠금 경합 시 대기 시간
+    # 거래 상태(trade_status.json): 변경은 저널(trade_status.journal)에 append, 스냅샷은 타이머로 압축
+    STATE_COMPACT_SEC: float = 5.0         # 첫 변경 후 이 시간 뒤 스냅샷 교체 + 저널 정리
+    STATE_JOURNAL_MAX_RECORDS: int = 1000  # 저널 기록이 이 수를 넘으면 즉시 압축
+
     # 데이터/상태 파일 기준 디렉터리 (비우면 프로젝트 루트)
     DATA_DIR: str = ""
 
@@ -114,6 +174,10 @@ class Settings(BaseSettings):
     def target_symbols_list(self) -> list[str]:
         return _parse_symbols(self.TARGET_SYMBOLS)
 
+    @property
+    def daily_history_symbols_list(self) -> list[str]:
+        return _parse_symbols(self.DAILY_HISTORY_SYMBOLS)
+
     @property
     def blacklist_symbols_list(self) -> list[str]:
         return _parse_symbols(self.BLACKLIST_SYMBOLS)
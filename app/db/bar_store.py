@@ -0,0 +1,156 @@
+"""
+일봉 로컬 저장소: 확정된 과거 일봉을 SQLite(daily_bars)에 종목×일자로 보관.
+- 최초 조회 시 KIS 일봉 API 응답으로 백필하고, 이후에는 장 마감 후 새 봉만 추가(upsert)합니다.
+- 유니버스 백테스트용 장기 일봉은 kis_market.sync_daily_history(기간별 시세, 과거 방향 페이지 백필)로 채웁니다.
+- kis_market.get_daily_ohlcv가 이 저장소를 먼저 읽으므로, 동기화된 종목은 장중 일봉 API 호출이 없습니다.
+- 반환 행은 KIS 일봉 응답과 같은 키(stck_bsop_date, stck_oprc, stck_hgpr, stck_lwpr, stck_clpr, acml_vol)의 문자열 값.
+"""
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from app.core.logger import logger
+from app.db import models, session
+
+
+def _fmt(value: float | int | None) -> str:
+    if value is None:
+        return "0"
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def _to_row(bar: models.DailyBar) -> dict:
+    return {
+        "stck_bsop_date": bar.date,
+        "stck_oprc": _fmt(bar.open),
+        "stck_hgpr": _fmt(bar.high),
+        "stck_lwpr": _fmt(bar.low),
+        "stck_clpr": _fmt(bar.close),
+        "acml_vol": _fmt(bar.volume),
+    }
+
+
+def _from_row(symbol: str, row: dict) -> dict | None:
+    try:
+        return {
+            "symbol": symbol,
+            "date": str(row["stck_bsop_date"]),
+            "open": float(row.get("stck_oprc") or 0),
+            "high": float(row.get("stck_hgpr") or 0),
+            "low": float(row.get("stck_lwpr") or 0),
+            "close": float(row["stck_clpr"]),
+            "volume": int(float(row.get("acml_vol") or 0)),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def synced_through(symbol: str) -> str | None:
+    """종목의 일봉 동기화 기준일(YYYYMMDD). 한 번도 동기화하지 않았으면 None."""
+    db = session.SessionLocal()
+    try:
+        row = db.get(models.DailyBarSync, symbol)
+        return row.synced_through if row else None
+    finally:
+        db.close()
+
+
+def history_from(symbol: str) -> str | None:
+    """과거 일봉 백필로 확인한 가장 이른 날짜(YYYYMMDD). 과거 백필 전이면 None."""
+    db = session.SessionLocal()
+    try:
+        row = db.get(models.DailyBarSync, symbol)
+        return row.history_from if row else None
+    finally:
+        db.close()
+
+
+def load_bars(symbol: str, limit: int) -> list[dict]:
+    """저장된 일봉을 최신순으로 최대 limit개 반환합니다."""
+    db = session.SessionLocal()
+    try:
+        bars = (
+            db.query(models.DailyBar)
+            .filter(models.DailyBar.symbol == symbol)
+            .order_by(models.DailyBar.date.desc())
+            .limit(limit)
+            .all()
+        )
+        return [_to_row(b) for b in bars]
+    finally:
+        db.close()
+
+
+def load_columns(symbols: list[str], start: str | None = None, end: str | None = None,
+                 chunk: int = 500) -> list[tuple]:
+    """
+    여러 종목 일봉을 (symbol, date, open, high, low, close, volume) 튜플로 한 번에 반환합니다 (대량 백테스트용).
+    ORM 객체·문자열 변환 없이 읽고, 종목은 chunk개씩 IN 조회 (SQLite 변수 개수 제한).
+    """
+    bar = models.DailyBar
+    cols = select(bar.symbol, bar.date, bar.open, bar.high, bar.low, bar.close, bar.volume)
+    if start:
+        cols = cols.where(bar.date >= start)
+    if end:
+        cols = cols.where(bar.date <= end)
+    unique = list(dict.fromkeys(symbols))
+    out: list[tuple] = []
+    db = session.SessionLocal()
+    try:
+        for i in range(0, len(unique), chunk):
+            out.extend(tuple(r) for r in db.execute(cols.where(bar.symbol.in_(unique[i:i + chunk]))))
+        return out
+    finally:
+        db.close()
+
+
+def _upsert_bars(db, values: list[dict]) -> None:
+    if not values:
+        return
+    stmt = insert(models.DailyBar).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["symbol", "date"],
+        set_={c: stmt.excluded[c] for c in ("open", "high", "low", "close", "volume")},
+    )
+    db.execute(stmt)
+
+
+def save_bars(symbol: str, rows: list[dict], through: str) -> int:
+    """
+    through(YYYYMMDD) 이하 일자의 봉을 upsert하고 동기화 기준일을 through로 기록합니다.
+    through 이후(장중 당일 봉 등 미확정) 행은 저장하지 않습니다. 저장한 봉 수를 반환.
+    """
+    values = [v for v in (_from_row(symbol, r) for r in rows) if v and v["date"] <= through]
+    db = session.SessionLocal()
+    try:
+        _upsert_bars(db, values)
+        sync = insert(models.DailyBarSync).values(symbol=symbol, synced_through=through)
+        db.execute(sync.on_conflict_do_update(index_elements=["symbol"], set_={"synced_through": through}))
+        db.commit()
+        return len(values)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[{symbol}] 일봉 저장 실패: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def save_history(symbol: str, rows: list[dict], through: str, covered_from: str) -> int:
+    """
+    과거 일봉 백필 1페이지: through 이하 봉을 upsert하고 history_from을 covered_from으로 기록합니다.
+    최근 동기화 기준일(synced_through)은 바꾸지 않습니다 (장중 일봉 조회 경로는 기존 동기화를 그대로 따름).
+    """
+    values = [v for v in (_from_row(symbol, r) for r in rows) if v and v["date"] <= through]
+    db = session.SessionLocal()
+    try:
+        _upsert_bars(db, values)
+        sync = insert(models.DailyBarSync).values(symbol=symbol, history_from=covered_from)
+        db.execute(sync.on_conflict_do_update(index_elements=["symbol"], set_={"history_from": covered_from}))
+        db.commit()
+        return len(values)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[{symbol}] 과거 일봉 저장 실패: {e}")
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,210 @@
+"""
+DecisionLog 비동기 배치 기록기.
+- record()는 행 dict를 bounded 큐에 넣고 바로 반환 (매매 판단 경로에서 세션 생성·커밋·fsync 없음).
+  큐가 가득 차면 그 행은 버리고 dropped 카운터만 올림 (판단 경로를 막지 않음).
+- 백그라운드 스레드가 DECISION_LOG_FLUSH_MS마다 또는 DECISION_LOG_BATCH_SIZE행이 모이면
+  한 트랜잭션에서 executemany INSERT/UPDATE.
+- DECISION_LOG_COLLAPSE_HOLD: 같은 종목·전략의 연속된 동일 HOLD(사유·처리 결과 동일)는 한 행으로 합쳐
+  repeat_count를 올리고 last_timestamp·현재가·지표만 갱신 (첫 판단 시각은 timestamp 유지).
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, insert, update
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.db import models, session
+
+_table = models.DecisionLog.__table__
+_update_run = (
+    update(_table)
+    .where(and_(
+        _table.c.symbol == bindparam("b_symbol"),
+        _table.c.strategy_name == bindparam("b_strategy"),
+        _table.c.timestamp == bindparam("b_timestamp"),
+    ))
+    .values(
+        repeat_count=bindparam("b_count"),
+        last_timestamp=bindparam("b_last"),
+        current_price=bindparam("b_price"),
+        indicator_values=bindparam("b_indicators"),
+    )
+)
+
+
+class _HoldRun:
+    """종목·전략별 진행 중인 연속 HOLD 묶음."""
+
+    __slots__ = ("key", "row", "inserted", "dirty")
+
+    def __init__(self, key: tuple, row: dict):
+        self.key = key
+        self.row = row
+        self.inserted = False
+        self.dirty = True
+
+
+class DecisionLogWriter:
+    def __init__(self):
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._runs: dict[tuple[str, str], _HoldRun] = {}  # 기록 스레드 전용
+        self._stats = {"queued": 0, "inserted": 0, "collapsed": 0, "dropped": 0, "batches": 0, "errors": 0}
+        self._stats_lock = threading.Lock()  # record()는 여러 판단 스레드에서 동시에 불림
+
+    def _count(self, **deltas: int) -> None:
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self._stats[name] += delta
+
+    # --- 생산자 (판단 경로) ---
+    def record(self, symbol: str, strategy_name: str, signal: str, reason: str, indicator_values: dict | None,
+               current_price: float | None, action_taken: str) -> None:
+        row = {
+            "timestamp": datetime.utcnow(),
+            "symbol": symbol,
+            "strategy_name": strategy_name,
+            "signal": signal,
+            "decision_reason": reason,
+            "indicator_values": json.dumps(indicator_values or {}, ensure_ascii=False, default=str),
+            "current_price": current_price,
+            "action_taken": action_taken,
+            "repeat_count": 1,
+            "last_timestamp": None,
+        }
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+            self._count(queued=1)
+        except queue.Full:
+            self._count(dropped=1)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=max(1, settings.DECISION_LOG_QUEUE_SIZE))
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="decision-log-writer", daemon=True)
+            self._thread.start()
+
+    # --- 기록 스레드 ---
+    def _run(self) -> None:
+        flush_sec = max(1, settings.DECISION_LOG_FLUSH_MS) / 1000
+        batch_size = max(1, settings.DECISION_LOG_BATCH_SIZE)
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = []
+            deadline = time.monotonic() + flush_sec
+            while len(batch) < batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._idle.clear()
+            if batch or any(run.dirty for run in self._runs.values()):
+                self._write(batch)
+            if self._queue.empty():
+                self._idle.set()
+
+    @staticmethod
+    def _update_params(run: _HoldRun) -> dict:
+        return {
+            "b_symbol": run.row["symbol"],
+            "b_strategy": run.row["strategy_name"],
+            "b_timestamp": run.row["timestamp"],
+            "b_count": run.row["repeat_count"],
+            "b_last": run.row["last_timestamp"],
+            "b_price": run.row["current_price"],
+            "b_indicators": run.row["indicator_values"],
+        }
+
+    def _write(self, batch: list[dict]) -> None:
+        collapse = settings.DECISION_LOG_COLLAPSE_HOLD
+        inserts: list[dict] = []
+        updates: list[dict] = []  # 이번 배치에서 끝난 묶음의 미기록 갱신 (아래에서 진행 중인 묶음분을 더함)
+        for row in batch:
+            run_key = (row["symbol"], row["strategy_name"])
+            run = self._runs.get(run_key)
+            if run is not None and run.dirty and run.inserted and (
+                row["signal"] != "HOLD" or not collapse or run.key != (row["decision_reason"], row["action_taken"])
+            ):
+                updates.append(self._update_params(run))  # 끝나는 묶음의 마지막 repeat_count 보존
+            if row["signal"] != "HOLD" or not collapse:
+                self._runs.pop(run_key, None)  # HOLD가 아닌 판단이 오면 진행 중인 묶음 종료
+                inserts.append(row)
+                continue
+            key = (row["decision_reason"], row["action_taken"])
+            if run is not None and run.key == key:
+                run.row["repeat_count"] += 1
+                run.row["last_timestamp"] = row["timestamp"]
+                run.row["current_price"] = row["current_price"]
+                run.row["indicator_values"] = row["indicator_values"]
+                run.dirty = True
+                self._count(collapsed=1)
+                continue
+            run = _HoldRun(key, row)
+            self._runs[run_key] = run
+            inserts.append(row)
+
+        # 이번 배치에서 새로 INSERT되는 묶음 첫 행은 최신 값으로 들어가므로 UPDATE 불필요
+        new_runs = [run for run in self._runs.values() if run.dirty and not run.inserted]
+        updates += [self._update_params(run) for run in self._runs.values() if run.dirty and run.inserted]
+        if not inserts and not updates:
+            return
+        try:
+            with session.engine.begin() as conn:
+                if inserts:
+                    conn.execute(insert(_table), inserts)
+                if updates:
+                    conn.execute(_update_run, updates)
+        except Exception as e:
+            self._count(errors=1)
+            self._runs.clear()  # 묶음 상태를 DB와 다시 맞추기 위해 다음 HOLD부터 새 행으로 시작
+            logger.error(f"의사결정 로그 배치 저장 실패 ({len(inserts)}건): {e}")
+            return
+        for run in new_runs:
+            run.inserted = True
+        for run in self._runs.values():
+            run.dirty = False
+        self._count(inserted=len(inserts), batches=1)
+
+    # --- 제어 ---
+    def flush(self, timeout: float = 5.0) -> bool:
+        """큐가 비고 마지막 배치가 기록될 때까지 대기 (테스트/종료용)."""
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._queue.empty() and self._idle.wait(timeout=0.05) and self._queue.empty():
+                return True
+        return False
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """남은 행을 기록하고 기록 스레드를 종료합니다."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return {**counters, "pending": self._queue.qsize() if self._queue is not None else 0,
+                "openHoldRuns": len(self._runs)}
+
+
+decision_log = DecisionLogWriter()
@@ -1,5 +1,5 @@
 """
-스키마 마이그레이션: 기존 DB에 새 컬럼 추가 등
+스키마 마이그레이션: 기존 DB에 새 컬럼·인덱스 추가 등
 """
 from sqlalchemy import text
 
@@ -7,20 +7,50 @@ from .session import engine
 from . import models
 from ..core.logger import logger
 
+# (테이블, 컬럼, 타입/기본값 DDL)
+_ADDED_COLUMNS = [
+    ("trade_logs", "realized_pl", "REAL DEFAULT 0.0"),
+    ("decision_logs", "repeat_count", "INTEGER DEFAULT 1"),
+    ("decision_logs", "last_timestamp", "DATETIME"),
+    ("daily_bar_sync", "history_from", "VARCHAR"),
+]
+
 
 def run_migrations():
     """누락된 컬럼 등을 추가합니다."""
     with engine.connect() as conn:
         try:
-            result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='trade_logs'"))
-            if result.fetchone() is None:
-                return  # 테이블이 없으면 create_all이 새로 만들 것이므로 스킵
-            result = conn.execute(text("PRAGMA table_info(trade_logs)"))
-            columns = [row[1] for row in result]
-            if "realized_pl" not in columns:
-                conn.execute(text("ALTER TABLE trade_logs ADD COLUMN realized_pl REAL DEFAULT 0.0"))
-                conn.commit()
-                logger.info("trade_logs.realized_pl 컬럼을 추가했습니다.")
+            for table, column, ddl in _ADDED_COLUMNS:
+                result = conn.execute(text(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'"))
+                if result.fetchone() is None:
+                    continue  # 테이블이 없으면 create_all이 새로 만들 것이므로 스킵
+                result = conn.execute(text(f"PRAGMA table_info({table})"))
+                columns = [row[1] for row in result]
+                if column not in columns:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    conn.commit()
+                    logger.info(f"{table}.{column} 컬럼을 추가했습니다.")
         except Exception as e:
             logger.warning(f"마이그레이션 실패: {e}")
             conn.rollback()
+    _ensure_indexes()
+
+
+def _ensure_indexes():
+    """모델에 선언된 인덱스 중 기존 DB에 없는 것을 만듭니다 (create_all은 기존 테이블에 인덱스를 추가하지 않음)."""
+    with engine.connect() as conn:
+        try:
+            existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))}
+            for table in models.Base.metadata.sorted_tables:
+                if table.name not in existing:
+                    continue
+                for index in table.indexes:
+                    try:
+                        index.create(conn, checkfirst=True)
+                    except Exception as e:
+                        logger.warning(f"인덱스 {index.name} 생성 실패: {e}")
+            conn.execute(text("PRAGMA optimize"))  # 새 인덱스 통계 갱신 (필요한 테이블만 ANALYZE)
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"인덱스 생성 실패: {e}")
+            conn.rollback()
@@ -0,0 +1,201 @@
+"""
+분봉 로컬 저장소: 종목별 디렉터리에 열(column)마다 고정 폭 바이너리 파일을 두고 np.memmap으로 읽습니다.
+- 열: date(int32 YYYYMMDD), hhmm(int16), open/high/low/close(int32 원), volume(int64 분 거래량). 시각 오름차순.
+- meta.json: rows(유효 행 수), through(최신 저장 거래일), since(과거 방향으로 확인한 가장 이른 거래일), gen(열 파일 세대).
+  추가는 열 파일 append → meta 교체 순서라 중간에 끊겨도 meta.rows 뒤 꼬리는 다음 쓰기에서 잘라냄 (재개 가능).
+- since 이전 날짜는 prepend_days로 채움: 과거분 + 기존 행을 새 세대 열 파일에 쓴 뒤 meta를 교체 (끊겨도 기존 세대 유지).
+- 읽기는 memmap 뷰라 1년치 × 100종목도 접근한 페이지만 메모리에 올라옵니다.
+위치: DATA_DIR/minute_bars/<symbol>/
+"""
+import json
+import threading
+from datetime import time as dtime
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+
+COLUMNS = {
+    "date": np.int32,
+    "hhmm": np.int16,
+    "open": np.int32,
+    "high": np.int32,
+    "low": np.int32,
+    "close": np.int32,
+    "volume": np.int64,
+}
+
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def root_dir() -> Path:
+    return settings.base_dir / "minute_bars"
+
+
+def _symbol_dir(symbol: str) -> Path:
+    return root_dir() / symbol
+
+
+def _lock(symbol: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(symbol, threading.Lock())
+
+
+def _column_path(directory: Path, name: str, gen: int) -> Path:
+    return directory / (f"{name}.bin" if not gen else f"{name}.{gen}.bin")
+
+
+def read_meta(symbol: str) -> dict:
+    """{"rows": 행 수, "through": 최신 저장일, "since": 가장 이른 확인일, "gen": 열 파일 세대}. 미저장이면 through/since None."""
+    try:
+        meta = json.loads((_symbol_dir(symbol) / "meta.json").read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"rows": 0, "through": None, "since": None, "gen": 0}
+    meta.setdefault("gen", 0)
+    if not meta.get("since") and meta["through"]:
+        # since 도입 전 meta: 첫 행 날짜(없으면 through)부터 저장된 것으로 봄
+        first = None
+        if meta["rows"]:
+            first = np.fromfile(_column_path(_symbol_dir(symbol), "date", meta["gen"]), dtype=COLUMNS["date"], count=1)
+        meta["since"] = str(int(first[0])) if first is not None and len(first) else meta["through"]
+    return meta
+
+
+def _write_meta(symbol: str, meta: dict) -> None:
+    path = _symbol_dir(symbol) / "meta.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    tmp.replace(path)
+
+
+def synced_through(symbol: str) -> str | None:
+    return read_meta(symbol)["through"]
+
+
+def synced_since(symbol: str) -> str | None:
+    return read_meta(symbol)["since"]
+
+
+def _day_columns(day: str, bars: list[dict]) -> dict[str, np.ndarray]:
+    bars = sorted(bars, key=lambda b: b["hhmm"])
+    return {
+        "date": np.full(len(bars), int(day), dtype=COLUMNS["date"]),
+        **{name: np.array([b[name] for b in bars], dtype=COLUMNS[name]) for name in COLUMNS if name != "date"},
+    }
+
+
+def append_day(symbol: str, day: str, bars: list[dict]) -> int:
+    """
+    하루치 분봉을 추가하고 through를 day로 올립니다 (bars가 비어도 through는 갱신 → 휴장/거래정지일 재조회 없음).
+    bars: [{"hhmm", "open", "high", "low", "close", "volume"}]. 이미 저장된 날짜 이하이면 무시. 반환: 추가 행 수.
+    """
+    with _lock(symbol):
+        meta = read_meta(symbol)
+        if meta["through"] and day <= meta["through"]:
+            return 0
+        directory = _symbol_dir(symbol)
+        directory.mkdir(parents=True, exist_ok=True)
+        columns = _day_columns(day, bars)
+        rows = meta["rows"]
+        for name, dtype in COLUMNS.items():
+            with open(_column_path(directory, name, meta["gen"]), "ab") as f:
+                f.truncate(rows * np.dtype(dtype).itemsize)  # 끊긴 이전 append 꼬리 제거
+                f.write(columns[name].tobytes())
+        _write_meta(symbol, {"rows": rows + len(bars), "through": day, "since": meta["since"] or day, "gen": meta["gen"]})
+        return len(bars)
+
+
+def prepend_days(symbol: str, days: list[tuple[str, list[dict]]]) -> int:
+    """
+    since 이전 거래일 분봉을 앞쪽에 채우고 since를 가장 이른 day로 내립니다 (빈 bars도 since는 갱신 → 휴장일 재조회 없음).
+    days: [(day, bars)] 순서 무관, since 이상 날짜는 무시. 이 day들과 기존 since 사이에 빈 거래일이 없어야 합니다
+    (호출자가 since 직전부터 과거 방향으로 연속 조회). 기존 행을 새 세대 파일로 다시 쓰므로 여러 날을 모아 한 번에 호출.
+    아직 저장된 날이 없으면(through 없음) append_day를 쓸 것. 반환: 추가 행 수.
+    """
+    with _lock(symbol):
+        meta = read_meta(symbol)
+        if not meta["through"]:
+            raise ValueError(f"[{symbol}] 저장된 분봉이 없어 앞쪽에 채울 수 없습니다 (append_day 사용).")
+        days = sorted((d, b) for d, b in days if d < meta["since"])
+        if not days:
+            return 0
+        directory = _symbol_dir(symbol)
+        old_gen, new_gen, rows = meta["gen"], meta["gen"] + 1, meta["rows"]
+        head = [_day_columns(day, bars) for day, bars in days]
+        added = sum(len(columns["date"]) for columns in head)
+        for name, dtype in COLUMNS.items():
+            old = np.fromfile(_column_path(directory, name, old_gen), dtype=dtype, count=rows) if rows else np.empty(0, dtype)
+            with open(_column_path(directory, name, new_gen), "wb") as f:
+                for columns in head:
+                    f.write(columns[name].tobytes())
+                f.write(old.tobytes())
+        _write_meta(symbol, {"rows": rows + added, "through": meta["through"], "since": days[0][0], "gen": new_gen})
+        for name in COLUMNS:
+            try:
+                _column_path(directory, name, old_gen).unlink()
+            except OSError:
+                pass  # 다른 프로세스가 memmap 중(Windows) 등 — 다음 세대 교체 때 남아 있어도 무해
+        return added
+
+
+class MinuteBars:
+    """종목 분봉 memmap 뷰. 열은 속성(date, hhmm, open, ...)으로 접근."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        meta = read_meta(symbol)
+        self.rows = meta["rows"]
+        self.through = meta["through"]
+        self.since = meta["since"]
+        self.gen = meta["gen"]
+        directory = _symbol_dir(symbol)
+        for name, dtype in COLUMNS.items():
+            if self.rows:
+                column = np.memmap(_column_path(directory, name, self.gen), dtype=dtype, mode="r", shape=(self.rows,))
+            else:
+                column = np.empty(0, dtype=dtype)
+            setattr(self, name, column)
+
+    def days(self) -> list[str]:
+        return [str(d) for d in np.unique(self.date)]
+
+    def day_range(self, day: str) -> tuple[int, int]:
+        key = int(day)
+        return int(np.searchsorted(self.date, key, side="left")), int(np.searchsorted(self.date, key, side="right"))
+
+    def day(self, day: str) -> dict[str, np.ndarray]:
+        """하루치 열 슬라이스 (memmap 뷰)."""
+        lo, hi = self.day_range(day)
+        return {name: getattr(self, name)[lo:hi] for name in COLUMNS}
+
+    def path(self, day: str) -> list[tuple[dtime, float, float]]:
+        """백테스트 장중 경로 [(시각, 분봉 종가, 누적거래량)] (Backtester intraday 형식)."""
+        cols = self.day(day)
+        cum_volume = np.cumsum(cols["volume"], dtype=np.int64)
+        return [
+            (dtime(int(t) // 100, int(t) % 100), float(c), float(v))
+            for t, c, v in zip(cols["hhmm"], cols["close"], cum_volume)
+        ]
+
+
+_readers: dict[str, MinuteBars] = {}
+_readers_lock = threading.Lock()
+
+
+def open_bars(symbol: str) -> MinuteBars:
+    """종목 memmap 뷰 (행 수나 열 파일 세대가 바뀌었으면 다시 매핑)."""
+    meta = read_meta(symbol)
+    with _readers_lock:
+        reader = _readers.get(symbol)
+        if reader is None or (reader.rows, reader.gen) != (meta["rows"], meta["gen"]):
+            reader = MinuteBars(symbol)
+            _readers[symbol] = reader
+        return reader
+
+
+def intraday_path(symbol: str, day: str) -> list[tuple[dtime, float, float]] | None:
+    """Backtester(intraday=...)용: 저장된 분봉 경로, 없으면 None (일봉 OHLC 보간으로 대체)."""
+    path = open_bars(symbol).path(day)
+    return path or None
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index, Enum as SQLEnum
 from datetime import datetime
 import enum
 
@@ -30,6 +30,15 @@ class TradeLog(Base):
     kis_response = Column(String)  # KIS API 응답 저장
     realized_pl = Column(Float, default=0.0)  # 실현손익
 
+    __table_args__ = (
+        # 당일 실현손익 SUM: 동등 조건(order_type, status) → 범위(timestamp) 순, realized_pl까지 포함해 테이블 접근 없이 집계
+        Index("ix_trade_logs_type_status_ts_pl", "order_type", "status", "timestamp", "realized_pl"),
+        # 당일 체결 건수 COUNT
+        Index("ix_trade_logs_status_ts", "status", "timestamp"),
+        # 최근 매매 로그 (timestamp DESC LIMIT)
+        Index("ix_trade_logs_timestamp", "timestamp"),
+    )
+
 
 class PortfolioSnapshot(Base):
     __tablename__ = "portfolio_snapshots"
@@ -67,3 +76,59 @@ class DecisionLog(Base):
     indicator_values = Column(Text, default="{}")  # JSON
     current_price = Column(Float)
     action_taken = Column(String)  # EXECUTED, SKIPPED, FAILED
+    repeat_count = Column(Integer, default=1)  # 연속된 동일 HOLD 판단을 한 행으로 합친 횟수
+    last_timestamp = Column(DateTime)  # 합쳐진 마지막 판단 시각 (timestamp는 첫 판단)
+
+    __table_args__ = (
+        # 종목별 최근 판단 (symbol = ? ORDER BY timestamp DESC LIMIT), HOLD 묶음 UPDATE 대상 찾기
+        Index("ix_decision_logs_symbol_ts", "symbol", "timestamp"),
+    )
+
+
+class OpenOrder(Base):
+    """주문 장부: 접수된 주문의 체결/정정/취소 상태 (OrderManager가 관리, 재시작 시 미완료 주문 복구)."""
+    __tablename__ = "open_orders"
+
+    id = Column(Integer, primary_key=True, index=True)
+    origin_odno = Column(String, unique=True, index=True)  # 최초 주문번호 (정정돼도 유지)
+    odno = Column(String, index=True)  # 현재 주문번호 (정정 시 갱신)
+    org_no = Column(String, default="")  # KRX_FWDG_ORD_ORGNO (정정/취소에 필요)
+    symbol = Column(String, index=True)
+    side = Column(String)  # BUY, SELL
+    quantity = Column(Integer)
+    price = Column(Integer, default=0)  # 0이면 시장가
+    filled_qty = Column(Integer, default=0)
+    avg_price = Column(Float, default=0.0)
+    status = Column(String, index=True)  # open, filled, cancelled, expired, rejected
+    reprices = Column(Integer, default=0)
+    carried_qty = Column(Integer, default=0)  # 정정 전 원주문 체결 수량 (현재 주문번호 체결분과 합산)
+    carried_notional = Column(Float, default=0.0)
+    expires_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailyBar(Base):
+    """일봉 로컬 저장소 (종목×일자). 장 마감 후 확정된 봉만 저장, 당일 봉은 실시간 시세로 합성."""
+    __tablename__ = "daily_bars"
+
+    symbol = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)  # YYYYMMDD (stck_bsop_date)
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(Integer)
+
+
+class DailyBarSync(Base):
+    """
+    종목별 일봉 동기화 기준일: 이 날짜까지 확정된 봉을 API로 확인함 (휴장일 반복 조회 방지).
+    history_from: 과거 일봉 백필(기간별 시세)로 이 날짜 이후를 확인함 (없으면 과거 백필 전).
+    """
+    __tablename__ = "daily_bar_sync"
+
+    symbol = Column(String, primary_key=True)
+    synced_through = Column(String)  # YYYYMMDD
+    history_from = Column(String)  # YYYYMMDD
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,13 +1,38 @@
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.core.config import settings
+
 DATABASE_URL = "sqlite:///./autotrade.db"
 
+
+def apply_pragmas(dbapi_conn, connection_record=None) -> None:
+    """
+    SQLite 연결마다 성능 프로파일 적용.
+    - WAL: 읽기(get_status 등)와 매매 스레드 쓰기가 서로 막지 않음. synchronous=NORMAL은 WAL에서 커밋당 fsync 생략
+      (전원 장애 시 마지막 커밋 일부만 잃고 DB는 손상되지 않음).
+    - busy_timeout: 쓰기 경합 시 즉시 'database is locked' 대신 대기.
+    """
+    cursor = dbapi_conn.cursor()
+    try:
+        if settings.SQLITE_JOURNAL_MODE:
+            cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        if settings.SQLITE_SYNCHRONOUS:
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_MB) * 1024}")  # 음수 = KiB 단위
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_MB) * 1024 * 1024}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
 engine = create_engine(
     DATABASE_URL, connect_args={"check_same_thread": False}
 )
+event.listen(engine, "connect", apply_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
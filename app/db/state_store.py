@@ -0,0 +1,225 @@
+"""
+trade_status 저장소: 스냅샷(trade_status.json) + 쓰기 선행 저널(trade_status.journal).
+- 변경은 저널에 JSON 한 줄씩 append: put(종목 상태 전체), set(일부 필드), del. 손절가·고가 갱신은 바뀐 필드만 기록하므로
+  전체 dict 직렬화·파일 재작성이 없음. durable=True(체결 반영)만 fsync, 나머지는 flush만
+  (프로세스 종료에는 안전, 전원 장애 시 마지막 트레일링 갱신 몇 건만 유실 가능).
+- 압축: 압축 후 첫 변경에서 STATE_COMPACT_SEC 뒤(저널이 STATE_JOURNAL_MAX_RECORDS를 넘으면 즉시) 타이머 스레드가
+  전체 상태를 임시 파일에 쓰고 fsync → os.replace로 스냅샷 교체 → 저널에서 스냅샷에 반영된 앞부분 제거.
+  파일 쓰기는 공용 lock 밖에서 하고 교체·저널 정리만 lock 안에서 합니다.
+- 복구: 시작 시 스냅샷 + 저널 재생 (끊긴 마지막 줄은 무시). 저널 기록은 종목·필드 단위 덮어쓰기라 같은 기록을
+  새 스냅샷 위에 다시 재생해도 결과가 같음 → 스냅샷 교체와 저널 정리 사이에 종료돼도 안전.
+"""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.trade_state_lock import trade_state_lock
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _apply(state: dict, record: dict) -> None:
+    op, symbol = record["op"], record["s"]
+    if op == "put":
+        state[symbol] = record["v"]
+    elif op == "set":
+        state.setdefault(symbol, {}).update(record["v"])
+    elif op == "del":
+        state.pop(symbol, None)
+
+
+class TradeStateStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(".journal")
+        self._source: Callable[[], dict] | None = None
+        self._journal = None  # 저널 append 핸들 (첫 기록 때 열림)
+        self._records = 0  # 마지막 스냅샷 이후 저널 기록 수
+        self._generation = 0  # 스냅샷이 교체될 때마다 +1 (오래된 압축 결과 폐기용)
+        self._timer: threading.Timer | None = None
+        self._timer_immediate = False
+        self._compact_lock = threading.Lock()
+        self._stats = {"records": 0, "fsyncs": 0, "compactions": 0, "errors": 0}
+
+    def attach(self, source: Callable[[], dict]) -> None:
+        """압축 시 스냅샷으로 쓸 현재 상태 dict를 돌려주는 함수 (공용 lock 안에서 호출됨)."""
+        self._source = source
+
+    # --- 복구 ---
+    def load(self) -> dict:
+        """스냅샷 + 저널 재생. 저널을 재생했으면 바로 새 스냅샷으로 압축."""
+        with trade_state_lock:
+            try:
+                state = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                state = {}
+            except json.JSONDecodeError as e:
+                logger.warning(f"거래 상태 스냅샷 손상, 저널만 재생: {e}")
+                state = {}
+            replayed = 0
+            try:
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.warning(f"거래 상태 저널의 끊긴 마지막 기록을 무시합니다 ({replayed}건 재생 후)")
+                            break
+                        _apply(state, record)
+                        replayed += 1
+            except FileNotFoundError:
+                pass
+            if replayed:
+                logger.info(f"거래 상태 저널 {replayed}건 재생")
+                self.save_all(state)
+            return state
+
+    # --- 저널 ---
+    def put(self, symbol: str, state: dict, durable: bool = False) -> None:
+        self._append({"op": "put", "s": symbol, "v": state}, durable)
+
+    def update(self, symbol: str, fields: dict, durable: bool = False) -> None:
+        self._append({"op": "set", "s": symbol, "v": fields}, durable)
+
+    def delete(self, symbol: str, durable: bool = False) -> None:
+        self._append({"op": "del", "s": symbol}, durable)
+
+    def _append(self, record: dict, durable: bool) -> None:
+        line = _dumps(record) + "\n"
+        with trade_state_lock:
+            try:
+                if self._journal is None:
+                    self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._journal = open(self.journal_path, "a", encoding="utf-8")
+                self._journal.write(line)
+                self._journal.flush()
+                if durable:
+                    os.fsync(self._journal.fileno())
+                    self._stats["fsyncs"] += 1
+            except OSError as e:
+                self._stats["errors"] += 1
+                logger.error(f"거래 상태 저널 기록 실패: {e}")
+                return
+            self._records += 1
+            self._stats["records"] += 1
+            self._schedule()
+
+    def _schedule(self) -> None:
+        immediate = self._records >= max(1, settings.STATE_JOURNAL_MAX_RECORDS)
+        if self._timer is not None:
+            if not immediate or self._timer_immediate:
+                return
+            self._timer.cancel()
+        self._timer_immediate = immediate
+        self._timer = threading.Timer(0.0 if immediate else max(0.0, settings.STATE_COMPACT_SEC), self.compact)
+        self._timer.daemon = True
+        self._timer.start()
+
+    # --- 스냅샷 ---
+    def _write_snapshot_tmp(self, text: str) -> str:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return tmp
+
+    def _journal_size(self) -> int:
+        if self._journal is not None:
+            self._journal.flush()
+            return self._journal.tell()
+        try:
+            return self.journal_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _drop_journal_head(self, offset: int) -> None:
+        """저널에서 offset 앞부분(스냅샷에 반영됨)을 제거. 공용 lock 안에서 호출."""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(offset)
+                tail = f.read()
+        except FileNotFoundError:
+            tail = b""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        tmp = self.journal_path.with_suffix(".journal.tmp")
+        with open(tmp, "wb") as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def compact(self) -> None:
+        """현재 상태를 스냅샷으로 교체하고 반영된 저널을 비웁니다 (타이머 스레드)."""
+        if self._source is None:
+            return
+        with self._compact_lock:
+            with trade_state_lock:
+                self._timer = None
+                text = _dumps(self._source())
+                offset = self._journal_size()
+                records = self._records
+                generation = self._generation
+            try:
+                tmp = self._write_snapshot_tmp(text)
+            except OSError as e:
+                self._stats["errors"] += 1
+                logger.error(f"거래 상태 스냅샷 저장 실패: {e}")
+                return
+            with trade_state_lock:
+                if generation != self._generation:
+                    os.unlink(tmp)  # 그 사이 save_all이 더 새 스냅샷을 씀
+                    return
+                try:
+                    os.replace(tmp, self.path)
+                    self._generation += 1
+                    self._drop_journal_head(offset)
+                except OSError as e:
+                    self._stats["errors"] += 1
+                    logger.error(f"거래 상태 압축 실패 (저널 유지): {e}")
+                    return
+                self._records = max(0, self._records - records)
+                self._stats["compactions"] += 1
+
+    def save_all(self, state: dict) -> None:
+        """전체 상태를 즉시 스냅샷으로 저장하고 저널을 비웁니다 (일괄 변경·리콘실리에이션용)."""
+        with trade_state_lock:
+            try:
+                tmp = self._write_snapshot_tmp(_dumps(state))
+                os.replace(tmp, self.path)
+                self._generation += 1
+                self._drop_journal_head(self._journal_size())
+            except OSError as e:
+                self._stats["errors"] += 1
+                logger.error(f"거래 상태 저장 실패: {e}")
+                return
+            self._records = 0
+            self._stats["compactions"] += 1
+
+    def close(self) -> None:
+        """대기 중인 압축 타이머를 취소하고 마지막으로 압축합니다 (종료 시)."""
+        with trade_state_lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.compact()
+
+    def stats(self) -> dict:
+        return {**self._stats, "pendingRecords": self._records}
+
+
+trade_state_store = TradeStateStore(settings.base_dir / "trade_status.json")
@@ -3,6 +3,7 @@ import os
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime, time as dtime, timezone, timedelta
@@ -26,25 +27,36 @@ except ModuleNotFoundError as e:
     print("실행은 루트에서: uvicorn app.main:app --reload --host 0.0.0.0 --port 8000", file=sys.stderr)
     sys.exit(1)
 
-from app.api import kis_order, kis_market, kis_condition
+from app.api import kis_order, kis_market, kis_condition, kis_http
+from app.api.kis_fills import fill_tracker
+from app.api.order_manager import order_manager
+from app.api.kis_retry import get_rate_limiter_stats
+from app.api.kis_realtime import realtime_feed
 from app.core.config import settings
 from app.core.logger import logger
 from app.core.slack import send_slack_notification
 from app.db import models, session
+from app.db.decision_log import decision_log
+from app.db.state_store import trade_state_store
 from app.db.models import OrderType, OrderStatus
 from app.services import portfolio as portfolio_service
 from app.services import reconciliation as reconciliation_service
 from app.services import indicators as indicators_service
 from app.services import stock_scoring as stock_scoring_service
+from app.services import trading_rules
 from app.services import llm_advisor as llm_advisor_service
-from app.strategies.registry import StrategyRegistry
 from app.services.websocket_manager import ws_manager
+from app.services.indicator_state import indicator_book
+from app.services.daily_ledger import daily_ledger
+from app.services.positions import Position, PositionBook
+from app.services.strategy_cache import strategy_cache
 
 # --- Global Variables & Settings ---
-TRADE_STATUS_FILE: Path = settings.base_dir / "trade_status.json"
+TRADE_STATUS_FILE: Path = trade_state_store.path
 scheduler = AsyncIOScheduler()
 target_symbols: list[str] = []
-trade_status: dict = {}
+trade_status = PositionBook()  # symbol → Position (보유 종목 색인 포함)
+trade_state_store.attach(lambda: trade_status.to_dict())  # 압축 시 스냅샷 원본 (load_trade_status가 재할당해도 최신 장부)
 trading_enabled = True  # API로 on/off 가능
 _last_slot_scan_time: float = 0.0  # 빈 자리 채우기: 마지막 종목 검색 시각 (초)
 
@@ -82,6 +94,18 @@ def _is_permanent_reject(error_msg: str) -> bool:
     return any(kw in error_msg for kw in _PERMANENT_REJECT_KEYWORDS)
 # LLM 매수 거부 시 종목별 쿨다운 (symbol -> 쿨다운 만료 시각 epoch)
 _llm_reject_cooldown: dict[str, float] = {}
+# 실시간 체결 이벤트 평가: 마지막 정규 사이클의 예산/리스크 파라미터(ts 포함)를 재사용
+_last_cycle_params: dict = {}
+_CYCLE_PARAMS_MAX_AGE = 60.0  # 이보다 오래된 파라미터면 이벤트 평가 생략 (다음 정규 사이클 대기)
+_realtime_last_eval: dict[str, float] = {}  # symbol -> 마지막 이벤트 평가 시각 (monotonic)
+# 종목별 평가 엔진: 종목마다 독립 태스크로 평가 (같은 종목은 종목별 락으로 직렬화)
+_engine_executor = ThreadPoolExecutor(max_workers=max(1, settings.ENGINE_MAX_WORKERS), thread_name_prefix="engine")
+_engine_inflight: set[str] = set()  # 스레드풀에 대기/실행 중인 종목
+_engine_inflight_lock = threading.Lock()
+_symbol_locks: dict[str, threading.Lock] = {}
+_symbol_locks_guard = threading.Lock()
+# 매수 진행 중(주문~잔고 동기화) 종목: 슬롯 계산에 보유로 포함해 동시 매수로 MAX_SLOTS 초과 방지
+_pending_buys: set[str] = set()
 # 당일 매도 종목 재진입 방지 (매일 아침 초기화)
 _daily_sold_symbols: set[str] = set()
 
@@ -91,38 +115,18 @@ DEFAULT_STRATEGY_PARAMS = {"ma_period": 20, "trailing_stop_pct": 4.0, "k": getat
 # 지수 필터 캐시 (매 사이클마다 API 호출 방지, 60초 유효)
 _market_filter_cache: dict = {"ok": True, "ts": 0.0, "reason": ""}
 _MARKET_FILTER_TTL = 60  # 초
-_EMPTY_POSITION = {"bought": False, "purchase_price": 0.0, "quantity": 0, "stop_price": 0.0}
-
-
-def _get_tick_size(price: float) -> int:
-    """한국 주식 호가 단위를 반환합니다."""
-    if price < 2000:
-        return 1
-    elif price < 5000:
-        return 5
-    elif price < 20000:
-        return 10
-    elif price < 50000:
-        return 50
-    elif price < 200000:
-        return 100
-    elif price < 500000:
-        return 500
-    else:
-        return 1000
+_EMPTY_POSITION = Position()  # 읽기 전용 기본값 (미등록 종목 조회용)
 
 
-def _calc_buy_limit_price(current_price: float, tick_offset: int = 2) -> int:
-    """현재가 + N호가 지정가를 계산합니다. tick_offset=0이면 0 반환(시장가)."""
-    if tick_offset <= 0:
-        return 0
-    tick = _get_tick_size(current_price)
-    return int(current_price + tick * tick_offset)
+# 호가 단위/지정가 계산은 백테스트와 공용 (app.services.trading_rules)
+_get_tick_size = trading_rules.get_tick_size
+_calc_buy_limit_price = trading_rules.calc_buy_limit_price
 
 
 def _clear_position(symbol: str):
     """보유 포지션 상태를 초기화합니다."""
-    trade_status[symbol] = dict(_EMPTY_POSITION)
+    with _trade_state_lock:
+        trade_status.reset(symbol)
 
 
 def _resolve_sell_quantity(symbol: str, requested_qty: int) -> int:
@@ -137,7 +141,7 @@ def _resolve_sell_quantity(symbol: str, requested_qty: int) -> int:
     if actual_qty <= 0:
         logger.warning(f"[{symbol}] 매도 요청({requested_qty}주)이나 KIS 보유=0 → 로컬 포지션 정리 후 스킵")
         _clear_position(symbol)
-        save_trade_status()
+        _persist_position(symbol, durable=True)
         return 0
     if actual_qty < requested_qty:
         logger.warning(
@@ -169,7 +173,7 @@ def _estimate_buy_execution_price(symbol: str, requested_price: int, fallback_pr
 def _compute_buy_budget(slot_limit: int, base_ratio: float, budget_multiplier: float = 1.0) -> tuple[float, int, int]:
     """주문가능현금 기준으로 종목당 매수 예산을 계산합니다."""
     cash_balance = kis_order.get_orderable_cash_balance()
-    current_holdings = sum(1 for st in trade_status.values() if st.get("bought"))
+    current_holdings = len(_held_positions())
     open_slots = max(1, slot_limit - current_holdings)
     budget_per_stock = (cash_balance * base_ratio * budget_multiplier) / open_slots
     return budget_per_stock, current_holdings, cash_balance
@@ -233,66 +237,48 @@ def _is_entry_allowed_time() -> bool:
     now = datetime.now(KST)
     if now.weekday() >= 5:
         return False
-    t = now.time()
-    no_before_min = getattr(settings, "ENTRY_NO_BEFORE_MINUTE", 30) or 0
-    no_after_h = getattr(settings, "ENTRY_NO_AFTER_HOUR", 14)
-    no_after_m = getattr(settings, "ENTRY_NO_AFTER_MINUTE", 30)
-    if no_before_min > 0 and t < dtime(9, no_before_min):
-        return False
-    if no_after_h is not None and no_after_m is not None:
-        if t >= dtime(no_after_h, no_after_m):
-            return False
-    return True
+    return trading_rules.is_entry_allowed_at(now.time())
 
 
 def get_strategy_for_symbol(symbol: str):
-    """종목별 StrategyConfig를 조회해 전략 인스턴스를 반환합니다. 없으면 기본 변동성 돌파."""
-    db = session.SessionLocal()
-    try:
-        row = (
-            db.query(models.StrategyConfig)
-            .filter(models.StrategyConfig.symbol == symbol, models.StrategyConfig.is_active == True)
-            .order_by(models.StrategyConfig.updated_at.desc())
-            .first()
-        )
-        if row and row.strategy_name:
-            params = json.loads(row.parameters) if isinstance(row.parameters, str) else (row.parameters or {})
-            return StrategyRegistry.get_strategy(row.strategy_name, params)
-    except Exception as e:
-        logger.debug(f"종목 {symbol} 전략 설정 조회 실패, 기본 전략 사용: {e}")
-    finally:
-        db.close()
-    return StrategyRegistry.get_strategy(DEFAULT_STRATEGY_NAME, DEFAULT_STRATEGY_PARAMS)
+    """종목별 StrategyConfig 전략 인스턴스 (strategy_cache 재사용). 설정이 없으면 기본 변동성 돌파."""
+    return strategy_cache.get(symbol, DEFAULT_STRATEGY_NAME, DEFAULT_STRATEGY_PARAMS)
 
 # --- State Persistence Functions ---
 def save_trade_status():
-    """거래 상태를 JSON 파일에 저장합니다. (스레드 안전 — 공용 lock 보유)"""
+    """거래 상태 전체를 스냅샷으로 즉시 저장합니다 (일괄 변경용, 종목 단위 변경은 _persist_position)."""
+    with _trade_state_lock:
+        trade_state_store.save_all(trade_status.to_dict())
+
+
+def _persist_position(symbol: str, durable: bool = False) -> None:
+    """종목 포지션 하나를 상태 저널에 기록합니다. durable=True(체결 반영)면 fsync."""
     with _trade_state_lock:
-        TRADE_STATUS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(TRADE_STATUS_FILE, "w", encoding="utf-8") as f:
-            json.dump(trade_status, f, indent=4, ensure_ascii=False)
+        position = trade_status.get(symbol)
+        if position is None:
+            trade_state_store.delete(symbol, durable)
+        else:
+            trade_state_store.put(symbol, position.to_dict(), durable)
 
 
 def load_trade_status():
-    """JSON 파일에서 거래 상태를 불러옵니다. 조건검색 사용 시 HTS 조건검색 결과로 대상 종목을 갱신합니다."""
+    """스냅샷 + 저널에서 거래 상태를 복구합니다. 조건검색 사용 시 HTS 조건검색 결과로 대상 종목을 갱신합니다."""
     global trade_status, target_symbols
-    try:
-        with open(TRADE_STATUS_FILE, "r", encoding="utf-8") as f:
-            trade_status = json.load(f)
+    trade_status = PositionBook.from_dict(trade_state_store.load())
+    if len(trade_status):
         logger.info("거래 상태를 파일에서 성공적으로 불러왔습니다.")
-    except (FileNotFoundError, json.JSONDecodeError):
-        trade_status = {}
+    else:
         logger.warning("거래 상태 파일을 찾을 수 없어 새로 생성합니다.")
 
     # P7: 미보유 종목이 20개 초과 시 일괄 제거 (누적 방지)
-    non_holding = [s for s, st in trade_status.items() if not st.get("bought")]
+    non_holding = [s for s, pos in trade_status.items() if not pos.bought and not pos.pending_buy]
     if len(non_holding) > 20:
         for s in non_holding:
-            del trade_status[s]
+            trade_status.remove(s)
         logger.info(f"trade_status 정리: 미보유 {len(non_holding)}건 제거")
         save_trade_status()
 
-    holding = [s for s, st in trade_status.items() if st.get("bought")]
+    holding = trade_status.held_symbols()
     if settings.USE_VOLUME_RANK:
         # 거래량 상위 API 사용 (HTS 불필요)
         dynamic_list = kis_condition.get_top_volume_stocks()
@@ -317,40 +303,19 @@ def load_trade_status():
             target_symbols = ["005930", "000660"]
 
     for symbol in target_symbols:
-        trade_status.setdefault(
-            symbol,
-            {"bought": False, "purchase_price": 0.0, "quantity": 0, "stop_price": 0.0},
-        )
+        trade_status.watch(symbol)
 
 def _get_today_pl_and_assets():
-    """당일 실현손익과 총자산을 (today_pl, total_assets)로 반환. 조회 실패 시 (0, None)."""
-    KST = timezone(timedelta(hours=9))
-    today_start = datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0).astimezone(timezone.utc).replace(tzinfo=None)
-    db = session.SessionLocal()
-    try:
-        rows = (
-            db.query(models.TradeLog)
-            .filter(
-                models.TradeLog.timestamp >= today_start,
-                models.TradeLog.order_type == OrderType.SELL,
-                models.TradeLog.status == OrderStatus.EXECUTED,
-            )
-            .all()
-        )
-        today_pl = sum(r.realized_pl or 0.0 for r in rows)
-    except Exception:
-        today_pl = 0.0
-    finally:
-        db.close()
+    """당일 실현손익(메모리 원장)과 총자산을 (today_pl, total_assets)로 반환. 총자산 조회 실패 시 (today_pl, None)."""
+    today_pl = daily_ledger.realized_pl()
     try:
         cash = kis_order.get_cash_balance()
         total_holding = 0.0
-        for sym, st in trade_status.items():
-            if st.get("bought"):
-                try:
-                    total_holding += kis_market.get_current_price(sym) * st["quantity"]
-                except Exception:
-                    total_holding += st.get("purchase_price", 0) * st.get("quantity", 0)
+        held = _held_positions()
+        prices = kis_market.get_current_prices(list(held))
+        for sym, pos in held.items():
+            price = prices.get(sym) or pos.purchase_price
+            total_holding += price * pos.quantity
         total_assets = cash + total_holding
         return today_pl, total_assets
     except Exception:
@@ -364,49 +329,33 @@ def _get_portfolio_pl(include_unrealized: bool = False) -> tuple[float, float |
         return realized_pl, total_assets
 
     unrealized_pl = 0.0
-    for sym, st in trade_status.items():
-        if not st.get("bought"):
-            continue
-        qty = st.get("quantity", 0) or 0
-        purchase_price = st.get("purchase_price", 0) or 0
-        if qty <= 0 or purchase_price <= 0:
-            continue
-        try:
-            current_price = kis_market.get_current_price(sym)
-            unrealized_pl += (current_price - purchase_price) * qty
-        except Exception:
+    held = _held_positions()
+    prices = kis_market.get_current_prices(list(held))
+    for sym, pos in held.items():
+        qty = pos.quantity or 0
+        purchase_price = pos.purchase_price or 0
+        current_price = prices.get(sym)
+        if qty <= 0 or purchase_price <= 0 or current_price is None:
             continue
+        unrealized_pl += (current_price - purchase_price) * qty
     return realized_pl + unrealized_pl, total_assets
 
 
 def _get_today_trade_count() -> int:
-    """당일 체결 건수(BUY+SELL 성공)를 반환합니다."""
-    KST = timezone(timedelta(hours=9))
-    today_start = datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0).astimezone(timezone.utc).replace(tzinfo=None)
-    db = session.SessionLocal()
-    try:
-        return (
-            db.query(models.TradeLog)
-            .filter(
-                models.TradeLog.timestamp >= today_start,
-                models.TradeLog.status == OrderStatus.EXECUTED,
-            )
-            .count()
-        )
-    except Exception:
-        return 0
-    finally:
-        db.close()
+    """당일 체결 건수(BUY+SELL 성공)를 반환합니다 (메모리 원장)."""
+    return daily_ledger.trade_count()
 
 
 def _log_trade(symbol: str, order_type: str, price: float, quantity: int, status: OrderStatus, kis_response: dict | None, realized_pl: float | None = None):
-    """주문 결과를 DB에 기록합니다. SELL 시 realized_pl(매도금액-원금)을 넘기면 실현손익으로 저장합니다."""
+    """주문 결과를 DB에 기록하고 당일 원장에 반영합니다. SELL 시 realized_pl(매도금액-원금)을 넘기면 실현손익으로 저장합니다."""
+    order_enum = OrderType.BUY if order_type == "BUY" else OrderType.SELL
+    trade_id = None
     try:
         db = session.SessionLocal()
         try:
             log = models.TradeLog(
                 symbol=symbol,
-                order_type=OrderType.BUY if order_type == "BUY" else OrderType.SELL,
+                order_type=order_enum,
                 price=price,
                 quantity=quantity,
                 status=status,
@@ -415,10 +364,12 @@ def _log_trade(symbol: str, order_type: str, price: float, quantity: int, status
             )
             db.add(log)
             db.commit()
+            trade_id = log.id
         finally:
             db.close()
     except Exception as e:
         logger.error(f"거래 로그 저장 실패: {e}")
+    daily_ledger.record(order_enum, status, realized_pl, trade_id)
 
 
 # --- Trading Jobs ---
@@ -443,21 +394,44 @@ def run_trading_strategy():
         _trading_job_lock.release()
 
 
-def _run_trading_strategy_impl():
-    """run_trading_strategy 실제 로직 (락 획득 후 호출)."""
-    global target_symbols, _last_slot_scan_time
-    with _trade_state_lock:
-        _run_trading_strategy_impl_locked()
+def _sync_realtime_symbols():
+    """실시간 시세 구독 종목을 보유 종목 + 대상 종목으로 맞춥니다 (보유 종목 우선)."""
+    if not settings.USE_REALTIME_FEED:
+        return
+    holdings = list(_held_positions())
+    realtime_feed.set_symbols(holdings + [s for s in target_symbols if s not in holdings])
 
 
-def _run_trading_strategy_impl_locked():
-    """trade_status 락을 보유한 상태에서 실행되는 자동매매 로직."""
-    global target_symbols, _last_slot_scan_time
+def _on_realtime_tick(symbol: str, tick: dict) -> None:
+    """실시간 체결 리스너 (이벤트 루프 스레드). 종목별 최소 간격으로 엔진에 평가를 넣습니다."""
+    if not trading_enabled or not _is_trading_session() or symbol not in target_symbols:
+        return
+    now = time.monotonic()
+    if now - _realtime_last_eval.get(symbol, 0.0) < settings.REALTIME_EVAL_MIN_INTERVAL:
+        return
+    params = dict(_last_cycle_params)
+    ts = params.pop("ts", 0.0)
+    if not params or time.time() - ts > _CYCLE_PARAMS_MAX_AGE:
+        return
+    if _schedule_evaluation(symbol, params):
+        _realtime_last_eval[symbol] = now
+
+
+def _run_trading_strategy_impl():
+    """
+    run_trading_strategy 실제 로직 (job 락 획득 후 호출).
+    대상 종목 갱신·예산/리스크 계산 후 종목별 평가를 엔진 스레드풀에 넣고 바로 반환합니다.
+    이전 사이클의 평가가 아직 진행 중인 종목(주문 동기화·LLM 대기 등)은 이번 사이클에서 건너뜀.
+    """
+    global target_symbols, _last_slot_scan_time, _last_cycle_params
 
     # --- 빈 자리 채우기: 동적 종목(거래량/조건검색) 사용 시, 슬롯 제한 및 주기 재검색 ---
     use_dynamic = settings.USE_VOLUME_RANK or settings.USE_CONDITION_SEARCH
     if use_dynamic:
-        current_holdings = [s for s, st in trade_status.items() if st.get("bought")]
+        with _trade_state_lock:
+            # 매수 진행 중(슬롯 예약) 종목도 보유로 취급해 감시 목록에서 빠지지 않게 함
+            current_holdings = trade_status.held_symbols()
+            current_holdings += sorted(s for s in _pending_buys if s not in current_holdings)
         holding_count = len(current_holdings)
         max_slots = settings.MAX_SLOTS or 3
         scan_interval = settings.SCAN_INTERVAL or 60
@@ -480,21 +454,28 @@ def _run_trading_strategy_impl_locked():
                     target_symbols = current_holdings + ranked
                 else:
                     target_symbols = current_holdings + real_targets[:slots_needed]
-                for symbol in target_symbols:
-                    trade_status.setdefault(
-                        symbol,
-                        {"bought": False, "purchase_price": 0.0, "quantity": 0, "stop_price": 0.0},
-                    )
+                with _trade_state_lock:
+                    for symbol in target_symbols:
+                        trade_status.watch(symbol)
                 _last_slot_scan_time = time.time()
                 logger.info(f"타겟 리스트 갱신: {target_symbols} (보유 {holding_count} + 신규 {len(target_symbols) - holding_count})")
             except Exception as e:
                 logger.error(f"빈 자리 채우기 검색 실패: {e}")
 
     logger.debug("자동 매매 로직 실행: 매수 및 트레일링 스톱 모니터링")
+    # 미체결 주문 관리: 당일 체결조회 1회로 갱신 → 제한 시간 지난 잔량 취소 → 오래된 지정가 재호가
+    order_manager.maintain(_reprice_buy_order)
     try:
         ratio = max(0.01, min(1.0, settings.BUDGET_RATIO))
         effective_max_slots = settings.MAX_SLOTS or 3
         budget_multiplier = 1.0
+        # 당일 연패: MAX_CONSECUTIVE_LOSSES 이상이면 슬롯 1개 축소 + 종목당 예산 BUDGET_CUT_ON_STREAK 배
+        loss_streak = daily_ledger.loss_streak()
+        max_losses = getattr(settings, "MAX_CONSECUTIVE_LOSSES", 0) or 0
+        if max_losses > 0 and loss_streak >= max_losses:
+            effective_max_slots = max(1, effective_max_slots - 1)
+            budget_multiplier = max(0.0, min(1.0, getattr(settings, "BUDGET_CUT_ON_STREAK", 1.0)))
+            logger.debug(f"당일 {loss_streak}연패 → 슬롯 {effective_max_slots}개, 예산 {budget_multiplier:.0%}")
         budget_per_stock, current_holdings, cash_balance = _compute_buy_budget(effective_max_slots, ratio)
     except Exception as e:
         logger.error(f"주문가능현금 조회 실패: {e}")
@@ -514,428 +495,475 @@ def _run_trading_strategy_impl_locked():
         if max_trades > 0 and today_trades >= max_trades:
             no_new_buy = True
             logger.debug(f"일일 매매 횟수 한도 ({today_trades} >= {max_trades}) → 신규 매수 중단")
+    # 후보 전 종목 현재가를 앱 이벤트 루프에서 동시 조회 → 종목별 평가의 get_current_price는 캐시 hit
+    kis_market.prefetch_quotes(target_symbols)
+    cycle_params = {
+        "ratio": ratio,
+        "effective_max_slots": effective_max_slots,
+        "budget_multiplier": budget_multiplier,
+        "no_new_buy": no_new_buy,
+    }
+    _last_cycle_params = {**cycle_params, "ts": time.time()}
+    _sync_realtime_symbols()
     for symbol in target_symbols:
-        try:
-            strategy = get_strategy_for_symbol(symbol)
-            trailing_pct = strategy.get_parameters().get("trailing_stop_pct", 3.0)
-            current_price = kis_market.get_current_price(symbol)
+        _schedule_evaluation(symbol, cycle_params)
 
-            # 1. 매수 상태: 트레일링 스톱 및 전략 SELL 신호 확인
-            if trade_status.get(symbol, {}).get("bought"):
-                stop_price = trade_status[symbol]["stop_price"]
-                quantity = trade_status[symbol]["quantity"]
-
-                # 3단계 익절: stage1 부분익절+보호선 이동, stage2 추가 1/3 매도, 나머지 트레일링
-                # 임계는 config (STAGE1/STAGE2_TAKE_PROFIT_PCT, BREAKEVEN_OFFSET_PCT)
-                purchase_price = trade_status[symbol].get("purchase_price", 0) or 0
-                initial_quantity = trade_status[symbol].get("initial_quantity", quantity)
-                # 최고가 추적 (트레일링/ATR 손절 기준점 — 현재가가 아닌 최고가 기준)
-                high_price = trade_status[symbol].get("high_price", purchase_price or current_price)
-                if current_price > high_price:
-                    high_price = current_price
-                    trade_status[symbol]["high_price"] = high_price
-                stage1_done = trade_status[symbol].get("stage1_sell_done", False)
-                stage2_done = trade_status[symbol].get("stage2_sell_done", False)
-                stage1_pct = getattr(settings, "STAGE1_TAKE_PROFIT_PCT", 7.0)
-                stage2_pct = getattr(settings, "STAGE2_TAKE_PROFIT_PCT", 9.0)
-                breakeven_offset_pct = getattr(settings, "BREAKEVEN_OFFSET_PCT", -1.5)
-                stage1_trigger = purchase_price * (1 + stage1_pct / 100)
-                stage2_trigger = purchase_price * (1 + stage2_pct / 100)
-                breakeven_stop = purchase_price * (1 + breakeven_offset_pct / 100)
-                if purchase_price <= 0:
-                    pass
-                elif initial_quantity < 3:
-                    # 보유 수량이 3주 미만이면 단계 익절 불가 → 트레일링 스톱에 맡김
-                    if not stage1_done:
-                        logger.debug(f"[{symbol}] 보유 {initial_quantity}주 → 단계 익절 스킵 (트레일링 스톱 유지)")
-                elif not stage1_done and current_price >= stage1_trigger:
-                    # stage1 익절: 1/3 매도 + 손절가를 본절 보호선으로 이동
-                    sell_qty = initial_quantity // 3
-                    if sell_qty <= 0 or quantity < sell_qty:
-                        logger.debug(f"[{symbol}] +{stage1_pct}% 도달했지만 단계 익절 수량 부족으로 stage1 유지 (보유={quantity}, 기준={sell_qty})")
-                        time.sleep(0.2)
-                        continue
-                    if sell_qty > 0 and quantity >= sell_qty:
-                        sell_qty = _resolve_sell_quantity(symbol, sell_qty)
-                        if sell_qty <= 0:
-                            time.sleep(0.2)
-                            continue
-                        try:
-                            res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
-                            pl = (current_price - purchase_price) * sell_qty
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
-                            send_slack_notification(
-                                f"[익절 1/3 +{stage1_pct}%] {symbol} ({sell_qty}주) | "
-                                f"현재가: {current_price:.0f}, 보호선 {breakeven_stop:.0f} ({breakeven_offset_pct:+.1f}%)"
-                            )
-                            trade_status[symbol]["quantity"] = max(0, quantity - sell_qty)
-                            queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
-                        except Exception as e:
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.FAILED, None)
-                            logger.error(f"[{symbol}] 익절 1/3 매도 실패: {e}")
-                            time.sleep(0.2)
-                            continue
-                    # 보호선 이동: 정확한 본절(=매수가) 대신 BREAKEVEN_OFFSET_PCT만큼 아래로 둬서 노이즈 흡수
-                    trade_status[symbol]["stop_price"] = max(trade_status[symbol].get("stop_price", 0), breakeven_stop)
-                    trade_status[symbol]["stage1_sell_done"] = True
-                    logger.info(
-                        f"[{symbol}] +{stage1_pct}% 익절 1/3 처리, 손절가 보호선 이동 -> {breakeven_stop:.0f} "
-                        f"({breakeven_offset_pct:+.1f}%)"
-                    )
-                    save_trade_status()
-                    time.sleep(0.2)
-                    continue
-                elif stage1_done and not stage2_done and current_price >= stage2_trigger:
-                    # stage2 익절: 추가 1/3 매도
-                    sell_qty = initial_quantity // 3
-                    remaining = trade_status[symbol]["quantity"]
-                    sell_qty = min(sell_qty, remaining)
-                    if sell_qty > 0:
-                        sell_qty = _resolve_sell_quantity(symbol, sell_qty)
-                        if sell_qty <= 0:
-                            time.sleep(0.2)
-                            continue
-                        try:
-                            res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
-                            pl = (current_price - purchase_price) * sell_qty
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
-                            send_slack_notification(f"[익절 2/3 +{stage2_pct}%] {symbol} ({sell_qty}주) | 현재가: {current_price:.0f}")
-                            trade_status[symbol]["quantity"] = max(0, remaining - sell_qty)
-                            queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
-                        except Exception as e:
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.FAILED, None)
-                            logger.error(f"[{symbol}] 익절 2/3 매도 실패: {e}")
-                            time.sleep(0.2)
-                            continue
-                    trade_status[symbol]["stage2_sell_done"] = True
-                    save_trade_status()
-                    time.sleep(0.2)
-                    continue
-
-                # 전략 SELL 신호 확인 (RSI 과매수)
-                signal, _ = strategy.check_signal(symbol, current_price=current_price)
-                if signal == "SELL":
-                    if initial_quantity < 3:
-                        # 소량 보유 → 전량 매도 (단계 익절 불가한 포지션)
-                        sell_qty = _resolve_sell_quantity(symbol, quantity)
-                        if sell_qty <= 0:
-                            time.sleep(0.2)
-                            continue
-                        logger.info(f"[{symbol}] RSI 매도 ({sell_qty}주 전량)")
-                        try:
-                            res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
-                            pl = (current_price - purchase_price) * sell_qty
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
-                            send_slack_notification(f"[RSI 매도] {symbol} ({sell_qty}주) | 현재가: {current_price:.0f}")
-                            _clear_position(symbol)
-                            _daily_sold_symbols.add(symbol)
-                            save_trade_status()
-                            queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
-                        except Exception as e:
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.FAILED, None)
-                            logger.error(f"[{symbol}] 매도 주문 실패: {e}")
-                        time.sleep(0.2)
-                        continue
-                    else:
-                        # 다량 보유 → 트레일링 타이트닝 (추세추종 유지, 전량매도 대신 손절폭 절반 축소)
-                        tight_stop = high_price * (1 - trailing_pct / 200)
-                        if tight_stop > trade_status[symbol]["stop_price"]:
-                            trade_status[symbol]["stop_price"] = tight_stop
-                            logger.info(f"[{symbol}] RSI 과매수 → 트레일링 타이트닝 (손절가 {tight_stop:.0f}, 최고가 {high_price:.0f})")
-                            save_trade_status()
-                        time.sleep(0.2)
-                        continue
-
-                # 단계별 최대 손실폭 제한 (-5% 반절, -8% 전량)
-                max_loss_half = getattr(settings, "MAX_LOSS_PCT_HALF", -5.0)
-                max_loss_full = getattr(settings, "MAX_LOSS_PCT_FULL", -8.0)
-                if purchase_price > 0:
-                    loss_pct = (current_price - purchase_price) / purchase_price * 100
-                    half_cut_done = trade_status[symbol].get("half_cut_done", False)
-                    # -8% 이하: 전량 손절
-                    if loss_pct <= max_loss_full:
-                        logger.info(f"[{symbol}] 최대 손실폭 전량 손절! ({loss_pct:.1f}%) 현재가: {current_price}, 매수가: {purchase_price}")
-                        sell_qty = _resolve_sell_quantity(symbol, quantity)
-                        if sell_qty <= 0:
-                            continue
-                        try:
-                            res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
-                            pl = (current_price - purchase_price) * sell_qty
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
-                            send_slack_notification(f"[전량 손절 {loss_pct:.1f}%] {symbol} ({sell_qty}주) | 현재가: {current_price:.0f}")
-                            _clear_position(symbol)
-                            _daily_sold_symbols.add(symbol)
-                            save_trade_status()
-                            queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
-                        except Exception as e:
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.FAILED, None)
-                            logger.error(f"[{symbol}] 전량 손절 매도 실패: {e}")
-                        continue
-                    # -5% 이하: 1/2 손절 (1회만)
-                    if loss_pct <= max_loss_half and not half_cut_done and quantity >= 2:
-                        sell_qty = quantity // 2
-                        logger.info(f"[{symbol}] 최대 손실폭 1/2 손절! ({loss_pct:.1f}%) 현재가: {current_price}, 매수가: {purchase_price}")
-                        sell_qty = _resolve_sell_quantity(symbol, sell_qty)
-                        if sell_qty <= 0:
-                            continue
-                        try:
-                            res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
-                            pl = (current_price - purchase_price) * sell_qty
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
-                            send_slack_notification(f"[1/2 손절 {loss_pct:.1f}%] {symbol} ({sell_qty}주) | 현재가: {current_price:.0f}")
-                            trade_status[symbol]["quantity"] = max(0, quantity - sell_qty)
-                            trade_status[symbol]["half_cut_done"] = True
-                            save_trade_status()
-                            queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
-                        except Exception as e:
-                            _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.FAILED, None)
-                            logger.error(f"[{symbol}] 1/2 손절 매도 실패: {e}")
-                        continue
-
-                # 손절 조건 확인 (ATR 기반 또는 트레일링 스톱)
-                use_atr = getattr(settings, "USE_ATR_STOP", False) or strategy.get_parameters().get("use_atr_stop", False)
-                atr_mult = getattr(settings, "ATR_MULTIPLIER", 1.5)
-                if use_atr and trade_status[symbol].get("atr") is not None:
-                    atr = trade_status[symbol]["atr"]
-                    atr_floor = high_price - atr * atr_mult
-                    if atr_floor > stop_price:
-                        stop_price = atr_floor
-                if current_price <= stop_price:
-                    stop_type = "ATR 손절" if (not stage1_done and use_atr) else "트레일링 스톱"
-                    logger.info(f"[{symbol}] {stop_type} 매도! 현재가: {current_price}, 손절가: {stop_price}")
-                    sell_qty = _resolve_sell_quantity(symbol, quantity)
-                    if sell_qty <= 0:
-                        continue
-                    try:
-                        res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
-                        pl = (current_price - purchase_price) * sell_qty
-                        _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
-                        send_slack_notification(f"[{stop_type}] {symbol} ({sell_qty}주) | 현재가: {current_price:.0f}")
-                        _clear_position(symbol)
-                        _daily_sold_symbols.add(symbol)
-                        save_trade_status()
-                        queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
-                    except Exception as e:
-                        _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.FAILED, None)
-                        logger.error(f"[{symbol}] 매도 주문 실패: {e}")
-                    continue
-
-                # 트레일링 스톱 상향: stage1 전에는 ATR 손절만 유지, stage1 후에 트레일링 활성
-                if not stage1_done and initial_quantity >= 3:
-                    # stage1 전: ATR 손절가만 갱신 (최고가 기준, 상향만)
-                    if use_atr and trade_status[symbol].get("atr") is not None:
-                        atr = trade_status[symbol]["atr"]
-                        atr_stop = high_price - atr * atr_mult
-                        if atr_stop > stop_price:
-                            trade_status[symbol]["stop_price"] = atr_stop
-                            logger.debug(f"[{symbol}] stage1 전 ATR 손절가 상향 -> {atr_stop:.0f} (최고가 {high_price:.0f})")
-                            save_trade_status()
-                else:
-                    # stage1 후: 트레일링 스톱 활성 (최고가 기준, ATR floor 반영)
-                    new_stop_price = high_price * (1 - trailing_pct / 100)
-                    if use_atr and trade_status[symbol].get("atr") is not None:
-                        atr = trade_status[symbol]["atr"]
-                        atr_floor = high_price - atr * atr_mult
-                        new_stop_price = max(new_stop_price, atr_floor)
-                    if new_stop_price > stop_price:
-                        trade_status[symbol]["stop_price"] = new_stop_price
-                        logger.debug(f"[{symbol}] 트레일링 스톱 상향 -> {new_stop_price:.0f} (최고가 {high_price:.0f})")
-                        save_trade_status()
-
-            # 2. 미매수 상태: 매수 신호 확인 (진입 허용 시간 + 일별 리스크 통과 시)
+
+def _get_symbol_lock(symbol: str) -> threading.Lock:
+    """종목별 락 (같은 종목의 엔진 평가·수동 매매·장마감 매도를 직렬화)."""
+    with _symbol_locks_guard:
+        lock = _symbol_locks.get(symbol)
+        if lock is None:
+            lock = _symbol_locks[symbol] = threading.Lock()
+        return lock
+
+
+def _position_snapshot(symbol: str) -> Position:
+    """종목 포지션 복사본 (공용 락은 복사하는 순간에만 보유)."""
+    with _trade_state_lock:
+        return (trade_status.get(symbol) or _EMPTY_POSITION).copy()
+
+
+def _held_positions() -> dict[str, Position]:
+    """보유 종목 포지션 복사본 {symbol: Position} (보유 색인만 순회)."""
+    with _trade_state_lock:
+        return {s: pos.copy() for s, pos in trade_status.held()}
+
+
+def _update_position(symbol: str, save: bool = True, durable: bool = False, **fields) -> None:
+    """
+    보유 포지션 필드를 갱신합니다. 그 사이 정리된 포지션(리컨실 등)이면 무시.
+    save=True면 바뀐 필드만 상태 저널에 기록 (durable=True: 체결 반영이라 fsync).
+    """
+    with _trade_state_lock:
+        position = trade_status.get(symbol)
+        if position is None or not position.bought:
+            return
+        trade_status.update(symbol, fields)
+        if save:
+            trade_state_store.update(symbol, fields, durable=durable)
+
+
+def _close_position(symbol: str) -> None:
+    """전량 매도 후 포지션 정리 + 당일 재진입 방지 등록."""
+    with _trade_state_lock:
+        _clear_position(symbol)
+        _daily_sold_symbols.add(symbol)
+        _persist_position(symbol, durable=True)
+
+
+def _reserve_buy_slot(symbol: str, slot_limit: int) -> bool:
+    """보유 + 매수 진행 중 종목 수가 슬롯 한도 미만이면 이 종목 몫으로 슬롯을 예약합니다."""
+    with _trade_state_lock:
+        if symbol in _pending_buys:
+            return False
+        holdings = trade_status.held_count()
+        if holdings + len(_pending_buys) >= slot_limit:
+            return False
+        _pending_buys.add(symbol)
+        return True
+
+
+def _release_buy_slot(symbol: str) -> None:
+    with _trade_state_lock:
+        _pending_buys.discard(symbol)
+
+
+def _schedule_evaluation(symbol: str, params: dict) -> bool:
+    """종목 평가를 엔진 스레드풀에 넣습니다. 같은 종목이 이미 대기/실행 중이면 False."""
+    with _engine_inflight_lock:
+        if symbol in _engine_inflight:
+            return False
+        _engine_inflight.add(symbol)
+    try:
+        future = _engine_executor.submit(_evaluate_symbol, symbol, **params)
+    except RuntimeError:
+        # 종료 중 (executor shutdown)
+        with _engine_inflight_lock:
+            _engine_inflight.discard(symbol)
+        return False
+    future.add_done_callback(lambda _f: _finish_evaluation(symbol))
+    return True
+
+
+def _finish_evaluation(symbol: str) -> None:
+    with _engine_inflight_lock:
+        _engine_inflight.discard(symbol)
+
+
+def _evaluate_symbol(symbol: str, *, ratio: float, effective_max_slots: int, budget_multiplier: float, no_new_buy: bool):
+    """
+    종목 하나에 대한 매도(익절/손절/트레일링) 또는 매수 판단·주문. 정규 사이클과 실시간 체결 이벤트가 공용으로 호출.
+    종목별 락으로 같은 종목끼리만 직렬화하고, trade_status 공용 락은 상태 읽기/갱신 순간에만 잡습니다
+    (주문·잔고 동기화·LLM 호출은 공용 락 밖에서 실행 → 수동 매매/리컨실이 사이클에 막히지 않음).
+    """
+    lock = _get_symbol_lock(symbol)
+    if not lock.acquire(blocking=False):
+        logger.debug(f"[{symbol}] 같은 종목 주문/평가 진행 중 → 이번 평가 스킵")
+        return
+    try:
+        strategy = get_strategy_for_symbol(symbol)
+        trailing_pct = strategy.get_parameters().get("trailing_stop_pct", 3.0)
+        current_price = kis_market.get_current_price(symbol)
+        pos = _position_snapshot(symbol)
+        if pos.pending_buy:
+            logger.debug(f"[{symbol}] 매수 주문 체결 대기 중 → 평가 스킵")
+            return
+
+        # 1. 매수 상태: 트레일링 스톱 및 전략 SELL 신호 확인
+        if pos.bought:
+            _evaluate_holding(symbol, pos, strategy, current_price, trailing_pct)
+        # 2. 미매수 상태: 매수 신호 확인 (진입 허용 시간 + 일별 리스크 통과 시)
+        else:
+            _evaluate_entry(
+                symbol, strategy, current_price, trailing_pct,
+                ratio=ratio,
+                effective_max_slots=effective_max_slots,
+                budget_multiplier=budget_multiplier,
+                no_new_buy=no_new_buy,
+            )
+    except Exception as e:
+        logger.error(f"[{symbol}] 매매 로직 실행 중 에러: {e}")
+    finally:
+        lock.release()
+
+
+def _evaluate_holding(symbol: str, pos: Position, strategy, current_price: float, trailing_pct: float):
+    """
+    보유 종목: 단계 익절, RSI 매도/타이트닝, 최대 손실폭, ATR/트레일링 스톱. (종목 락 보유 상태에서 호출)
+    판단은 trading_rules.decide_exit(백테스트와 공용), 여기서는 주문·기록·알림·상태 반영만 합니다.
+    """
+    rules = trading_rules.ExitRules.from_settings(strategy.get_parameters())
+    decision = trading_rules.decide_exit(
+        pos, current_price, trailing_pct,
+        signal_fn=lambda: strategy.check_signal(symbol, current_price=current_price)[0],
+        rules=rules,
+    )
+    if decision.high_price is not None:
+        _update_position(symbol, save=False, high_price=decision.high_price)
+
+    if decision.kind != "sell":
+        if decision.updates:
+            _update_position(symbol, **decision.updates)
+        if decision.note:
+            if decision.reason == "signal_tighten":
+                logger.info(f"[{symbol}] {decision.note}")
             else:
-                if no_new_buy:
-                    logger.debug(f"[{symbol}] 매수 스킵: 일별 리스크(손실한도/일일횟수) 도달")
-                    time.sleep(0.2)
-                    continue
-                if not getattr(settings, "SAME_DAY_REENTRY", False) and symbol in _daily_sold_symbols:
-                    logger.debug(f"[{symbol}] 매수 스킵: 당일 매도 종목 재진입 방지")
-                    time.sleep(0.2)
-                    continue
-                if symbol in _DAILY_BUY_BLACKLIST:
-                    logger.debug(f"[{symbol}] 매수 스킵: 당일 자동 블랙리스트 (정책성 거부 이력)")
-                    time.sleep(0.2)
-                    continue
-                if not _is_entry_allowed_time():
-                    logger.debug(f"[{symbol}] 매수 스킵: 진입 허용 시간 아님 (09:{settings.ENTRY_NO_BEFORE_MINUTE:02d}~{settings.ENTRY_NO_AFTER_HOUR}:{settings.ENTRY_NO_AFTER_MINUTE:02d})")
-                    time.sleep(0.2)
-                    continue
-                # 시장 지수 필터: 지수가 MA 아래면 매수 금지 (LLM 활성 시 바이패스 → LLM이 판단)
-                market_ok, market_reason = _check_market_filter()
-                if not market_ok and not settings.USE_LLM_ADVISOR:
-                    logger.debug(f"[{symbol}] 매수 스킵: 시장 하락 ({market_reason})")
-                    time.sleep(0.2)
-                    continue
-                # 매수 쿨다운 체크 (이전 실패 후 5분 대기)
-                cooldown_until = _buy_cooldown.get(symbol, 0)
-                now_ts = time.time()
-                if now_ts < cooldown_until:
-                    logger.debug(f"[{symbol}] 매수 쿨다운 중 (남은 {cooldown_until - now_ts:.0f}초)")
-                    time.sleep(0.2)
-                    continue
-                # 만료된 쿨다운 정리
-                expired = [s for s, t in _buy_cooldown.items() if now_ts >= t]
-                for s in expired:
-                    del _buy_cooldown[s]
-                signal, price_at_signal = strategy.check_signal(symbol, current_price=current_price)
-                if signal == "BUY" and price_at_signal is not None:
-                    try:
-                        budget_per_stock, current_holdings, cash_balance = _compute_buy_budget(effective_max_slots, ratio, budget_multiplier)
-                    except Exception as e:
-                        logger.error(f"[{symbol}] 주문가능현금 재조회 실패: {e}")
-                        time.sleep(0.2)
-                        continue
-                    if current_holdings >= effective_max_slots:
-                        logger.debug(f"[{symbol}] 매수 스킵: 유효 슬롯 가득 참 ({current_holdings}/{effective_max_slots})")
-                        time.sleep(0.2)
-                        continue
-                    # 추격매수 방지: 목표가 대비 슬리피지 필터 (LLM 활성 시 바이패스 → LLM이 판단)
-                    max_slippage_pct = getattr(settings, "ENTRY_MAX_BREAKOUT_SLIPPAGE_PCT", 2.0) or 0
-                    if max_slippage_pct > 0 and not settings.USE_LLM_ADVISOR:
-                        target_price = float(getattr(strategy, "last_indicators", {}).get("target_price") or 0)
-                        if target_price > 0 and price_at_signal > target_price * (1 + max_slippage_pct / 100):
-                            logger.debug(
-                                f"[{symbol}] 매수 스킵: 목표가 대비 {max_slippage_pct}% 이상 이격 "
-                                f"(목표가={target_price:.0f}, 현재가={price_at_signal:.0f})"
-                            )
-                            time.sleep(0.2)
-                            continue
-
-                    # 상친거(시가 대비 N% 이상 상승) 매수 방지 — LLM 활성 시 바이패스 (LLM이 판단)
-                    if not settings.USE_LLM_ADVISOR:
-                        max_up_pct = getattr(settings, "ENTRY_MAX_UP_FROM_OPEN_PCT", 10.0) or 0
-                        if max_up_pct > 0:
-                            try:
-                                daily = kis_market.get_daily_ohlcv(symbol, days=1)
-                                if daily and len(daily) > 0:
-                                    today_open = float(daily[0].get("stck_oprc") or 0)
-                                    if today_open > 0 and price_at_signal >= today_open * (1 + max_up_pct / 100):
-                                        logger.debug(f"[{symbol}] 매수 스킵: 시가 대비 {max_up_pct}% 이상 상승 (시가={today_open:.0f}, 현재가={price_at_signal:.0f})")
-                                        time.sleep(0.2)
-                                        continue
-                            except Exception as e:
-                                logger.debug(f"[{symbol}] 시가 조회 실패, 상승률 필터 스킵: {e}")
-
-                    quantity_to_buy = int(budget_per_stock // price_at_signal)
-                    if quantity_to_buy < 1:
-                        logger.debug(f"[{symbol}] 매수 스킵: 예산 부족 (종목당 예산으로 1주 미만)")
-                        time.sleep(0.2)
-                        continue
-
-                    # --- LLM 매수 어드바이저 검증 ---
-                    if settings.USE_LLM_ADVISOR:
-                        # LLM 거부 쿨다운 체크: 이전에 거부당한 종목은 일정 시간 재시도하지 않음
-                        llm_cd_until = _llm_reject_cooldown.get(symbol, 0)
-                        if now_ts < llm_cd_until:
-                            remaining = int(llm_cd_until - now_ts)
-                            logger.debug(f"[{symbol}] LLM 거부 쿨다운 중 (남은 {remaining}초)")
-                            time.sleep(0.2)
-                            continue
-                        # 만료된 LLM 거부 쿨다운 정리
-                        expired_llm = [s for s, t in _llm_reject_cooldown.items() if now_ts >= t]
-                        for s in expired_llm:
-                            del _llm_reject_cooldown[s]
-
-                        try:
-                            ohlcv_for_llm = kis_market.get_daily_ohlcv(symbol, days=5) or []
-                            llm_indicators = dict(getattr(strategy, "last_indicators", {}))
-                            llm_reason = getattr(strategy, "last_decision_reason", "")
-                            # 바이패스된 필터 정보를 LLM에 전달 (LLM이 최종 판단)
-                            if not market_ok:
-                                llm_indicators["market_filter_warning"] = market_reason
-                            slippage_target = float(llm_indicators.get("target_price") or 0)
-                            if slippage_target > 0 and max_slippage_pct > 0:
-                                slippage = (price_at_signal - slippage_target) / slippage_target * 100
-                                if slippage > 0:
-                                    llm_indicators["slippage_from_target_pct"] = round(slippage, 2)
-                            llm_approved, llm_msg = llm_advisor_service.should_buy(
-                                symbol=symbol,
-                                current_price=price_at_signal,
-                                indicators=llm_indicators,
-                                ohlcv_recent=ohlcv_for_llm,
-                                strategy_reason=llm_reason,
-                            )
-                            if not llm_approved:
-                                cooldown_sec = getattr(settings, "LLM_REJECT_COOLDOWN", 1800)
-                                _llm_reject_cooldown[symbol] = time.time() + cooldown_sec
-                                logger.info(f"[{symbol}] LLM 매수 거부: {llm_msg} (쿨다운 {cooldown_sec}초)")
-                                send_slack_notification(f"[LLM 매수 거부] {symbol} | {llm_msg} (재시도 {cooldown_sec//60}분 후)")
-                                time.sleep(0.2)
-                                continue
-                            logger.info(f"[{symbol}] LLM 매수 승인: {llm_msg}")
-                        except Exception as e:
-                            logger.warning(f"[{symbol}] LLM 어드바이저 오류, 매수 진행 (fail-open): {e}")
-
-                    # 장마감 매도 로직과의 경합 방지: LLM 호출 등으로 시간이 걸린 뒤 매수 직전에 재확인
-                    if not trading_enabled:
-                        logger.info(f"[{symbol}] 매수 스킵: 자동매매 비활성화됨 (장마감 매도 진행 중)")
-                        time.sleep(0.2)
-                        continue
-
-                    use_atr_stop = getattr(settings, "USE_ATR_STOP", False)
-                    atr_mult = getattr(settings, "ATR_MULTIPLIER", 1.5)
-                    atr_val = indicators_service.get_atr(symbol) if use_atr_stop else None
-                    if use_atr_stop and atr_val is not None and atr_val > 0:
-                        initial_stop_price = price_at_signal - atr_val * atr_mult
-                    else:
-                        initial_stop_price = price_at_signal * (1 - trailing_pct / 100)
-
-                    try:
-                        tick_offset = getattr(settings, "BUY_PRICE_TICK_OFFSET", 2) or 0
-                        buy_price = _calc_buy_limit_price(price_at_signal, tick_offset)
-                        res = kis_order.place_order(symbol=symbol, quantity=quantity_to_buy, price=buy_price, order_type="BUY")
-                        # 체결 후 KIS 잔고 반영까지 대기 → 후속 익절/손절 매도가 "주문가능수량 초과" 오류로 실패하는 것 방지
-                        synced_qty = kis_order.wait_for_holding_at_least(symbol, quantity_to_buy, timeout=15.0, interval=1.5)
-                        effective_qty = synced_qty if synced_qty > 0 else quantity_to_buy
-                        executed_buy_price = _estimate_buy_execution_price(symbol, buy_price, price_at_signal, effective_qty)
-                        stop_shift = executed_buy_price - price_at_signal
-                        _log_trade(symbol, "BUY", executed_buy_price, effective_qty, OrderStatus.EXECUTED, res)
-                        st_entry = {
-                            "bought": True,
-                            "purchase_price": executed_buy_price,
-                            "quantity": effective_qty,
-                            "initial_quantity": effective_qty,
-                            "high_price": executed_buy_price,
-                            "stop_price": max(0.0, initial_stop_price + stop_shift),
-                            "stage1_sell_done": False,
-                            "stage2_sell_done": False,
-                        }
-                        if use_atr_stop and atr_val is not None:
-                            st_entry["atr"] = atr_val
-                        trade_status[symbol] = st_entry
-                        logger.info(f"[{symbol}] 매수 성공! 체결 추정가: {executed_buy_price:.0f}, 손절가: {st_entry['stop_price']:.0f}")
-                        send_slack_notification(f"[매수 성공] {symbol}({effective_qty}주) | 매수가: {executed_buy_price:.0f}")
-                        save_trade_status()
-                        queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "BUY", "price": executed_buy_price, "quantity": effective_qty})
-                        _buy_cooldown.pop(symbol, None)  # 매수 성공 시 쿨다운 제거
-                    except Exception as e:
-                        _log_trade(symbol, "BUY", price_at_signal, quantity_to_buy, OrderStatus.FAILED, None)
-                        err_str = str(e)
-                        if _is_permanent_reject(err_str):
-                            _DAILY_BUY_BLACKLIST.add(symbol)
-                            logger.warning(
-                                f"[{symbol}] 정책성 매수 거부 감지 → 당일 자동 블랙리스트 등록 (사유: {err_str})"
-                            )
-                        else:
-                            _buy_cooldown[symbol] = time.time() + _BUY_COOLDOWN_SECONDS
-                            logger.error(f"[{symbol}] 매수 주문 실패 (쿨다운 {_BUY_COOLDOWN_SECONDS}초 설정): {e}")
-
-            time.sleep(0.2)
+                logger.debug(f"[{symbol}] {decision.note}")
+        return
 
+    quantity = pos.quantity
+    purchase_price = pos.purchase_price or 0
+    logger.info(
+        f"[{symbol}] {decision.label} 매도 ({decision.quantity}주) 현재가: {current_price}, 매수가: {purchase_price}"
+        + (f", {decision.note}" if decision.note else "")
+    )
+    sell_qty = _resolve_sell_quantity(symbol, decision.quantity)
+    if sell_qty <= 0:
+        return
+    try:
+        res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
+        pl = (current_price - purchase_price) * sell_qty
+        _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
+        send_slack_notification(
+            f"[{decision.label}] {symbol} ({sell_qty}주) | 현재가: {current_price:.0f}"
+            + (f", {decision.note}" if decision.note else "")
+        )
+        if decision.close:
+            _close_position(symbol)
+        else:
+            _update_position(symbol, durable=True, quantity=max(0, quantity - sell_qty), **decision.updates)
+        queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
+    except Exception as e:
+        _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.FAILED, None)
+        logger.error(f"[{symbol}] {decision.label} 매도 실패: {e}")
+
+
+def _evaluate_entry(symbol: str, strategy, current_price: float, trailing_pct: float, *,
+                    ratio: float, effective_max_slots: int, budget_multiplier: float, no_new_buy: bool):
+    """미보유 종목: 진입 필터 → 매수 신호 → 슬롯 예약 후 매수. (종목 락 보유 상태에서 호출)"""
+    if no_new_buy:
+        logger.debug(f"[{symbol}] 매수 스킵: 일별 리스크(손실한도/일일횟수) 도달")
+        return
+    if not getattr(settings, "SAME_DAY_REENTRY", False) and symbol in _daily_sold_symbols:
+        logger.debug(f"[{symbol}] 매수 스킵: 당일 매도 종목 재진입 방지")
+        return
+    if symbol in _DAILY_BUY_BLACKLIST:
+        logger.debug(f"[{symbol}] 매수 스킵: 당일 자동 블랙리스트 (정책성 거부 이력)")
+        return
+    if not _is_entry_allowed_time():
+        logger.debug(f"[{symbol}] 매수 스킵: 진입 허용 시간 아님 (09:{settings.ENTRY_NO_BEFORE_MINUTE:02d}~{settings.ENTRY_NO_AFTER_HOUR}:{settings.ENTRY_NO_AFTER_MINUTE:02d})")
+        return
+    # 시장 지수 필터: 지수가 MA 아래면 매수 금지 (LLM 활성 시 바이패스 → LLM이 판단)
+    market_ok, market_reason = _check_market_filter()
+    if not market_ok and not settings.USE_LLM_ADVISOR:
+        logger.debug(f"[{symbol}] 매수 스킵: 시장 하락 ({market_reason})")
+        return
+    # 매수 쿨다운 체크 (이전 실패 후 5분 대기)
+    cooldown_until = _buy_cooldown.get(symbol, 0)
+    now_ts = time.time()
+    if now_ts < cooldown_until:
+        logger.debug(f"[{symbol}] 매수 쿨다운 중 (남은 {cooldown_until - now_ts:.0f}초)")
+        return
+    # 만료된 쿨다운 정리
+    expired = [s for s, t in list(_buy_cooldown.items()) if now_ts >= t]
+    for s in expired:
+        _buy_cooldown.pop(s, None)
+    signal, price_at_signal = strategy.check_signal(symbol, current_price=current_price)
+    if signal != "BUY" or price_at_signal is None:
+        return
+    # 슬롯 예약: 다른 종목 매수가 동시에 진행 중이어도 보유+진행 중 합계가 한도를 넘지 않도록
+    if not _reserve_buy_slot(symbol, effective_max_slots):
+        logger.debug(f"[{symbol}] 매수 스킵: 유효 슬롯 가득 참 (보유+매수 진행 중 {effective_max_slots}개)")
+        return
+    submitted = False
+    try:
+        submitted = _execute_buy(
+            symbol, strategy, price_at_signal, trailing_pct, now_ts, market_ok, market_reason,
+            ratio=ratio, effective_max_slots=effective_max_slots, budget_multiplier=budget_multiplier,
+        )
+    finally:
+        # 주문이 접수됐으면 슬롯은 체결 반영(_apply_buy_fill) 시 해제
+        if not submitted:
+            _release_buy_slot(symbol)
+
+
+def _execute_buy(symbol: str, strategy, price_at_signal: float, trailing_pct: float, now_ts: float,
+                 market_ok: bool, market_reason: str, *, ratio: float, effective_max_slots: int, budget_multiplier: float) -> bool:
+    """
+    예산/추격매수/LLM 검증 후 매수 주문 → 체결 대기 기록(pending_buy) 등록. (슬롯 예약 상태에서 호출)
+    체결 확인을 기다리지 않고 바로 반환하며, 체결되면 _apply_buy_fill이 포지션을 bought로 전환합니다.
+    :return: 주문 접수 여부 (True면 슬롯 예약은 체결 반영 시 해제)
+    """
+    try:
+        budget_per_stock, _, _ = _compute_buy_budget(effective_max_slots, ratio, budget_multiplier)
+    except Exception as e:
+        logger.error(f"[{symbol}] 주문가능현금 재조회 실패: {e}")
+        return False
+    # 추격매수 방지: 목표가 대비 이격 / 시가 대비 상승률 필터 (LLM 활성 시 바이패스 → LLM이 판단)
+    max_slippage_pct = getattr(settings, "ENTRY_MAX_BREAKOUT_SLIPPAGE_PCT", 2.0) or 0
+    if not settings.USE_LLM_ADVISOR:
+        target_price = float(getattr(strategy, "last_indicators", {}).get("target_price") or 0)
+        today_open = 0.0
+        try:
+            daily = kis_market.get_daily_ohlcv(symbol, days=1)
+            if daily:
+                today_open = float(daily[0].get("stck_oprc") or 0)
+        except Exception as e:
+            logger.debug(f"[{symbol}] 시가 조회 실패, 상승률 필터 스킵: {e}")
+        chase_reason = trading_rules.entry_chase_reason(price_at_signal, target_price, today_open)
+        if chase_reason:
+            logger.debug(f"[{symbol}] 매수 스킵: {chase_reason}")
+            return False
+
+    quantity_to_buy = int(budget_per_stock // price_at_signal)
+    if quantity_to_buy < 1:
+        logger.debug(f"[{symbol}] 매수 스킵: 예산 부족 (종목당 예산으로 1주 미만)")
+        return False
+
+    # --- LLM 매수 어드바이저 검증 ---
+    if settings.USE_LLM_ADVISOR:
+        # LLM 거부 쿨다운 체크: 이전에 거부당한 종목은 일정 시간 재시도하지 않음
+        llm_cd_until = _llm_reject_cooldown.get(symbol, 0)
+        if now_ts < llm_cd_until:
+            remaining = int(llm_cd_until - now_ts)
+            logger.debug(f"[{symbol}] LLM 거부 쿨다운 중 (남은 {remaining}초)")
+            return False
+        # 만료된 LLM 거부 쿨다운 정리
+        expired_llm = [s for s, t in list(_llm_reject_cooldown.items()) if now_ts >= t]
+        for s in expired_llm:
+            _llm_reject_cooldown.pop(s, None)
+
+        try:
+            ohlcv_for_llm = kis_market.get_daily_ohlcv(symbol, days=5) or []
+            llm_indicators = dict(getattr(strategy, "last_indicators", {}))
+            llm_reason = getattr(strategy, "last_decision_reason", "")
+            # 바이패스된 필터 정보를 LLM에 전달 (LLM이 최종 판단)
+            if not market_ok:
+                llm_indicators["market_filter_warning"] = market_reason
+            slippage_target = float(llm_indicators.get("target_price") or 0)
+            if slippage_target > 0 and max_slippage_pct > 0:
+                slippage = (price_at_signal - slippage_target) / slippage_target * 100
+                if slippage > 0:
+                    llm_indicators["slippage_from_target_pct"] = round(slippage, 2)
+            llm_approved, llm_msg = llm_advisor_service.should_buy(
+                symbol=symbol,
+                current_price=price_at_signal,
+                indicators=llm_indicators,
+                ohlcv_recent=ohlcv_for_llm,
+                strategy_reason=llm_reason,
+            )
+            if not llm_approved:
+                cooldown_sec = getattr(settings, "LLM_REJECT_COOLDOWN", 1800)
+                _llm_reject_cooldown[symbol] = time.time() + cooldown_sec
+                logger.info(f"[{symbol}] LLM 매수 거부: {llm_msg} (쿨다운 {cooldown_sec}초)")
+                send_slack_notification(f"[LLM 매수 거부] {symbol} | {llm_msg} (재시도 {cooldown_sec//60}분 후)")
+                return False
+            logger.info(f"[{symbol}] LLM 매수 승인: {llm_msg}")
         except Exception as e:
-            logger.error(f"[{symbol}] 매매 로직 실행 중 에러: {e}")
+            logger.warning(f"[{symbol}] LLM 어드바이저 오류, 매수 진행 (fail-open): {e}")
+
+    # 장마감 매도 로직과의 경합 방지: LLM 호출 등으로 시간이 걸린 뒤 매수 직전에 재확인
+    if not trading_enabled:
+        logger.info(f"[{symbol}] 매수 스킵: 자동매매 비활성화됨 (장마감 매도 진행 중)")
+        return False
+
+    use_atr_stop = getattr(settings, "USE_ATR_STOP", False)
+    atr_mult = getattr(settings, "ATR_MULTIPLIER", 1.5)
+    atr_val = indicators_service.get_atr(symbol) if use_atr_stop else None
+    initial_stop_price = trading_rules.initial_stop_price(price_at_signal, trailing_pct, atr_val, use_atr_stop, atr_mult)
+
+    try:
+        tick_offset = getattr(settings, "BUY_PRICE_TICK_OFFSET", 2) or 0
+        buy_price = _calc_buy_limit_price(price_at_signal, tick_offset)
+        ticket = order_manager.submit(symbol, "BUY", quantity_to_buy, buy_price, timeout=settings.BUY_FILL_TIMEOUT)
+        pending = {
+            "quantity": quantity_to_buy,
+            "price": buy_price,
+            "signal_price": price_at_signal,
+            "initial_stop_price": initial_stop_price,
+            "atr": atr_val if use_atr_stop else None,
+            "submitted_at": time.time(),
+        }
+        _register_pending_buy(symbol, ticket, pending)
+        logger.info(f"[{symbol}] 매수 주문 접수: {quantity_to_buy}주 @ {buy_price} → 체결 대기")
+        return True
+    except Exception as e:
+        _log_trade(symbol, "BUY", price_at_signal, quantity_to_buy, OrderStatus.FAILED, None)
+        err_str = str(e)
+        if _is_permanent_reject(err_str):
+            _DAILY_BUY_BLACKLIST.add(symbol)
+            logger.warning(
+                f"[{symbol}] 정책성 매수 거부 감지 → 당일 자동 블랙리스트 등록 (사유: {err_str})"
+            )
+        else:
+            _buy_cooldown[symbol] = time.time() + _BUY_COOLDOWN_SECONDS
+            logger.error(f"[{symbol}] 매수 주문 실패 (쿨다운 {_BUY_COOLDOWN_SECONDS}초 설정): {e}")
+        return False
+
+
+def _register_pending_buy(symbol: str, ticket, pending: dict) -> None:
+    """체결 대기 매수 주문을 trade_status[symbol].pending_buy로 기록하고, 체결 추적이 끝나면 엔진 스레드에서 반영."""
+    pending["odno"] = ticket.origin_odno
+    with _trade_state_lock:
+        trade_status.watch(symbol).pending_buy = pending
+        _persist_position(symbol, durable=True)
+
+    def _on_done(_f):
+        try:
+            _engine_executor.submit(_apply_buy_fill, symbol, ticket)
+        except RuntimeError:
+            # 종료 중: pending_buy 기록이 남아 재시작 시 _resume_pending_buys가 이어받음
+            pass
+
+    ticket.future.add_done_callback(_on_done)
+
+
+def _reprice_buy_order(ticket) -> int | None:
+    """미체결 지정가 매수 재호가: 현재가 + BUY_PRICE_TICK_OFFSET호가. 신호가 대비 추격 한도를 넘으면 유지(None)."""
+    if ticket.side != "BUY":
+        return None
+    tick_offset = getattr(settings, "BUY_PRICE_TICK_OFFSET", 2) or 0
+    new_price = _calc_buy_limit_price(kis_market.get_current_price(ticket.symbol), tick_offset)
+    if new_price <= 0:
+        return None
+    pending = _position_snapshot(ticket.symbol).pending_buy or {}
+    signal_price = pending.get("signal_price") or 0
+    max_slippage_pct = getattr(settings, "ENTRY_MAX_BREAKOUT_SLIPPAGE_PCT", 2.0) or 0
+    if signal_price > 0 and max_slippage_pct > 0 and new_price > signal_price * (1 + max_slippage_pct / 100):
+        logger.debug(f"[{ticket.symbol}] 재호가 스킵: 신호가 {signal_price:.0f} 대비 {max_slippage_pct}% 초과 ({new_price})")
+        return None
+    return new_price
+
+
+def _apply_buy_fill(symbol: str, ticket) -> Position | None:
+    """
+    체결 추적이 끝난 매수 주문을 trade_status에 반영합니다 (체결 수량 0이면 잔고로 한 번 더 확인).
+    성공 시 bought 포지션, 미체결이면 None. 슬롯 예약은 결과와 무관하게 해제.
+    """
+    try:
+        with _get_symbol_lock(symbol):
+            with _trade_state_lock:
+                pending = (trade_status.get(symbol) or _EMPTY_POSITION).pending_buy
+            if not pending or str(pending.get("odno") or "") != ticket.origin_odno:
+                return None  # 이미 반영됨 (재시작 복구·중복 콜백)
+            filled_qty = ticket.filled_qty
+            if filled_qty <= 0:
+                try:
+                    filled_qty = kis_order.get_holding_quantity(symbol, max_age=0)
+                except Exception as e:
+                    logger.warning(f"[{symbol}] 체결 미확인 주문 잔고 확인 실패: {e}")
+            if filled_qty <= 0:
+                with _trade_state_lock:
+                    position = trade_status.get(symbol)
+                    if position is not None:
+                        position.pending_buy = None
+                    _persist_position(symbol, durable=True)
+                _log_trade(symbol, "BUY", pending["signal_price"], pending["quantity"], OrderStatus.FAILED, ticket.to_dict())
+                _buy_cooldown[symbol] = time.time() + _BUY_COOLDOWN_SECONDS
+                logger.warning(f"[{symbol}] 매수 주문 미체결 ({ticket.status}) → 쿨다운 {_BUY_COOLDOWN_SECONDS}초")
+                return None
+
+            signal_price = pending["signal_price"]
+            executed_buy_price = ticket.avg_price or _estimate_buy_execution_price(
+                symbol, pending["price"], signal_price, filled_qty
+            )
+            stop_shift = executed_buy_price - signal_price
+            position = Position(
+                bought=True,
+                purchase_price=executed_buy_price,
+                quantity=filled_qty,
+                initial_quantity=filled_qty,
+                high_price=executed_buy_price,
+                stop_price=max(0.0, pending["initial_stop_price"] + stop_shift),
+                atr=pending.get("atr"),
+            )
+            with _trade_state_lock:
+                trade_status.set(symbol, position)
+                _persist_position(symbol, durable=True)
+            kis_order.invalidate_account_snapshot()
+        _log_trade(symbol, "BUY", executed_buy_price, filled_qty, OrderStatus.EXECUTED, ticket.to_dict())
+        label = "수동 매수" if pending.get("manual") else "매수 성공"
+        logger.info(f"[{symbol}] {label}! {filled_qty}주 @ {executed_buy_price:.0f}, 손절가: {position.stop_price:.0f}")
+        send_slack_notification(f"[{label}] {symbol}({filled_qty}주) | 매수가: {executed_buy_price:.0f}")
+        queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "BUY", "price": executed_buy_price, "quantity": filled_qty})
+        _buy_cooldown.pop(symbol, None)
+        return position.copy()
+    except Exception as e:
+        logger.error(f"[{symbol}] 매수 체결 반영 실패: {e}")
+        return None
+    finally:
+        _release_buy_slot(symbol)
+
+
+def _resume_pending_buys() -> None:
+    """재시작 시 주문 장부의 미완료 주문과 trade_status의 체결 대기 기록을 다시 연결 (슬롯도 다시 예약)."""
+    tickets = order_manager.resume()
+    with _trade_state_lock:
+        pending = {s: dict(pos.pending_buy) for s, pos in trade_status.pending()}
+        _pending_buys.update(pending)
+    for symbol, record in pending.items():
+        odno = str(record.get("odno") or "")
+        ticket = tickets.get(odno)
+        if ticket is None:
+            # 장부에 없는 주문 (이미 종료 등) → 체결조회/잔고로 확인 후 정리
+            remaining = max(0.0, record["submitted_at"] + settings.BUY_FILL_TIMEOUT - time.time())
+            ticket = fill_tracker.track(odno, symbol, "BUY", record["quantity"], record["price"], remaining)
+        logger.info(f"[{symbol}] 체결 대기 매수 주문 복구: 주문번호 {odno}")
+        _register_pending_buy(symbol, ticket, record)
 
 
 def sell_symbol(symbol: str, quantity: int | None = None) -> dict:
     """
     특정 종목을 개별 매도합니다. quantity가 없거나 0이면 전량 매도.
+    종목별 락만 잡고 주문하므로 다른 종목 평가(주문 동기화·LLM 대기)에 막히지 않습니다.
     :return: {"success": bool, "message": str, "sold_quantity": int or 0}
     """
-    with _trade_state_lock:
-        st = trade_status.get(symbol)
-        if not st or not st.get("bought"):
+    with _get_symbol_lock(symbol):
+        pos = _position_snapshot(symbol)
+        if not pos.bought:
             return {"success": False, "message": f"{symbol} 보유 종목이 아닙니다.", "sold_quantity": 0}
-        held = st["quantity"]
+        held = pos.quantity
         if held <= 0:
             return {"success": False, "message": f"{symbol} 보유 수량이 없습니다.", "sold_quantity": 0}
         sell_qty = (quantity if quantity and quantity > 0 else held)
@@ -943,7 +971,7 @@ def sell_symbol(symbol: str, quantity: int | None = None) -> dict:
         sell_qty = _resolve_sell_quantity(symbol, sell_qty)
         if sell_qty <= 0:
             return {"success": False, "message": f"{symbol} KIS 잔고가 없어 매도 불가 (로컬 포지션 정리 완료)", "sold_quantity": 0}
-        purchase_price = st.get("purchase_price", 0) or 0
+        purchase_price = pos.purchase_price or 0
         try:
             current_price = kis_market.get_current_price(symbol)
             res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
@@ -952,11 +980,9 @@ def sell_symbol(symbol: str, quantity: int | None = None) -> dict:
             send_slack_notification(f"[개별 매도] {symbol}, 수량: {sell_qty}, 현재가: {current_price:.0f}")
             remaining = held - sell_qty
             if remaining <= 0:
-                _clear_position(symbol)
-                _daily_sold_symbols.add(symbol)
+                _close_position(symbol)
             else:
-                trade_status[symbol]["quantity"] = remaining
-            save_trade_status()
+                _update_position(symbol, durable=True, quantity=remaining)
             queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
             return {"success": True, "message": f"{symbol} {sell_qty}주 매도 체결", "sold_quantity": sell_qty}
         except Exception as e:
@@ -974,10 +1000,8 @@ def buy_symbol(symbol: str, quantity: int | None = None, amount: int | None = No
     :return: {"success": bool, "message": str, ...}
     """
     # 이미 보유 중이면 에러
-    with _trade_state_lock:
-        st = trade_status.get(symbol)
-        if st and st.get("bought"):
-            return {"success": False, "message": f"{symbol} 이미 보유 중인 종목입니다."}
+    if _position_snapshot(symbol).bought:
+        return {"success": False, "message": f"{symbol} 이미 보유 중인 종목입니다."}
 
     # 현재가 조회
     try:
@@ -1008,73 +1032,85 @@ def buy_symbol(symbol: str, quantity: int | None = None, amount: int | None = No
     else:
         initial_stop_price = current_price * (1 - trailing_pct / 100)
 
-    # 시장가 매수 주문
-    with _trade_state_lock:
-        if trade_status.get(symbol, {}).get("bought"):
+    # 시장가 매수 주문 (종목별 락: 같은 종목 엔진 평가와만 직렬화, 체결 대기 중에도 공용 락 미보유)
+    with _get_symbol_lock(symbol):
+        pos = _position_snapshot(symbol)
+        if pos.bought:
             return {"success": False, "message": f"{symbol} 이미 보유 중인 종목입니다."}
+        if pos.pending_buy:
+            return {"success": False, "message": f"{symbol} 체결 대기 중인 매수 주문이 있습니다."}
         try:
-            res = kis_order.place_order(symbol=symbol, quantity=qty, price=0, order_type="BUY")
-            # 체결 후 KIS 잔고 반영까지 대기 (후속 매도 가드와 일관성 유지)
-            synced_qty = kis_order.wait_for_holding_at_least(symbol, qty, timeout=15.0, interval=1.5)
-            effective_qty = synced_qty if synced_qty > 0 else qty
-            executed_buy_price = _estimate_buy_execution_price(symbol, 0, current_price, effective_qty)
-            stop_shift = executed_buy_price - current_price
-            _log_trade(symbol, "BUY", executed_buy_price, effective_qty, OrderStatus.EXECUTED, res)
-            st_entry = {
-                "bought": True,
-                "purchase_price": executed_buy_price,
-                "quantity": effective_qty,
-                "initial_quantity": effective_qty,
-                "high_price": executed_buy_price,
-                "stop_price": max(0.0, initial_stop_price + stop_shift),
-                "stage1_sell_done": False,
-                "stage2_sell_done": False,
-            }
-            if use_atr_stop and atr_val is not None:
-                st_entry["atr"] = atr_val
-            trade_status[symbol] = st_entry
-            save_trade_status()
-            logger.info(f"[{symbol}] 수동 매수 성공! {effective_qty}주 @ {executed_buy_price:.0f}, 손절가: {st_entry['stop_price']:.0f}")
-            send_slack_notification(f"[수동 매수] {symbol}({effective_qty}주) | 매수가: {executed_buy_price:.0f}")
-            queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "BUY", "price": executed_buy_price, "quantity": effective_qty})
-            return {
-                "success": True,
-                "message": f"{symbol} {effective_qty}주 매수 체결 (시장가)",
-                "symbol": symbol,
-                "quantity": effective_qty,
-                "price": executed_buy_price,
-                "stop_price": st_entry["stop_price"],
-            }
+            ticket = order_manager.submit(symbol, "BUY", qty, 0, timeout=settings.BUY_FILL_TIMEOUT)
         except Exception as e:
             _log_trade(symbol, "BUY", current_price, qty, OrderStatus.FAILED, None)
             logger.error(f"[{symbol}] 수동 매수 실패: {e}")
             return {"success": False, "message": f"매수 주문 실패: {e}"}
+        pending = {
+            "quantity": qty,
+            "price": 0,
+            "signal_price": current_price,
+            "initial_stop_price": initial_stop_price,
+            "atr": atr_val if use_atr_stop else None,
+            "submitted_at": time.time(),
+            "manual": True,
+        }
+        _register_pending_buy(symbol, ticket, pending)
+    # 시장가 주문은 보통 즉시 체결 → 짧게 기다려 응답에 체결 결과를 담고, 늦으면 체결 대기 상태로 반환
+    fill_tracker.wait(ticket, timeout=15.0)
+    if not ticket.done:
+        return {
+            "success": True,
+            "message": f"{symbol} {qty}주 매수 주문 접수 (체결 대기, 체결되면 자동 등록)",
+            "symbol": symbol,
+            "quantity": qty,
+            "pending": True,
+        }
+    # 체결 반영은 엔진 스레드의 _apply_buy_fill이 수행 → 반영 완료까지 짧게 대기
+    for _ in range(20):
+        pos = _position_snapshot(symbol)
+        if pos.bought or not pos.pending_buy:
+            break
+        time.sleep(0.1)
+    if not pos.bought:
+        return {"success": False, "message": f"{symbol} 매수 주문 미체결 ({ticket.status})"}
+    return {
+        "success": True,
+        "message": f"{symbol} {pos.quantity}주 매수 체결 (시장가)",
+        "symbol": symbol,
+        "quantity": pos.quantity,
+        "price": pos.purchase_price,
+        "stop_price": pos.stop_price,
+    }
 
 
 def _sell_all_holdings():
     """trade_status에서 bought=True인 모든 종목을 매도한다. 매도 건수를 반환."""
     sold = 0
-    for symbol, st in list(trade_status.items()):
-        if st.get("bought"):
-            quantity = st["quantity"]
-            sell_qty = _resolve_sell_quantity(symbol, quantity)
+    for symbol in _held_positions():
+        # 진행 중인 같은 종목 평가/주문이 끝날 때까지 대기 후 최신 포지션 기준으로 매도
+        with _get_symbol_lock(symbol):
+            pos = _position_snapshot(symbol)
+            if not pos.bought:
+                continue
+            sell_qty = _resolve_sell_quantity(symbol, pos.quantity)
             if sell_qty <= 0:
                 continue
-            purchase_price = st.get("purchase_price", 0) or 0
+            purchase_price = pos.purchase_price or 0
             try:
                 current_price = kis_market.get_current_price(symbol)
                 res = kis_order.place_order(symbol=symbol, quantity=sell_qty, price=0, order_type="SELL")
                 pl = (current_price - purchase_price) * sell_qty if purchase_price else 0.0
                 _log_trade(symbol, "SELL", current_price, sell_qty, OrderStatus.EXECUTED, res, realized_pl=pl)
                 send_slack_notification(f"[장 마감 매도] {symbol}, 수량: {sell_qty}, 현재가: {current_price:.0f}")
-                _clear_position(symbol)
-                _daily_sold_symbols.add(symbol)
+                with _trade_state_lock:
+                    _clear_position(symbol)
+                    _daily_sold_symbols.add(symbol)
                 queue_broadcast({"type": "trade_event", "symbol": symbol, "side": "SELL", "price": current_price, "quantity": sell_qty})
                 sold += 1
             except Exception as e:
                 _log_trade(symbol, "SELL", 0.0, sell_qty, OrderStatus.FAILED, None)
                 logger.error(f"[{symbol}] 장 마감 매도 실패: {e}")
-            time.sleep(1)
+        time.sleep(1)
     return sold
 
 
@@ -1095,11 +1131,91 @@ def sell_all_at_close():
 def job_portfolio_snapshot():
     """5분마다 포트폴리오 스냅샷 저장"""
     try:
-        portfolio_service.create_portfolio_snapshot(trade_status)
+        portfolio_service.create_portfolio_snapshot(_held_positions())
     except Exception as e:
         logger.error(f"포트폴리오 스냅샷 실패: {e}")
 
 
+def job_sync_daily_bars():
+    """장 마감 후 대상·보유 종목 일봉을 로컬 저장소에 추가 (다음 날부터 장중 일봉 API 호출 생략)"""
+    try:
+        symbols = list(dict.fromkeys(list(_held_positions()) + list(target_symbols)))
+        synced = kis_market.sync_daily_bars(symbols)
+        logger.info(f"일봉 저장소 동기화: {synced}/{len(symbols)}종목")
+    except Exception as e:
+        logger.error(f"일봉 저장소 동기화 실패: {e}")
+
+
+def job_sync_minute_bars():
+    """
+    분봉 저장소 동기화 (USE_MINUTE_BAR_SYNC): 대상·보유 종목의 최근 MINUTE_BAR_BACKFILL_DAYS 평일 분봉을 채움
+    (새 거래일은 뒤에 추가, 저장분 이전 날짜는 과거 방향으로 앞에 추가).
+    실행당 MINUTE_BAR_MAX_REQUESTS회까지만 호출하고 남은 백필은 다음 실행(주말 포함 매일)에서 이어감.
+    """
+    if not settings.USE_MINUTE_BAR_SYNC:
+        return
+    try:
+        symbols = list(dict.fromkeys(list(_held_positions()) + list(target_symbols)))
+        result = kis_market.sync_minute_bars(
+            symbols, settings.MINUTE_BAR_BACKFILL_DAYS, settings.MINUTE_BAR_MAX_REQUESTS,
+        )
+        logger.info(f"분봉 저장소 동기화: {result['days']}일 {result['rows']}행, 요청 {result['requests']}회"
+                    f"{'' if result['complete'] else ' (다음 실행에서 계속)'}")
+    except Exception as e:
+        logger.error(f"분봉 저장소 동기화 실패: {e}")
+
+
+def job_sync_daily_history():
+    """
+    과거 일봉 백필 (USE_DAILY_HISTORY_SYNC): 대상·보유·DAILY_HISTORY_SYMBOLS 종목의 최근 DAILY_HISTORY_YEARS년 일봉을 과거 방향으로 채움.
+    실행당 DAILY_HISTORY_MAX_REQUESTS회까지만 호출하고 남은 백필은 다음 실행에서 이어감 (다 채운 종목은 호출 없음).
+    """
+    if not settings.USE_DAILY_HISTORY_SYNC:
+        return
+    try:
+        symbols = list(dict.fromkeys(list(_held_positions()) + list(target_symbols) + settings.daily_history_symbols_list))
+        result = kis_market.sync_daily_history(symbols, settings.DAILY_HISTORY_YEARS, settings.DAILY_HISTORY_MAX_REQUESTS)
+        logger.info(f"과거 일봉 백필: {result['symbols']}종목 완료, {result['rows']}행, 요청 {result['requests']}회"
+                    f"{'' if result['complete'] else ' (다음 실행에서 계속)'}")
+    except Exception as e:
+        logger.error(f"과거 일봉 백필 실패: {e}")
+
+
+def job_weekly_retune():
+    """
+    주간 재튜닝 (USE_WEEKLY_RETUNE): 보유·대상 종목 일봉으로 기본 전략 워크포워드를 돌려 최근 in-sample 최적 파라미터를 찾고,
+    out-of-sample 누적 수익이 손실이 아닐 때만 종목별 StrategyConfig에 기록. 지난 폴드는 디스크 캐시라 새 폴드만 계산.
+    다른 전략이 활성 설정된 종목은 전략·파라미터를 바꾸지 않음 (기본 전략 종목·설정 없는 종목만 갱신).
+    """
+    if not settings.USE_WEEKLY_RETUNE:
+        return
+    try:
+        from app.services import param_sweep, vector_backtest, walk_forward
+
+        symbols = list(dict.fromkeys(list(_held_positions()) + list(target_symbols)))
+        data = vector_backtest.load_universe(symbols)
+        result = walk_forward.WalkForward(
+            data,
+            DEFAULT_STRATEGY_NAME,
+            in_sample_days=settings.WALK_FORWARD_IN_SAMPLE_DAYS,
+            out_of_sample_days=settings.WALK_FORWARD_OUT_OF_SAMPLE_DAYS,
+            method="bayes",
+            n_candidates=settings.RETUNE_CANDIDATES,
+        ).run()
+        oos_return = result["outOfSample"].get("totalReturnPct", 0.0)
+        latest = result["latest"]
+        if not latest or oos_return < 0:
+            logger.info(f"주간 재튜닝 미적용 (out-of-sample {oos_return}%, 폴드 {len(result['folds'])}개)")
+            return
+        applied = param_sweep.apply_best(DEFAULT_STRATEGY_NAME, latest["params"], symbols, keep_other_strategies=True)
+        send_slack_notification(
+            f"[주간 재튜닝] {DEFAULT_STRATEGY_NAME} {latest['params']} → {applied}종목 "
+            f"(out-of-sample {oos_return}%, 신규 폴드 {result['computedFolds']}개)"
+        )
+    except Exception as e:
+        logger.error(f"주간 재튜닝 실패: {e}")
+
+
 def job_reconciliation():
     """30분마다 포지션 정합성 검사"""
     try:
@@ -1125,18 +1241,17 @@ def refresh_target_symbols_from_condition():
         return
     global target_symbols
     try:
-        holding = [s for s, st in trade_status.items() if st.get("bought")]
+        with _trade_state_lock:
+            holding = trade_status.held_symbols()
         if settings.USE_VOLUME_RANK:
             dynamic_list = kis_condition.get_top_volume_stocks()
         else:
             dynamic_list = kis_condition.get_target_stocks_by_condition()
         if dynamic_list:
             target_symbols = holding + [s for s in dynamic_list if s not in holding][: settings.CONDITION_SEARCH_MAX]
-            for symbol in target_symbols:
-                trade_status.setdefault(
-                    symbol,
-                    {"bought": False, "purchase_price": 0.0, "quantity": 0, "stop_price": 0.0},
-                )
+            with _trade_state_lock:
+                for symbol in target_symbols:
+                    trade_status.watch(symbol)
             source = "거래량 순위" if settings.USE_VOLUME_RANK else "조건검색"
             logger.info(f"{source} 장중 갱신: 대상 종목 {len(target_symbols)} (보유 {len(holding)} + 신규 {len(target_symbols) - len(holding)})")
     except Exception as e:
@@ -1155,6 +1270,11 @@ async def price_update_broadcaster():
     while True:
         await asyncio.sleep(5)
         try:
+            # 보유 종목 현재가는 async 클라이언트로 동시 조회해 캐시에 채운 뒤 get_status가 재사용
+            with _trade_state_lock:
+                held = trade_status.held_symbols()
+            if held:
+                await kis_market.get_current_prices_async(held)
             status = await loop.run_in_executor(None, get_status)
             await ws_manager.broadcast({"type": "status_update", "payload": status})
         except Exception as e:
@@ -1172,10 +1292,13 @@ async def price_update_broadcaster():
 # --- FastAPI Lifespan & App ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    kis_http.bind_event_loop(asyncio.get_running_loop())
     models.Base.metadata.create_all(bind=session.engine)
     from app.db.migrate import run_migrations
     run_migrations()
+    daily_ledger.rebuild()
     load_trade_status()
+    _resume_pending_buys()
     scheduler.add_job(enable_trading_morning, 'cron', day_of_week='mon-fri', hour=8, minute=59, id="enable_trading_job")
     scheduler.add_job(
         run_trading_strategy,
@@ -1191,12 +1314,34 @@ async def lifespan(app: FastAPI):
     scheduler.add_job(sell_all_at_close, 'cron', day_of_week='mon-fri', hour=15, minute=19, id="sell_all_job")
     scheduler.add_job(job_portfolio_snapshot, 'cron', minute='*/5', id="portfolio_snapshot_job")
     scheduler.add_job(job_reconciliation, 'cron', minute='0,30', id="reconciliation_job")
+    scheduler.add_job(job_sync_daily_bars, 'cron', day_of_week='mon-fri', hour=15, minute=45, id="daily_bar_sync_job")
+    scheduler.add_job(job_sync_minute_bars, 'cron', hour=16, minute=0, id="minute_bar_sync_job")
+    scheduler.add_job(job_sync_daily_history, 'cron', hour=17, minute=0, id="daily_history_sync_job")
+    scheduler.add_job(job_weekly_retune, 'cron', day_of_week='sat', hour=6, minute=0, id="weekly_retune_job")
     scheduler.start()
     asyncio.create_task(price_update_broadcaster())
+    # 보유/대상 종목 지표 상태를 일봉 저장소에서 미리 구성 (시작 지연 없이 엔진 스레드에서)
+    _engine_executor.submit(indicator_book.warm, list(_held_positions()) + (target_symbols or settings.target_symbols_list))
+    realtime_task = None
+    if settings.USE_REALTIME_FEED:
+        realtime_feed.add_listener(indicator_book.on_tick)
+        realtime_feed.add_listener(_on_realtime_tick)
+        if settings.KIS_USER_ID:
+            realtime_feed.enable_fill_notices(settings.KIS_USER_ID, fill_tracker.on_notice)
+        _sync_realtime_symbols()
+        realtime_task = asyncio.create_task(realtime_feed.run())
     logger.info("고도화된 자동매매 시스템이 시작되었습니다.")
     send_slack_notification("고도화된 자동매매 시스템이 시작되었습니다.")
     yield
     scheduler.shutdown()
+    _engine_executor.shutdown(wait=False, cancel_futures=True)
+    decision_log.stop()
+    trade_state_store.close()
+    if realtime_task is not None:
+        realtime_feed.stop()
+        realtime_task.cancel()
+    kis_http.bind_event_loop(None)
+    await kis_http.close_async_client()
     logger.info("자동매매 시스템이 종료되었습니다.")
 
 app = FastAPI(lifespan=lifespan)
@@ -1251,46 +1396,27 @@ def get_status():
         logger.error(f"예수금 조회 실패: {e}")
         cash = 0
         assets_error = str(e)
+    # 엔진 스레드가 갱신 중이어도 일관된 응답이 되도록 복사본 기준으로 계산
+    with _trade_state_lock:
+        positions = trade_status.to_dict()
+        held = {s: pos.copy() for s, pos in trade_status.held()}
     total_holding = 0.0
-    for symbol, st in trade_status.items():
-        if st.get("bought"):
-            try:
-                price = kis_market.get_current_price(symbol)
-                total_holding += price * st["quantity"]
-            except Exception:
-                total_holding += st["purchase_price"] * st["quantity"]
-    # 당일 실현손익: 오늘 체결된 매도의 (매도금액 - 원금) 합계
-    from datetime import datetime, timezone, timedelta
-    KST = timezone(timedelta(hours=9))
-    today_pl = 0.0
-    db = session.SessionLocal()
-    try:
-        today_start = datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0).astimezone(timezone.utc).replace(tzinfo=None)
-        rows = (
-            db.query(models.TradeLog)
-            .filter(
-                models.TradeLog.timestamp >= today_start,
-                models.TradeLog.order_type == OrderType.SELL,
-                models.TradeLog.status == OrderStatus.EXECUTED,
-            )
-            .all()
-        )
-        today_pl = sum(r.realized_pl or 0.0 for r in rows)
-    except Exception as e:
-        logger.debug(f"당일 손익 집계 스킵: {e}")
-    finally:
-        db.close()
+    prices = kis_market.get_current_prices(list(held))
+    for symbol, pos in held.items():
+        total_holding += prices.get(symbol, pos.purchase_price) * pos.quantity
+    # 당일 실현손익: 오늘 체결된 매도의 (매도금액 - 원금) 합계 (메모리 원장)
+    today_pl = daily_ledger.realized_pl()
     # 총 자산 = 현금(예수금) + 보유 주식 평가액 (매수 시 현금 ↓ 보유 ↑, 합계는 동일 유지)
     total_assets = cash + total_holding
     return_rate = (today_pl / total_assets * 100) if total_assets else 0.0
-    positions_detail = portfolio_service.calculate_unrealized_pl(trade_status)
+    positions_detail = portfolio_service.calculate_unrealized_pl(held)
     return {
         "totalAssets": round(total_assets, 0),
         "cashBalance": round(cash, 0),
         "holdingsValue": round(total_holding, 0),
         "todayRealizedPL": today_pl,
         "returnRate": round(return_rate, 2),
-        "positions": trade_status,
+        "positions": positions,
         "positionsDetail": positions_detail,
         "tradingEnabled": trading_enabled,
         "targetSymbols": target_symbols,
@@ -1298,15 +1424,31 @@ def get_status():
     }
 
 
+@app.get("/api/metrics")
+def get_metrics():
+    """내부 성능 지표 (시세 캐시 hit/miss, 레이트 리미터 토큰/대기 시간, 실시간 시세 연결 상태, 체결 대기 주문, 지표 상태 종목 수, 의사결정 로그 큐 등)"""
+    return {
+        "marketCache": kis_market.get_cache_stats(),
+        "rateLimiter": get_rate_limiter_stats(),
+        "realtimeFeed": realtime_feed.stats(),
+        "fillTracker": fill_tracker.stats(),
+        "indicatorState": indicator_book.stats(),
+        "strategyCache": strategy_cache.stats(),
+        "decisionLog": decision_log.stats(),
+        "dailyLedger": daily_ledger.snapshot(),
+        "stateStore": trade_state_store.stats(),
+    }
+
+
 @app.get("/api/decisions")
 def get_decisions(symbol: str = "", limit: int = 50):
     """의사결정 로그를 조회합니다."""
     db = session.SessionLocal()
     try:
-        query = db.query(models.DecisionLog).order_by(models.DecisionLog.timestamp.desc()).limit(limit)
+        query = db.query(models.DecisionLog)
         if symbol:
             query = query.filter(models.DecisionLog.symbol == symbol)
-        rows = query.all()
+        rows = query.order_by(models.DecisionLog.timestamp.desc()).limit(limit).all()
         return [
             {
                 "id": r.id,
@@ -1318,6 +1460,8 @@ def get_decisions(symbol: str = "", limit: int = 50):
                 "indicator_values": json.loads(r.indicator_values) if r.indicator_values else {},
                 "current_price": r.current_price,
                 "action_taken": r.action_taken,
+                "repeat_count": r.repeat_count or 1,
+                "last_timestamp": r.last_timestamp.isoformat() if r.last_timestamp else None,
             }
             for r in rows
         ]
@@ -1414,8 +1558,12 @@ def api_sync_positions():
 # 라우터 등록 (전략/포트폴리오 API)
 from app.routers import strategies as strategies_router
 from app.routers import portfolio as portfolio_router
+from app.routers import orders as orders_router
+from app.routers import backtest as backtest_router
 app.include_router(strategies_router.router, prefix="/api")
 app.include_router(portfolio_router.router, prefix="/api")
+app.include_router(orders_router.router, prefix="/api")
+app.include_router(backtest_router.router, prefix="/api")
 
 
 if __name__ == "__main__":
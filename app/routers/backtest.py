@@ -0,0 +1,231 @@
+"""백테스트 실행 API (로컬 일봉 저장소 기반)"""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.api import kis_market
+from app.core.config import settings
+from app.db import minute_store
+from app.services import backtest as backtest_service
+from app.services import param_sweep, vector_backtest, walk_forward
+
+router = APIRouter(prefix="/backtest", tags=["backtest"])
+
+
+class BacktestBody(BaseModel):
+    symbols: list[str]
+    strategy_name: str = "volatility_breakout"
+    parameters: dict = {}
+    start: str | None = None
+    end: str | None = None
+    days: int = 400
+    initial_cash: float = 10_000_000
+    slippage_ticks: int = 1
+    fee_pct: float = 0.015
+    tax_pct: float = 0.18
+    close_at_end: bool = True
+    use_minute_bars: bool = False
+    include_trades: bool = True
+
+
+@router.post("")
+def run_backtest(body: BacktestBody):
+    """저장된 일봉으로 전략 + 실거래 청산 규칙을 재생해 자산 곡선/체결/통계를 반환합니다."""
+    if not body.symbols:
+        raise HTTPException(status_code=400, detail="symbols가 비어 있습니다.")
+    provider = backtest_service.load_replay(body.symbols, body.days)
+    try:
+        tester = backtest_service.Backtester(
+            provider,
+            body.strategy_name,
+            body.parameters,
+            initial_cash=body.initial_cash,
+            slippage_ticks=body.slippage_ticks,
+            fee_pct=body.fee_pct,
+            tax_pct=body.tax_pct,
+            close_at_end=body.close_at_end,
+            intraday=minute_store.intraday_path if body.use_minute_bars else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = tester.run(body.start, body.end)
+    if not body.include_trades:
+        result.pop("trades")
+    return result
+
+
+class UniverseBacktestBody(BaseModel):
+    symbols: list[str]
+    strategy_name: str = "volatility_breakout"
+    parameters: dict = {}
+    start: str | None = None
+    end: str | None = None
+    max_positions: int | None = None
+    budget_ratio: float | None = None
+    initial_cash: float = 10_000_000
+    slippage_ticks: int = 1
+    fee_pct: float = 0.015
+    tax_pct: float = 0.18
+    include_symbols: bool = True
+
+
+@router.post("/universe")
+def run_universe_backtest(body: UniverseBacktestBody):
+    """저장된 일봉 전체 유니버스를 벡터 백테스트합니다 (일봉 경로 근사, 종목별 + 포트폴리오 집계)."""
+    if not body.symbols:
+        raise HTTPException(status_code=400, detail="symbols가 비어 있습니다.")
+    data = vector_backtest.load_universe(body.symbols, end=body.end)  # 지표 워밍업을 위해 start 이전 봉도 읽음
+    if not data.dates:
+        raise HTTPException(status_code=404, detail="저장된 일봉이 없습니다. 먼저 일봉 동기화를 실행하세요.")
+    try:
+        return vector_backtest.run_vectorized(
+            data,
+            body.strategy_name,
+            body.parameters,
+            slippage_ticks=body.slippage_ticks,
+            fee_pct=body.fee_pct,
+            tax_pct=body.tax_pct,
+            max_positions=body.max_positions,
+            budget_ratio=body.budget_ratio,
+            initial_cash=body.initial_cash,
+            start=body.start,
+            end=body.end,
+            per_symbol=body.include_symbols,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+class DailyHistoryBody(BaseModel):
+    symbols: list[str]
+    years: float | None = None
+    max_requests: int | None = None
+
+
+@router.post("/daily-history")
+def sync_daily_history(body: DailyHistoryBody):
+    """
+    유니버스 백테스트·스윕용 과거 일봉을 기간별 시세 API로 과거 방향 백필합니다 (이미 채운 종목은 건너뜀).
+    complete=False면 요청 한도에 걸린 것이므로 같은 요청을 다시 보내면 이어서 진행합니다.
+    """
+    if not body.symbols:
+        raise HTTPException(status_code=400, detail="symbols가 비어 있습니다.")
+    return kis_market.sync_daily_history(
+        body.symbols,
+        body.years if body.years is not None else settings.DAILY_HISTORY_YEARS,
+        body.max_requests if body.max_requests is not None else settings.DAILY_HISTORY_MAX_REQUESTS,
+    )
+
+
+class SweepBody(BaseModel):
+    symbols: list[str]
+    strategy_name: str = "volatility_breakout"
+    method: str = "random"
+    n_candidates: int = 50
+    space: dict = {}
+    include_exit: bool = False
+    metric: str = "sharpe"
+    min_trades: int = 20
+    engine: str = "vector"
+    workers: int | None = None
+    seed: int = 0
+    start: str | None = None
+    end: str | None = None
+    max_positions: int | None = None
+    initial_cash: float = 10_000_000
+    top: int = 20
+    apply: bool = False
+
+
+@router.post("/sweep")
+def run_sweep(body: SweepBody):
+    """
+    get_param_schema 범위에서 후보를 만들어 병렬 백테스트하고 점수순 상위 결과를 반환합니다.
+    apply=True면 최적 전략 파라미터를 symbols의 StrategyConfig에 기록합니다.
+    """
+    if not body.symbols:
+        raise HTTPException(status_code=400, detail="symbols가 비어 있습니다.")
+    data = vector_backtest.load_universe(body.symbols, end=body.end)
+    if not data.dates:
+        raise HTTPException(status_code=404, detail="저장된 일봉이 없습니다. 먼저 일봉 동기화를 실행하세요.")
+    try:
+        sweep = param_sweep.ParameterSweep(
+            data,
+            body.strategy_name,
+            method=body.method,
+            space=body.space,
+            include_exit=body.include_exit,
+            n_candidates=body.n_candidates,
+            metric=body.metric,
+            min_trades=body.min_trades,
+            engine=body.engine,
+            workers=body.workers,
+            seed=body.seed,
+            start=body.start,
+            end=body.end,
+            max_positions=body.max_positions,
+            initial_cash=body.initial_cash,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = sweep.run()
+    result["results"] = result["results"][:body.top]
+    if body.apply and result["best"]:
+        result["applied"] = param_sweep.apply_best(body.strategy_name, result["best"]["params"], body.symbols)
+    return result
+
+
+class WalkForwardBody(BaseModel):
+    symbols: list[str]
+    strategy_name: str = "volatility_breakout"
+    in_sample_days: int = 250
+    out_of_sample_days: int = 20
+    anchored: bool = False
+    max_folds: int | None = None
+    method: str = "bayes"
+    n_candidates: int = 40
+    space: dict = {}
+    include_exit: bool = False
+    metric: str = "sharpe"
+    min_trades: int = 20
+    engine: str = "vector"
+    workers: int | None = None
+    max_positions: int | None = None
+    apply: bool = False
+
+
+@router.post("/walk-forward")
+def run_walk_forward(body: WalkForwardBody):
+    """
+    in-sample 스윕 → out-of-sample 검증을 굴려 폴드별/전체 결과를 반환합니다 (폴드 결과는 디스크 캐시).
+    apply=True면 최근 in-sample 창 최적 파라미터를 symbols의 StrategyConfig에 기록합니다.
+    """
+    if not body.symbols:
+        raise HTTPException(status_code=400, detail="symbols가 비어 있습니다.")
+    data = vector_backtest.load_universe(body.symbols)
+    if not data.dates:
+        raise HTTPException(status_code=404, detail="저장된 일봉이 없습니다. 먼저 일봉 동기화를 실행하세요.")
+    try:
+        runner = walk_forward.WalkForward(
+            data,
+            body.strategy_name,
+            in_sample_days=body.in_sample_days,
+            out_of_sample_days=body.out_of_sample_days,
+            anchored=body.anchored,
+            max_folds=body.max_folds,
+            method=body.method,
+            n_candidates=body.n_candidates,
+            space=body.space,
+            include_exit=body.include_exit,
+            metric=body.metric,
+            min_trades=body.min_trades,
+            engine=body.engine,
+            workers=body.workers,
+            max_positions=body.max_positions,
+        )
+        result = runner.run()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if body.apply and result["latest"]:
+        result["applied"] = param_sweep.apply_best(body.strategy_name, result["latest"]["params"], body.symbols)
+    return result
@@ -0,0 +1,46 @@
+"""주문 장부 조회 및 미체결 주문 정정/취소 API"""
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from app.api.order_manager import order_manager
+
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+
+@router.get("")
+def list_orders(limit: int = Query(50, ge=1, le=500)):
+    """미체결 주문(메모리 장부)과 최근 주문 이력(DB 장부)을 반환합니다."""
+    return {
+        "open": [t.to_dict() for t in order_manager.open_orders()],
+        "recent": order_manager.recent_orders(limit),
+    }
+
+
+class AmendBody(BaseModel):
+    price: int
+
+
+@router.post("/{odno}/amend")
+def amend_order(odno: str, body: AmendBody):
+    """미체결 잔량을 새 지정가로 정정합니다."""
+    if body.price <= 0:
+        raise HTTPException(status_code=400, detail="정정 가격은 0보다 커야 합니다.")
+    ticket = order_manager.get(odno)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail=f"미체결 주문 {odno}을(를) 찾을 수 없습니다.")
+    if not order_manager.amend(odno, body.price):
+        raise HTTPException(status_code=409, detail=f"주문 {odno} 정정 실패 (이미 체결/취소되었을 수 있습니다).")
+    # 정정 후에는 추적 키가 새 주문번호로 바뀌므로 (이전 정정 번호로는 다시 못 찾음) 미리 잡은 티켓을 반환
+    return ticket.to_dict()
+
+
+@router.post("/{odno}/cancel")
+def cancel_order(odno: str):
+    """미체결 잔량을 취소합니다. 이미 체결된 수량은 그대로 포지션에 반영됩니다."""
+    ticket = order_manager.get(odno)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail=f"미체결 주문 {odno}을(를) 찾을 수 없습니다.")
+    if not order_manager.cancel(odno):
+        raise HTTPException(status_code=409, detail=f"주문 {odno} 취소 실패 (이미 체결되었을 수 있습니다).")
+    return ticket.to_dict()
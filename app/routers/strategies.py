@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from app.db import models, session
+from app.services.strategy_cache import strategy_cache
 from app.strategies.registry import StrategyRegistry
 
 router = APIRouter(prefix="/strategies", tags=["strategies"])
@@ -63,6 +64,7 @@ def save_strategy_config(body: StrategyConfigBody):
             row.parameters = params_str
             row.is_active = True
             db.commit()
+            strategy_cache.invalidate(body.symbol)
             return {"success": True, "symbol": body.symbol, "strategy_name": body.strategy_name}
         new_row = models.StrategyConfig(
             symbol=body.symbol,
@@ -72,6 +74,7 @@ def save_strategy_config(body: StrategyConfigBody):
         )
         db.add(new_row)
         db.commit()
+        strategy_cache.invalidate(body.symbol)
         return {"success": True, "symbol": body.symbol, "strategy_name": body.strategy_name}
     except Exception as e:
         db.rollback()
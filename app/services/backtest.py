@@ -0,0 +1,279 @@
+"""
+이벤트 기반 백테스트.
+- 등록된 전략(StrategyRegistry)을 ReplayMarketData(일봉 저장소/기록/합성)로 돌리고, 청산은 실거래와 같은
+  trading_rules.decide_exit(단계 익절·RSI 매도·최대 손실폭·ATR/트레일링 스톱)으로 판단합니다.
+- 시뮬레이션 시계: 거래일마다 종목별 장중 틱을 시각순으로 재생. 분봉(intraday)이 없으면 일봉 OHLC로
+  시가 → (양봉: 저가→고가 / 음봉: 고가→저가) → 종가 경로를 보간해 만들고, 장중 고가/저가/거래량은 그 시점까지 값만 노출.
+- 체결: 매수는 현재가 + slippage_ticks호가, 매도(시장가)는 현재가 - slippage_ticks호가 (호가 단위는 trading_rules.get_tick_size).
+  수수료(fee_pct)는 양방향, 거래세(tax_pct)는 매도에만. 15:19 장마감 전량 매도(sell_all_at_close)도 재현.
+- 시장 지수 필터, LLM 어드바이저, 주문 거부/미체결 쿨다운은 재현하지 않습니다.
+"""
+import math
+from datetime import time as dtime
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import trading_rules
+from app.services.market_data import ReplayMarketData
+from app.strategies.registry import StrategyRegistry
+
+SESSION_OPEN = dtime(9, 0)
+SESSION_CLOSE = dtime(15, 20)
+CLOSE_OUT_TIME = dtime(15, 19)
+TRADING_DAYS_PER_YEAR = 252
+
+# 일봉 OHLC → 장중 틱 시각 (시가, 첫 극값, 둘째 극값, 종가)
+_OHLC_PATH_TIMES = (dtime(9, 0), dtime(10, 0), dtime(13, 0), dtime(15, 15))
+
+
+def _minutes(t: dtime) -> int:
+    return t.hour * 60 + t.minute
+
+
+def ohlc_path(bar: dict, steps: int = 3) -> list[tuple[dtime, float, float]]:
+    """
+    일봉 1개 → [(시각, 가격, 누적거래량)]. 시가·극값·종가 4점 사이를 구간당 steps틱으로 선형 보간하고
+    가격은 호가 단위로 맞춤. 거래량은 경과 시간 비례로 배분.
+    """
+    o, h, l, c = (float(bar[k]) for k in ("stck_oprc", "stck_hgpr", "stck_lwpr", "stck_clpr"))
+    volume = float(bar.get("acml_vol") or "nan")
+    anchors = list(zip(map(_minutes, _OHLC_PATH_TIMES), (o, l, h, c) if c >= o else (o, h, l, c)))
+    points = [anchors[0]]
+    for (m0, p0), (m1, p1) in zip(anchors, anchors[1:]):
+        for i in range(1, steps + 1):
+            points.append((m0 + (m1 - m0) * i // steps, p0 + (p1 - p0) * i / steps))
+    open_min = _minutes(SESSION_OPEN)
+    session_minutes = _minutes(SESSION_CLOSE) - open_min
+    path = []
+    for m, p in points:
+        tick = trading_rules.get_tick_size(p)
+        path.append((dtime(m // 60, m % 60), round(p / tick) * tick, volume * max(m - open_min, 1) / session_minutes))
+    return path
+
+
+def load_replay(symbols: list[str], days: int = 400) -> ReplayMarketData:
+    """로컬 일봉 저장소에서 재생 데이터를 만듭니다 (미리 sync_daily_bars로 채워 둘 것)."""
+    from app.db import bar_store
+
+    return ReplayMarketData({symbol: bar_store.load_bars(symbol, days) for symbol in dict.fromkeys(symbols)})
+
+
+class Backtester:
+    """전략 1개 × 종목 유니버스 백테스트. run()은 {"equity", "trades", "stats"} dict를 반환."""
+
+    def __init__(self, provider: ReplayMarketData, strategy_name: str = "volatility_breakout",
+                 strategy_params: dict | None = None, *, initial_cash: float = 10_000_000,
+                 max_slots: int | None = None, budget_ratio: float | None = None, slippage_ticks: int = 1,
+                 fee_pct: float = 0.015, tax_pct: float = 0.18, exit_rules: trading_rules.ExitRules | None = None,
+                 close_at_end: bool = True, warmup_days: int = 60, intraday=None, path_steps: int = 3):
+        """
+        intraday(symbol, day) -> [(시각, 가격, 누적거래량)] 또는 None (없으면 일봉 OHLC 경로, 구간당 path_steps틱).
+        close_at_end: 실거래처럼 매일 15:19 전량 매도 (False면 보유 이월).
+        """
+        self.provider = provider
+        self.strategy = StrategyRegistry.get_strategy(strategy_name, strategy_params, provider=provider)
+        self.strategy.record_decisions = False
+        self.trailing_pct = self.strategy.get_parameters().get("trailing_stop_pct", 3.0)
+        self.rules = exit_rules or trading_rules.ExitRules.from_settings(self.strategy.get_parameters())
+        self.initial_cash = float(initial_cash)
+        self.max_slots = max_slots or settings.MAX_SLOTS or 3
+        self.budget_ratio = budget_ratio if budget_ratio is not None else settings.BUDGET_RATIO
+        self.slippage_ticks = slippage_ticks
+        self.fee = fee_pct / 100
+        self.tax = tax_pct / 100
+        self.close_at_end = close_at_end
+        self.warmup_days = warmup_days
+        self.intraday = intraday
+        self.path_steps = path_steps
+        self._reset()
+
+    def _reset(self) -> None:
+        self.cash = self.initial_cash
+        self.positions: dict[str, dict] = {}
+        self.trades: list[dict] = []
+        self.equity: list[dict] = []
+        self.fees_paid = 0.0
+        self._day = ""
+        self._sold_today: set[str] = set()
+
+    # --- 실행 ---
+    def run(self, start: str | None = None, end: str | None = None) -> dict:
+        self._reset()
+        dates = self.provider.dates()
+        first = dates[min(self.warmup_days, len(dates))] if dates else ""
+        start = max(start or first, first)
+        for day in dates:
+            if day < start or (end and day > end):
+                continue
+            self._run_day(day)
+        return {"equity": self.equity, "trades": self.trades, "stats": self.stats()}
+
+    def _run_day(self, day: str) -> None:
+        self._day = day
+        self._sold_today.clear()
+        self.provider.set_date(day)
+        events = []
+        bars = {}
+        for symbol in self.provider.symbols():
+            bar = self.provider.bar(symbol, day)
+            if bar is None:
+                continue
+            bars[symbol] = bar
+            path = self.intraday(symbol, day) if self.intraday is not None else None
+            for t, price, volume in path or ohlc_path(bar, self.path_steps):
+                events.append((t, symbol, price, volume))
+        events.sort(key=lambda e: e[0])
+
+        high: dict[str, float] = {}
+        low: dict[str, float] = {}
+        last: dict[str, float] = {}
+        for t, symbol, price, volume in events:
+            if t >= CLOSE_OUT_TIME and self.close_at_end:
+                break
+            high[symbol] = max(high.get(symbol, price), price)
+            low[symbol] = min(low.get(symbol, price), price)
+            last[symbol] = price
+            self.provider.set_quote(symbol, price, high[symbol], low[symbol], volume)
+            if symbol in self.positions:
+                self._evaluate_holding(symbol, price, t)
+            elif trading_rules.is_entry_allowed_at(t):
+                self._evaluate_entry(symbol, price, t, bars[symbol])
+
+        closes = {s: float(b["stck_clpr"]) for s, b in bars.items()}
+        if self.close_at_end:
+            for symbol in list(self.positions):
+                price = last.get(symbol, closes.get(symbol))
+                if price is not None:
+                    self._sell(symbol, self.positions[symbol]["quantity"], price, CLOSE_OUT_TIME, "close_out", "장 마감 매도", close=True)
+        market_value = 0.0
+        for symbol, pos in self.positions.items():
+            pos["last_close"] = closes.get(symbol, pos.get("last_close", pos["purchase_price"]))
+            market_value += pos["quantity"] * pos["last_close"]
+        self.equity.append({
+            "date": day,
+            "equity": self.cash + market_value,
+            "cash": self.cash,
+            "positions": len(self.positions),
+        })
+
+    # --- 판단 ---
+    def _evaluate_holding(self, symbol: str, price: float, t: dtime) -> None:
+        pos = self.positions[symbol]
+        decision = trading_rules.decide_exit(
+            pos, price, self.trailing_pct,
+            signal_fn=lambda: self.strategy.check_signal(symbol, current_price=price)[0],
+            rules=self.rules,
+        )
+        if decision.high_price is not None:
+            pos["high_price"] = decision.high_price
+        if decision.kind == "sell":
+            self._sell(symbol, decision.quantity, price, t, decision.reason, decision.label, decision.close, decision.updates)
+        elif decision.updates:
+            pos.update(decision.updates)
+
+    def _evaluate_entry(self, symbol: str, price: float, t: dtime, bar: dict) -> None:
+        if len(self.positions) >= self.max_slots:
+            return
+        if not getattr(settings, "SAME_DAY_REENTRY", False) and symbol in self._sold_today:
+            return
+        signal, price_at_signal = self.strategy.check_signal(symbol, current_price=price)
+        if signal != "BUY" or price_at_signal is None:
+            return
+        target_price = float(getattr(self.strategy, "last_indicators", {}).get("target_price") or 0)
+        if trading_rules.entry_chase_reason(price_at_signal, target_price, float(bar["stck_oprc"])):
+            return
+        open_slots = max(1, self.max_slots - len(self.positions))
+        budget = self.cash * self.budget_ratio / open_slots
+        fill = price_at_signal + trading_rules.get_tick_size(price_at_signal) * self.slippage_ticks
+        quantity = int(budget // (fill * (1 + self.fee)))
+        if quantity < 1:
+            return
+        atr = None
+        if self.rules.use_atr:
+            atr = self.provider.get_indicators(symbol).atr(getattr(settings, "ATR_PERIOD", 20))
+            atr = None if math.isnan(atr) else atr
+        stop = trading_rules.initial_stop_price(price_at_signal, self.trailing_pct, atr, self.rules.use_atr, self.rules.atr_mult)
+        cost = quantity * fill
+        fee = cost * self.fee
+        self.cash -= cost + fee
+        self.fees_paid += fee
+        self.positions[symbol] = {
+            "bought": True,
+            "purchase_price": fill,
+            "quantity": quantity,
+            "initial_quantity": quantity,
+            "high_price": fill,
+            "stop_price": max(0.0, stop + (fill - price_at_signal)),
+            "stage1_sell_done": False,
+            "stage2_sell_done": False,
+            "atr": atr,
+            "entry_date": self._day,
+        }
+        self.trades.append({
+            "date": self._day, "time": t.strftime("%H:%M"), "symbol": symbol, "side": "BUY",
+            "price": fill, "quantity": quantity, "reason": "entry",
+            "label": getattr(self.strategy, "last_decision_reason", ""), "pnl": None,
+        })
+
+    def _sell(self, symbol: str, quantity: int, price: float, t: dtime, reason: str, label: str,
+              close: bool = False, updates: dict | None = None) -> None:
+        pos = self.positions[symbol]
+        quantity = min(quantity, pos["quantity"])
+        if quantity <= 0:
+            return
+        fill = max(1.0, price - trading_rules.get_tick_size(price) * self.slippage_ticks)
+        proceeds = quantity * fill
+        fee = proceeds * (self.fee + self.tax)
+        self.cash += proceeds - fee
+        self.fees_paid += fee
+        pnl = (fill - pos["purchase_price"]) * quantity - fee - quantity * pos["purchase_price"] * self.fee
+        self.trades.append({
+            "date": self._day, "time": t.strftime("%H:%M"), "symbol": symbol, "side": "SELL",
+            "price": fill, "quantity": quantity, "reason": reason, "label": label, "pnl": pnl,
+        })
+        pos["quantity"] -= quantity
+        if close or pos["quantity"] <= 0:
+            del self.positions[symbol]
+            self._sold_today.add(symbol)
+        elif updates:
+            pos.update(updates)
+
+    # --- 결과 ---
+    def stats(self) -> dict:
+        return compute_stats(self.equity, self.trades, self.initial_cash, self.fees_paid)
+
+
+def curve_stats(values, initial_cash: float) -> dict:
+    """일별 자산 배열 → 수익률, CAGR, 최대 낙폭, 샤프."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return {"days": 0, "finalEquity": initial_cash, "totalReturnPct": 0.0}
+    curve = np.concatenate(([initial_cash], values))
+    returns = curve[1:] / curve[:-1] - 1
+    drawdown = curve / np.maximum.accumulate(curve) - 1
+    years = values.size / TRADING_DAYS_PER_YEAR
+    std = returns.std()
+    return {
+        "days": int(values.size),
+        "finalEquity": round(float(values[-1]), 0),
+        "totalReturnPct": round(float(values[-1] / initial_cash - 1) * 100, 2),
+        "cagrPct": round(float((values[-1] / initial_cash) ** (1 / years) - 1) * 100, 2) if values[-1] > 0 else -100.0,
+        "maxDrawdownPct": round(float(drawdown.min()) * 100, 2),
+        "sharpe": round(float(returns.mean() / std * math.sqrt(TRADING_DAYS_PER_YEAR)), 2) if std > 0 else 0.0,
+    }
+
+
+def compute_stats(equity: list[dict], trades: list[dict], initial_cash: float, fees_paid: float = 0.0) -> dict:
+    """자산 곡선·체결 목록 → 수익률, CAGR, 최대 낙폭, 샤프, 승률, 손익비."""
+    stats = curve_stats([e["equity"] for e in equity], initial_cash)
+    sells = np.array([t["pnl"] for t in trades if t["side"] == "SELL"], dtype=float)
+    gains, losses = sells[sells > 0].sum(), -sells[sells < 0].sum()
+    stats.update({
+        "trades": int(sum(1 for t in trades if t["side"] == "BUY")),
+        "sells": int(sells.size),
+        "winRatePct": round(float((sells > 0).mean()) * 100, 1) if sells.size else 0.0,
+        "profitFactor": round(float(gains / losses), 2) if losses > 0 else None,
+        "fees": round(fees_paid, 0),
+    })
+    return stats
@@ -0,0 +1,139 @@
+"""
+당일 매매 원장 (메모리).
+- 당일 실현손익, 체결 건수(BUY+SELL 성공), 매도 승/패, 연패 수를 _log_trade마다 갱신 → 리스크 체크와 /api/status가 O(1)로 읽음.
+- 시작 시(또는 KST 날짜가 바뀐 뒤 첫 접근 시) 당일 TradeLog로 한 번 재구성합니다.
+  재구성 쿼리가 실패하면 날짜를 확정하지 않고 _REBUILD_RETRY_SEC 뒤 다음 접근에서 다시 시도합니다 (그동안은 0부터 집계).
+  재구성 이후 기록은 TradeLog id로 중복을 거름 (재구성 쿼리가 이미 본 행은 다시 더하지 않음).
+- 연패는 당일 체결 매도 기준 (손실 매도마다 +1, 이익·본전 매도 시 0). 날짜가 바뀌면 초기화.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+from app.core.logger import logger
+from app.db import models, session
+from app.db.models import OrderStatus, OrderType
+
+KST = timezone(timedelta(hours=9))
+_REBUILD_RETRY_SEC = 30.0  # 재구성 실패 후 재시도 간격 (DB 장애 중 접근마다 쿼리·경고가 반복되지 않게)
+
+
+def _today() -> date:
+    return datetime.now(KST).date()
+
+
+def _day_start_utc(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=KST).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class DailyLedger:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day: date | None = None
+        self._last_id = 0  # 재구성 때 읽은 마지막 TradeLog id
+        self._retry_at = 0.0  # 재구성 실패 시 다음 시도 시각 (monotonic)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._realized_pl = 0.0
+        self._trades = 0
+        self._wins = 0
+        self._losses = 0
+        self._loss_streak = 0
+
+    def _apply(self, order_type: OrderType, status: OrderStatus, realized_pl: float | None) -> None:
+        if status != OrderStatus.EXECUTED:
+            return
+        self._trades += 1
+        if order_type != OrderType.SELL:
+            return
+        pl = realized_pl or 0.0
+        self._realized_pl += pl
+        if pl < 0:
+            self._losses += 1
+            self._loss_streak += 1
+        else:
+            self._wins += int(pl > 0)
+            self._loss_streak = 0
+
+    def _rebuild_locked(self, day: date) -> None:
+        self._reset()
+        db = session.SessionLocal()
+        try:
+            last_id = db.query(func.max(models.TradeLog.id)).scalar() or 0
+            rows = (
+                db.query(models.TradeLog.order_type, models.TradeLog.status, models.TradeLog.realized_pl)
+                .filter(
+                    models.TradeLog.status == OrderStatus.EXECUTED,
+                    models.TradeLog.timestamp >= _day_start_utc(day),
+                    models.TradeLog.id <= last_id,  # 조회 사이에 커밋된 행은 record()가 반영
+                )
+                .order_by(models.TradeLog.timestamp.asc(), models.TradeLog.id.asc())
+                .all()
+            )
+        except Exception as e:
+            # 날짜를 확정하지 않음 → 재시도 간격 뒤 다음 접근에서 다시 재구성 (그동안 record()분은 재구성 시 DB에서 다시 읽음)
+            self._day = None
+            self._retry_at = time.monotonic() + _REBUILD_RETRY_SEC
+            logger.warning(f"당일 매매 원장 재구성 실패 (0부터 집계, {_REBUILD_RETRY_SEC:.0f}초 뒤 재시도): {e}")
+            return
+        finally:
+            db.close()
+        for order_type, status, realized_pl in rows:
+            self._apply(order_type, status, realized_pl)
+        self._day = day
+        self._last_id = last_id
+        logger.info(
+            f"당일 매매 원장 재구성 ({day}): 체결 {self._trades}건, 실현손익 {self._realized_pl:.0f}, 연패 {self._loss_streak}"
+        )
+
+    def _ensure_today(self) -> None:
+        today = _today()
+        if self._day != today and time.monotonic() >= self._retry_at:
+            self._rebuild_locked(today)
+
+    def rebuild(self) -> None:
+        """DB에서 당일 원장을 다시 읽습니다 (앱 시작 시)."""
+        with self._lock:
+            self._rebuild_locked(_today())
+
+    def record(self, order_type: OrderType, status: OrderStatus, realized_pl: float | None = None,
+               trade_id: int | None = None) -> None:
+        """_log_trade 직후 호출. trade_id는 저장된 TradeLog id (DB 저장 실패 시 None → 그대로 반영)."""
+        with self._lock:
+            self._ensure_today()
+            if trade_id is not None and trade_id <= self._last_id:
+                return  # 재구성 쿼리가 이미 반영한 행
+            self._apply(order_type, status, realized_pl)
+
+    def realized_pl(self) -> float:
+        with self._lock:
+            self._ensure_today()
+            return self._realized_pl
+
+    def trade_count(self) -> int:
+        with self._lock:
+            self._ensure_today()
+            return self._trades
+
+    def loss_streak(self) -> int:
+        with self._lock:
+            self._ensure_today()
+            return self._loss_streak
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._ensure_today()
+            return {
+                "day": (self._day or _today()).isoformat(),
+                "realizedPL": round(self._realized_pl, 0),
+                "trades": self._trades,
+                "wins": self._wins,
+                "losses": self._losses,
+                "lossStreak": self._loss_streak,
+            }
+
+
+daily_ledger = DailyLedger()
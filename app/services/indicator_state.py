@@ -0,0 +1,292 @@
+"""
+종목별 증분 지표 상태.
+- 확정된 과거 일봉은 누적합(종가, 종가², 상승폭, 하락폭, True Range, 거래량)으로 보관 → 임의 기간 SMA/표준편차/RSI/ATR/평균거래량을 O(1)로 조회.
+- 당일 봉(시가/고가/저가/현재가/누적거래량)은 체결 틱·현재가 캐시로 O(1) 갱신하고, 당일 값이 필요한 지표(ATR, Wilder RSI)는 잠정값으로 계산.
+- 날짜가 바뀌면 일봉 저장소(kis_market.get_daily_ohlcv)에서 다시 구성합니다. 전략은 배열을 다시 만들지 않고 현재 값을 읽습니다.
+"""
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.core.logger import logger
+
+KST = timezone(timedelta(hours=9))
+
+# 상태 구성 시 읽는 일봉 수 (전략 기간 최대치 + 여유)
+STATE_WINDOW = 120
+WILDER_RSI_PERIOD = 14
+
+
+def _num(row: dict, *keys) -> float:
+    for key in keys:
+        val = row.get(key)
+        if val is not None:
+            try:
+                return float(val)
+            except (TypeError, ValueError):
+                return math.nan
+    return math.nan
+
+
+class SymbolIndicators:
+    """종목 1개의 확정 일봉 누적합 + 당일 봉 상태."""
+
+    __slots__ = (
+        "symbol", "session_date", "_closes", "_highs", "_lows",
+        "_cum_close", "_cum_close_sq", "_cum_gain", "_cum_loss", "_cum_tr", "_cum_vol", "_cum_vol_n",
+        "_wilder_gain", "_wilder_loss",
+        "open", "high", "low", "last", "volume",
+    )
+
+    def __init__(self, symbol: str, session_date: str):
+        self.symbol = symbol
+        self.session_date = session_date
+        self._closes: list[float] = []
+        self._highs: list[float] = []
+        self._lows: list[float] = []
+        # 누적합은 앞에 0을 하나 두어 구간합 = cum[-1] - cum[-1 - n]
+        self._cum_close = [0.0]
+        self._cum_close_sq = [0.0]
+        self._cum_gain = [0.0]
+        self._cum_loss = [0.0]
+        self._cum_tr = [0.0]
+        self._cum_vol = [0.0]
+        self._cum_vol_n = [0]
+        self._wilder_gain: float | None = None
+        self._wilder_loss: float | None = None
+        self.open = self.high = self.low = self.last = math.nan
+        self.volume = math.nan
+
+    # --- 구성 ---
+    @classmethod
+    def from_bars(cls, symbol: str, daily_data: list, today: str | None = None) -> "SymbolIndicators":
+        """KIS 일봉(최신순)으로 상태를 만듭니다. 당일 봉(stck_bsop_date == today, 날짜 없으면 첫 행)은 당일 상태로."""
+        today = today or datetime.now(KST).strftime("%Y%m%d")
+        state = cls(symbol, today)
+        rows = list(daily_data or [])
+        intraday = None
+        if rows and str(rows[0].get("stck_bsop_date", today)) == today:
+            intraday = rows.pop(0)
+        for row in reversed(rows):
+            state.append_bar(
+                _num(row, "stck_hgpr"), _num(row, "stck_lwpr"), _num(row, "stck_clpr"),
+                _num(row, "acml_vol", "stck_acml_vol", "acml_volume"),
+            )
+        if intraday is not None:
+            state.update(
+                price=_num(intraday, "stck_clpr"), open_=_num(intraday, "stck_oprc"),
+                high=_num(intraday, "stck_hgpr"), low=_num(intraday, "stck_lwpr"),
+                volume=_num(intraday, "acml_vol", "stck_acml_vol", "acml_volume"),
+            )
+        return state
+
+    def append_bar(self, high: float, low: float, close: float, volume: float) -> None:
+        """확정 일봉 1개를 추가합니다 (O(1))."""
+        prev_close = self._closes[-1] if self._closes else None
+        self._closes.append(close)
+        self._highs.append(high)
+        self._lows.append(low)
+        self._cum_close.append(self._cum_close[-1] + close)
+        self._cum_close_sq.append(self._cum_close_sq[-1] + close * close)
+        if prev_close is not None:
+            delta = close - prev_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            self._cum_gain.append(self._cum_gain[-1] + gain)
+            self._cum_loss.append(self._cum_loss[-1] + loss)
+            self._cum_tr.append(self._cum_tr[-1] + self._true_range(high, low, prev_close))
+            n_deltas = len(self._closes) - 1
+            if n_deltas == WILDER_RSI_PERIOD:
+                self._wilder_gain = self._cum_gain[-1] / WILDER_RSI_PERIOD
+                self._wilder_loss = self._cum_loss[-1] / WILDER_RSI_PERIOD
+            elif n_deltas > WILDER_RSI_PERIOD:
+                self._wilder_gain = (self._wilder_gain * (WILDER_RSI_PERIOD - 1) + gain) / WILDER_RSI_PERIOD
+                self._wilder_loss = (self._wilder_loss * (WILDER_RSI_PERIOD - 1) + loss) / WILDER_RSI_PERIOD
+        valid = not math.isnan(volume)
+        self._cum_vol.append(self._cum_vol[-1] + (volume if valid else 0.0))
+        self._cum_vol_n.append(self._cum_vol_n[-1] + (1 if valid else 0))
+
+    def start_session(self, session_date: str) -> None:
+        """새 거래일 시작: 당일 봉을 비웁니다 (직전 당일 봉은 append_bar로 먼저 확정)."""
+        self.session_date = session_date
+        self.open = self.high = self.low = self.last = math.nan
+        self.volume = math.nan
+
+    def update(self, price: float, open_: float | None = None, high: float | None = None,
+               low: float | None = None, volume: float | None = None) -> None:
+        """당일 봉 갱신 (체결 틱 또는 현재가 응답, O(1)). 0 이하·NaN 값은 무시."""
+        if price and price > 0:
+            self.last = price
+            self.high = price if math.isnan(self.high) else max(self.high, price)
+            self.low = price if math.isnan(self.low) else min(self.low, price)
+            if math.isnan(self.open):
+                self.open = price
+        if open_ and open_ > 0:
+            self.open = open_
+        if high and high > 0:
+            self.high = high if math.isnan(self.high) else max(self.high, high)
+        if low and low > 0:
+            self.low = low if math.isnan(self.low) else min(self.low, low)
+        if volume is not None and not math.isnan(volume) and volume >= 0:
+            self.volume = volume
+
+    # --- 조회 (확정 일봉) ---
+    @property
+    def count(self) -> int:
+        """확정 일봉 수."""
+        return len(self._closes)
+
+    def prev_bar(self, offset: int = 0) -> dict | None:
+        """직전 확정 봉(offset=0) 또는 그 이전 봉 {high, low, close}."""
+        i = len(self._closes) - 1 - offset
+        if i < 0:
+            return None
+        return {"high": self._highs[i], "low": self._lows[i], "close": self._closes[i]}
+
+    def sma(self, period: int, offset: int = 0) -> float:
+        """최근 확정 종가 period개 평균 (offset개 봉 이전 기준). 부족하면 NaN."""
+        end = len(self._cum_close) - 1 - offset
+        if period <= 0 or end - period < 0:
+            return math.nan
+        return (self._cum_close[end] - self._cum_close[end - period]) / period
+
+    def std(self, period: int) -> float:
+        """최근 확정 종가 period개 모표준편차."""
+        if period <= 0 or len(self._closes) < period:
+            return math.nan
+        mean = self.sma(period)
+        sq = (self._cum_close_sq[-1] - self._cum_close_sq[-1 - period]) / period
+        return math.sqrt(max(sq - mean * mean, 0.0))
+
+    def bollinger(self, period: int = 20, num_std: float = 2.0) -> tuple[float, float, float]:
+        """(중심선, 상단, 하단)."""
+        mid = self.sma(period)
+        std = self.std(period) or 1e-10
+        return mid, mid + num_std * std, mid - num_std * std
+
+    def rsi(self, period: int = 14) -> float:
+        """확정 종가 기준 최근 period개 등락폭 단순평균 RSI (indicators.rsi와 동일 정의)."""
+        n = len(self._cum_gain) - 1
+        if period <= 0 or n < period:
+            return 50.0
+        avg_gain = (self._cum_gain[-1] - self._cum_gain[-1 - period]) / period
+        avg_loss = (self._cum_loss[-1] - self._cum_loss[-1 - period]) / period
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def wilder_rsi(self, include_today: bool = True) -> float:
+        """Wilder RSI(14). include_today면 당일 현재가를 잠정 반영 (상태는 바꾸지 않음)."""
+        if self._wilder_gain is None:
+            return 50.0
+        gain, loss = self._wilder_gain, self._wilder_loss
+        if include_today and not math.isnan(self.last) and self._closes:
+            delta = self.last - self._closes[-1]
+            p = WILDER_RSI_PERIOD
+            gain = (gain * (p - 1) + max(delta, 0.0)) / p
+            loss = (loss * (p - 1) + max(-delta, 0.0)) / p
+        if loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def average_volume(self, period: int = 20) -> float:
+        """최근 확정 봉 period개 평균 거래량. 유효값이 period개 미만이면 NaN."""
+        if period <= 0 or len(self._cum_vol) - 1 < period:
+            return math.nan
+        n = self._cum_vol_n[-1] - self._cum_vol_n[-1 - period]
+        if n < period:
+            return math.nan
+        return (self._cum_vol[-1] - self._cum_vol[-1 - period]) / n
+
+    def atr(self, period: int = 20) -> float:
+        """
+        ATR(period): 당일 봉이 있으면 당일 TR(잠정) + 직전 period-1개 확정 TR, 없으면 최근 period개 확정 TR 평균.
+        (indicators.compute_atr_from_daily와 동일 정의)
+        """
+        n_tr = len(self._cum_tr) - 1
+        has_today = not math.isnan(self.high) and not math.isnan(self.low) and bool(self._closes)
+        if period <= 0 or self.count < period + (0 if has_today else 1):
+            return math.nan
+        if not has_today:
+            return (self._cum_tr[-1] - self._cum_tr[-1 - period]) / period
+        today_tr = self._true_range(self.high, self.low, self._closes[-1])
+        k = period - 1
+        past = (self._cum_tr[-1] - self._cum_tr[-1 - k]) if k > 0 and n_tr >= k else 0.0
+        return (past + today_tr) / period
+
+    def snapshot(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "sessionDate": self.session_date,
+            "bars": self.count,
+            "open": self.open, "high": self.high, "low": self.low, "last": self.last, "volume": self.volume,
+            "sma20": self.sma(20),
+            "rsi14": self.rsi(14),
+            "wilderRsi14": self.wilder_rsi(),
+            "atr20": self.atr(20),
+            "avgVolume20": self.average_volume(20),
+        }
+
+    @staticmethod
+    def _true_range(high: float, low: float, prev_close: float) -> float:
+        return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class IndicatorBook:
+    """종목별 SymbolIndicators 보관소. 날짜가 바뀌면 일봉 저장소에서 재구성, 틱/현재가로 당일 값 갱신."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: dict[str, SymbolIndicators] = {}
+
+    def get(self, symbol: str) -> SymbolIndicators:
+        """당일 상태를 반환 (없거나 날짜가 바뀌었으면 일봉으로 재구성, 현재가 캐시가 있으면 당일 값 반영)."""
+        from app.api import kis_market
+
+        today = datetime.now(KST).strftime("%Y%m%d")
+        with self._lock:
+            state = self._states.get(symbol)
+        if state is None or state.session_date != today:
+            state = SymbolIndicators.from_bars(symbol, kis_market.get_daily_ohlcv(symbol, days=STATE_WINDOW), today)
+            with self._lock:
+                self._states[symbol] = state
+        quote = kis_market.peek_quote(symbol)
+        if quote:
+            state.update(
+                price=_num(quote, "stck_prpr"), open_=_num(quote, "stck_oprc"),
+                high=_num(quote, "stck_hgpr"), low=_num(quote, "stck_lwpr"), volume=_num(quote, "acml_vol"),
+            )
+        return state
+
+    def warm(self, symbols: list[str]) -> int:
+        """시작 시 대상 종목 상태를 미리 구성합니다. 구성한 종목 수를 반환."""
+        built = 0
+        for symbol in dict.fromkeys(symbols):
+            try:
+                self.get(symbol)
+                built += 1
+            except Exception as e:
+                logger.debug(f"[{symbol}] 지표 상태 구성 실패: {e}")
+        return built
+
+    def on_tick(self, symbol: str, tick: dict) -> None:
+        """실시간 체결 리스너: 상태가 있는 종목만 당일 값을 O(1) 갱신."""
+        with self._lock:
+            state = self._states.get(symbol)
+        if state is None:
+            return
+        state.update(price=tick.get("price"), open_=tick.get("open"), high=tick.get("high"),
+                     low=tick.get("low"), volume=tick.get("volume"))
+
+    def drop(self, symbol: str | None = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop(symbol, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"symbols": len(self._states)}
+
+
+indicator_book = IndicatorBook()
@@ -1,33 +1,191 @@
-"""기술적 지표 계산 (ATR 등)."""
-from app.api import kis_market
-from app.core.config import settings
-
-
-def compute_atr_from_daily(daily_data: list, period: int = 20) -> float | None:
-    """
-    일봉 리스트에서 ATR(평균 진폭)을 계산합니다.
-    daily_data: [오늘, 전일, ...] 순서. 각 항목은 stck_hgpr, stck_lwpr, stck_clpr 포함.
-    """
-    if not daily_data or len(daily_data) < period + 1:
-        return None
-    tr_list = []
-    for i in range(min(period + 1, len(daily_data) - 1)):
-        high = float(daily_data[i]["stck_hgpr"])
-        low = float(daily_data[i]["stck_lwpr"])
-        close = float(daily_data[i]["stck_clpr"])
-        prev_close = float(daily_data[i + 1]["stck_clpr"]) if i + 1 < len(daily_data) else close
-        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-        tr_list.append(tr)
-    if len(tr_list) < period:
-        return None
-    return sum(tr_list[:period]) / period
-
-
-def get_atr(symbol: str, period: int | None = None) -> float | None:
-    """종목의 ATR(period일)을 조회합니다. 실패 시 None."""
-    period = period or getattr(settings, "ATR_PERIOD", 20)
-    try:
-        data = kis_market.get_daily_ohlcv(symbol, days=period + 2)
-        return compute_atr_from_daily(data, period)
-    except Exception:
-        return None
+"""
+기술적 지표 계산 (NumPy 벡터 연산).
+- 모든 지표는 오래된순(과거 → 최신) float 배열의 마지막 축을 시간축으로 계산합니다.
+  1차원(종목 1개)이면 스칼라/1차원, 2차원(종목×일자)이면 종목별 결과 배열을 한 번에 반환합니다.
+- KIS 일봉 응답(최신순 dict 리스트)은 bars_to_arrays / bars_matrix로 변환해 사용합니다.
+- kis_market(종목별 지표 상태)은 get_atr에서만 지연 import → 백테스트 등에서 KIS 의존성 없이 지표만 가져다 쓸 수 있습니다.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.core.config import settings
+
+OHLCV_KEYS = {
+    "open": ("stck_oprc",),
+    "high": ("stck_hgpr",),
+    "low": ("stck_lwpr",),
+    "close": ("stck_clpr",),
+    "volume": ("acml_vol", "stck_acml_vol", "acml_volume"),
+}
+
+
+def _scalar(value):
+    """0차원 결과는 float로 풀어 반환 (1종목 호출 시 기존 float 인터페이스 유지)."""
+    arr = np.asarray(value)
+    return float(arr) if arr.ndim == 0 else arr
+
+
+def _field(row: dict, keys: tuple) -> float:
+    for key in keys:
+        val = row.get(key)
+        if val is not None:
+            try:
+                return float(val)
+            except (TypeError, ValueError):
+                return np.nan
+    return np.nan
+
+
+# --- 변환 ---
+def bars_to_arrays(daily_data: list, days: int | None = None) -> dict[str, np.ndarray]:
+    """
+    KIS 일봉(최신순) → 필드별 오래된순 float 배열 {"open","high","low","close","volume"}.
+    days 지정 시 최신 days개만 사용. 값이 없거나 숫자가 아니면 NaN.
+    """
+    rows = (daily_data or [])[:days] if days else (daily_data or [])
+    n = len(rows)
+    out = {}
+    for name, keys in OHLCV_KEYS.items():
+        arr = np.empty(n, dtype=float)
+        for i, row in enumerate(rows):
+            arr[n - 1 - i] = _field(row, keys)
+        out[name] = arr
+    return out
+
+
+def bars_matrix(bars_list: list[list], days: int) -> dict[str, np.ndarray]:
+    """
+    여러 종목 일봉 → 필드별 종목×days 행렬 (오래된순). 봉이 days개보다 적은 종목은 앞쪽(과거)을 NaN으로 채웁니다.
+    """
+    out = {name: np.full((len(bars_list), days), np.nan) for name in OHLCV_KEYS}
+    for i, bars in enumerate(bars_list):
+        arrays = bars_to_arrays(bars, days)
+        n = len(arrays["close"])
+        if n == 0:
+            continue
+        for name, arr in arrays.items():
+            out[name][i, days - n:] = arr
+    return out
+
+
+# --- 추세 ---
+def sma(values, period: int) -> np.ndarray:
+    """단순이동평균 (롤링). 결과 길이 = n - period + 1 (마지막 값이 최신). 데이터 부족 시 빈 배열."""
+    v = np.asarray(values, dtype=float)
+    if period <= 0 or v.shape[-1] < period:
+        return np.empty(v.shape[:-1] + (0,))
+    return sliding_window_view(v, period, axis=-1).mean(axis=-1)
+
+
+def ema(values, period: int) -> np.ndarray:
+    """지수이동평균 (alpha = 2/(period+1), 첫 값으로 시작). 결과 길이 = n."""
+    v = np.asarray(values, dtype=float)
+    out = np.empty_like(v)
+    if v.shape[-1] == 0:
+        return out
+    alpha = 2.0 / (period + 1)
+    out[..., 0] = v[..., 0]
+    for t in range(1, v.shape[-1]):
+        out[..., t] = alpha * v[..., t] + (1 - alpha) * out[..., t - 1]
+    return out
+
+
+def bollinger(closes, period: int = 20, num_std: float = 2.0):
+    """최신 period개 종가의 볼린저 밴드 (중심선, 상단, 하단). 표준편차는 모표준편차(ddof=0)."""
+    c = np.asarray(closes, dtype=float)[..., -period:]
+    mid = c.mean(axis=-1)
+    std = c.std(axis=-1)
+    std = np.where(std == 0, 1e-10, std)
+    return _scalar(mid), _scalar(mid + num_std * std), _scalar(mid - num_std * std)
+
+
+# --- 모멘텀 ---
+def _wilder_average(values: np.ndarray, period: int) -> np.ndarray:
+    avg = values[..., :period].mean(axis=-1)
+    for t in range(period, values.shape[-1]):
+        avg = (avg * (period - 1) + values[..., t]) / period
+    return avg
+
+
+def rsi(closes, period: int = 14, wilder: bool = False):
+    """
+    최신 RSI. 기본은 최근 period개 등락폭의 단순평균(기존 전략과 동일), wilder=True면 Wilder 평활.
+    데이터가 period+1개 미만이면 50, 하락폭 평균이 0이면 100.
+    """
+    c = np.asarray(closes, dtype=float)
+    if period <= 0 or c.shape[-1] < period + 1:
+        return _scalar(np.full(c.shape[:-1], 50.0))
+    deltas = np.diff(c, axis=-1)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    if wilder:
+        avg_gain = _wilder_average(gains, period)
+        avg_loss = _wilder_average(losses, period)
+    else:
+        avg_gain = gains[..., -period:].mean(axis=-1)
+        avg_loss = losses[..., -period:].mean(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return _scalar(np.where(avg_loss == 0, 100.0, value))
+
+
+# --- 변동성 ---
+def true_range(high, low, close) -> np.ndarray:
+    """True Range (두 번째 봉부터, 전일 종가 기준). 결과 길이 = n - 1."""
+    h = np.asarray(high, dtype=float)[..., 1:]
+    lo = np.asarray(low, dtype=float)[..., 1:]
+    prev_close = np.asarray(close, dtype=float)[..., :-1]
+    return np.maximum(h - lo, np.maximum(np.abs(h - prev_close), np.abs(lo - prev_close)))
+
+
+def atr(high, low, close, period: int = 20):
+    """최신 period개 True Range의 단순평균 (당일 봉 포함). 봉이 period+1개 미만이면 NaN."""
+    tr = true_range(high, low, close)
+    if tr.shape[-1] < period:
+        return _scalar(np.full(tr.shape[:-1], np.nan))
+    return _scalar(tr[..., -period:].mean(axis=-1))
+
+
+# --- 거래량 ---
+def average_volume(volume, period: int = 20):
+    """최신 봉을 제외한 직전 period개 거래량 평균. 유효값이 period개 미만이면 NaN."""
+    v = np.asarray(volume, dtype=float)[..., :-1][..., -period:]
+    valid = ~np.isnan(v)
+    count = valid.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid, v, 0.0).sum(axis=-1) / count
+    return _scalar(np.where(count >= period, mean, np.nan))
+
+
+def volume_ratio(volume, period: int = 20):
+    """최신 봉 거래량 / 직전 period개 평균. 계산 불가면 NaN."""
+    v = np.asarray(volume, dtype=float)
+    avg = np.asarray(average_volume(v, period))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(avg > 0, v[..., -1] / avg, np.nan)
+    return _scalar(ratio)
+
+
+# --- 일봉 헬퍼 ---
+def compute_atr_from_daily(daily_data: list, period: int = 20) -> float | None:
+    """
+    일봉 리스트에서 ATR(평균 진폭)을 계산합니다.
+    daily_data: [오늘, 전일, ...] 순서. 각 항목은 stck_hgpr, stck_lwpr, stck_clpr 포함.
+    """
+    if not daily_data or len(daily_data) < period + 1:
+        return None
+    arrays = bars_to_arrays(daily_data, period + 1)
+    value = atr(arrays["high"], arrays["low"], arrays["close"], period)
+    return None if np.isnan(value) else value
+
+
+def get_atr(symbol: str, period: int | None = None) -> float | None:
+    """종목의 ATR(period일)을 조회합니다 (종목별 증분 지표 상태 사용). 실패 시 None."""
+    from app.services.indicator_state import indicator_book
+
+    period = period or getattr(settings, "ATR_PERIOD", 20)
+    try:
+        value = indicator_book.get(symbol).atr(period)
+        return None if np.isnan(value) else value
+    except Exception:
+        return None
@@ -360,27 +360,12 @@ def _log_decision(
     current_price: float,
     action_taken: str,
 ) -> None:
-    """DecisionLog 테이블에 LLM 판단 결과를 기록한다."""
+    """DecisionLog에 LLM 판단 결과를 기록한다 (배치 기록기 큐)."""
     try:
-        from app.db import models, session
+        from app.db.decision_log import decision_log
 
-        db = session.SessionLocal()
-        try:
-            log = models.DecisionLog(
-                symbol=symbol,
-                strategy_name="llm_advisor",
-                signal=decision,
-                decision_reason=reason,
-                indicator_values=json.dumps(
-                    {"confidence": confidence}, ensure_ascii=False
-                ),
-                current_price=current_price,
-                action_taken=action_taken,
-            )
-            db.add(log)
-            db.commit()
-        finally:
-            db.close()
+        decision_log.record(symbol, "llm_advisor", decision, reason, {"confidence": confidence},
+                            current_price, action_taken)
     except Exception as e:
         logger.error(f"[LLM] DecisionLog 저장 실패: {e}")
 
@@ -0,0 +1,241 @@
+"""
+전략용 시세 제공자 (MarketDataProvider).
+- 전략은 kis_market을 직접 부르지 않고 self.market_data(제공자)로 일봉/현재가/지표 상태를 읽습니다.
+- KisMarketData: 실거래 (kis_market 캐시 + 종목별 지표 상태). 전략 기본값.
+- CachedMarketData: 다른 제공자 앞에 두는 사이클 단위 메모 캐시 → 여러 전략이 한 번 조회한 값을 공유.
+- ReplayMarketData: 미리 받아 둔 일봉을 날짜 커서로 재생 (백테스트/기록 재현).
+- SyntheticMarketData: 시드 고정 랜덤워크 일봉 (전략 동작 확인용).
+kis_market은 KisMarketData 안에서만 지연 import → 재생/합성 제공자는 KIS 의존성 없이 사용할 수 있습니다.
+"""
+import bisect
+import math
+import random
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta, timezone
+
+from app.services.indicator_state import STATE_WINDOW, SymbolIndicators
+
+KST = timezone(timedelta(hours=9))
+
+# kis_market.get_daily_ohlcv와 같은 최소 반환 개수
+_MIN_DAILY_ROWS = 30
+
+
+class MarketDataProvider(ABC):
+    """전략이 사용하는 시세 인터페이스. 일봉은 KIS 응답과 같은 형식(최신순 dict, stck_* 키)."""
+
+    @abstractmethod
+    def get_daily_ohlcv(self, symbol: str, days: int = 30) -> list:
+        """일봉 (최신순, 첫 행이 당일)."""
+
+    @abstractmethod
+    def get_current_price(self, symbol: str) -> float:
+        """현재가."""
+
+    def session_date(self) -> str:
+        """제공자 기준 당일 (YYYYMMDD)."""
+        return datetime.now(KST).strftime("%Y%m%d")
+
+    def get_indicators(self, symbol: str) -> SymbolIndicators:
+        """종목 지표 상태. 기본 구현은 일봉으로 매번 구성 (제공자별로 캐시/증분 갱신을 덮어씀)."""
+        return SymbolIndicators.from_bars(symbol, self.get_daily_ohlcv(symbol, STATE_WINDOW), self.session_date())
+
+
+class KisMarketData(MarketDataProvider):
+    """실거래 시세: kis_market (TTL 캐시·일봉 저장소) + indicator_book."""
+
+    def get_daily_ohlcv(self, symbol: str, days: int = 30) -> list:
+        from app.api import kis_market
+        return kis_market.get_daily_ohlcv(symbol, days=days)
+
+    def get_current_price(self, symbol: str) -> float:
+        from app.api import kis_market
+        return kis_market.get_current_price(symbol)
+
+    def get_indicators(self, symbol: str) -> SymbolIndicators:
+        from app.services.indicator_state import indicator_book
+        return indicator_book.get(symbol)
+
+
+class CachedMarketData(MarketDataProvider):
+    """inner 제공자 결과를 clear() 전까지 메모합니다. 매매 사이클 시작 시 clear()."""
+
+    def __init__(self, inner: MarketDataProvider):
+        self.inner = inner
+        self._lock = threading.Lock()
+        self._memo: dict[tuple, object] = {}
+
+    def _memoized(self, key: tuple, fetch):
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = fetch()
+        with self._lock:
+            self._memo[key] = value
+        return value
+
+    def get_daily_ohlcv(self, symbol: str, days: int = 30) -> list:
+        rows = self._memoized(("daily", symbol, max(days, _MIN_DAILY_ROWS)),
+                              lambda: self.inner.get_daily_ohlcv(symbol, days))
+        return list(rows)
+
+    def get_current_price(self, symbol: str) -> float:
+        return self._memoized(("price", symbol), lambda: self.inner.get_current_price(symbol))
+
+    def session_date(self) -> str:
+        return self.inner.session_date()
+
+    def get_indicators(self, symbol: str) -> SymbolIndicators:
+        return self._memoized(("indicators", symbol), lambda: self.inner.get_indicators(symbol))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+
+
+class ReplayMarketData(MarketDataProvider):
+    """
+    일봉 재생. bars: {symbol: 일봉 리스트(최신순 또는 오래된순, stck_bsop_date 필수)}.
+    set_date(YYYYMMDD)로 커서를 옮기면 그날까지의 봉만 보이고, 현재가는 그날 price_field(기본 종가).
+    set_quote로 장중 시점(현재가·고가·저가·누적거래량)을 주면 당일 봉은 그 값으로 대체 → 당일 미래값 미참조.
+    지표 상태는 커서가 앞으로 가면 지나간 봉만 append_bar로 확정 (날짜당 O(1)).
+    """
+
+    def __init__(self, bars: dict[str, list], price_field: str = "stck_clpr"):
+        self.price_field = price_field
+        self._bars: dict[str, list] = {}
+        self._dates: dict[str, list[str]] = {}
+        for symbol, rows in bars.items():
+            ordered = sorted(rows, key=lambda r: str(r["stck_bsop_date"]))
+            self._bars[symbol] = ordered
+            self._dates[symbol] = [str(r["stck_bsop_date"]) for r in ordered]
+        self._cursor = max((d[-1] for d in self._dates.values() if d), default="")
+        self._quotes: dict[str, dict] = {}
+        self._states: dict[str, SymbolIndicators] = {}
+        self._committed: dict[str, int] = {}  # 상태에 확정된 봉 수
+
+    # --- 커서 ---
+    def dates(self) -> list[str]:
+        """전 종목 거래일 (오래된순)."""
+        return sorted({d for dates in self._dates.values() for d in dates})
+
+    def symbols(self) -> list[str]:
+        return list(self._bars)
+
+    def bar(self, symbol: str, day: str | None = None) -> dict | None:
+        """day(기본 커서) 일봉 원본. 없으면 None."""
+        day = day or self._cursor
+        dates = self._dates.get(symbol, [])
+        i = bisect.bisect_left(dates, day)
+        return self._bars[symbol][i] if i < len(dates) and dates[i] == day else None
+
+    def set_date(self, day: str) -> None:
+        """커서를 day로 옮깁니다 (장중 시세 초기화)."""
+        self._cursor = str(day)
+        self._quotes.clear()
+
+    def set_quote(self, symbol: str, price: float, high: float | None = None, low: float | None = None,
+                  volume: float | None = None) -> None:
+        """당일 장중 시점 시세를 지정합니다 (고가/저가/거래량은 그 시점까지 값)."""
+        self._quotes[symbol] = {"price": float(price), "high": high, "low": low, "volume": volume}
+
+    def set_price(self, symbol: str, price: float) -> None:
+        """당일 현재가만 덮어씁니다."""
+        self.set_quote(symbol, price)
+
+    def session_date(self) -> str:
+        return self._cursor
+
+    # --- 조회 ---
+    def _visible(self, symbol: str) -> int:
+        return bisect.bisect_right(self._dates.get(symbol, []), self._cursor)
+
+    def get_daily_ohlcv(self, symbol: str, days: int = 30) -> list:
+        end = self._visible(symbol)
+        n = max(days, _MIN_DAILY_ROWS)
+        rows = [dict(r) for r in reversed(self._bars.get(symbol, [])[max(0, end - n):end])]
+        quote = self._quotes.get(symbol)
+        if rows and quote is not None and rows[0]["stck_bsop_date"] == self._cursor:
+            today = rows[0]
+            today["stck_clpr"] = str(quote["price"])
+            today["stck_hgpr"] = str(quote["high"] if quote["high"] is not None else quote["price"])
+            today["stck_lwpr"] = str(quote["low"] if quote["low"] is not None else quote["price"])
+            if quote["volume"] is not None:
+                today["acml_vol"] = str(quote["volume"])
+        return rows
+
+    def get_current_price(self, symbol: str) -> float:
+        quote = self._quotes.get(symbol)
+        if quote is not None:
+            return quote["price"]
+        end = self._visible(symbol)
+        if end == 0:
+            raise KeyError(f"{symbol}: {self._cursor} 이전 일봉 없음")
+        return float(self._bars[symbol][end - 1][self.price_field])
+
+    def get_indicators(self, symbol: str) -> SymbolIndicators:
+        """커서가 앞으로 가면 지나간 봉만 확정해 상태를 이어가고, 뒤로 가면 다시 구성합니다."""
+        dates = self._dates.get(symbol, [])
+        committed = bisect.bisect_left(dates, self._cursor)  # 커서 전날까지 봉 수
+        state = self._states.get(symbol)
+        if state is None or committed < self._committed[symbol]:
+            state = super().get_indicators(symbol)
+            self._states[symbol] = state
+            self._committed[symbol] = committed
+            if symbol not in self._quotes:
+                return state
+        elif state.session_date != self._cursor:
+            for row in self._bars[symbol][self._committed[symbol]:committed]:
+                state.append_bar(
+                    float(row["stck_hgpr"]), float(row["stck_lwpr"]), float(row["stck_clpr"]),
+                    float(row.get("acml_vol") or "nan"),
+                )
+            self._committed[symbol] = committed
+            state.start_session(self._cursor)
+            today = self.bar(symbol)
+            if today is not None:
+                state.update(price=math.nan, open_=float(today["stck_oprc"]))
+                if symbol not in self._quotes:
+                    state.update(price=float(today["stck_clpr"]), high=float(today["stck_hgpr"]),
+                                 low=float(today["stck_lwpr"]), volume=float(today.get("acml_vol") or "nan"))
+        quote = self._quotes.get(symbol)
+        if quote is not None:
+            state.update(price=quote["price"], high=quote["high"], low=quote["low"], volume=quote["volume"])
+        return state
+
+
+class SyntheticMarketData(ReplayMarketData):
+    """시드 고정 랜덤워크(로그정규) 일봉을 만들어 재생합니다. 평일만, end 날짜까지 days개."""
+
+    def __init__(self, symbols: list[str], days: int = 250, end: date | None = None, seed: int = 0,
+                 start_price: float = 10000.0, drift: float = 0.0003, volatility: float = 0.02):
+        rng = random.Random(seed)
+        trading_days = []
+        day = end or datetime.now(KST).date()
+        while len(trading_days) < days:
+            if day.weekday() < 5:
+                trading_days.append(day.strftime("%Y%m%d"))
+            day -= timedelta(days=1)
+        trading_days.reverse()
+        bars = {}
+        for symbol in symbols:
+            rows, close = [], start_price
+            for d in trading_days:
+                open_ = close * math.exp(rng.gauss(0, volatility / 4))
+                close = open_ * math.exp(rng.gauss(drift, volatility))
+                high = max(open_, close) * (1 + abs(rng.gauss(0, volatility / 2)))
+                low = min(open_, close) * (1 - abs(rng.gauss(0, volatility / 2)))
+                rows.append({
+                    "stck_bsop_date": d,
+                    "stck_oprc": str(round(open_)),
+                    "stck_hgpr": str(round(high)),
+                    "stck_lwpr": str(round(low)),
+                    "stck_clpr": str(round(close)),
+                    "acml_vol": str(rng.randint(50_000, 500_000)),
+                })
+            bars[symbol] = rows
+        super().__init__(bars)
+
+
+live_market_data = KisMarketData()
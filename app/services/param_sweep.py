@@ -0,0 +1,473 @@
+"""
+전략 파라미터 스윕/최적화.
+- 탐색 공간: 전략 get_param_schema()의 min/max/step (+ include_exit 시 EXIT_PARAM_SCHEMA 청산 임계값). space 인자로 덮어쓰기.
+- 후보 생성: grid(격자) / random(시드 고정 균등) / bayes(TPE: 상위 후보 밀도 ÷ 나머지 밀도가 큰 점을 배치 단위로 제안).
+- 평가: 유니버스 가격 행렬을 공유 메모리 한 블록에 올리고 ProcessPoolExecutor 워커가 initializer에서 한 번만 attach
+  → 작업 인자는 파라미터 dict뿐 (가격 데이터를 작업마다 pickle하지 않음). 후보끼리 독립이라 코어 수에 비례해 처리량 증가.
+- 엔진: vector(vector_backtest, 기본) / event(Backtester; 워커마다 공유 행렬에서 재생 제공자를 한 번 구성).
+- 결과 캐시: (데이터 지문, 전략, 엔진, 비용 설정, 파라미터) 해시 → 통계. 같은 후보는 다시 돌리지 않음.
+- apply_best: 최적 전략 파라미터를 종목별 StrategyConfig 행에 기록. 청산 임계값은 전역 settings라 추천값으로만 반환.
+"""
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services import trading_rules
+from app.services.vector_backtest import FIELDS, UniverseData, run_vectorized
+from app.strategies.registry import StrategyRegistry
+
+EXIT_PREFIX = "exit."
+
+# 청산 임계값 탐색 범위 (ExitRules 속성명, 대응 settings)
+EXIT_PARAM_SCHEMA = [
+    {"name": "stage1_pct", "setting": "STAGE1_TAKE_PROFIT_PCT", "type": "float", "min": 3.0, "max": 12.0},
+    {"name": "stage2_pct", "setting": "STAGE2_TAKE_PROFIT_PCT", "type": "float", "min": 5.0, "max": 15.0},
+    {"name": "breakeven_offset_pct", "setting": "BREAKEVEN_OFFSET_PCT", "type": "float", "min": -3.0, "max": 0.5},
+    {"name": "atr_mult", "setting": "ATR_MULTIPLIER", "type": "float", "min": 0.8, "max": 3.0},
+]
+
+# 후보 제약: (앞, 뒤) 둘 다 후보에 있으면 앞 < 뒤
+ORDERED_PARAMS = [
+    ("short_period", "long_period"),
+    ("oversold", "overbought"),
+    (EXIT_PREFIX + "stage1_pct", EXIT_PREFIX + "stage2_pct"),
+]
+
+METHODS = ("grid", "random", "bayes")
+ENGINES = ("vector", "event")
+
+_CACHE_MAX = 20_000
+_cache: OrderedDict[str, dict] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# --- 탐색 공간 ---
+def build_space(strategy_name: str, include_exit: bool = False, overrides: dict | None = None) -> dict[str, dict]:
+    """
+    {파라미터명: spec}. spec은 {"type", "min", "max", "step"} 또는 {"values": [...]}.
+    범위가 없는 파라미터는 기본값 고정(제외). 청산 파라미터는 "exit." 접두사.
+    overrides: {이름: [값 목록] | {"min", "max", "step"}} (None이면 탐색에서 제외).
+    """
+    strategy_class = StrategyRegistry._strategies.get(strategy_name)
+    if strategy_class is None:
+        raise ValueError(f"Unknown strategy: {strategy_name}")
+    space: dict[str, dict] = {}
+    for p in strategy_class.get_param_schema():
+        if p["type"] == "bool":
+            space[p["name"]] = {"values": [True, False]}
+        elif "min" in p and "max" in p:
+            space[p["name"]] = {k: p[k] for k in ("type", "min", "max", "step") if k in p}
+    if include_exit:
+        for p in EXIT_PARAM_SCHEMA:
+            space[EXIT_PREFIX + p["name"]] = {k: p[k] for k in ("type", "min", "max")}
+    for name, spec in (overrides or {}).items():
+        if spec is None:
+            space.pop(name, None)
+        elif isinstance(spec, (list, tuple)):
+            space[name] = {"values": list(spec)}
+        else:
+            base = space.get(name, {"type": "float"})
+            space[name] = {**base, **spec}
+    return space
+
+
+def is_valid(candidate: dict) -> bool:
+    return all(candidate[a] < candidate[b] for a, b in ORDERED_PARAMS if a in candidate and b in candidate)
+
+
+def _choices(spec: dict, grid_points: int) -> list:
+    """spec의 이산 후보값 (격자/정수/범주)."""
+    if "values" in spec:
+        return list(spec["values"])
+    lo, hi = spec["min"], spec["max"]
+    if spec.get("type") == "int":
+        return list(range(int(lo), int(hi) + 1, int(spec.get("step", 1))))
+    if "step" in spec:
+        n = int(round((hi - lo) / spec["step"])) + 1
+        return [round(lo + i * spec["step"], 4) for i in range(n)]
+    return [round(float(v), 4) for v in np.linspace(lo, hi, grid_points)]
+
+
+def _is_continuous(spec: dict) -> bool:
+    return "values" not in spec and spec.get("type") != "int" and "step" not in spec
+
+
+def _encode(space: dict, candidate: dict, grid_points: int) -> list[float]:
+    """후보 → [0,1]^d (연속은 선형, 이산은 후보값 인덱스)."""
+    out = []
+    for name, spec in space.items():
+        value = candidate[name]
+        if _is_continuous(spec):
+            span = spec["max"] - spec["min"]
+            out.append((value - spec["min"]) / span if span else 0.0)
+        else:
+            values = _choices(spec, grid_points)
+            i = values.index(value) if value in values else 0
+            out.append(i / (len(values) - 1) if len(values) > 1 else 0.0)
+    return out
+
+
+def _decode(space: dict, u: np.ndarray, grid_points: int) -> dict:
+    candidate = {}
+    for x, (name, spec) in zip(np.clip(u, 0.0, 1.0), space.items()):
+        if _is_continuous(spec):
+            candidate[name] = round(float(spec["min"] + x * (spec["max"] - spec["min"])), 4)
+        else:
+            values = _choices(spec, grid_points)
+            candidate[name] = values[int(round(x * (len(values) - 1)))]
+    return candidate
+
+
+def grid_candidates(space: dict, grid_points: int = 5, limit: int | None = None, seed: int = 0) -> list[dict]:
+    """격자 전체 (limit 초과 시 시드 고정 무작위 표본)."""
+    names = list(space)
+    grid = [dict(zip(names, combo)) for combo in itertools.product(*(_choices(space[n], grid_points) for n in names))]
+    grid = [c for c in grid if is_valid(c)]
+    if limit and len(grid) > limit:
+        grid = random.Random(seed).sample(grid, limit)
+    return grid
+
+
+def random_candidates(space: dict, n: int, seed: int = 0, grid_points: int = 5) -> list[dict]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n * 20):
+        candidate = {}
+        for name, spec in space.items():
+            if _is_continuous(spec):
+                candidate[name] = round(rng.uniform(spec["min"], spec["max"]), 4)
+            else:
+                candidate[name] = rng.choice(_choices(spec, grid_points))
+        if is_valid(candidate):
+            out.append(candidate)
+            if len(out) >= n:
+                break
+    return out
+
+
+def tpe_candidates(space: dict, history: list[tuple[dict, float]], n: int, seed: int = 0,
+                   grid_points: int = 5, gamma: float = 0.25, bandwidth: float = 0.15, samples: int = 64) -> list[dict]:
+    """
+    TPE 제안: 평가 결과를 점수 상위 gamma(좋은 군)/나머지로 나누고, 좋은 군 주변 표본 중
+    l(x)/g(x) (가우시안 커널 밀도 비)가 큰 순서로 n개. 이미 평가한 후보는 제외.
+    평가 결과가 2건 미만이면(초기 후보 평가 실패 등) 밀도를 만들 수 없으므로 random 후보로 대신합니다.
+    """
+    seen = {_candidate_key(c) for c, _ in history}
+    if len(history) < 2:
+        fresh = [c for c in random_candidates(space, n + len(seen), seed, grid_points) if _candidate_key(c) not in seen]
+        return fresh[:n]
+    rng = np.random.default_rng(seed)
+    ranked = sorted(history, key=lambda h: h[1], reverse=True)
+    n_good = max(1, int(math.ceil(gamma * len(ranked))))
+    good = np.array([_encode(space, c, grid_points) for c, _ in ranked[:n_good]])
+    bad = np.array([_encode(space, c, grid_points) for c, _ in ranked[n_good:]] or [rng.random(len(space))])
+    pool = good[rng.integers(len(good), size=samples * n)] + rng.normal(0, bandwidth, (samples * n, len(space)))
+    pool = np.vstack((np.clip(pool, 0.0, 1.0), rng.random((samples * n // 4, len(space)))))
+
+    def _log_density(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        d2 = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1)
+        return np.log(np.exp(-d2 / (2 * bandwidth ** 2)).mean(axis=1) + 1e-300)
+
+    score = _log_density(pool, good) - _log_density(pool, bad)
+    out = []
+    for i in np.argsort(-score):
+        candidate = _decode(space, pool[i], grid_points)
+        key = _candidate_key(candidate)
+        if key not in seen and is_valid(candidate):
+            seen.add(key)
+            out.append(candidate)
+            if len(out) >= n:
+                break
+    return out
+
+
+def _candidate_key(candidate: dict) -> str:
+    return json.dumps(candidate, sort_keys=True)
+
+
+def split_params(candidate: dict) -> tuple[dict, dict]:
+    """후보 → (전략 파라미터, ExitRules 덮어쓰기)."""
+    strategy_params, exit_overrides = {}, {}
+    for name, value in candidate.items():
+        if name.startswith(EXIT_PREFIX):
+            exit_overrides[name[len(EXIT_PREFIX):]] = value
+        else:
+            strategy_params[name] = value
+    return strategy_params, exit_overrides
+
+
+# --- 평가 (워커) ---
+_worker: dict = {}
+
+
+def _init_worker(shm_name: str, shape: tuple, symbols: list[str], dates: list[str], config: dict) -> None:
+    """워커 시작 시 1회: 공유 메모리 가격 행렬에 attach (복사 없음)."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    _worker.clear()
+    _worker.update(shm=shm, data=UniverseData(symbols, dates, dict(zip(FIELDS, block))), config=config)
+
+
+def _evaluate_in_worker(candidate: dict) -> dict:
+    return evaluate(_worker["data"], _worker["config"], candidate, _worker)
+
+
+def evaluate(data: UniverseData, config: dict, candidate: dict, scratch: dict | None = None, full: bool = False) -> dict:
+    """
+    후보 1개 백테스트 → stats (full=True면 equity 포함 전체 결과).
+    scratch: 이벤트 엔진 재생 제공자 재사용용 (워커/호출자 단위).
+    """
+    strategy_params, exit_overrides = split_params(candidate)
+    rules = trading_rules.ExitRules.from_settings(strategy_params, **exit_overrides)
+    costs = {k: config[k] for k in ("slippage_ticks", "fee_pct", "tax_pct")}
+    if config["engine"] == "vector":
+        result = run_vectorized(
+            data, config["strategy_name"], strategy_params, exit_rules=rules,
+            max_positions=config["max_positions"], budget_ratio=config["budget_ratio"],
+            initial_cash=config["initial_cash"], start=config["start"], end=config["end"], per_symbol=False, **costs,
+        )
+        return result if full else result["stats"]
+
+    from app.services.backtest import Backtester
+    from app.services.market_data import ReplayMarketData
+
+    scratch = scratch if scratch is not None else {}
+    if "replay" not in scratch:
+        scratch["replay"] = ReplayMarketData(data.to_bars())
+    tester = Backtester(
+        scratch["replay"], config["strategy_name"], strategy_params, exit_rules=rules,
+        initial_cash=config["initial_cash"], max_slots=config["max_positions"] or settings.MAX_SLOTS,
+        budget_ratio=config["budget_ratio"] if config["budget_ratio"] is not None else settings.BUDGET_RATIO, **costs,
+    )
+    result = tester.run(config["start"], config["end"])
+    return result if full else result["stats"]
+
+
+def data_fingerprint(data: UniverseData) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([data.symbols, data.dates]).encode())
+    for name in FIELDS:
+        h.update(np.ascontiguousarray(getattr(data, name)).tobytes())
+    return h.hexdigest()
+
+
+class ParameterSweep:
+    """
+    전략 파라미터 스윕. run()은 점수 내림차순 결과와 최적 후보를 반환.
+    점수 = stats[metric] (거래 수가 min_trades 미만이면 제외).
+    """
+
+    def __init__(self, data: UniverseData, strategy_name: str = "volatility_breakout", *, method: str = "random",
+                 space: dict | None = None, include_exit: bool = False, n_candidates: int = 50,
+                 grid_points: int = 5, metric: str = "sharpe", min_trades: int = 20, engine: str = "vector",
+                 workers: int | None = None, seed: int = 0, start: str | None = None, end: str | None = None,
+                 max_positions: int | None = None, budget_ratio: float | None = None,
+                 initial_cash: float = 10_000_000, slippage_ticks: int = 1, fee_pct: float = 0.015, tax_pct: float = 0.18,
+                 fingerprint: str | None = None):
+        if method not in METHODS:
+            raise ValueError(f"지원하지 않는 탐색 방식: {method} ({', '.join(METHODS)})")
+        if engine not in ENGINES:
+            raise ValueError(f"지원하지 않는 엔진: {engine} ({', '.join(ENGINES)})")
+        self.data = data
+        self.method = method
+        self.space = build_space(strategy_name, include_exit, space)
+        if not self.space:
+            raise ValueError(f"{strategy_name}: 탐색할 파라미터가 없습니다.")
+        self.n_candidates = n_candidates
+        self.grid_points = grid_points
+        self.metric = metric
+        self.min_trades = min_trades
+        self.seed = seed
+        self.workers = workers or getattr(settings, "SWEEP_WORKERS", 0) or os.cpu_count() or 1
+        self.config = {
+            "strategy_name": strategy_name, "engine": engine, "start": start, "end": end,
+            "max_positions": max_positions, "budget_ratio": budget_ratio, "initial_cash": initial_cash,
+            "slippage_ticks": slippage_ticks, "fee_pct": fee_pct, "tax_pct": tax_pct,
+        }
+        self._fingerprint = fingerprint or data_fingerprint(data)
+        self.cache_hits = 0
+
+    # --- 캐시 ---
+    def _key(self, candidate: dict) -> str:
+        payload = json.dumps({"data": self._fingerprint, "config": self.config, "params": candidate}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def score(self, stats: dict) -> float:
+        if stats.get("trades", 0) < self.min_trades:
+            return -math.inf
+        value = stats.get(self.metric)
+        return -math.inf if value is None or (isinstance(value, float) and math.isnan(value)) else float(value)
+
+    # --- 실행 ---
+    def run(self) -> dict:
+        started = time.monotonic()
+        results: list[dict] = []
+        with self._pool() as submit:
+            if self.method == "grid":
+                results += self._evaluate_batch(submit, grid_candidates(self.space, self.grid_points, self.n_candidates, self.seed))
+            elif self.method == "random":
+                results += self._evaluate_batch(submit, random_candidates(self.space, self.n_candidates, self.seed, self.grid_points))
+            else:
+                n_initial = min(self.n_candidates, max(2 * len(self.space), self.workers, 8))
+                results += self._evaluate_batch(submit, random_candidates(self.space, n_initial, self.seed, self.grid_points))
+                batch = max(1, self.workers)
+                round_no = 0
+                while len(results) < self.n_candidates:
+                    round_no += 1
+                    history = [(r["params"], r["score"] if math.isfinite(r["score"]) else -1e9) for r in results]
+                    proposals = tpe_candidates(self.space, history, min(batch, self.n_candidates - len(results)),
+                                               seed=self.seed + round_no, grid_points=self.grid_points)
+                    evaluated = self._evaluate_batch(submit, proposals)
+                    if not evaluated:
+                        break  # 제안이 없거나 전부 평가 실패 (데이터·전략 오류 등) → 지금까지 결과로 종료
+                    results += evaluated
+        results.sort(key=lambda r: r["score"], reverse=True)
+        best = results[0] if results and math.isfinite(results[0]["score"]) else None
+        for r in results:
+            if not math.isfinite(r["score"]):
+                r["score"] = None  # JSON 응답용 (거래 부족 등 제외된 후보)
+        elapsed = time.monotonic() - started
+        logger.info(f"파라미터 스윕 완료: {self.config['strategy_name']} {self.method} {len(results)}건 "
+                    f"(캐시 {self.cache_hits}건, 워커 {self.workers}, {elapsed:.1f}초)")
+        return {
+            "strategy_name": self.config["strategy_name"],
+            "method": self.method,
+            "metric": self.metric,
+            "space": self.space,
+            "evaluated": len(results),
+            "cacheHits": self.cache_hits,
+            "workers": self.workers,
+            "elapsedSec": round(elapsed, 2),
+            "best": best,
+            "recommendedSettings": _exit_settings(best["params"]) if best else {},
+            "results": results,
+        }
+
+    def _evaluate_batch(self, submit, candidates: list[dict]) -> list[dict]:
+        out, pending = [], {}
+        for candidate in candidates:
+            key = self._key(candidate)
+            with _cache_lock:
+                stats = _cache.get(key)
+                if stats is not None:
+                    _cache.move_to_end(key)
+            if stats is not None:
+                self.cache_hits += 1
+                out.append(self._result(candidate, stats))
+            elif key not in pending:
+                pending[key] = (candidate, submit(candidate))
+        for key, (candidate, future) in pending.items():
+            try:
+                stats = future.result()
+            except Exception as e:
+                logger.warning(f"스윕 후보 평가 실패 {candidate}: {e}")
+                continue
+            with _cache_lock:
+                _cache[key] = stats
+                while len(_cache) > _CACHE_MAX:
+                    _cache.popitem(last=False)
+            out.append(self._result(candidate, stats))
+        return out
+
+    def _result(self, candidate: dict, stats: dict) -> dict:
+        return {"params": candidate, "score": self.score(stats), "stats": stats}
+
+    @contextmanager
+    def _pool(self):
+        """submit(candidate) → Future. 워커 1개면 프로세스 없이 현재 프로세스에서 평가."""
+        if self.workers <= 1:
+            scratch: dict = {}
+            yield lambda c: _ImmediateFuture(lambda: evaluate(self.data, self.config, c, scratch))
+            return
+        shape = (len(FIELDS),) + self.data.close.shape
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        try:
+            block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            for i, name in enumerate(FIELDS):
+                block[i] = getattr(self.data, name)
+            del block
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),  # 서버(멀티스레드) 프로세스에서 fork하지 않음
+                initializer=_init_worker,
+                initargs=(shm.name, shape, self.data.symbols, self.data.dates, self.config),
+            ) as executor:
+                yield lambda c: executor.submit(_evaluate_in_worker, c)
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class _ImmediateFuture:
+    """직렬 평가용: result() 호출 시 계산 (Future와 같은 사용법)."""
+
+    def __init__(self, fn):
+        self._fn = fn
+
+    def result(self):
+        return self._fn()
+
+
+def _exit_settings(candidate: dict) -> dict:
+    """후보의 청산 파라미터 → settings 이름별 추천값."""
+    names = {p["name"]: p["setting"] for p in EXIT_PARAM_SCHEMA}
+    return {names[k]: v for k, v in split_params(candidate)[1].items() if k in names}
+
+
+def apply_best(strategy_name: str, parameters: dict, symbols: list[str], keep_other_strategies: bool = False) -> int:
+    """
+    최적 파라미터(전략 파라미터만)를 종목별 StrategyConfig에 기록. 반환: 기록한 종목 수.
+    keep_other_strategies=True(자동 재튜닝)면 활성 설정이 다른 전략인 종목은 건너뜀 (설정 없는 종목은 기본 전략이라 기록).
+    """
+    from app.db import models, session
+    from app.services.strategy_cache import strategy_cache
+
+    strategy_params, _ = split_params(parameters)
+    StrategyRegistry.get_strategy(strategy_name, strategy_params)  # 생성 가능한 조합인지 확인
+    params_str = json.dumps(strategy_params, ensure_ascii=False)
+    db = session.SessionLocal()
+    applied: list[str] = []
+    try:
+        for symbol in dict.fromkeys(symbols):
+            configs = (
+                db.query(models.StrategyConfig)
+                .filter(models.StrategyConfig.symbol == symbol)
+                .order_by(models.StrategyConfig.updated_at.desc())
+            )
+            row = configs.first()
+            if keep_other_strategies:
+                active = configs.filter(models.StrategyConfig.is_active == True).first()
+                if active is not None and active.strategy_name != strategy_name:
+                    continue  # 사용자가 다른 전략을 지정한 종목
+                row = active or row
+            applied.append(symbol)
+            if row:
+                row.strategy_name = strategy_name
+                row.parameters = params_str
+                row.is_active = True
+            else:
+                db.add(models.StrategyConfig(symbol=symbol, strategy_name=strategy_name, parameters=params_str, is_active=True))
+        db.commit()
+        strategy_cache.invalidate()
+        logger.info(f"스윕 최적 파라미터 적용: {strategy_name} {strategy_params} → {len(applied)}종목")
+        return len(applied)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
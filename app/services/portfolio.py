@@ -1,22 +1,27 @@
 import json
 from datetime import datetime, timedelta, timezone
 
+from sqlalchemy import func
+
 from app.api import kis_order, kis_market
 from app.core.logger import logger
 from app.db import models, session
 from app.db.models import OrderType, OrderStatus
+from app.services.positions import Position
 
 
-def calculate_unrealized_pl(trade_status: dict) -> list[dict]:
-    """보유종목별 평가손익을 계산합니다."""
+def calculate_unrealized_pl(positions: dict[str, Position]) -> list[dict]:
+    """보유종목별 평가손익을 계산합니다. positions: symbol → Position (보유 종목 사본)."""
     results = []
-    for symbol, st in trade_status.items():
-        if not st.get("bought"):
-            continue
+    held = {s: pos for s, pos in positions.items() if pos.bought}
+    prices = kis_market.get_current_prices(list(held))
+    for symbol, pos in held.items():
         try:
-            current_price = kis_market.get_current_price(symbol)
-            purchase_price = st["purchase_price"]
-            quantity = st["quantity"]
+            current_price = prices.get(symbol)
+            if current_price is None:
+                raise ValueError("현재가 조회 실패")
+            purchase_price = pos.purchase_price
+            quantity = pos.quantity
             unrealized = (current_price - purchase_price) * quantity
             unrealized_pct = ((current_price - purchase_price) / purchase_price * 100) if purchase_price else 0.0
             results.append({
@@ -26,18 +31,18 @@ def calculate_unrealized_pl(trade_status: dict) -> list[dict]:
                 "currentPrice": current_price,
                 "unrealizedPL": round(unrealized, 2),
                 "unrealizedPLPct": round(unrealized_pct, 2),
-                "stopPrice": st.get("stop_price", 0.0),
+                "stopPrice": pos.stop_price,
             })
         except Exception as e:
             logger.error(f"[{symbol}] 평가손익 계산 실패: {e}")
             results.append({
                 "symbol": symbol,
-                "quantity": st["quantity"],
-                "purchasePrice": st["purchase_price"],
-                "currentPrice": st["purchase_price"],
+                "quantity": pos.quantity,
+                "purchasePrice": pos.purchase_price,
+                "currentPrice": pos.purchase_price,
                 "unrealizedPL": 0.0,
                 "unrealizedPLPct": 0.0,
-                "stopPrice": st.get("stop_price", 0.0),
+                "stopPrice": pos.stop_price,
             })
     return results
 
@@ -46,14 +51,13 @@ def calculate_realized_pl(start_date: datetime | None = None) -> float:
     """실현손익을 집계합니다."""
     db = session.SessionLocal()
     try:
-        query = db.query(models.TradeLog).filter(
+        query = db.query(func.coalesce(func.sum(models.TradeLog.realized_pl), 0.0)).filter(
             models.TradeLog.order_type == OrderType.SELL,
             models.TradeLog.status == OrderStatus.EXECUTED,
         )
         if start_date:
             query = query.filter(models.TradeLog.timestamp >= start_date)
-        rows = query.all()
-        return sum(r.realized_pl or 0.0 for r in rows)
+        return float(query.scalar())
     except Exception as e:
         logger.error(f"실현손익 집계 실패: {e}")
         return 0.0
@@ -61,7 +65,7 @@ def calculate_realized_pl(start_date: datetime | None = None) -> float:
         db.close()
 
 
-def create_portfolio_snapshot(trade_status: dict):
+def create_portfolio_snapshot(positions: dict[str, Position]):
     """포트폴리오 스냅샷을 저장합니다."""
     try:
         cash = kis_order.get_cash_balance()
@@ -71,8 +75,7 @@ def create_portfolio_snapshot(trade_status: dict):
 
     holdings_value = 0.0
     total_unrealized = 0.0
-    positions = calculate_unrealized_pl(trade_status)
-    for pos in positions:
+    for pos in calculate_unrealized_pl(positions):
         holdings_value += pos["currentPrice"] * pos["quantity"]
         total_unrealized += pos["unrealizedPL"]
 
@@ -0,0 +1,184 @@
+"""
+포지션 모델.
+- Position: 종목 하나의 보유/대기 상태 (__slots__ 고정 필드, 상태 파일에 없는 키는 extra로 보존).
+  trading_rules.decide_exit 등 dict 형식을 읽는 코드가 그대로 쓰도록 get()/[]도 지원합니다
+  (None인 선택 필드는 '없는 키'로 취급 → 기존 .get(key, 기본값) 의미 유지).
+- PositionBook: symbol → Position. 보유 종목은 별도 색인(_held)으로 관리해 보유 순회·개수가 O(보유 수).
+  bought가 바뀌는 변경은 반드시 PositionBook(set/reset/update)으로 해야 색인이 맞습니다.
+상태 파일(trade_status.json/저널) 형식은 기존 dict 형식 그대로 (to_dict/from_dict).
+"""
+from typing import Iterator
+
+_MISSING = object()
+
+
+class Position:
+    __slots__ = (
+        "bought", "purchase_price", "quantity", "stop_price",
+        "initial_quantity", "high_price", "atr",
+        "stage1_sell_done", "stage2_sell_done", "half_cut_done",
+        "pending_buy", "extra",
+    )
+    # 항상 기록하는 필드 / None이면 기록하지 않는 선택 필드 / 보유 중일 때만 기록하는 플래그
+    _BASE = ("bought", "purchase_price", "quantity", "stop_price")
+    _OPTIONAL = ("initial_quantity", "high_price", "atr", "pending_buy")
+    _FLAGS = ("stage1_sell_done", "stage2_sell_done", "half_cut_done")
+    _FIELDS = frozenset(_BASE + _OPTIONAL + _FLAGS)
+
+    def __init__(self, bought: bool = False, purchase_price: float = 0.0, quantity: int = 0, stop_price: float = 0.0,
+                 initial_quantity: int | None = None, high_price: float | None = None, atr: float | None = None,
+                 stage1_sell_done: bool = False, stage2_sell_done: bool = False, half_cut_done: bool = False,
+                 pending_buy: dict | None = None, extra: dict | None = None):
+        self.bought = bought
+        self.purchase_price = purchase_price
+        self.quantity = quantity
+        self.stop_price = stop_price
+        self.initial_quantity = initial_quantity
+        self.high_price = high_price
+        self.atr = atr
+        self.stage1_sell_done = stage1_sell_done
+        self.stage2_sell_done = stage2_sell_done
+        self.half_cut_done = half_cut_done
+        self.pending_buy = pending_buy
+        self.extra = extra
+
+    # --- dict 호환 읽기 ---
+    def get(self, key: str, default=None):
+        if key in self._FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def update(self, fields: dict) -> None:
+        """필드 일괄 갱신 (bought 변경은 PositionBook.update로)."""
+        for key, value in fields.items():
+            if key in self._FIELDS:
+                setattr(self, key, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def copy(self) -> "Position":
+        clone = Position.__new__(Position)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        if clone.extra is not None:
+            clone.extra = dict(clone.extra)
+        return clone
+
+    # --- 직렬화 ---
+    def to_dict(self) -> dict:
+        out = {name: getattr(self, name) for name in self._BASE}
+        for name in self._OPTIONAL:
+            value = getattr(self, name)
+            if value is not None:
+                out[name] = value
+        if self.bought:
+            for name in self._FLAGS:
+                out[name] = getattr(self, name)
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "Position":
+        position = cls()
+        if data:
+            position.update(data)
+        return position
+
+    def __repr__(self) -> str:
+        return f"Position({self.to_dict()!r})"
+
+
+class PositionBook:
+    """symbol → Position, 보유 종목 색인 포함."""
+
+    def __init__(self):
+        self._positions: dict[str, Position] = {}
+        self._held: dict[str, Position] = {}
+
+    def _index(self, symbol: str, position: Position) -> None:
+        if position.bought:
+            self._held[symbol] = position
+        else:
+            self._held.pop(symbol, None)
+
+    # --- 조회 ---
+    def get(self, symbol: str) -> Position | None:
+        return self._positions.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def items(self):
+        return self._positions.items()
+
+    def held(self):
+        """보유 종목 (symbol, Position) 뷰 — O(보유 수)."""
+        return self._held.items()
+
+    def held_symbols(self) -> list[str]:
+        return list(self._held)
+
+    def held_count(self) -> int:
+        return len(self._held)
+
+    def pending(self) -> list[tuple[str, Position]]:
+        """매수 체결 대기 중인 (symbol, Position)."""
+        return [(s, p) for s, p in self._positions.items() if p.pending_buy]
+
+    # --- 변경 ---
+    def watch(self, symbol: str) -> Position:
+        """미보유 감시 종목 등록 (이미 있으면 그대로)."""
+        position = self._positions.get(symbol)
+        if position is None:
+            position = self._positions[symbol] = Position()
+        return position
+
+    def set(self, symbol: str, position: Position) -> None:
+        self._positions[symbol] = position
+        self._index(symbol, position)
+
+    def reset(self, symbol: str) -> Position:
+        """포지션 초기화 (미보유 감시 상태로)."""
+        position = Position()
+        self.set(symbol, position)
+        return position
+
+    def update(self, symbol: str, fields: dict) -> Position | None:
+        position = self._positions.get(symbol)
+        if position is None:
+            return None
+        position.update(fields)
+        if "bought" in fields:
+            self._index(symbol, position)
+        return position
+
+    def remove(self, symbol: str) -> None:
+        self._positions.pop(symbol, None)
+        self._held.pop(symbol, None)
+
+    # --- 직렬화 ---
+    def to_dict(self) -> dict[str, dict]:
+        return {symbol: position.to_dict() for symbol, position in self._positions.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, dict] | None) -> "PositionBook":
+        book = cls()
+        for symbol, state in (data or {}).items():
+            book.set(symbol, Position.from_dict(state))
+        return book
@@ -1,35 +1,21 @@
-import json
-from pathlib import Path
-
 from app.api import kis_order, kis_market
 from app.core.config import settings
 from app.core.logger import logger
 from app.core.slack import send_slack_notification
 from app.core.trade_state_lock import trade_state_lock
+from app.db.state_store import trade_state_store
 from app.services import indicators as indicators_service
+from app.services.positions import Position, PositionBook
 
-TRADE_STATUS_FILE: Path = settings.base_dir / "trade_status.json"
-
-
-def _atomic_write_trade_status(trade_status: dict) -> None:
-    """trade_status.json 쓰기 — 공용 lock 보유 + 파일 mkdir."""
-    with trade_state_lock:
-        TRADE_STATUS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(TRADE_STATUS_FILE, "w", encoding="utf-8") as f:
-            json.dump(trade_status, f, indent=4, ensure_ascii=False)
 
-_EMPTY_POSITION = {"bought": False, "purchase_price": 0.0, "quantity": 0, "stop_price": 0.0}
+def _atomic_write_trade_status(trade_status: PositionBook) -> None:
+    """trade_status 전체를 스냅샷으로 원자적 저장 (임시 파일 + os.replace, 저널 정리)."""
+    trade_state_store.save_all(trade_status.to_dict())
 
 
 def get_balance_position(symbol: str) -> dict | None:
-    """KIS 잔고 조회 결과에서 특정 종목 행을 반환합니다."""
-    kis_holdings = kis_order.get_balance()
-    if not kis_holdings:
-        return None
-    for item in kis_holdings:
-        if item.get("pdno") == symbol:
-            return item
-    return None
+    """KIS 잔고 조회 결과에서 특정 종목 행을 반환합니다. (계좌 스냅샷 공유)"""
+    return kis_order.get_account_snapshot().position(symbol)
 
 
 def extract_average_price(position: dict | None) -> float | None:
@@ -52,7 +38,8 @@ def extract_average_price(position: dict | None) -> float | None:
 def _get_kis_balance_map() -> dict[str, int] | None:
     """KIS 잔고를 {symbol: quantity} 맵으로 반환. 실패 시 None."""
     try:
-        kis_holdings = kis_order.get_balance()
+        # 리컨실은 KIS 기준으로 로컬 상태를 고치므로 캐시 대신 항상 새로 조회
+        kis_holdings = kis_order.get_balance(max_age=0)
     except Exception as e:
         logger.error(f"잔고 조회 실패: {e}")
         return None
@@ -66,7 +53,7 @@ def _get_kis_balance_map() -> dict[str, int] | None:
     return kis_map
 
 
-def sync_positions_from_kis(trade_status: dict, kis_map: dict[str, int] | None = None) -> list[str]:
+def sync_positions_from_kis(trade_status: PositionBook, kis_map: dict[str, int] | None = None) -> list[str]:
     """
     KIS 실제 잔고 기준으로 trade_status를 동기화합니다.
     KIS에 잔고가 0인데 로컬에 보유로 되어 있으면 보유 해제하고 파일 저장.
@@ -77,12 +64,10 @@ def sync_positions_from_kis(trade_status: dict, kis_map: dict[str, int] | None =
         kis_map = _get_kis_balance_map() or {}
     cleared: list[str] = []
     with trade_state_lock:
-        for symbol, st in list(trade_status.items()):
-            if not st.get("bought"):
-                continue
+        for symbol in trade_status.held_symbols():
             kis_qty = kis_map.get(symbol, 0)
             if kis_qty <= 0:
-                trade_status[symbol] = {**_EMPTY_POSITION}
+                trade_status.reset(symbol)
                 cleared.append(symbol)
                 logger.info(f"[동기화] {symbol} KIS 잔고 없음 → 보유 해제")
         if cleared:
@@ -90,7 +75,7 @@ def sync_positions_from_kis(trade_status: dict, kis_map: dict[str, int] | None =
     return cleared
 
 
-def run_reconciliation(trade_status: dict):
+def run_reconciliation(trade_status: PositionBook):
     """trade_status vs KIS get_balance() 비교, 불일치 시 로컬을 KIS 기준으로 정리 후 알림"""
     kis_map = _get_kis_balance_map()
     if kis_map is None:
@@ -106,14 +91,17 @@ def run_reconciliation(trade_status: dict):
     with trade_state_lock:
         # 로컬 상태를 {symbol: quantity} 맵으로 변환 (동기화 반영 후)
         local_map: dict[str, int] = {}
-        for symbol, st in trade_status.items():
-            if st.get("bought") and st.get("quantity", 0) > 0:
-                local_map[symbol] = st["quantity"]
+        for symbol, pos in trade_status.held():
+            if pos.quantity > 0:
+                local_map[symbol] = pos.quantity
 
         # KIS에만 있는 고아 포지션 자동 추가
         adopted = []
         for sym, kis_qty in kis_map.items():
             if kis_qty > 0 and sym not in local_map:
+                pos = trade_status.get(sym)
+                if pos is not None and pos.pending_buy:
+                    continue  # 체결 대기 중인 매수 주문 → 체결 반영 시 등록됨
                 try:
                     position = get_balance_position(sym)
                     current_price = kis_market.get_current_price(sym)
@@ -137,7 +125,7 @@ def run_reconciliation(trade_status: dict):
                     }
                     if atr_val and atr_val > 0:
                         entry["atr"] = atr_val
-                    trade_status[sym] = entry
+                    trade_status.set(sym, Position.from_dict(entry))
                     adopted.append(sym)
                     logger.info(
                         f"[고아 포지션 추가] {sym} ({kis_qty}주) | 평균단가: {purchase_price:.0f}, "
@@ -150,7 +138,7 @@ def run_reconciliation(trade_status: dict):
             send_slack_notification(f"[리콘실리에이션] 고아 포지션 {len(adopted)}건 자동 추가: {', '.join(adopted)}")
             # local_map 갱신 (아래 불일치 검사에 반영)
             for sym in adopted:
-                local_map[sym] = trade_status[sym]["quantity"]
+                local_map[sym] = trade_status.get(sym).quantity
 
         # 수량 불일치 (둘 다 보유 중인데 수량이 다른 경우) → KIS 기준으로 강제 정합
         # KIS 잔고를 단일 소스로 취급해야 매도 시 "주문가능수량 초과" 오류가 재발하지 않음
@@ -171,14 +159,14 @@ def run_reconciliation(trade_status: dict):
             for m in mismatches:
                 sym = m["symbol"]
                 kis_qty = m["kis_quantity"]
-                st = trade_status.get(sym)
+                pos = trade_status.get(sym)
                 # bought=True이고 KIS도 보유 중인 케이스만 quantity 강제 동기화
                 # (KIS=0인 케이스는 위쪽 sync_positions_from_kis에서 이미 처리, 고아 케이스는 자동 추가에서 처리)
-                if st and st.get("bought") and kis_qty > 0:
-                    st["quantity"] = kis_qty
+                if pos is not None and pos.bought and kis_qty > 0:
+                    pos.quantity = kis_qty
                     # initial_quantity도 위로 늘어난 경우엔 함께 상향(분할 익절 비율 보존)
-                    if kis_qty > st.get("initial_quantity", 0):
-                        st["initial_quantity"] = kis_qty
+                    if kis_qty > (pos.initial_quantity or 0):
+                        pos.initial_quantity = kis_qty
                     adjusted.append(sym)
             if adjusted:
                 _atomic_write_trade_status(trade_status)
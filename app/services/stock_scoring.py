@@ -1,109 +1,130 @@
-"""
-종목 스코어링: 거래량 증가율, 전일대비 등락률, MA20 위 거리, 변동성 적정성을 조합해 점수를 매깁니다.
-동적 종목(거래량/조건검색) 사용 시 상위 N개만 진입 대상으로 쓰기 위함.
-"""
-from app.api import kis_market
-from app.core.logger import logger
-import numpy as np
-
-# 가중치 (합 1.0)
-W_VOLUME = 0.3
-W_DAILY_CHG = 0.2
-W_MA20_DIST = 0.2
-W_VOLATILITY = 0.3
-
-MA_PERIOD = 20
-VOL_KEY_CANDIDATES = ("acml_vol", "stck_acml_vol", "acml_volume")
-
-
-def _get_volume_and_ma(symbol: str) -> tuple[float | None, float | None, float | None, float | None]:
-    """
-    일봉에서 당일 거래량, 20일 평균 거래량, MA20, 전일 종가, 전일 변동폭/종가 비율을 반환.
-    반환: (today_vol, avg_vol_20, ma20, prev_close, prev_vol_ratio)
-    """
-    try:
-        data = kis_market.get_daily_ohlcv(symbol, days=MA_PERIOD + 2)
-        if not data or len(data) < MA_PERIOD + 1:
-            return None, None, None, None, None
-        vol_key = None
-        for k in VOL_KEY_CANDIDATES:
-            if data[0].get(k) is not None:
-                vol_key = k
-                break
-        today_vol = float(data[0][vol_key]) if vol_key else None
-        avg_vol_20 = None
-        if vol_key:
-            vols = [float(d[vol_key]) for d in data[1 : MA_PERIOD + 1] if d.get(vol_key) is not None]
-            if len(vols) >= MA_PERIOD:
-                avg_vol_20 = sum(vols) / len(vols)
-        closes = [float(d["stck_clpr"]) for d in data[1 : MA_PERIOD + 1]]
-        ma20 = np.mean(closes)
-        prev_close = float(data[1]["stck_clpr"])
-        prev_high = float(data[1]["stck_hgpr"])
-        prev_low = float(data[1]["stck_lwpr"])
-        vol_ratio = (prev_high - prev_low) / prev_close if prev_close > 0 else None
-        return today_vol, avg_vol_20, ma20, prev_close, vol_ratio
-    except Exception as e:
-        logger.debug(f"스코어 데이터 조회 실패 {symbol}: {e}")
-        return None, None, None, None, None
-
-
-def score_symbol(symbol: str) -> float:
-    """
-    단일 종목에 대해 0~1 스코어를 반환합니다.
-    - 거래량_증가율: 당일 거래량 / 20일 평균 (상대적, 1.5면 0.5점 등으로 정규화)
-    - 전일대비_등락률: 적당한 양봉이면 가산 (0~5% 구간이면 높게)
-    - MA20_위_거리: MA20 바로 위가 좋음 (너무 멀면 과열)
-    - 변동성_적정성: 0.02~0.05 구간이면 높게
-    """
-    try:
-        current = kis_market.get_current_price(symbol)
-    except Exception:
-        return 0.0
-    today_vol, avg_vol_20, ma20, prev_close, prev_vol_ratio = _get_volume_and_ma(symbol)
-    score_vol = 0.5
-    if today_vol is not None and avg_vol_20 is not None and avg_vol_20 > 0:
-        ratio = today_vol / avg_vol_20
-        score_vol = min(1.0, ratio / 2.0)  # 2배면 1점
-    score_daily = 0.5
-    if prev_close and prev_close > 0:
-        chg = (current - prev_close) / prev_close
-        if 0 <= chg <= 0.05:
-            score_daily = 0.5 + chg * 10
-        elif chg > 0.05:
-            score_daily = 1.0
-        else:
-            score_daily = max(0, 0.5 + chg * 5)
-        score_daily = max(0, min(1.0, score_daily))
-    score_ma = 0.5
-    if ma20 and ma20 > 0 and current > ma20:
-        dist = (current - ma20) / ma20
-        if 0 < dist <= 0.03:
-            score_ma = 0.7 + dist * 10
-        elif dist <= 0.05:
-            score_ma = 1.0
-        else:
-            score_ma = max(0.5, 1.0 - (dist - 0.05) * 5)
-        score_ma = max(0, min(1.0, score_ma))
-    score_volatility = 0.5
-    if prev_vol_ratio is not None:
-        if 0.02 <= prev_vol_ratio <= 0.05:
-            score_volatility = 1.0
-        elif prev_vol_ratio < 0.02:
-            score_volatility = 0.5 + prev_vol_ratio * 25
-        else:
-            score_volatility = max(0.3, 1.0 - (prev_vol_ratio - 0.05) * 5)
-        score_volatility = max(0, min(1.0, score_volatility))
-    total = score_vol * W_VOLUME + score_daily * W_DAILY_CHG + score_ma * W_MA20_DIST + score_volatility * W_VOLATILITY
-    return round(total, 4)
-
-
-def rank_candidates(symbols: list[str], top_n: int) -> list[str]:
-    """
-    후보 종목에 대해 스코어를 계산하고 상위 top_n개를 반환합니다.
-    """
-    if not symbols or top_n <= 0:
-        return symbols[:top_n]
-    scored = [(s, score_symbol(s)) for s in symbols]
-    scored.sort(key=lambda x: -x[1])
-    return [s for s, _ in scored[:top_n]]
+"""
+종목 스코어링: 거래량 증가율, 전일대비 등락률, MA20 위 거리, 변동성 적정성을 조합해 점수를 매깁니다.
+동적 종목(거래량/조건검색) 사용 시 상위 N개만 진입 대상으로 쓰기 위함.
+후보 전체의 현재가·일봉을 먼저 동시 조회(캐시 재사용)한 뒤, 후보×피처 행렬로 한 번에 점수를 계산합니다.
+"""
+from app.api import kis_market
+from app.core.logger import logger
+from app.services import indicators as indicators_service
+import numpy as np
+
+# 가중치 (합 1.0)
+W_VOLUME = 0.3
+W_DAILY_CHG = 0.2
+W_MA20_DIST = 0.2
+W_VOLATILITY = 0.3
+
+FEATURES = ("volume", "daily_change", "ma20_distance", "volatility")
+WEIGHTS = np.array([W_VOLUME, W_DAILY_CHG, W_MA20_DIST, W_VOLATILITY])
+
+MA_PERIOD = 20
+
+
+def _raw_features(bars_list: list[list]) -> tuple[np.ndarray, ...]:
+    """
+    후보별 일봉(최신순)으로 원시값 배열을 만듭니다 (종목×일자 행렬에서 한 번에 계산, 봉 부족 종목은 NaN).
+    반환: (today_vol, avg_vol_20, ma20, prev_close, prev_vol_ratio)
+    """
+    m = indicators_service.bars_matrix(bars_list, MA_PERIOD + 1)
+    close, high, low, volume = m["close"], m["high"], m["low"], m["volume"]
+    complete = ~np.isnan(close).any(axis=1)
+    today_vol = volume[:, -1]
+    avg_vol_20 = np.asarray(indicators_service.average_volume(volume, MA_PERIOD))
+    ma20 = indicators_service.sma(close[:, :-1], MA_PERIOD)[:, -1]
+    prev_close = close[:, -2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_ratio = np.where(prev_close > 0, (high[:, -2] - low[:, -2]) / prev_close, np.nan)
+    return tuple(np.where(complete, a, np.nan) for a in (today_vol, avg_vol_20, ma20, prev_close, vol_ratio))
+
+
+def score_matrix(current, today_vol, avg_vol_20, ma20, prev_close, vol_ratio) -> np.ndarray:
+    """
+    후보별 원시값 배열(길이 N, 결측은 NaN)로 N×4 피처 점수 행렬(FEATURES 순서, 각 0~1)을 계산합니다.
+    - 거래량_증가율: 당일 거래량 / 20일 평균 (2배면 1점)
+    - 전일대비_등락률: 적당한 양봉이면 가산 (0~5% 구간이면 높게)
+    - MA20_위_거리: MA20 바로 위가 좋음 (너무 멀면 과열)
+    - 변동성_적정성: 0.02~0.05 구간이면 높게
+    결측 피처는 중립 0.5점.
+    """
+    current, today_vol, avg_vol_20, ma20, prev_close, vol_ratio = (
+        np.asarray(a, dtype=float) for a in (current, today_vol, avg_vol_20, ma20, prev_close, vol_ratio)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ok = ~np.isnan(today_vol) & (avg_vol_20 > 0)
+        score_vol = np.where(ok, np.minimum(1.0, today_vol / avg_vol_20 / 2.0), 0.5)
+
+        chg = (current - prev_close) / prev_close
+        daily = np.where(
+            (chg >= 0) & (chg <= 0.05), 0.5 + chg * 10,
+            np.where(chg > 0.05, 1.0, np.maximum(0.0, 0.5 + chg * 5)),
+        )
+        score_daily = np.where(prev_close > 0, np.clip(daily, 0.0, 1.0), 0.5)
+
+        dist = (current - ma20) / ma20
+        ma = np.where(
+            dist <= 0.03, 0.7 + dist * 10,
+            np.where(dist <= 0.05, 1.0, np.maximum(0.5, 1.0 - (dist - 0.05) * 5)),
+        )
+        score_ma = np.where((ma20 > 0) & (current > ma20), np.clip(ma, 0.0, 1.0), 0.5)
+
+        vola = np.where(
+            (vol_ratio >= 0.02) & (vol_ratio <= 0.05), 1.0,
+            np.where(vol_ratio < 0.02, 0.5 + vol_ratio * 25, np.maximum(0.3, 1.0 - (vol_ratio - 0.05) * 5)),
+        )
+        score_volatility = np.where(np.isnan(vol_ratio), 0.5, np.clip(vola, 0.0, 1.0))
+    return np.column_stack([score_vol, score_daily, score_ma, score_volatility])
+
+
+def score_candidates(symbols: list[str]) -> list[dict]:
+    """
+    후보 전체 점수를 계산합니다. 현재가(멀티종목 시세)와 일봉을 동시 조회해 캐시를 채운 뒤 한 번에 벡터 계산.
+    반환: [{"symbol", "score", "features": {피처명: 점수}}] (점수 내림차순). 현재가 조회 실패 종목은 0점.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return []
+    kis_market.prefetch_daily_ohlcv(symbols)
+    try:
+        prices = kis_market.get_current_prices(symbols)
+    except Exception as e:
+        logger.debug(f"스코어 현재가 일괄 조회 실패: {e}")
+        prices = {}
+    bars_list = []
+    for symbol in symbols:
+        try:
+            bars_list.append(kis_market.get_daily_ohlcv(symbol, days=MA_PERIOD + 2) or [])
+        except Exception as e:
+            logger.debug(f"스코어 데이터 조회 실패 {symbol}: {e}")
+            bars_list.append([])
+    today_vol, avg_vol_20, ma20, prev_close, vol_ratio = _raw_features(bars_list)
+    current = np.array([prices.get(s, np.nan) for s in symbols], dtype=float)
+
+    features = score_matrix(current, today_vol, avg_vol_20, ma20, prev_close, vol_ratio)
+    totals = np.where(np.isnan(current), 0.0, np.round(features @ WEIGHTS, 4))
+    results = [
+        {
+            "symbol": symbol,
+            "score": float(totals[i]),
+            "features": {name: round(float(features[i, j]), 4) for j, name in enumerate(FEATURES)},
+        }
+        for i, symbol in enumerate(symbols)
+    ]
+    results.sort(key=lambda r: -r["score"])
+    return results
+
+
+def score_symbol(symbol: str) -> float:
+    """단일 종목에 대해 0~1 스코어를 반환합니다."""
+    return score_candidates([symbol])[0]["score"]
+
+
+def rank_candidates(symbols: list[str], top_n: int) -> list[str]:
+    """
+    후보 종목에 대해 스코어를 계산하고 상위 top_n개를 반환합니다.
+    """
+    if not symbols or top_n <= 0:
+        return symbols[:top_n]
+    scored = score_candidates(symbols)
+    for r in scored:
+        logger.debug(f"[{r['symbol']}] 스코어 {r['score']:.4f} {r['features']}")
+    return [r["symbol"] for r in scored[:top_n]]
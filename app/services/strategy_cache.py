@@ -0,0 +1,103 @@
+"""
+종목별 전략 인스턴스 캐시.
+- 활성 StrategyConfig 행을 쿼리 한 번으로 읽어 {symbol: (전략명, 파라미터)}로 보관하고,
+  인스턴스는 (symbol, 전략명, 파라미터 해시) 키로 재사용합니다 → 사이클마다 종목별 DB 조회·JSON 파싱·객체 생성 없음,
+  전략 인스턴스 상태(last_indicators 등)가 사이클 사이에 유지됨.
+- 설정 저장(/api/strategies/config, 스윕/재튜닝 apply_best) 시 invalidate() → 다음 조회에서 설정을 다시 읽고,
+  파라미터가 바뀐 종목만 새 인스턴스를 만듭니다.
+"""
+import hashlib
+import json
+import threading
+
+from app.core.logger import logger
+from app.db import models, session
+from app.strategies.base import Strategy
+from app.strategies.registry import StrategyRegistry
+
+
+def _params_hash(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def load_active_configs() -> dict[str, tuple[str, dict]]:
+    """활성 StrategyConfig 전체 → {symbol: (전략명, 파라미터)}. 같은 종목이 여러 행이면 최근 수정 행."""
+    db = session.SessionLocal()
+    try:
+        rows = (
+            db.query(models.StrategyConfig)
+            .filter(models.StrategyConfig.is_active == True)
+            .order_by(models.StrategyConfig.updated_at.asc())
+            .all()
+        )
+    finally:
+        db.close()
+    configs: dict[str, tuple[str, dict]] = {}
+    for row in rows:
+        if not row.strategy_name:
+            continue
+        try:
+            params = json.loads(row.parameters) if isinstance(row.parameters, str) else (row.parameters or {})
+        except (TypeError, ValueError) as e:
+            logger.debug(f"종목 {row.symbol} 전략 파라미터 파싱 실패, 기본 전략 사용: {e}")
+            continue
+        configs[row.symbol] = (row.strategy_name, params)
+    return configs
+
+
+class StrategyCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configs: dict[str, tuple[str, dict]] | None = None
+        self._instances: dict[str, tuple[tuple[str, str], Strategy]] = {}  # symbol → ((전략명, 해시), 인스턴스)
+        self._hits = 0
+        self._builds = 0
+        self._loads = 0
+
+    def _ensure_configs(self) -> dict[str, tuple[str, dict]]:
+        if self._configs is None:
+            try:
+                self._configs = load_active_configs()
+                self._loads += 1
+            except Exception as e:
+                logger.debug(f"전략 설정 일괄 조회 실패, 기본 전략 사용: {e}")
+                return {}  # 캐시하지 않음 → 다음 조회에서 재시도
+        return self._configs
+
+    def get(self, symbol: str, default_name: str, default_params: dict) -> Strategy:
+        """종목 전략 인스턴스. 설정이 없거나 생성에 실패하면 기본 전략."""
+        with self._lock:
+            name, params = self._ensure_configs().get(symbol, (default_name, default_params))
+            key = (name, _params_hash(params))
+            cached = self._instances.get(symbol)
+            if cached is not None and cached[0] == key:
+                self._hits += 1
+                return cached[1]
+            try:
+                strategy = StrategyRegistry.get_strategy(name, params)
+            except Exception as e:
+                logger.debug(f"종목 {symbol} 전략 생성 실패({name}), 기본 전략 사용: {e}")
+                strategy = StrategyRegistry.get_strategy(default_name, default_params)
+            self._instances[symbol] = (key, strategy)  # 생성 실패 시에도 설정 키로 보관 → 같은 설정이면 재시도 안 함
+            self._builds += 1
+            return strategy
+
+    def invalidate(self, symbol: str | None = None) -> None:
+        """설정을 다시 읽게 합니다. symbol 지정 시 그 종목 인스턴스도 새로 생성."""
+        with self._lock:
+            self._configs = None
+            if symbol is not None:
+                self._instances.pop(symbol, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "instances": len(self._instances),
+                "configs": len(self._configs) if self._configs is not None else None,
+                "hits": self._hits,
+                "builds": self._builds,
+                "configLoads": self._loads,
+            }
+
+
+strategy_cache = StrategyCache()
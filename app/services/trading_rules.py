@@ -0,0 +1,239 @@
+"""
+매매 규칙 (실거래 main과 백테스트 공용, 부수효과 없음).
+- 호가 단위/지정가 계산, 진입 허용 시간, 추격매수 필터, 초기 손절가.
+- decide_exit: 보유 포지션(Position 또는 같은 키의 dict)과 현재가로 단계 익절 → RSI 매도/타이트닝 → 최대 손실폭 → ATR/트레일링 스톱
+  순서의 청산 판단만 돌려주고, 주문·체결 기록·알림·상태 저장은 호출자가 수행합니다.
+"""
+from datetime import time as dtime
+
+from app.core.config import settings
+
+
+def get_tick_size(price: float) -> int:
+    """한국 주식 호가 단위를 반환합니다."""
+    if price < 2000:
+        return 1
+    elif price < 5000:
+        return 5
+    elif price < 20000:
+        return 10
+    elif price < 50000:
+        return 50
+    elif price < 200000:
+        return 100
+    elif price < 500000:
+        return 500
+    else:
+        return 1000
+
+
+def calc_buy_limit_price(current_price: float, tick_offset: int = 2) -> int:
+    """현재가 + N호가 지정가를 계산합니다. tick_offset=0이면 0 반환(시장가)."""
+    if tick_offset <= 0:
+        return 0
+    tick = get_tick_size(current_price)
+    return int(current_price + tick * tick_offset)
+
+
+def is_entry_allowed_at(t: dtime) -> bool:
+    """
+    신규 매수 허용 시각 여부 (설정값 기반, 요일 판단은 호출자).
+    - 09:{ENTRY_NO_BEFORE_MINUTE} 이후 ~ {ENTRY_NO_AFTER_HOUR}:{ENTRY_NO_AFTER_MINUTE} 미만일 때만 True
+    """
+    no_before_min = getattr(settings, "ENTRY_NO_BEFORE_MINUTE", 30) or 0
+    no_after_h = getattr(settings, "ENTRY_NO_AFTER_HOUR", 14)
+    no_after_m = getattr(settings, "ENTRY_NO_AFTER_MINUTE", 30)
+    if no_before_min > 0 and t < dtime(9, no_before_min):
+        return False
+    if no_after_h is not None and no_after_m is not None:
+        if t >= dtime(no_after_h, no_after_m):
+            return False
+    return True
+
+
+def entry_chase_reason(price: float, target_price: float = 0.0, today_open: float = 0.0) -> str:
+    """
+    추격매수 필터. 막아야 하면 사유, 아니면 빈 문자열.
+    - 목표가 대비 ENTRY_MAX_BREAKOUT_SLIPPAGE_PCT% 이상 이격
+    - 당일 시가 대비 ENTRY_MAX_UP_FROM_OPEN_PCT% 이상 상승
+    """
+    max_slippage_pct = getattr(settings, "ENTRY_MAX_BREAKOUT_SLIPPAGE_PCT", 2.0) or 0
+    if max_slippage_pct > 0 and target_price > 0 and price > target_price * (1 + max_slippage_pct / 100):
+        return f"목표가 대비 {max_slippage_pct}% 이상 이격 (목표가={target_price:.0f}, 현재가={price:.0f})"
+    max_up_pct = getattr(settings, "ENTRY_MAX_UP_FROM_OPEN_PCT", 10.0) or 0
+    if max_up_pct > 0 and today_open > 0 and price >= today_open * (1 + max_up_pct / 100):
+        return f"시가 대비 {max_up_pct}% 이상 상승 (시가={today_open:.0f}, 현재가={price:.0f})"
+    return ""
+
+
+def initial_stop_price(entry_price: float, trailing_pct: float, atr: float | None = None,
+                       use_atr: bool = False, atr_mult: float = 1.5) -> float:
+    """진입 시 손절가: ATR 사용 시 진입가 - ATR*배수, 아니면 진입가*(1 - trailing_pct%)."""
+    if use_atr and atr is not None and atr > 0:
+        return entry_price - atr * atr_mult
+    return entry_price * (1 - trailing_pct / 100)
+
+
+class ExitRules:
+    """청산 임계값 묶음 (기본값은 settings, 백테스트/스윕에서 덮어쓰기)."""
+
+    __slots__ = ("stage1_pct", "stage2_pct", "breakeven_offset_pct", "max_loss_half", "max_loss_full",
+                 "use_atr", "atr_mult")
+
+    def __init__(self, stage1_pct: float = 7.0, stage2_pct: float = 9.0, breakeven_offset_pct: float = -1.5,
+                 max_loss_half: float = -5.0, max_loss_full: float = -8.0, use_atr: bool = False, atr_mult: float = 1.5):
+        self.stage1_pct = stage1_pct
+        self.stage2_pct = stage2_pct
+        self.breakeven_offset_pct = breakeven_offset_pct
+        self.max_loss_half = max_loss_half
+        self.max_loss_full = max_loss_full
+        self.use_atr = use_atr
+        self.atr_mult = atr_mult
+
+    @classmethod
+    def from_settings(cls, strategy_params: dict | None = None, **overrides) -> "ExitRules":
+        """settings 기준 규칙. 전략 파라미터 use_atr_stop=True면 ATR 손절 사용."""
+        rules = cls(
+            stage1_pct=getattr(settings, "STAGE1_TAKE_PROFIT_PCT", 7.0),
+            stage2_pct=getattr(settings, "STAGE2_TAKE_PROFIT_PCT", 9.0),
+            breakeven_offset_pct=getattr(settings, "BREAKEVEN_OFFSET_PCT", -1.5),
+            max_loss_half=getattr(settings, "MAX_LOSS_PCT_HALF", -5.0),
+            max_loss_full=getattr(settings, "MAX_LOSS_PCT_FULL", -8.0),
+            use_atr=bool(getattr(settings, "USE_ATR_STOP", False) or (strategy_params or {}).get("use_atr_stop", False)),
+            atr_mult=getattr(settings, "ATR_MULTIPLIER", 1.5),
+        )
+        for name, value in overrides.items():
+            setattr(rules, name, value)
+        return rules
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ExitDecision:
+    """
+    청산 판단 결과.
+    - kind "sell": quantity주 매도 요청 (close=True면 전량 청산). 매도 성공 시 updates 반영 (부분 매도면 수량 차감은 호출자).
+    - kind "hold": 매도 없음, updates(손절가 상향 등)가 있으면 반영.
+    - high_price: 최고가 갱신 시 새 값 (판단과 무관하게 먼저 반영).
+    """
+
+    __slots__ = ("kind", "reason", "quantity", "close", "updates", "high_price", "label", "note")
+
+    def __init__(self, kind: str, reason: str, *, quantity: int = 0, close: bool = False, updates: dict | None = None,
+                 high_price: float | None = None, label: str = "", note: str = ""):
+        self.kind = kind
+        self.reason = reason
+        self.quantity = quantity
+        self.close = close
+        self.updates = updates or {}
+        self.high_price = high_price
+        self.label = label
+        self.note = note
+
+
+def decide_exit(pos: dict, current_price: float, trailing_pct: float, signal_fn=None,
+                rules: ExitRules | None = None, atr: float | None = None) -> ExitDecision:
+    """
+    보유 종목 청산 판단: 단계 익절, RSI 매도/타이트닝, 최대 손실폭, ATR/트레일링 스톱.
+    signal_fn() -> "BUY"/"SELL"/"HOLD" 는 단계 익절에 해당하지 않을 때만 호출됩니다 (전략 check_signal).
+    atr 미지정 시 pos["atr"] 사용.
+    """
+    rules = rules or ExitRules.from_settings()
+    stop_price = pos["stop_price"]
+    quantity = pos["quantity"]
+
+    # 3단계 익절: stage1 부분익절+보호선 이동, stage2 추가 1/3 매도, 나머지 트레일링
+    purchase_price = pos.get("purchase_price", 0) or 0
+    initial_quantity = pos.get("initial_quantity", quantity)
+    # 최고가 추적 (트레일링/ATR 손절 기준점 — 현재가가 아닌 최고가 기준)
+    high_price = pos.get("high_price", purchase_price or current_price)
+    new_high = None
+    if current_price > high_price:
+        high_price = new_high = current_price
+
+    def _decision(kind: str, reason: str, **kwargs) -> ExitDecision:
+        return ExitDecision(kind, reason, high_price=new_high, **kwargs)
+
+    stage1_done = pos.get("stage1_sell_done", False)
+    stage2_done = pos.get("stage2_sell_done", False)
+    stage1_trigger = purchase_price * (1 + rules.stage1_pct / 100)
+    stage2_trigger = purchase_price * (1 + rules.stage2_pct / 100)
+    breakeven_stop = purchase_price * (1 + rules.breakeven_offset_pct / 100)
+    if purchase_price <= 0:
+        pass
+    elif initial_quantity < 3:
+        # 보유 수량이 3주 미만이면 단계 익절 불가 → 트레일링 스톱에 맡김
+        pass
+    elif not stage1_done and current_price >= stage1_trigger:
+        # stage1 익절: 1/3 매도 + 손절가를 본절 보호선으로 이동
+        sell_qty = initial_quantity // 3
+        if sell_qty <= 0 or quantity < sell_qty:
+            return _decision("hold", "stage1_insufficient",
+                             note=f"+{rules.stage1_pct}% 도달했지만 단계 익절 수량 부족 (보유={quantity}, 기준={sell_qty})")
+        # 보호선: 정확한 본절(=매수가) 대신 BREAKEVEN_OFFSET_PCT만큼 아래로 둬서 노이즈 흡수
+        return _decision(
+            "sell", "stage1", quantity=sell_qty,
+            updates={"stop_price": max(pos.get("stop_price", 0), breakeven_stop), "stage1_sell_done": True},
+            label=f"익절 1/3 +{rules.stage1_pct}%",
+            note=f"보호선 {breakeven_stop:.0f} ({rules.breakeven_offset_pct:+.1f}%)",
+        )
+    elif stage1_done and not stage2_done and current_price >= stage2_trigger:
+        # stage2 익절: 추가 1/3 매도
+        sell_qty = min(initial_quantity // 3, quantity)
+        if sell_qty > 0:
+            return _decision("sell", "stage2", quantity=sell_qty, updates={"stage2_sell_done": True},
+                             label=f"익절 2/3 +{rules.stage2_pct}%")
+        return _decision("hold", "stage2", updates={"stage2_sell_done": True})
+
+    # 전략 SELL 신호 확인 (RSI 과매수)
+    signal = signal_fn() if signal_fn is not None else "HOLD"
+    if signal == "SELL":
+        if initial_quantity < 3:
+            # 소량 보유 → 전량 매도 (단계 익절 불가한 포지션)
+            return _decision("sell", "signal", quantity=quantity, close=True, label="RSI 매도")
+        # 다량 보유 → 트레일링 타이트닝 (추세추종 유지, 전량매도 대신 손절폭 절반 축소)
+        tight_stop = high_price * (1 - trailing_pct / 200)
+        if tight_stop > stop_price:
+            return _decision("hold", "signal_tighten", updates={"stop_price": tight_stop},
+                             note=f"RSI 과매수 → 트레일링 타이트닝 (손절가 {tight_stop:.0f}, 최고가 {high_price:.0f})")
+        return _decision("hold", "signal_tighten")
+
+    # 단계별 최대 손실폭 제한 (반절 → 전량)
+    if purchase_price > 0:
+        loss_pct = (current_price - purchase_price) / purchase_price * 100
+        if loss_pct <= rules.max_loss_full:
+            return _decision("sell", "max_loss_full", quantity=quantity, close=True, label=f"전량 손절 {loss_pct:.1f}%")
+        if loss_pct <= rules.max_loss_half and not pos.get("half_cut_done", False) and quantity >= 2:
+            return _decision("sell", "max_loss_half", quantity=quantity // 2, updates={"half_cut_done": True},
+                             label=f"1/2 손절 {loss_pct:.1f}%")
+
+    # 손절 조건 확인 (ATR 기반 또는 트레일링 스톱)
+    atr = pos.get("atr") if atr is None else atr
+    use_atr = rules.use_atr and atr is not None
+    if use_atr:
+        atr_floor = high_price - atr * rules.atr_mult
+        if atr_floor > stop_price:
+            stop_price = atr_floor
+    if current_price <= stop_price:
+        stop_type = "ATR 손절" if (not stage1_done and rules.use_atr) else "트레일링 스톱"
+        return _decision("sell", "stop", quantity=quantity, close=True, label=stop_type,
+                         note=f"손절가 {stop_price:.0f}")
+
+    # 트레일링 스톱 상향: stage1 전에는 ATR 손절만 유지, stage1 후에 트레일링 활성
+    if not stage1_done and initial_quantity >= 3:
+        # stage1 전: ATR 손절가만 갱신 (최고가 기준, 상향만)
+        if use_atr:
+            atr_stop = high_price - atr * rules.atr_mult
+            if atr_stop > stop_price:
+                return _decision("hold", "atr_raise", updates={"stop_price": atr_stop},
+                                 note=f"stage1 전 ATR 손절가 상향 -> {atr_stop:.0f} (최고가 {high_price:.0f})")
+    else:
+        # stage1 후: 트레일링 스톱 활성 (최고가 기준, ATR floor 반영)
+        new_stop_price = high_price * (1 - trailing_pct / 100)
+        if use_atr:
+            new_stop_price = max(new_stop_price, high_price - atr * rules.atr_mult)
+        if new_stop_price > stop_price:
+            return _decision("hold", "trail_raise", updates={"stop_price": new_stop_price},
+                             note=f"트레일링 스톱 상향 -> {new_stop_price:.0f} (최고가 {high_price:.0f})")
+    return _decision("hold", "none")
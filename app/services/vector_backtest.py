@@ -0,0 +1,381 @@
+"""
+유니버스 벡터 백테스트 (일봉 전용, NumPy).
+- 종목×일자 가격 행렬(UniverseData)에서 전략별 진입 조건을 배열 연산으로 한 번에 계산하고,
+  진입한 거래만 모아 장중 경로(backtest.ohlc_path와 같은 시가 → 극값 → 종가 순서)를 따라 청산을 벡터로 시뮬레이션합니다.
+- 청산 규칙은 trading_rules.ExitRules(단계 익절·보호선·최대 손실폭·ATR/트레일링 스톱), 미청산 잔량은 종가에 매도
+  (실거래 sell_all_at_close와 동일한 당일 청산). 전략 RSI 매도 신호, 거래량 필터, 진입 허용 시간은 반영하지 않는 근사입니다.
+- 종목별 결과와 포트폴리오(일별 max_positions 슬롯, 예산 비율) 집계를 함께 반환합니다.
+"""
+import bisect
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import trading_rules
+from app.services.backtest import curve_stats
+from app.strategies.registry import StrategyRegistry
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+# trading_rules.get_tick_size와 같은 구간 (가격 < bound → size)
+_TICK_BOUNDS = np.array([2000, 5000, 20000, 50000, 200000, 500000], dtype=float)
+_TICK_SIZES = np.array([1, 5, 10, 50, 100, 500, 1000], dtype=float)
+
+
+class UniverseData:
+    """종목×일자 OHLCV 행렬 (일자 오름차순, 거래 없는 날은 NaN)."""
+
+    __slots__ = ("symbols", "dates", "open", "high", "low", "close", "volume")
+
+    def __init__(self, symbols: list[str], dates: list[str], arrays: dict[str, np.ndarray]):
+        self.symbols = symbols
+        self.dates = dates
+        for name in FIELDS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple]) -> "UniverseData":
+        """(symbol, date, open, high, low, close, volume) 튜플 목록 → 행렬."""
+        symbols = sorted({r[0] for r in rows})
+        dates = sorted({r[1] for r in rows})
+        sym_idx = {s: i for i, s in enumerate(symbols)}
+        date_idx = {d: i for i, d in enumerate(dates)}
+        n = len(rows)
+        si = np.fromiter((sym_idx[r[0]] for r in rows), dtype=np.int64, count=n)
+        di = np.fromiter((date_idx[r[1]] for r in rows), dtype=np.int64, count=n)
+        arrays = {}
+        for k, name in enumerate(FIELDS, start=2):
+            mat = np.full((len(symbols), len(dates)), np.nan)
+            mat[si, di] = np.fromiter((np.nan if r[k] is None else r[k] for r in rows), dtype=float, count=n)
+            arrays[name] = mat
+        return cls(symbols, dates, arrays)
+
+    @classmethod
+    def from_bars(cls, bars: dict[str, list]) -> "UniverseData":
+        """{symbol: KIS 형식 일봉 리스트} → 행렬 (ReplayMarketData와 같은 입력)."""
+        keys = ("stck_oprc", "stck_hgpr", "stck_lwpr", "stck_clpr", "acml_vol")
+        rows = [
+            (symbol, str(r["stck_bsop_date"]), *(float(r.get(k) or "nan") for k in keys))
+            for symbol, rs in bars.items() for r in rs
+        ]
+        return cls.from_rows(rows)
+
+    def until(self, end: str) -> "UniverseData":
+        """end(YYYYMMDD) 이하 일자만 보는 뷰 (행렬 복사 없음)."""
+        n = bisect.bisect_right(self.dates, end)
+        return UniverseData(self.symbols, self.dates[:n], {name: getattr(self, name)[:, :n] for name in FIELDS})
+
+    def to_bars(self) -> dict[str, list]:
+        """행렬 → {symbol: KIS 형식 일봉 리스트(오래된순)} (이벤트 백테스트 재생용)."""
+        keys = ("stck_oprc", "stck_hgpr", "stck_lwpr", "stck_clpr", "acml_vol")
+        bars = {}
+        for i, symbol in enumerate(self.symbols):
+            rows = []
+            for j in np.flatnonzero(~np.isnan(self.close[i])):
+                values = (self.open[i, j], self.high[i, j], self.low[i, j], self.close[i, j], self.volume[i, j])
+                row = {"stck_bsop_date": self.dates[j]}
+                row.update((k, "" if np.isnan(v) else str(int(v)) if v == int(v) else str(v)) for k, v in zip(keys, values))
+                rows.append(row)
+            bars[symbol] = rows
+        return bars
+
+
+def load_universe(symbols: list[str], start: str | None = None, end: str | None = None) -> UniverseData:
+    """
+    로컬 일봉 저장소에서 유니버스 행렬을 읽습니다.
+    장기 일봉은 kis_market.sync_daily_history(USE_DAILY_HISTORY_SYNC 또는 POST /api/backtest/daily-history)로 미리 채울 것
+    (일봉 API 동기화만으로는 종목당 최근 약 30봉뿐).
+    """
+    from app.db import bar_store
+
+    return UniverseData.from_rows(bar_store.load_columns(symbols, start, end))
+
+
+# --- 배열 헬퍼 (마지막 축이 시간) ---
+def tick_size(price: np.ndarray) -> np.ndarray:
+    return _TICK_SIZES[np.searchsorted(_TICK_BOUNDS, np.nan_to_num(price, nan=0.0), side="right")]
+
+
+def shift(x: np.ndarray, k: int = 1) -> np.ndarray:
+    """k봉 뒤로 민 배열 (t 위치에 t-k 값, 앞쪽 NaN)."""
+    out = np.full_like(x, np.nan)
+    out[..., k:] = x[..., :-k]
+    return out
+
+
+def rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """t까지 n개 평균 (누적합 차분). 구간에 NaN이 있으면 NaN."""
+    out = np.full_like(x, np.nan)
+    if n <= 0 or x.shape[-1] < n:
+        return out
+    valid = ~np.isnan(x)
+    pad = np.zeros(x.shape[:-1] + (1,))
+    csum = np.concatenate((pad, np.cumsum(np.where(valid, x, 0.0), axis=-1)), axis=-1)
+    cnan = np.concatenate((pad, np.cumsum(~valid, axis=-1)), axis=-1)
+    window = csum[..., n:] - csum[..., :-n]
+    bad = (cnan[..., n:] - cnan[..., :-n]) > 0
+    out[..., n - 1:] = np.where(bad, np.nan, window / n)
+    return out
+
+
+def rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    """t까지 n개 모표준편차."""
+    mean = rolling_mean(x, n)
+    sq = rolling_mean(x * x, n)
+    return np.sqrt(np.maximum(sq - mean * mean, 0.0))
+
+
+def rolling_rsi(closes: np.ndarray, period: int) -> np.ndarray:
+    """t까지 최근 period개 등락폭 단순평균 RSI (indicators.rsi와 동일 정의)."""
+    deltas = closes - shift(closes)
+    gains = np.where(deltas > 0, deltas, np.where(np.isnan(deltas), np.nan, 0.0))
+    losses = np.where(deltas < 0, -deltas, np.where(np.isnan(deltas), np.nan, 0.0))
+    avg_gain = rolling_mean(gains, period)
+    avg_loss = rolling_mean(losses, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, value)
+
+
+def rolling_atr(data: UniverseData, period: int) -> np.ndarray:
+    """t까지 period개 True Range 평균."""
+    prev_close = shift(data.close)
+    tr = np.fmax(data.high - data.low, np.fmax(np.abs(data.high - prev_close), np.abs(data.low - prev_close)))
+    tr = np.where(np.isnan(prev_close), np.nan, tr)
+    return rolling_mean(tr, period)
+
+
+# --- 진입 신호 ---
+def entry_signals(data: UniverseData, strategy_name: str, params: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    전략별 당일 진입 (mask, 진입 신호가, 우선순위). 지표는 전일까지 종가로 계산해 당일 미래값을 쓰지 않습니다.
+    우선순위가 낮을수록 장중 먼저 진입했을 가능성이 큼 (슬롯 제한 시 선택 기준).
+    """
+    o, h, l, c = data.open, data.high, data.low, data.close
+    prev_close = shift(c)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if strategy_name == "volatility_breakout":
+            ma_period = params.get("ma_period", 20)
+            rng = shift(h) - shift(l)
+            k = np.full_like(c, params.get("k", 0.5))
+            if params.get("use_adaptive_k", True):
+                ratio = rng / prev_close
+                k = np.where(ratio > 0.05, 0.3, np.where(ratio < 0.02, 0.65, 0.45))
+            target = o + rng * k
+            # 현재가 ≥ 목표가 & 현재가 ≥ MA → 장중 처음 max(목표가, MA)를 넘는 시점에 진입
+            ma = rolling_mean(prev_close, ma_period)
+            level = np.fmax(target, ma)
+            price = np.fmax(level, o)
+            entry = (h >= level) & ~np.isnan(target) & ~np.isnan(ma)
+            rsi_block = getattr(settings, "RSI_ENTRY_BLOCK", 65.0) or 0
+            if params.get("rsi_exit_threshold", 70.0) > 0 and rsi_block > 0:
+                entry &= rolling_rsi(prev_close, min(14, ma_period - 1)) < rsi_block
+            gap_up_pct = getattr(settings, "ENTRY_GAP_UP_PCT", 5.0) or 0
+            if gap_up_pct > 0:
+                entry &= ~(o >= prev_close * (1 + gap_up_pct / 100))
+            max_up_pct = getattr(settings, "ENTRY_MAX_UP_FROM_OPEN_PCT", 10.0) or 0
+            if max_up_pct > 0:
+                entry &= price < o * (1 + max_up_pct / 100)
+            priority = (price - o) / o
+        elif strategy_name == "ma_crossover":
+            short = rolling_mean(prev_close, params.get("short_period", 5))
+            long = rolling_mean(prev_close, params.get("long_period", 20))
+            entry = (shift(short) < shift(long)) & (short >= long)
+            price = o
+            priority = (long - short) / long
+        elif strategy_name == "rsi":
+            rsi = rolling_rsi(prev_close, params.get("period", 14))
+            entry = rsi < params.get("oversold", 30.0)
+            price = o
+            priority = rsi
+        elif strategy_name == "bollinger":
+            period = params.get("period", 20)
+            mid = rolling_mean(prev_close, period)
+            std = rolling_std(prev_close, period)
+            lower = mid - params.get("std_dev", 2.0) * np.where(std == 0, 1e-10, std)
+            entry = l <= lower
+            price = np.fmin(o, lower)
+            priority = (price - lower) / lower
+        else:
+            raise ValueError(f"벡터 백테스트 미지원 전략: {strategy_name}")
+    entry &= ~np.isnan(price) & ~np.isnan(c)
+    return entry, price, np.where(entry, priority, np.inf)
+
+
+def _waypoints(data: UniverseData, si: np.ndarray, di: np.ndarray, entry_price: np.ndarray,
+               from_open: np.ndarray) -> np.ndarray:
+    """
+    거래별 진입 후 가격 경로 (N×4, NaN 패딩). backtest.ohlc_path와 같은 가정:
+    양봉 시가→저가→고가→종가, 음봉 시가→고가→저가→종가. 진입가가 시가가 아니면 그 가격을 처음 지나는 구간부터.
+    """
+    o, h, l, c = (getattr(data, f)[si, di] for f in ("open", "high", "low", "close"))
+    bull = c >= o
+    up_entry = entry_price >= o  # 돌파 진입 (시가 위에서 진입)
+    way = np.full((len(si), 4), np.nan)
+    way[:, 0] = entry_price
+    # 시가 진입: 하루 전체 경로
+    way[:, 1] = np.where(bull, l, h)
+    way[:, 2] = np.where(bull, h, l)
+    way[:, 3] = c
+    # 돌파 진입: 양봉은 저가 이후 상승 구간에서 → 고가 → 종가, 음봉은 시가→고가 구간에서 → 고가 → 저가 → 종가
+    brk = ~from_open & up_entry
+    way[brk & bull, 1] = h[brk & bull]
+    way[brk & bull, 2] = c[brk & bull]
+    way[brk & bull, 3] = np.nan
+    way[brk & ~bull, 1] = h[brk & ~bull]
+    way[brk & ~bull, 2] = l[brk & ~bull]
+    # 하락 진입(밴드 하단 등): 양봉은 시가→저가 구간에서 → 저가 → 고가 → 종가, 음봉은 고가→저가 구간에서 → 저가 → 종가
+    dip = ~from_open & ~up_entry
+    way[dip & bull, 1] = l[dip & bull]
+    way[dip & bull, 2] = h[dip & bull]
+    way[dip & ~bull, 1] = l[dip & ~bull]
+    way[dip & ~bull, 2] = c[dip & ~bull]
+    way[dip & ~bull, 3] = np.nan
+    return way
+
+
+def simulate_exits(way: np.ndarray, signal_price: np.ndarray, atr: np.ndarray, rules: trading_rules.ExitRules,
+                   trailing_pct: float, slippage_ticks: int, fee: float, tax: float) -> np.ndarray:
+    """
+    경로(N×4)를 따라 단계 익절/보호선/최대 손실폭/손절을 벡터로 적용하고, 남은 수량은 마지막 가격(종가)에 매도.
+    거래별 수익률(수수료·세금·슬리피지 반영)을 반환.
+    """
+    n = len(signal_price)
+    fill = signal_price + tick_size(signal_price) * slippage_ticks
+    use_atr = rules.use_atr & ~np.isnan(atr)
+    atr0 = np.nan_to_num(atr)
+    stop = np.where(use_atr, signal_price - atr0 * rules.atr_mult, signal_price * (1 - trailing_pct / 100))
+    stop = np.maximum(0.0, stop + (fill - signal_price))
+    s1 = fill * (1 + rules.stage1_pct / 100)
+    s2 = fill * (1 + rules.stage2_pct / 100)
+    be_stop = fill * (1 + rules.breakeven_offset_pct / 100)
+    half_level = fill * (1 + rules.max_loss_half / 100)
+    full_level = fill * (1 + rules.max_loss_full / 100)
+
+    remaining = np.ones(n)
+    proceeds = np.zeros(n)
+    high = fill.copy()
+    stage1 = np.zeros(n, dtype=bool)
+    stage2 = np.zeros(n, dtype=bool)
+    half_done = np.zeros(n, dtype=bool)
+    last = way[:, 0].copy()
+
+    def _sell(mask, fraction, level):
+        px = np.maximum(1.0, level - tick_size(level) * slippage_ticks)
+        proceeds[mask] += (fraction * px)[mask]
+        remaining[mask] -= fraction[mask]
+
+    for k in range(1, way.shape[1]):
+        nxt = way[:, k]
+        live = ~np.isnan(nxt) & (remaining > 1e-12)
+        up = live & (nxt > last)
+        down = live & (nxt < last)
+        # 상승 구간: stage1(1/3 + 보호선) → stage2(1/3) → 최고가 갱신으로 손절선 상향
+        hit1 = up & ~stage1 & (nxt >= s1)
+        _sell(hit1, np.minimum(remaining, 1 / 3), s1)
+        stage1 |= hit1
+        stop = np.where(hit1, np.maximum(stop, be_stop), stop)
+        hit2 = up & stage1 & ~stage2 & (nxt >= s2)
+        _sell(hit2, np.minimum(remaining, 1 / 3), s2)
+        stage2 |= hit2
+        high = np.where(up, np.maximum(high, nxt), high)
+        trail = np.where(stage1, high * (1 - trailing_pct / 100), -np.inf)
+        atr_floor = np.where(use_atr, high - atr0 * rules.atr_mult, -np.inf)
+        stop = np.where(up, np.maximum(stop, np.maximum(trail, atr_floor)), stop)
+        # 하락 구간: 1/2 손절(손절선보다 위일 때 1회) → 손절선/전량 손절선 중 높은 쪽에서 잔량 전량
+        cut = down & ~half_done & (half_level >= nxt) & (half_level > stop) & (half_level > full_level) & (half_level <= last)
+        _sell(cut, remaining / 2, half_level)
+        half_done |= cut
+        exit_level = np.maximum(stop, full_level)
+        out = down & (exit_level >= nxt)
+        _sell(out, remaining.copy(), np.minimum(exit_level, last))
+        last = np.where(live, nxt, last)
+    _sell(remaining > 1e-12, remaining.copy(), last)
+    proceeds *= 1 - fee - tax
+    return proceeds / (fill * (1 + fee)) - 1
+
+
+def run_vectorized(data: UniverseData, strategy_name: str = "volatility_breakout", params: dict | None = None, *,
+                   slippage_ticks: int = 1, fee_pct: float = 0.015, tax_pct: float = 0.18,
+                   exit_rules: trading_rules.ExitRules | None = None, max_positions: int | None = None,
+                   budget_ratio: float | None = None, initial_cash: float = 10_000_000,
+                   start: str | None = None, end: str | None = None, per_symbol: bool = True) -> dict:
+    """
+    유니버스 전체 백테스트. 반환: {"stats": 집계, "equity": 일별 자산, "symbols": 종목별 결과}.
+    max_positions 지정 시 날마다 우선순위 상위 N개만 진입(슬롯당 예산 = 자산*budget_ratio/N),
+    미지정 시 신호 전부에 자산*budget_ratio를 균등 배분.
+    """
+    strategy = StrategyRegistry.get_strategy(strategy_name, params)
+    resolved = strategy.get_parameters()
+    trailing_pct = resolved.get("trailing_stop_pct", 3.0)
+    rules = exit_rules or trading_rules.ExitRules.from_settings(resolved)
+    budget_ratio = budget_ratio if budget_ratio is not None else settings.BUDGET_RATIO
+
+    entry, price, priority = entry_signals(data, strategy_name, resolved)
+    dates = np.array(data.dates)
+    if start:
+        entry &= dates >= start
+    if end:
+        entry &= dates <= end
+    if max_positions:
+        order = np.argsort(priority, axis=0, kind="stable")[:max_positions]
+        chosen = np.zeros_like(entry)
+        np.put_along_axis(chosen, order, True, axis=0)
+        entry &= chosen
+
+    si, di = np.nonzero(entry)
+    signal_price = price[si, di]
+    atr = rolling_atr(data, getattr(settings, "ATR_PERIOD", 20))
+    atr = shift(atr)[si, di]  # 전일까지 봉 기준
+    from_open = signal_price == data.open[si, di]
+    way = _waypoints(data, si, di, signal_price, from_open)
+    returns = simulate_exits(way, signal_price, atr, rules, trailing_pct, slippage_ticks, fee_pct / 100, tax_pct / 100)
+
+    # 포트폴리오: 일자별 진입 거래 수익률 합 × 슬롯 비중
+    n_days = len(data.dates)
+    day_sum = np.bincount(di, weights=returns, minlength=n_days)
+    day_count = np.bincount(di, minlength=n_days)
+    if max_positions:
+        day_ret = day_sum * budget_ratio / max_positions
+    else:
+        day_ret = np.divide(day_sum, day_count, out=np.zeros(n_days), where=day_count > 0) * budget_ratio
+    in_range = np.ones(n_days, dtype=bool)
+    if start:
+        in_range &= dates >= start
+    if end:
+        in_range &= dates <= end
+    first = int(np.argmax(in_range)) if in_range.any() else n_days
+    equity = initial_cash * np.cumprod(1 + day_ret[in_range])
+
+    stats = curve_stats(equity, initial_cash)
+    wins = returns > 0
+    gains, losses = returns[wins].sum(), -returns[returns < 0].sum()
+    stats.update({
+        "symbols": len(data.symbols),
+        "trades": int(returns.size),
+        "winRatePct": round(float(wins.mean()) * 100, 1) if returns.size else 0.0,
+        "avgReturnPct": round(float(returns.mean()) * 100, 3) if returns.size else 0.0,
+        "profitFactor": round(float(gains / losses), 2) if losses > 0 else None,
+    })
+    result = {
+        "stats": stats,
+        "equity": [{"date": d, "equity": round(float(v), 0)} for d, v in zip(data.dates[first:], equity)],
+    }
+    if per_symbol:
+        n_sym = len(data.symbols)
+        count = np.bincount(si, minlength=n_sym)
+        win = np.bincount(si, weights=wins, minlength=n_sym)
+        total = np.expm1(np.bincount(si, weights=np.log1p(returns), minlength=n_sym))
+        mean = np.divide(np.bincount(si, weights=returns, minlength=n_sym), count, out=np.zeros(n_sym), where=count > 0)
+        result["symbols"] = [
+            {
+                "symbol": sym,
+                "trades": int(count[i]),
+                "winRatePct": round(float(win[i] / count[i]) * 100, 1),
+                "avgReturnPct": round(float(mean[i]) * 100, 3),
+                "totalReturnPct": round(float(total[i]) * 100, 2),
+            }
+            for i, sym in enumerate(data.symbols) if count[i] > 0
+        ]
+    return result
+
@@ -0,0 +1,171 @@
+"""
+워크포워드 최적화/검증.
+- 거래일을 [in-sample N일 → out-of-sample M일] 창으로 굴립니다 (step=M, anchored=True면 in-sample 시작 고정).
+  폴드마다 in-sample 구간 ParameterSweep(프로세스 병렬) → 최적 파라미터로 바로 다음 out-of-sample 구간을 백테스트.
+- 폴드 결과는 DATA_DIR/walk_forward/<해시>.json에 저장. 해시 = 폴드 마지막 날까지의 데이터 지문 + 전략/스윕 설정 + 구간이라
+  봉이 한 달 추가돼도 기존 폴드는 파일에서 읽고 새 폴드만 계산합니다. 지문은 일자별 누적 해시라 폴드마다 행렬을 다시 훑지 않음.
+- out-of-sample 곡선을 이어 붙인 것이 전체 성과. retune=True면 마지막 in-sample 창(최근 N일)으로 한 번 더 스윕해
+  배포용 파라미터(latest)를 냅니다 (주간 재튜닝 잡이 이 값을 StrategyConfig에 기록).
+"""
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services import param_sweep
+from app.services.backtest import curve_stats
+from app.services.vector_backtest import FIELDS, UniverseData
+
+_CACHE_VERSION = 1
+
+
+def prefix_fingerprints(data: UniverseData) -> list[str]:
+    """일자별 누적 지문: i번째 값은 종목 목록 + 0..i일 OHLCV로 결정 (data.until(dates[i])의 지문)."""
+    block = np.stack([getattr(data, name) for name in FIELDS], axis=-1)  # S×T×5
+    h = hashlib.blake2b(json.dumps(data.symbols).encode(), digest_size=16).digest()
+    out = []
+    for j, day in enumerate(data.dates):
+        h = hashlib.blake2b(h + day.encode() + np.ascontiguousarray(block[:, j]).tobytes(), digest_size=16).digest()
+        out.append(h.hex())
+    return out
+
+
+class WalkForward:
+    """
+    워크포워드 실행기. sweep_options는 ParameterSweep 키워드 (method, n_candidates, metric, engine, workers ...).
+    warmup_days: 첫 in-sample 앞에 남겨 둘 지표 워밍업 일수.
+    """
+
+    def __init__(self, data: UniverseData, strategy_name: str = "volatility_breakout", *,
+                 in_sample_days: int = 250, out_of_sample_days: int = 20, anchored: bool = False,
+                 warmup_days: int = 60, max_folds: int | None = None, retune: bool = True,
+                 cache_dir: str | Path | None = None, **sweep_options):
+        if in_sample_days <= 0 or out_of_sample_days <= 0:
+            raise ValueError("in_sample_days/out_of_sample_days는 1 이상이어야 합니다.")
+        self.data = data
+        self.strategy_name = strategy_name
+        self.in_sample_days = in_sample_days
+        self.out_of_sample_days = out_of_sample_days
+        self.anchored = anchored
+        self.warmup_days = warmup_days
+        self.max_folds = max_folds
+        self.retune = retune
+        self.sweep_options = sweep_options
+        self.cache_dir = Path(cache_dir) if cache_dir else settings.base_dir / "walk_forward"
+        self._fingerprints: list[str] | None = None
+
+    # --- 폴드 ---
+    def windows(self) -> list[dict]:
+        """
+        [{"inSample": [시작, 끝], "outOfSample": [시작, 끝] | None}]. 구간 경계는 데이터 첫날 기준으로 고정이라
+        뒤에 봉이 추가돼도 기존 폴드 경계는 변하지 않습니다. retune 폴드(outOfSample=None)는 항상 마지막.
+        """
+        dates = self.data.dates
+        first = min(self.warmup_days, max(0, len(dates) - 1))
+        out = []
+        i = first
+        while i + self.in_sample_days + self.out_of_sample_days <= len(dates):
+            is_start = first if self.anchored else i
+            is_end = i + self.in_sample_days - 1
+            out.append({
+                "inSample": [dates[is_start], dates[is_end]],
+                "outOfSample": [dates[is_end + 1], dates[is_end + self.out_of_sample_days]],
+            })
+            i += self.out_of_sample_days
+        if self.max_folds:
+            out = out[-self.max_folds:]
+        if self.retune and len(dates) - first >= self.in_sample_days:
+            is_start = first if self.anchored else len(dates) - self.in_sample_days
+            out.append({"inSample": [dates[is_start], dates[-1]], "outOfSample": None})
+        return out
+
+    def _fingerprint_until(self, day: str) -> str:
+        if self._fingerprints is None:
+            self._fingerprints = prefix_fingerprints(self.data)
+        return self._fingerprints[self.data.dates.index(day)]
+
+    def _fold_key(self, window: dict, sweep: param_sweep.ParameterSweep) -> str:
+        last_day = (window["outOfSample"] or window["inSample"])[1]
+        payload = json.dumps({
+            "version": _CACHE_VERSION,
+            "data": self._fingerprint_until(last_day),
+            "window": window,
+            "space": sweep.space,
+            "config": sweep.config,
+            "sweep": {k: getattr(sweep, k) for k in ("method", "n_candidates", "grid_points", "metric", "min_trades", "seed")},
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    # --- 실행 ---
+    def run(self) -> dict:
+        started = time.monotonic()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        folds, computed = [], 0
+        for n, window in enumerate(self.windows(), start=1):
+            fold, cached = self._run_fold(window)
+            fold["fold"] = n
+            fold["cached"] = cached
+            computed += 0 if cached else 1
+            folds.append(fold)
+
+        tested = [f for f in folds if f["outOfSample"] is not None and f["outOfSampleEquity"]]
+        initial_cash = self.sweep_options.get("initial_cash", 10_000_000)
+        equity, value = [], float(initial_cash)
+        for f in tested:
+            for point in f["outOfSampleEquity"]:
+                equity.append({"date": point["date"], "equity": round(value * point["equity"] / initial_cash, 0)})
+            value *= f["outOfSampleEquity"][-1]["equity"] / initial_cash
+        latest = folds[-1] if folds else None  # retune 폴드가 있으면 그것, 없으면 마지막 검증 폴드
+        metric = self.sweep_options.get("metric", "sharpe")
+        elapsed = time.monotonic() - started
+        logger.info(f"워크포워드 완료: {self.strategy_name} 폴드 {len(folds)}개 (신규 계산 {computed}, {elapsed:.1f}초)")
+        return {
+            "strategy_name": self.strategy_name,
+            "metric": metric,
+            "folds": [{k: v for k, v in f.items() if k != "outOfSampleEquity"} for f in folds],
+            "computedFolds": computed,
+            "cachedFolds": len(folds) - computed,
+            "outOfSample": curve_stats([p["equity"] for p in equity], initial_cash),
+            "equity": equity,
+            "latest": {"inSample": latest["inSample"], "params": latest["params"]} if latest and latest["params"] else None,
+            "elapsedSec": round(elapsed, 2),
+        }
+
+    def _run_fold(self, window: dict) -> tuple[dict, bool]:
+        is_start, is_end = window["inSample"]
+        oos = window["outOfSample"]
+        sweep = param_sweep.ParameterSweep(
+            self.data.until(is_end), self.strategy_name, start=is_start, end=is_end,
+            fingerprint=self._fingerprint_until(is_end), **self.sweep_options,
+        )
+        path = self.cache_dir / f"{self._fold_key(window, sweep)}.json"
+        if path.exists():
+            try:
+                return json.loads(path.read_text(encoding="utf-8")), True
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"워크포워드 폴드 캐시 손상, 다시 계산: {path.name} ({e})")
+
+        result = sweep.run()
+        best = result["best"]
+        fold = {
+            "inSample": window["inSample"],
+            "outOfSample": oos,
+            "params": best["params"] if best else None,
+            "inSampleScore": best["score"] if best else None,
+            "inSampleStats": best["stats"] if best else None,
+            "outOfSampleStats": None,
+            "outOfSampleEquity": [],
+        }
+        if best and oos:
+            config = {**sweep.config, "start": oos[0], "end": oos[1]}
+            tested = param_sweep.evaluate(self.data.until(oos[1]), config, best["params"], full=True)
+            fold["outOfSampleStats"] = tested["stats"]
+            fold["outOfSampleEquity"] = [{"date": p["date"], "equity": p["equity"]} for p in tested["equity"]]
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(fold, ensure_ascii=False, default=float), encoding="utf-8")
+        tmp.replace(path)
+        return fold, False
@@ -1,9 +1,9 @@
 
-import json
 from abc import ABC, abstractmethod
 from datetime import datetime
 
 from app.core.logger import logger
+from app.services.market_data import MarketDataProvider, live_market_data
 
 
 class Strategy(ABC):
@@ -11,6 +11,19 @@ class Strategy(ABC):
 
     last_indicators: dict = {}
     last_decision_reason: str = ""
+    _market_data: MarketDataProvider | None = None
+    # False면 log_decision을 DB에 남기지 않음 (백테스트 등)
+    record_decisions: bool = True
+
+    @property
+    def market_data(self) -> MarketDataProvider:
+        """시세 제공자 (지정하지 않으면 실거래 KIS 시세)."""
+        return self._market_data or live_market_data
+
+    def use_market_data(self, provider: MarketDataProvider | None) -> "Strategy":
+        """시세 제공자를 바꿉니다 (캐시/재생/합성). None이면 실거래로 복귀."""
+        self._market_data = provider
+        return self
 
     @abstractmethod
     def check_signal(self, symbol: str, current_price: float | None = None) -> tuple[str, float | None]:
@@ -43,23 +56,12 @@ class Strategy(ABC):
 
     def log_decision(self, symbol: str, signal: str, reason: str,
                      indicator_values: dict, current_price: float, action_taken: str):
-        """의사결정을 DB에 기록합니다."""
+        """의사결정을 DecisionLog 배치 기록기 큐에 넣습니다 (DB 쓰기는 백그라운드 스레드)."""
+        if not self.record_decisions:
+            return
         try:
-            from app.db import models, session
-            db = session.SessionLocal()
-            try:
-                log = models.DecisionLog(
-                    symbol=symbol,
-                    strategy_name=self.get_strategy_name(),
-                    signal=signal,
-                    decision_reason=reason,
-                    indicator_values=json.dumps(indicator_values, ensure_ascii=False),
-                    current_price=current_price,
-                    action_taken=action_taken,
-                )
-                db.add(log)
-                db.commit()
-            finally:
-                db.close()
+            from app.db.decision_log import decision_log
+            decision_log.record(symbol, self.get_strategy_name(), signal, reason, indicator_values,
+                                current_price, action_taken)
         except Exception as e:
             logger.error(f"의사결정 로그 저장 실패: {e}")
@@ -1,9 +1,7 @@
 """볼린저 밴드 전략: 하단 밴드 매수, 상단 밴드 매도"""
 
-import numpy as np
-
-from app.api import kis_market
 from app.core.logger import logger
+from app.services import indicators as indicators_service
 from app.strategies.base import Strategy
 
 
@@ -28,28 +26,24 @@ class BollingerStrategy(Strategy):
     @classmethod
     def get_param_schema(cls) -> list[dict]:
         return [
-            {"name": "period", "type": "int", "default": 20, "description": "이동평균/표준편차 기간"},
-            {"name": "std_dev", "type": "float", "default": 2.0, "description": "밴드 표준편차 배수"},
-            {"name": "trailing_stop_pct", "type": "float", "default": 5.0, "description": "트레일링 스톱 비율 (%)"},
+            {"name": "period", "type": "int", "default": 20, "min": 10, "max": 40, "step": 2, "description": "이동평균/표준편차 기간"},
+            {"name": "std_dev", "type": "float", "default": 2.0, "min": 1.5, "max": 3.0, "description": "밴드 표준편차 배수"},
+            {"name": "trailing_stop_pct", "type": "float", "default": 5.0, "min": 1.0, "max": 8.0, "description": "트레일링 스톱 비율 (%)"},
         ]
 
     def check_signal(self, symbol: str, current_price: float | None = None) -> tuple[str, float | None]:
         try:
             days = self.period + 5
-            daily_data = kis_market.get_daily_ohlcv(symbol, days=days)
+            daily_data = self.market_data.get_daily_ohlcv(symbol, days=days)
             if not daily_data or len(daily_data) < days:
                 logger.warning(f"[{symbol}] 볼린저 계산을 위한 데이터가 부족합니다.")
                 return "HOLD", None
 
-            closes = np.array([float(d["stck_clpr"]) for d in daily_data[1:days]])
-            ma = np.mean(closes[-self.period :])
-            std = np.std(closes[-self.period :])
-            if std == 0:
-                std = 1e-10
-            upper = ma + self.std_dev * std
-            lower = ma - self.std_dev * std
+            # 전일까지 종가 (오래된순) → 최근 period개로 밴드 계산
+            closes = indicators_service.bars_to_arrays(daily_data[1:days])["close"]
+            ma, upper, lower = indicators_service.bollinger(closes, self.period, self.std_dev)
             if current_price is None:
-                current_price = kis_market.get_current_price(symbol)
+                current_price = self.market_data.get_current_price(symbol)
             indicators = {
                 "upper": round(upper, 2),
                 "lower": round(lower, 2),
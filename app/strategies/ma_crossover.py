@@ -1,9 +1,7 @@
 """이동평균 교차 전략: 단기 MA 상향 돌파 시 매수, 하향 돌파 시 매도"""
 
-import numpy as np
-
-from app.api import kis_market
 from app.core.logger import logger
+from app.services import indicators as indicators_service
 from app.strategies.base import Strategy
 
 
@@ -28,28 +26,28 @@ class MACrossover(Strategy):
     @classmethod
     def get_param_schema(cls) -> list[dict]:
         return [
-            {"name": "short_period", "type": "int", "default": 5, "description": "단기 이동평균 기간 (일)"},
-            {"name": "long_period", "type": "int", "default": 20, "description": "장기 이동평균 기간 (일)"},
-            {"name": "trailing_stop_pct", "type": "float", "default": 5.0, "description": "트레일링 스톱 비율 (%)"},
+            {"name": "short_period", "type": "int", "default": 5, "min": 3, "max": 15, "step": 1, "description": "단기 이동평균 기간 (일)"},
+            {"name": "long_period", "type": "int", "default": 20, "min": 10, "max": 60, "step": 5, "description": "장기 이동평균 기간 (일)"},
+            {"name": "trailing_stop_pct", "type": "float", "default": 5.0, "min": 1.0, "max": 8.0, "description": "트레일링 스톱 비율 (%)"},
         ]
 
     def check_signal(self, symbol: str, current_price: float | None = None) -> tuple[str, float | None]:
         try:
             days = self.long_period + 3
-            daily_data = kis_market.get_daily_ohlcv(symbol, days=days)
+            daily_data = self.market_data.get_daily_ohlcv(symbol, days=days)
             if not daily_data or len(daily_data) < days:
                 logger.warning(f"[{symbol}] MA 교차 계산을 위한 데이터가 부족합니다.")
                 return "HOLD", None
 
-            closes = [float(d["stck_clpr"]) for d in daily_data[1 : days]]
-            short_ma = np.mean(closes[: self.short_period])
-            long_ma = np.mean(closes[: self.long_period])
+            closes = indicators_service.bars_to_arrays(daily_data[1:days])["close"]
+            short_series = indicators_service.sma(closes, self.short_period)
+            long_series = indicators_service.sma(closes, self.long_period)
+            short_ma, long_ma = short_series[-1], long_series[-1]
             # 이전 봉 기준
-            prev_short = np.mean(closes[1 : self.short_period + 1])
-            prev_long = np.mean(closes[1 : self.long_period + 1])
+            prev_short, prev_long = short_series[-2], long_series[-2]
 
             if current_price is None:
-                current_price = kis_market.get_current_price(symbol)
+                current_price = self.market_data.get_current_price(symbol)
             indicators = {
                 "short_ma": round(short_ma, 2),
                 "long_ma": round(long_ma, 2),
@@ -2,6 +2,7 @@
 
 from typing import Type
 
+from app.services.market_data import MarketDataProvider
 from app.strategies.base import Strategy
 from app.strategies.volatility_breakout import VolatilityBreakout
 
@@ -14,11 +15,13 @@ class StrategyRegistry:
         cls._strategies[name] = strategy_class
 
     @classmethod
-    def get_strategy(cls, name: str, parameters: dict | None = None) -> Strategy:
+    def get_strategy(cls, name: str, parameters: dict | None = None,
+                     provider: MarketDataProvider | None = None) -> Strategy:
+        """전략 인스턴스를 만듭니다. provider 미지정 시 실거래 KIS 시세를 사용."""
         parameters = parameters or {}
         if name not in cls._strategies:
             raise ValueError(f"Unknown strategy: {name}")
-        return cls._strategies[name](**parameters)
+        return cls._strategies[name](**parameters).use_market_data(provider)
 
     @classmethod
     def list_strategies(cls) -> list[dict]:
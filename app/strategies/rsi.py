@@ -1,26 +1,10 @@
 """RSI 전략: RSI < 30 매수, RSI > 70 매도"""
 
-import numpy as np
-
-from app.api import kis_market
 from app.core.logger import logger
+from app.services import indicators as indicators_service
 from app.strategies.base import Strategy
 
 
-def _compute_rsi(prices: list[float], period: int) -> float:
-    if len(prices) < period + 1:
-        return 50.0
-    deltas = np.diff(prices)
-    gains = np.where(deltas > 0, deltas, 0.0)
-    losses = np.where(deltas < 0, -deltas, 0.0)
-    avg_gain = np.mean(gains[-period:])
-    avg_loss = np.mean(losses[-period:])
-    if avg_loss == 0:
-        return 100.0
-    rs = avg_gain / avg_loss
-    return 100.0 - (100.0 / (1.0 + rs))
-
-
 class RSIStrategy(Strategy):
     """RSI 과매도(< 30) 시 매수, 과매수(> 70) 시 매도"""
 
@@ -44,25 +28,24 @@ class RSIStrategy(Strategy):
     @classmethod
     def get_param_schema(cls) -> list[dict]:
         return [
-            {"name": "period", "type": "int", "default": 14, "description": "RSI 기간"},
-            {"name": "oversold", "type": "float", "default": 30.0, "description": "과매도 기준 (이하 매수)"},
-            {"name": "overbought", "type": "float", "default": 70.0, "description": "과매수 기준 (이상 매도)"},
-            {"name": "trailing_stop_pct", "type": "float", "default": 5.0, "description": "트레일링 스톱 비율 (%)"},
+            {"name": "period", "type": "int", "default": 14, "min": 5, "max": 30, "step": 1, "description": "RSI 기간"},
+            {"name": "oversold", "type": "float", "default": 30.0, "min": 15.0, "max": 40.0, "description": "과매도 기준 (이하 매수)"},
+            {"name": "overbought", "type": "float", "default": 70.0, "min": 60.0, "max": 85.0, "description": "과매수 기준 (이상 매도)"},
+            {"name": "trailing_stop_pct", "type": "float", "default": 5.0, "min": 1.0, "max": 8.0, "description": "트레일링 스톱 비율 (%)"},
         ]
 
     def check_signal(self, symbol: str, current_price: float | None = None) -> tuple[str, float | None]:
         try:
             days = self.period + 20
-            daily_data = kis_market.get_daily_ohlcv(symbol, days=days)
+            daily_data = self.market_data.get_daily_ohlcv(symbol, days=days)
             if not daily_data or len(daily_data) < days:
                 logger.warning(f"[{symbol}] RSI 계산을 위한 데이터가 부족합니다.")
                 return "HOLD", None
 
-            closes = [float(d["stck_clpr"]) for d in daily_data[1:days]]
-            closes_asc = list(reversed(closes))
-            rsi_val = _compute_rsi(closes_asc, self.period)
+            closes = indicators_service.bars_to_arrays(daily_data[1:days])["close"]
+            rsi_val = indicators_service.rsi(closes, self.period)
             if current_price is None:
-                current_price = kis_market.get_current_price(symbol)
+                current_price = self.market_data.get_current_price(symbol)
             indicators = {"rsi": round(rsi_val, 2), "current_price": current_price}
 
             if rsi_val < self.oversold:
@@ -1,23 +1,7 @@
 from .base import Strategy
-from app.api import kis_market
 from app.core.config import settings
 from app.core.logger import logger
-import numpy as np
-
-
-def _compute_rsi(prices: list[float], period: int) -> float:
-    """RSI 계산 (순환 import 방지를 위해 로컬 정의)"""
-    if len(prices) < period + 1:
-        return 50.0
-    deltas = np.diff(prices)
-    gains = np.where(deltas > 0, deltas, 0.0)
-    losses = np.where(deltas < 0, -deltas, 0.0)
-    avg_gain = np.mean(gains[-period:])
-    avg_loss = np.mean(losses[-period:])
-    if avg_loss == 0:
-        return 100.0
-    rs = avg_gain / avg_loss
-    return 100.0 - (100.0 / (1.0 + rs))
+import math
 
 
 class VolatilityBreakout(Strategy):
@@ -46,25 +30,26 @@ class VolatilityBreakout(Strategy):
     @classmethod
     def get_param_schema(cls) -> list[dict]:
         return [
-            {"name": "k", "type": "float", "default": 0.5, "description": "변동성 돌파 K값 (0~1, 고정 시 사용)"},
-            {"name": "ma_period", "type": "int", "default": 20, "description": "이동평균 기간 (일)"},
-            {"name": "trailing_stop_pct", "type": "float", "default": 3.0, "description": "트레일링 스톱 비율 (%)"},
+            {"name": "k", "type": "float", "default": 0.5, "min": 0.2, "max": 0.9, "description": "변동성 돌파 K값 (0~1, 고정 시 사용)"},
+            {"name": "ma_period", "type": "int", "default": 20, "min": 5, "max": 60, "step": 5, "description": "이동평균 기간 (일)"},
+            {"name": "trailing_stop_pct", "type": "float", "default": 3.0, "min": 1.0, "max": 8.0, "description": "트레일링 스톱 비율 (%)"},
             {"name": "use_adaptive_k", "type": "bool", "default": True, "description": "전일 변동성 기반 적응형 K 사용"},
-            {"name": "rsi_exit_threshold", "type": "float", "default": 70.0, "description": "RSI 과매수 매도 기준 (0=비활성)"},
+            {"name": "rsi_exit_threshold", "type": "float", "default": 70.0, "min": 60.0, "max": 90.0, "description": "RSI 과매수 매도 기준 (0=비활성)"},
         ]
 
     def check_signal(self, symbol: str, current_price: float | None = None) -> tuple[str, float | None]:
         """매수/매도 신호 확인 로직 (RSI 과매수 시 SELL 반환)"""
         try:
-            daily_data = kis_market.get_daily_ohlcv(symbol, days=self.ma_period + 2)
-            if not daily_data or len(daily_data) < self.ma_period + 1:
+            # 확정 일봉 누적합 + 당일 봉 상태에서 현재 값만 읽음 (틱마다 배열 재구성 없음)
+            state = self.market_data.get_indicators(symbol)
+            if state.count < self.ma_period or state.prev_bar() is None:
                 logger.warning(f"[{symbol}] {self.ma_period}일 MA 계산을 위한 데이터가 부족합니다.")
                 return "HOLD", None
 
-            closing_prices = [float(day['stck_clpr']) for day in daily_data[1:self.ma_period + 1]]
-            ma20 = np.mean(closing_prices)
+            ma20 = state.sma(self.ma_period)
             if current_price is None:
-                current_price = kis_market.get_current_price(symbol)
+                current_price = self.market_data.get_current_price(symbol)
+            state.update(price=current_price)
 
             indicators = {"ma": round(ma20, 2), "current_price": current_price, "k": self.k}
             llm_active = getattr(settings, "USE_LLM_ADVISOR", False)
@@ -73,8 +58,7 @@ class VolatilityBreakout(Strategy):
             rsi_sell = False
             rsi_val = 50.0
             if self.rsi_exit_threshold > 0:
-                closes_asc = list(reversed(closing_prices))
-                rsi_val = _compute_rsi(closes_asc, min(14, len(closes_asc) - 1))
+                rsi_val = state.rsi(min(14, self.ma_period - 1))
                 indicators["rsi"] = round(rsi_val, 2)
                 if rsi_val >= self.rsi_exit_threshold:
                     rsi_sell = True
@@ -108,11 +92,14 @@ class VolatilityBreakout(Strategy):
 
             logger.debug(f"[{symbol}] 추세 확인 (현재가: {current_price}, MA: {ma20})")
 
-            prev_day = daily_data[1]
-            prev_high = float(prev_day["stck_hgpr"])
-            prev_low = float(prev_day["stck_lwpr"])
-            prev_close = float(prev_day["stck_clpr"])
-            today_open = float(daily_data[0]["stck_oprc"])
+            prev_day = state.prev_bar()
+            prev_high = prev_day["high"]
+            prev_low = prev_day["low"]
+            prev_close = prev_day["close"]
+            today_open = state.open
+            if math.isnan(today_open):
+                logger.debug(f"[{symbol}] 당일 시가 미확인, 판단 보류")
+                return "HOLD", None
 
             # 갭 필터: 당일 시가가 전일 종가 대비 +ENTRY_GAP_UP_PCT% 이상 갭업이면 진입 스킵
             gap_up_pct = getattr(settings, "ENTRY_GAP_UP_PCT", 5.0) or 0
@@ -151,29 +138,19 @@ class VolatilityBreakout(Strategy):
             # 거래량 필터: 당일 거래량 >= 직전 20봉 평균 * ENTRY_VOLUME_RATIO (일봉에 거래량 필드 있을 때만)
             volume_ratio_req = getattr(settings, "ENTRY_VOLUME_RATIO", 0) or 0
             if volume_ratio_req > 0 and current_price >= target_price:
-                vol_key = None
-                for key in ("acml_vol", "stck_acml_vol", "acml_volume"):
-                    if daily_data[0].get(key) is not None:
-                        vol_key = key
-                        break
-                if vol_key:
-                    try:
-                        today_vol = float(daily_data[0][vol_key])
-                        vols = [float(d[vol_key]) for d in daily_data[1 : self.ma_period + 1] if d.get(vol_key) is not None]
-                        if len(vols) >= self.ma_period:
-                            avg_vol_20 = sum(vols) / len(vols)
-                            if avg_vol_20 > 0:
-                                indicators["volume_ratio"] = round(today_vol / avg_vol_20, 2)
-                            if avg_vol_20 > 0 and today_vol < avg_vol_20 * volume_ratio_req:
-                                if not llm_active:
-                                    logger.debug(f"[{symbol}] 거래량 필터 스킵 (당일 {today_vol:.0f} < 20일평균*{volume_ratio_req})")
-                                    self.log_decision(symbol, "HOLD", f"거래량 부족 (당일 < 20일평균*{volume_ratio_req})",
-                                                      indicators, current_price, "SKIPPED")
-                                    return "HOLD", None
-                                logger.debug(f"[{symbol}] 거래량 부족이나 LLM 판단 위임")
-                                indicators["volume_filter"] = "TRIGGERED"
-                    except (TypeError, ValueError, KeyError):
-                        pass
+                today_vol = state.volume
+                avg_vol_20 = state.average_volume(self.ma_period)
+                if not math.isnan(today_vol) and not math.isnan(avg_vol_20):
+                    if avg_vol_20 > 0:
+                        indicators["volume_ratio"] = round(today_vol / avg_vol_20, 2)
+                    if avg_vol_20 > 0 and today_vol < avg_vol_20 * volume_ratio_req:
+                        if not llm_active:
+                            logger.debug(f"[{symbol}] 거래량 필터 스킵 (당일 {today_vol:.0f} < 20일평균*{volume_ratio_req})")
+                            self.log_decision(symbol, "HOLD", f"거래량 부족 (당일 < 20일평균*{volume_ratio_req})",
+                                              indicators, current_price, "SKIPPED")
+                            return "HOLD", None
+                        logger.debug(f"[{symbol}] 거래량 부족이나 LLM 판단 위임")
+                        indicators["volume_filter"] = "TRIGGERED"
 
             if current_price >= target_price:
                 logger.debug(f"[{symbol}] 매수 신호 발생! 목표가 {target_price:.2f} 돌파")
@@ -0,0 +1,213 @@
+"""
+SQLite 성능 프로파일 벤치마크: 기본(rollback 저널·PRAGMA 없음·단일 컬럼 인덱스) vs 튜닝(WAL·PRAGMA·복합 인덱스).
+임시 디렉터리에 trade_logs / decision_logs를 --rows행씩 채우고
+1) 핫 쿼리(당일 실현손익 SUM, 당일 체결 건수, 종목별 최근 판단, 최근 매매) 지연,
+2) 매매 스레드가 계속 커밋하는 동안 상태 조회(get_status의 당일 손익 쿼리) 지연
+을 잽니다. 실행: 프로젝트 루트에서 python bench_db.py --rows 1000000
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.models import OrderStatus, OrderType
+from app.db.session import apply_pragmas
+
+KST = timezone(timedelta(hours=9))
+# 튜닝 프로파일에서 추가된 인덱스 (기본 프로파일에서는 삭제)
+PROFILE_INDEXES = {index.name for model in (models.TradeLog, models.DecisionLog) for index in model.__table_args__}
+CHUNK = 50_000
+
+
+def _today_start() -> datetime:
+    return datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _trade_rows(n: int, days: int, seed: int):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for i in range(n):
+        ts = now - timedelta(seconds=rng.random() * days * 86400)
+        yield (ts.isoformat(sep=" "), f"{rng.randrange(500):06d}", rng.choice(("BUY", "SELL")), 10000.0 + i % 977,
+               rng.randrange(1, 100), rng.choice(("EXECUTED", "EXECUTED", "EXECUTED", "FAILED", "PENDING")),
+               "{}", rng.uniform(-50000, 50000))
+
+
+def _decision_rows(n: int, days: int, seed: int):
+    rng = random.Random(seed + 1)
+    now = datetime.utcnow()
+    for _ in range(n):
+        ts = now - timedelta(seconds=rng.random() * days * 86400)
+        yield (ts.isoformat(sep=" "), f"{rng.randrange(500):06d}", "volatility_breakout",
+               rng.choice(("HOLD", "HOLD", "HOLD", "BUY", "SELL")), "no breakout", '{"rsi": 50}', 10000.0, "none", 1)
+
+
+def _insert(engine, sql: str, rows) -> None:
+    batch = []
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= CHUNK:
+                conn.exec_driver_sql(sql, batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql(sql, batch)
+
+
+def build(path: Path, tuned: bool, rows: int, days: int, seed: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if tuned:
+        event.listen(engine, "connect", apply_pragmas)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        if not tuned:
+            for name in PROFILE_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    started = time.perf_counter()
+    _insert(engine, "INSERT INTO trade_logs (timestamp, symbol, order_type, price, quantity, status, kis_response, "
+                    "realized_pl) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _trade_rows(rows, days, seed))
+    _insert(engine, "INSERT INTO decision_logs (timestamp, symbol, strategy_name, signal, decision_reason, "
+                    "indicator_values, current_price, action_taken, repeat_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _decision_rows(rows, days, seed))
+    if tuned:
+        with engine.begin() as conn:
+            conn.execute(text("PRAGMA optimize"))
+    return engine, time.perf_counter() - started
+
+
+# --- 앱과 같은 모양의 핫 쿼리 ---
+def q_today_pl(db):
+    return db.query(func.coalesce(func.sum(models.TradeLog.realized_pl), 0.0)).filter(
+        models.TradeLog.order_type == OrderType.SELL,
+        models.TradeLog.status == OrderStatus.EXECUTED,
+        models.TradeLog.timestamp >= _today_start(),
+    ).scalar()
+
+
+def q_trade_count(db):
+    return db.query(func.count(models.TradeLog.id)).filter(
+        models.TradeLog.status == OrderStatus.EXECUTED,
+        models.TradeLog.timestamp >= _today_start(),
+    ).scalar()
+
+
+def q_decisions_by_symbol(db):
+    return (db.query(models.DecisionLog).filter(models.DecisionLog.symbol == "000123")
+            .order_by(models.DecisionLog.timestamp.desc()).limit(50).all())
+
+
+def q_recent_trades(db):
+    return db.query(models.TradeLog).order_by(models.TradeLog.timestamp.desc()).limit(50).all()
+
+
+QUERIES = {
+    "today_pl": q_today_pl,
+    "trade_count": q_trade_count,
+    "decisions_by_symbol": q_decisions_by_symbol,
+    "recent_trades": q_recent_trades,
+}
+
+
+def _ms(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50 {statistics.median(samples) * 1000:8.2f}ms  p99 {p99 * 1000:8.2f}ms  max {samples[-1] * 1000:8.2f}ms"
+
+
+def bench_queries(engine, repeat: int) -> dict[str, list[float]]:
+    Session = sessionmaker(bind=engine)
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured["last"] = (statement, parameters)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    out, plans = {}, {}
+    for name, query in QUERIES.items():
+        samples = []
+        for i in range(repeat + 1):
+            db = Session()
+            try:
+                started = time.perf_counter()
+                query(db)
+                if i:  # 첫 실행은 캐시 워밍업
+                    samples.append(time.perf_counter() - started)
+            finally:
+                db.close()
+        out[name] = samples
+        statement, parameters = captured["last"]
+        with engine.connect() as conn:
+            plans[name] = "; ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+    event.remove(engine, "before_cursor_execute", capture)
+    return out, plans
+
+
+def bench_contention(engine, seconds: float) -> tuple[list[float], int, int]:
+    """쓰기 스레드가 커밋을 반복하는 동안 당일 손익 쿼리 지연. 반환: (조회 지연 목록, 조회 실패 수, 쓰기 커밋 수)."""
+    Session = sessionmaker(bind=engine)
+    stop = threading.Event()
+    commits = [0]
+
+    def writer():
+        db = Session()
+        try:
+            while not stop.is_set():
+                db.add(models.TradeLog(symbol="005930", order_type=OrderType.SELL, price=70000.0, quantity=1,
+                                       status=OrderStatus.EXECUTED, kis_response="{}", realized_pl=100.0))
+                db.add(models.DecisionLog(symbol="005930", strategy_name="volatility_breakout", signal="HOLD",
+                                          decision_reason="bench", current_price=70000.0, action_taken="none"))
+                db.commit()
+                commits[0] += 1
+        finally:
+            db.close()
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    samples, errors = [], 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        db = Session()
+        try:
+            started = time.perf_counter()
+            q_today_pl(db)
+            samples.append(time.perf_counter() - started)
+        except Exception:
+            errors += 1
+        finally:
+            db.close()
+    stop.set()
+    thread.join()
+    return samples, errors, commits[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="테이블당 행 수")
+    parser.add_argument("--days", type=int, default=250, help="행 타임스탬프 분포 기간 (일)")
+    parser.add_argument("--repeat", type=int, default=20, help="쿼리당 반복 횟수")
+    parser.add_argument("--contention-sec", type=float, default=5.0, help="쓰기 경합 측정 시간 (초)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile, tuned in (("기본", False), ("튜닝", True)):
+            engine, load_sec = build(Path(tmp) / f"{profile}.db", tuned, args.rows, args.days, args.seed)
+            print(f"\n[{profile}] 테이블당 {args.rows:,}행 적재 {load_sec:.1f}초")
+            results, plans = bench_queries(engine, args.repeat)
+            for name, samples in results.items():
+                print(f"  {name:<20} {_ms(samples)}   {plans[name]}")
+            samples, errors, commits = bench_contention(engine, args.contention_sec)
+            print(f"  {'쓰기 중 today_pl':<20} {_ms(samples)}   조회 {len(samples)}회 (실패 {errors}), 쓰기 커밋 {commits}회")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+테스트 공통 설정.
+- app.core.config는 필수 환경변수(KIS_APP_KEY 등)가 없으면 import에 실패하므로 app import 전에 더미 값을 넣습니다.
+- app.api.kis_auth는 import 시 DATA_DIR/token.json이 없으면 토큰을 발급(네트워크)하므로 만료 전 더미 토큰을 둡니다.
+- 로그(autotrade.log), SQLite(./autotrade.db), 상태 파일이 저장소에 생기지 않도록 임시 디렉터리에서 실행합니다
+  (작업 디렉터리를 옮기므로 저장소의 .env도 읽지 않음).
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_WORKDIR = tempfile.mkdtemp(prefix="autotrade-test-")
+os.chdir(_WORKDIR)
+os.environ["DATA_DIR"] = _WORKDIR
+for _key, _value in {
+    "KIS_APP_KEY": "test-app-key",
+    "KIS_APP_SECRET": "test-app-secret",
+    "KIS_ACCOUNT_NO": "00000000-01",
+    "SLACK_WEBHOOK_URL": "",
+}.items():
+    os.environ.setdefault(_key, _value)
+(Path(_WORKDIR) / "token.json").write_text(
+    json.dumps({"access_token": "test-token", "expire_time": "2999-12-31 00:00:00.000000"}), encoding="utf-8"
+)
+
+
+@pytest.fixture
+def db_session(monkeypatch, tmp_path):
+    """테스트마다 빈 SQLite DB를 만들어 session.SessionLocal을 바꿔 끼웁니다."""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db import models, session  # noqa: F401  (models import로 테이블 등록)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", session.apply_pragmas)
+    session.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(session, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
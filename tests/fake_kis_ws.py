@@ -0,0 +1,133 @@
+"""
+로컬 가짜 KIS 실시간 WebSocket 서버 (테스트용).
+- 구독/해제 요청(JSON)을 기록하고 KIS와 같은 형식의 응답을 보냅니다. 체결통보(H0STCNI0/H0STCNI9) 구독에는
+  복호화용 key/iv를 돌려줍니다.
+- push_trade()는 '0|H0STCNT0|001|...' 체결 프레임, push_notice()는 AES-256-CBC로 암호화한 '1|H0STCNI0|001|...'
+  체결통보 프레임을 연결된 클라이언트에 보냅니다.
+사용: async with FakeKisServer() as server: RealtimePriceFeed(url=server.url, approval_key_provider=...)
+"""
+import asyncio
+import base64
+import json
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+from websockets.asyncio.server import serve
+
+from app.api import kis_realtime
+
+NOTICE_KEY = "0123456789abcdef0123456789abcdef"  # AES-256 (32바이트)
+NOTICE_IV = "abcdef9876543210"
+
+
+def trade_fields(symbol: str, price: float, open_: float, high: float, low: float,
+                 trade_volume: int = 1, volume: int = 1000, time_: str = "093000") -> list[str]:
+    """H0STCNT0 레코드 1건 (46개 필드, 앱이 읽는 위치만 채움)."""
+    fields = ["0"] * kis_realtime._FIELD_COUNT
+    fields[kis_realtime._IDX_SYMBOL] = symbol
+    fields[kis_realtime._IDX_TIME] = time_
+    fields[kis_realtime._IDX_PRICE] = str(int(price))
+    fields[kis_realtime._IDX_OPEN] = str(int(open_))
+    fields[kis_realtime._IDX_HIGH] = str(int(high))
+    fields[kis_realtime._IDX_LOW] = str(int(low))
+    fields[kis_realtime._IDX_TRADE_VOL] = str(trade_volume)
+    fields[kis_realtime._IDX_ACML_VOL] = str(volume)
+    return fields
+
+
+def encrypt_notice(text: str, key: str = NOTICE_KEY, iv: str = NOTICE_IV) -> str:
+    cipher = AES.new(key.encode("utf-8"), AES.MODE_CBC, iv.encode("utf-8"))
+    return base64.b64encode(cipher.encrypt(pad(text.encode("utf-8"), AES.block_size))).decode("ascii")
+
+
+class FakeKisServer:
+    def __init__(self):
+        self.requests: list[dict] = []  # 받은 구독/해제 요청 (도착순)
+        self.pongs: list[str] = []  # 클라이언트가 되돌려 보낸 PINGPONG
+        self._clients = set()
+        self._server = None
+        self._changed = asyncio.Condition()
+        self.url = ""
+
+    async def __aenter__(self) -> "FakeKisServer":
+        self._server = await serve(self._handler, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    # --- 상태 ---
+    def subscribed(self) -> set[tuple[str, str]]:
+        """현재 구독 중인 (tr_id, tr_key)."""
+        active: set[tuple[str, str]] = set()
+        for request in self.requests:
+            key = (request["body"]["input"]["tr_id"], request["body"]["input"]["tr_key"])
+            if request["header"]["tr_type"] == "1":
+                active.add(key)
+            else:
+                active.discard(key)
+        return active
+
+    async def wait_for(self, predicate, timeout: float = 5.0) -> None:
+        """predicate(server)가 참이 될 때까지 대기 (요청·연결이 바뀔 때마다 재평가)."""
+        async def _wait():
+            async with self._changed:
+                await self._changed.wait_for(lambda: predicate(self))
+        await asyncio.wait_for(_wait(), timeout)
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    # --- 서버 → 클라이언트 ---
+    async def broadcast(self, message: str) -> None:
+        for ws in list(self._clients):
+            await ws.send(message)
+
+    async def push_trade(self, *records: list[str]) -> None:
+        payload = "^".join(field for record in records for field in record)
+        await self.broadcast(f"0|{kis_realtime.TR_ID_TRADE}|{len(records):03d}|{payload}")
+
+    async def push_notice(self, fields: list[str], tr_id: str = kis_realtime.TR_ID_NOTICE) -> None:
+        await self.broadcast(f"1|{tr_id}|001|{encrypt_notice('^'.join(fields))}")
+
+    async def ping(self) -> None:
+        await self.broadcast(json.dumps({"header": {"tr_id": "PINGPONG", "datetime": "20260101093000"}}))
+
+    async def drop_clients(self) -> None:
+        """연결 강제 종료 (재접속 테스트용)."""
+        for ws in list(self._clients):
+            await ws.close()
+
+    # --- 연결 처리 ---
+    async def _handler(self, ws) -> None:
+        self._clients.add(ws)
+        await self._notify()
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                header = data.get("header", {})
+                if header.get("tr_id") == "PINGPONG":
+                    self.pongs.append(message)
+                    await self._notify()
+                    continue
+                self.requests.append(data)
+                await ws.send(self._reply(data))
+                await self._notify()
+        finally:
+            self._clients.discard(ws)
+            await self._notify()
+
+    @staticmethod
+    def _reply(request: dict) -> str:
+        tr_id = request["body"]["input"]["tr_id"]
+        output = {}
+        if tr_id in (kis_realtime.TR_ID_NOTICE, kis_realtime.TR_ID_NOTICE_MOCK) and request["header"]["tr_type"] == "1":
+            output = {"key": NOTICE_KEY, "iv": NOTICE_IV}
+        return json.dumps({
+            "header": {"tr_id": tr_id, "tr_key": request["body"]["input"]["tr_key"], "encrypt": "N"},
+            "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": "SUBSCRIBE SUCCESS", "output": output},
+        })
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from app.api import kis_market
+from app.db import bar_store
+from app.services import vector_backtest
+
+THROUGH = "20260105"
+START_2Y = "20240106"  # THROUGH - round(2 * 365.25)일
+
+
+def _weekdays(start: str, end: str) -> list[str]:
+    day, last = datetime.strptime(start, "%Y%m%d"), datetime.strptime(end, "%Y%m%d")
+    out = []
+    while day <= last:
+        if day.weekday() < 5:
+            out.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return out
+
+
+class _FakeChart:
+    """기간별 시세 API 대역: listed 이후 평일마다 봉이 있고, start~end 중 최신 100봉을 최신순으로 돌려줌."""
+
+    def __init__(self, listed: dict[str, str]):
+        self.listed = listed
+        self.calls: list[tuple[str, str, str]] = []
+
+    def __call__(self, symbol, start, end):
+        self.calls.append((symbol, start, end))
+        days = _weekdays(max(start, self.listed[symbol]), end)[-kis_market._HISTORY_PAGE_ROWS:]
+        return [{"stck_bsop_date": d, "stck_oprc": "100", "stck_hgpr": "110", "stck_lwpr": "90",
+                 "stck_clpr": "105", "acml_vol": "1000"} for d in reversed(days)]
+
+
+def _patch(monkeypatch, listed):
+    fake = _FakeChart(listed)
+    monkeypatch.setattr(kis_market, "_fetch_daily_history", fake)
+    monkeypatch.setattr(kis_market, "_last_closed_session", lambda now=None: THROUGH)
+    return fake
+
+
+def test_backfill_pages_backward_until_years_covered(db_session, monkeypatch):
+    fake = _patch(monkeypatch, {"005930": "19900101", "000660": "20250601"})
+    result = kis_market.sync_daily_history(["005930", "000660"], years=2)
+
+    assert result["complete"] and result["symbols"] == 2
+    expected = _weekdays(START_2Y, THROUGH)
+    assert [r["stck_bsop_date"] for r in reversed(bar_store.load_bars("005930", 10_000))] == expected
+    assert len(bar_store.load_bars("000660", 10_000)) == len(_weekdays("20250601", THROUGH))
+    assert bar_store.history_from("005930") == START_2Y == bar_store.history_from("000660")
+    # 과거 백필은 최근 동기화 기준일을 건드리지 않음 (장중 일봉 조회는 일봉 API 동기화를 그대로 따름)
+    assert bar_store.synced_through("005930") is None
+    # 페이지는 겹치지 않고 과거 방향으로 이어짐
+    ends = [end for symbol, _, end in fake.calls if symbol == "005930"]
+    assert ends == sorted(ends, reverse=True) and len(ends) == -(-len(expected) // 100)
+
+    fake.calls.clear()
+    assert kis_market.sync_daily_history(["005930", "000660"], years=2)["requests"] == 0
+    assert not fake.calls
+
+
+def test_backfill_resumes_after_request_limit(db_session, monkeypatch):
+    fake = _patch(monkeypatch, {"005930": "19900101"})
+    first = kis_market.sync_daily_history(["005930"], years=2, max_requests=2)
+    assert not first["complete"] and first["requests"] == 2 and first["rows"] == 200
+
+    second = kis_market.sync_daily_history(["005930"], years=2)
+    assert second["complete"] and second["symbols"] == 1
+    assert fake.calls[2][2] < fake.calls[1][2]  # 중단한 날짜 이전부터 이어서 조회
+    assert len(bar_store.load_bars("005930", 10_000)) == len(_weekdays(START_2Y, THROUGH))
+
+
+def test_failed_page_is_retried_on_next_run(db_session, monkeypatch):
+    fake = _patch(monkeypatch, {"005930": "19900101"})
+
+    def flaky(symbol, start, end):
+        if len(fake.calls) == 1:
+            fake.calls.append((symbol, start, end))
+            raise RuntimeError("API 오류")
+        return fake(symbol, start, end)
+
+    monkeypatch.setattr(kis_market, "_fetch_daily_history", flaky)
+    assert kis_market.sync_daily_history(["005930"], years=2)["symbols"] == 0
+    assert bar_store.history_from("005930") > START_2Y
+    assert kis_market.sync_daily_history(["005930"], years=2)["symbols"] == 1
+    assert len(bar_store.load_bars("005930", 10_000)) == len(_weekdays(START_2Y, THROUGH))
+
+
+def test_load_universe_spans_backfilled_history(db_session, monkeypatch):
+    _patch(monkeypatch, {"005930": "19900101", "000660": "19900101"})
+    kis_market.sync_daily_history(["005930", "000660"], years=3)
+    data = vector_backtest.load_universe(["005930", "000660"])
+    assert len(data.dates) == len(_weekdays("20230105", THROUGH)) > 700
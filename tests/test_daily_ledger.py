@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from app.db import models
+from app.db.models import OrderStatus, OrderType
+from app.services import daily_ledger as ledger_module
+from app.services.daily_ledger import DailyLedger
+
+
+def _add(factory, order_type, realized_pl=0.0, status=OrderStatus.EXECUTED, when=None) -> int:
+    db = factory()
+    try:
+        row = models.TradeLog(symbol="005930", order_type=order_type, price=10000, quantity=1, status=status,
+                              realized_pl=realized_pl, timestamp=when or datetime.utcnow())
+        db.add(row)
+        db.commit()
+        return row.id
+    finally:
+        db.close()
+
+
+def test_rebuild_counts_today_executed_trades_only(db_session):
+    _add(db_session, OrderType.SELL, -500.0, when=datetime.utcnow() - timedelta(days=2))  # 지난 거래일
+    _add(db_session, OrderType.BUY)
+    _add(db_session, OrderType.SELL, 1000.0)
+    _add(db_session, OrderType.SELL, -300.0)
+    _add(db_session, OrderType.SELL, -200.0)
+    _add(db_session, OrderType.BUY, status=OrderStatus.FAILED)
+
+    ledger = DailyLedger()
+    ledger.rebuild()
+    snapshot = ledger.snapshot()
+    assert (snapshot["trades"], snapshot["wins"], snapshot["losses"], snapshot["lossStreak"]) == (4, 1, 2, 2)
+    assert ledger.realized_pl() == 500.0
+
+
+def test_record_skips_rows_already_read_by_rebuild(db_session):
+    seen = _add(db_session, OrderType.SELL, -100.0)
+    ledger = DailyLedger()
+    ledger.rebuild()
+    ledger.record(OrderType.SELL, OrderStatus.EXECUTED, -100.0, trade_id=seen)  # 재구성이 이미 반영
+    assert (ledger.trade_count(), ledger.loss_streak()) == (1, 1)
+
+    new = _add(db_session, OrderType.SELL, 400.0)
+    ledger.record(OrderType.SELL, OrderStatus.EXECUTED, 400.0, trade_id=new)
+    ledger.record(OrderType.BUY, OrderStatus.EXECUTED, trade_id=None)  # DB 저장 실패 행도 반영
+    assert (ledger.trade_count(), ledger.loss_streak(), ledger.realized_pl()) == (3, 0, 300.0)
+
+
+def test_failed_rebuild_is_retried_on_next_access(db_session, monkeypatch):
+    _add(db_session, OrderType.SELL, -100.0)
+    ledger = DailyLedger()
+
+    class _LockedSession:
+        def query(self, *args):
+            raise RuntimeError("database is locked")
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(ledger_module.session, "SessionLocal", _LockedSession)
+    ledger.rebuild()
+    assert ledger.trade_count() == 0  # 재시도 간격 동안은 0부터 집계 (재구성 재시도 안 함)
+
+    monkeypatch.setattr(ledger_module.session, "SessionLocal", db_session)
+    assert ledger.trade_count() == 0
+    monkeypatch.setattr(ledger_module, "_REBUILD_RETRY_SEC", 0.0)
+    ledger._retry_at = 0.0
+    assert (ledger.trade_count(), ledger.loss_streak()) == (1, 1)
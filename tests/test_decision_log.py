@@ -0,0 +1,60 @@
+import queue
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.db import models, session
+from app.db.decision_log import DecisionLogWriter
+
+_T0 = datetime(2026, 1, 5, 0, 0)
+
+
+@pytest.fixture
+def writer(db_session, monkeypatch):
+    monkeypatch.setattr(session, "engine", db_session.kw["bind"])
+    monkeypatch.setattr(settings, "DECISION_LOG_COLLAPSE_HOLD", True)
+    return DecisionLogWriter()
+
+
+def _row(i: int, signal: str = "HOLD", reason: str = "조건 미충족") -> dict:
+    """record()가 큐에 넣는 행과 같은 형식 (i초 뒤 판단)."""
+    return {
+        "timestamp": _T0 + timedelta(seconds=i), "symbol": "005930", "strategy_name": "rsi", "signal": signal,
+        "decision_reason": reason, "indicator_values": "{}", "current_price": 70000.0 + i,
+        "action_taken": "SKIPPED", "repeat_count": 1, "last_timestamp": None,
+    }
+
+
+def _stored(factory) -> list[tuple]:
+    db = factory()
+    try:
+        rows = db.query(models.DecisionLog).order_by(models.DecisionLog.timestamp).all()
+        return [(r.signal, r.decision_reason, r.repeat_count, r.current_price) for r in rows]
+    finally:
+        db.close()
+
+
+def test_hold_run_collapses_within_one_batch(writer, db_session):
+    writer._write([_row(0), _row(1), _row(2), _row(3, signal="BUY")])
+    assert _stored(db_session) == [("HOLD", "조건 미충족", 3, 70002.0), ("BUY", "조건 미충족", 1, 70003.0)]
+    assert writer.stats()["collapsed"] == 2
+
+
+def test_pending_count_of_inserted_run_is_written_when_run_ends(writer, db_session):
+    writer._write([_row(0)])  # 묶음 첫 행 INSERT
+    writer._write([_row(1), _row(2), _row(3, signal="BUY")])  # 같은 배치에서 묶음이 늘고 끝남
+    assert _stored(db_session) == [("HOLD", "조건 미충족", 3, 70002.0), ("BUY", "조건 미충족", 1, 70003.0)]
+
+    writer._write([_row(4)])
+    writer._write([_row(5), _row(6, reason="거래량 부족")])  # 다른 사유 HOLD가 묶음을 대체
+    assert _stored(db_session)[2:] == [("HOLD", "조건 미충족", 2, 70005.0), ("HOLD", "거래량 부족", 1, 70006.0)]
+
+
+def test_stats_counters(writer, monkeypatch):
+    monkeypatch.setattr(writer, "_ensure_started", lambda: None)  # 기록 스레드 없이 큐만 확인
+    writer._queue = queue.Queue(maxsize=1)
+    for _ in range(3):
+        writer.record("005930", "rsi", "HOLD", "조건 미충족", {}, 70000.0, "SKIPPED")
+    stats = writer.stats()
+    assert (stats["queued"], stats["dropped"], stats["pending"]) == (1, 2, 1)
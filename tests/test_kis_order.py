@@ -0,0 +1,25 @@
+import asyncio
+
+from app.api import kis_order
+
+
+def test_async_balance_shares_account_snapshot(monkeypatch):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return kis_order.AccountSnapshot([{"pdno": "005930", "hldg_qty": "10"}],
+                                         {"output2": [{"dnca_tot_amt": "1000000"}]})
+
+    monkeypatch.setattr(kis_order, "_fetch_account_snapshot", fetch)
+    kis_order.invalidate_account_snapshot()
+    try:
+        holdings = asyncio.run(kis_order.get_balance_async(max_age=60))
+        assert holdings == [{"pdno": "005930", "hldg_qty": "10"}]
+        # 동기 조회는 async 조회가 채운 스냅샷을 그대로 씀
+        assert kis_order.get_balance(max_age=60) is holdings and len(calls) == 1
+        kis_order.invalidate_account_snapshot()  # 주문 접수 후에는 다시 조회
+        asyncio.run(kis_order.get_balance_async(max_age=60))
+        assert len(calls) == 2
+    finally:
+        kis_order.invalidate_account_snapshot()
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+from fake_kis_ws import FakeKisServer, trade_fields
+
+from app.api import kis_market
+from app.api.kis_realtime import TR_ID_NOTICE, TR_ID_TRADE, RealtimePriceFeed, parse_trade_message
+from app.core.config import settings
+
+
+async def _approval_key() -> str:
+    return "test-approval-key"
+
+
+async def _until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("시간 내 조건 미충족")
+        await asyncio.sleep(0.01)
+
+
+async def _stop(feed: RealtimePriceFeed, task: asyncio.Task) -> None:
+    feed.stop()
+    await asyncio.wait_for(task, 5.0)
+
+
+def test_parse_trade_message_multiple_records():
+    fields = trade_fields("005930", 70100, 70000, 70500, 69800, trade_volume=3, volume=1200)
+    fields += trade_fields("000660", 180000, 179000, 181000, 178500, volume=500)
+    ticks = parse_trade_message(f"0|{TR_ID_TRADE}|002|" + "^".join(fields))
+    assert [(t["symbol"], t["price"], t["volume"]) for t in ticks] == [("005930", 70100.0, 1200), ("000660", 180000.0, 500)]
+    assert ticks[0]["trade_volume"] == 3
+
+
+def test_trade_frames_update_ticks_quote_cache_and_listeners():
+    async def scenario():
+        async with FakeKisServer() as server:
+            feed = RealtimePriceFeed(url=server.url, approval_key_provider=_approval_key)
+            received = []
+            feed.add_listener(lambda symbol, tick: received.append((symbol, tick["price"])))
+            feed.set_symbols(["005930", "000660"])
+            task = asyncio.create_task(feed.run())
+            try:
+                await server.wait_for(lambda s: s.subscribed() == {(TR_ID_TRADE, "005930"), (TR_ID_TRADE, "000660")})
+                assert all(r["header"]["approval_key"] == "test-approval-key" for r in server.requests)
+                await server.push_trade(
+                    trade_fields("005930", 70100, 70000, 70500, 69800, volume=1200),
+                    trade_fields("000660", 180000, 179000, 181000, 178500, volume=500),
+                )
+                await _until(lambda: len(received) == 2)
+            finally:
+                await _stop(feed, task)
+            return feed, received
+
+    feed, received = asyncio.run(scenario())
+    assert received == [("005930", 70100.0), ("000660", 180000.0)]
+    assert feed.get_tick("005930")["high"] == 70500.0
+    assert feed.stats()["ticks"] == 2
+    quote = kis_market.peek_quote("000660")
+    assert quote["stck_prpr"] == "180000" and quote["acml_vol"] == "500"
+
+
+def test_fill_notice_frames_are_decrypted(monkeypatch):
+    monkeypatch.setattr(settings, "MOCK_TRADE", False)  # 실전 체결통보 TR (H0STCNI0)
+
+    async def scenario():
+        async with FakeKisServer() as server:
+            feed = RealtimePriceFeed(url=server.url, approval_key_provider=_approval_key)
+            notices = []
+            feed.enable_fill_notices("hts-user", notices.append)
+            task = asyncio.create_task(feed.run())
+            try:
+                await server.wait_for(lambda s: (TR_ID_NOTICE, "hts-user") in s.subscribed())
+                await _until(lambda: TR_ID_NOTICE in feed._notice_cipher)  # 구독 응답의 key/iv 수신
+                await server.push_notice(["hts-user", "12345678", "0000012345", "", "02", "0", "00", "", "005930", "10"])
+                await _until(lambda: notices)
+            finally:
+                await _stop(feed, task)
+            return feed, notices
+
+    feed, notices = asyncio.run(scenario())
+    assert notices[0][0] == "hts-user" and notices[0][2] == "0000012345" and notices[0][8] == "005930"
+    assert feed.stats()["notices"] == 1
+
+
+def test_resubscribe_pingpong_and_reconnect():
+    async def scenario():
+        async with FakeKisServer() as server:
+            feed = RealtimePriceFeed(url=server.url, approval_key_provider=_approval_key)
+            feed.set_symbols(["005930", "000660"])
+            task = asyncio.create_task(feed.run())
+            try:
+                await server.wait_for(lambda s: len(s.subscribed()) == 2)
+                feed.set_symbols(["000660", "035720"])
+                await server.wait_for(lambda s: s.subscribed() == {(TR_ID_TRADE, "000660"), (TR_ID_TRADE, "035720")})
+                await server.ping()
+                await server.wait_for(lambda s: len(s.pongs) == 1)
+
+                sent_before = len(server.requests)
+                await server.drop_clients()
+                await _until(lambda: not feed.connected)
+                # 재접속하면 구독을 처음부터 다시 보냄
+                await server.wait_for(lambda s: len(s.requests) >= sent_before + 2, timeout=10.0)
+                assert feed.connected
+            finally:
+                await _stop(feed, task)
+            return server
+
+    server = asyncio.run(scenario())
+    assert {r["body"]["input"]["tr_key"] for r in server.requests[-2:]} == {"000660", "035720"}
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from app.api import kis_market
+from app.core.config import settings
+from app.db import minute_store
+
+THROUGH = "20260109"  # 금요일
+
+
+@pytest.fixture
+def data_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(type(settings), "base_dir", property(lambda self: tmp_path))
+    minute_store._readers.clear()
+    yield tmp_path
+    minute_store._readers.clear()
+
+
+def _bars(day: str, n: int = 3) -> list[dict]:
+    base = int(day[-2:]) * 100
+    return [{"hhmm": 900 + i, "open": base, "high": base + 1, "low": base - 1, "close": base + i, "volume": 10}
+            for i in range(n)]
+
+
+class _FakeMinuteApi:
+    def __init__(self, fail_on: str | None = None):
+        self.calls: list[str] = []
+        self.fail_on = fail_on
+
+    def __call__(self, symbol, day):
+        self.calls.append(day)
+        if day == self.fail_on:
+            raise RuntimeError("API 오류")
+        return _bars(day), 1
+
+
+def test_prepend_days_keeps_rows_sorted_and_swaps_generation(data_dir):
+    minute_store.append_day("005930", "20260108", _bars("20260108"))
+    minute_store.append_day("005930", "20260109", _bars("20260109"))
+    reader = minute_store.open_bars("005930")
+    assert reader.days() == ["20260108", "20260109"]
+
+    assert minute_store.prepend_days("005930", [("20260106", _bars("20260106")), ("20260107", [])]) == 3
+    meta = minute_store.read_meta("005930")
+    assert (meta["rows"], meta["through"], meta["since"], meta["gen"]) == (9, "20260109", "20260106", 1)
+    assert not (data_dir / "minute_bars" / "005930" / "date.bin").exists()  # 이전 세대 파일 정리
+    bars = minute_store.open_bars("005930")
+    assert bars is not reader and bars.days() == ["20260106", "20260108", "20260109"]
+    assert list(bars.day("20260108")["close"]) == [800, 801, 802]
+    # since 이상 날짜는 무시, 이후 append는 새 세대 파일에 이어 씀
+    assert minute_store.prepend_days("005930", [("20260107", _bars("20260107"))]) == 0
+    minute_store.append_day("005930", "20260112", _bars("20260112"))
+    assert minute_store.open_bars("005930").days()[-1] == "20260112"
+
+
+def test_legacy_meta_derives_since_from_first_row(data_dir):
+    minute_store.append_day("005930", "20260108", _bars("20260108"))
+    path = data_dir / "minute_bars" / "005930" / "meta.json"
+    path.write_text(json.dumps({"rows": 3, "through": "20260108"}), encoding="utf-8")
+    assert minute_store.synced_since("005930") == "20260108"
+
+
+def test_sync_extends_backfill_before_stored_range(data_dir, monkeypatch):
+    api = _FakeMinuteApi()
+    monkeypatch.setattr(kis_market, "get_minute_bars", api)
+    monkeypatch.setattr(kis_market, "_last_closed_session", lambda now=None: THROUGH)
+
+    first = kis_market.sync_minute_bars(["005930"], lookback_days=3)
+    assert first["complete"] and api.calls == ["20260107", "20260108", "20260109"]
+
+    # 기간을 늘리면 저장된 첫날 이전 평일을 과거 방향으로 조회해 앞에 채움 (일봉 저장소와 무관)
+    api.calls.clear()
+    second = kis_market.sync_minute_bars(["005930"], lookback_days=6)
+    assert second["complete"] and api.calls == ["20260106", "20260105", "20260102"]
+    assert minute_store.open_bars("005930").days() == kis_market._weekdays(THROUGH, 6)
+
+    api.calls.clear()
+    assert kis_market.sync_minute_bars(["005930"], lookback_days=6)["requests"] == 0
+
+
+def test_sync_prepend_resumes_after_limit_and_failure(data_dir, monkeypatch):
+    api = _FakeMinuteApi(fail_on="20260102")
+    monkeypatch.setattr(kis_market, "get_minute_bars", api)
+    monkeypatch.setattr(kis_market, "_last_closed_session", lambda now=None: THROUGH)
+    kis_market.sync_minute_bars(["005930"], lookback_days=2)
+
+    limited = kis_market.sync_minute_bars(["005930"], lookback_days=8, max_requests=2)
+    assert not limited["complete"] and minute_store.synced_since("005930") == "20260106"
+    kis_market.sync_minute_bars(["005930"], lookback_days=8)  # 20260102에서 실패 → 그 직전까지만 저장
+    assert minute_store.synced_since("005930") == "20260105"
+
+    api.fail_on = None
+    kis_market.sync_minute_bars(["005930"], lookback_days=8)
+    assert minute_store.open_bars("005930").days() == kis_market._weekdays(THROUGH, 8)
@@ -0,0 +1,42 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.kis_fills import OrderTicket
+from app.routers import orders
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(orders.router)
+    return TestClient(app)
+
+
+def test_amend_returns_ticket_after_rekey(monkeypatch):
+    ticket = OrderTicket("0000000101", "005930", "BUY", 10, 70000, timeout=60)
+    tracked = {"0000000101": ticket}
+
+    def amend(odno, price):
+        # 정정 성공 → 추적 키가 새 주문번호로 바뀌어 이전 번호로는 조회되지 않음
+        t = tracked.pop(odno)
+        t.odno, t.price = "0000000202", price
+        tracked[t.odno] = t
+        return True
+
+    monkeypatch.setattr(orders.order_manager, "get", tracked.get)
+    monkeypatch.setattr(orders.order_manager, "amend", amend)
+
+    response = _client().post("/orders/0000000101/amend", json={"price": 70100})
+    assert response.status_code == 200
+    assert response.json()["price"] == 70100
+    assert response.json()["odno"] == "0000000202"
+
+
+def test_amend_unknown_and_failed(monkeypatch):
+    ticket = OrderTicket("0000000101", "005930", "BUY", 10, 70000, timeout=60)
+    monkeypatch.setattr(orders.order_manager, "get", {"0000000101": ticket}.get)
+    monkeypatch.setattr(orders.order_manager, "amend", lambda odno, price: False)
+
+    client = _client()
+    assert client.post("/orders/999/amend", json={"price": 70100}).status_code == 404
+    assert client.post("/orders/0000000101/amend", json={"price": 0}).status_code == 400
+    assert client.post("/orders/0000000101/amend", json={"price": 70100}).status_code == 409
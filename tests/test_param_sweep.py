@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from app.services import param_sweep
+from app.services.param_sweep import ParameterSweep, build_space, tpe_candidates
+from app.services.vector_backtest import UniverseData
+
+
+def _universe() -> UniverseData:
+    rows = [("005930", f"202601{d:02d}", 100.0 + d, 102.0 + d, 99.0 + d, 101.0 + d, 1000) for d in range(1, 29)]
+    return UniverseData.from_rows(rows)
+
+
+@pytest.mark.parametrize("history_size", [0, 1])
+def test_tpe_falls_back_to_random_when_history_too_small(history_size):
+    space = build_space("volatility_breakout")
+    history = [(c, 1.0) for c in param_sweep.random_candidates(space, history_size, seed=99)]
+    proposals = tpe_candidates(space, history, 4, seed=1)
+    assert len(proposals) == 4
+    assert all(param_sweep.is_valid(c) for c in proposals)
+    assert not {param_sweep._candidate_key(c) for c, _ in history} & {param_sweep._candidate_key(c) for c in proposals}
+
+
+def test_bayes_sweep_stops_when_every_evaluation_fails(monkeypatch):
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(args[2])
+        raise RuntimeError("평가 실패")
+
+    monkeypatch.setattr(param_sweep, "evaluate", failing)
+    result = ParameterSweep(_universe(), method="bayes", n_candidates=30, workers=1, seed=123).run()
+    assert result["evaluated"] == 0 and result["best"] is None and result["results"] == []
+    assert 0 < len(calls) < 30  # 초기 후보 + 대체 후보 1회분만 시도하고 종료
+
+
+def _configs(factory) -> dict[str, tuple]:
+    from app.db import models
+
+    db = factory()
+    try:
+        return {r.symbol: (r.strategy_name, json.loads(r.parameters), r.is_active)
+                for r in db.query(models.StrategyConfig).order_by(models.StrategyConfig.updated_at.asc())}
+    finally:
+        db.close()
+
+
+def _seed_configs(factory) -> None:
+    from app.db import models
+
+    db = factory()
+    try:
+        db.add(models.StrategyConfig(symbol="005930", strategy_name="rsi", parameters='{"rsi_period": 9}', is_active=True))
+        db.add(models.StrategyConfig(symbol="000660", strategy_name="volatility_breakout", parameters='{"k": 0.5}',
+                                     is_active=True))
+        db.commit()
+    finally:
+        db.close()
+
+
+TUNED = {"k": 0.35, "ma_period": 10, "trailing_stop_pct": 2.5, "use_adaptive_k": False, "rsi_exit_threshold": 75.0}
+
+
+def test_apply_best_keeps_symbols_configured_with_other_strategies(db_session):
+    _seed_configs(db_session)
+    applied = param_sweep.apply_best("volatility_breakout", TUNED, ["005930", "000660", "035720"],
+                                     keep_other_strategies=True)
+    configs = _configs(db_session)
+    assert applied == 2
+    assert configs["005930"] == ("rsi", {"rsi_period": 9}, True)
+    assert configs["000660"] == ("volatility_breakout", TUNED, True)
+    assert configs["035720"] == ("volatility_breakout", TUNED, True)  # 설정 없음 → 기본 전략으로 기록
+    # 수동 적용(API apply=True)은 기존처럼 지정한 전략으로 전환
+    assert param_sweep.apply_best("volatility_breakout", TUNED, ["005930"]) == 1
+    assert _configs(db_session)["005930"][0] == "volatility_breakout"
+
+
+def test_weekly_retune_does_not_switch_other_strategies(db_session, monkeypatch):
+    import app.main as main
+    from app.services import vector_backtest, walk_forward
+
+    _seed_configs(db_session)
+
+    class _FakeWalkForward:
+        def __init__(self, data, strategy_name, **kwargs):
+            assert strategy_name == main.DEFAULT_STRATEGY_NAME
+
+        def run(self):
+            return {"outOfSample": {"totalReturnPct": 4.2}, "latest": {"params": TUNED}, "folds": [{}],
+                    "computedFolds": 1}
+
+    monkeypatch.setattr(main.settings, "USE_WEEKLY_RETUNE", True)
+    monkeypatch.setattr(main, "target_symbols", ["005930", "000660"])
+    monkeypatch.setattr(main, "_held_positions", lambda: {})
+    monkeypatch.setattr(main, "send_slack_notification", lambda message: None)
+    monkeypatch.setattr(vector_backtest, "load_universe", lambda symbols: _universe())
+    monkeypatch.setattr(walk_forward, "WalkForward", _FakeWalkForward)
+    main.job_weekly_retune()
+
+    configs = _configs(db_session)
+    assert configs["005930"] == ("rsi", {"rsi_period": 9}, True)
+    assert configs["000660"] == ("volatility_breakout", TUNED, True)
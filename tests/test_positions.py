@@ -0,0 +1,48 @@
+import pytest
+
+from app.services.positions import Position, PositionBook
+
+
+def test_position_reads_like_the_legacy_dict():
+    legacy = {"bought": True, "purchase_price": 70000.0, "quantity": 10, "stop_price": 67900.0,
+              "high_price": 72000.0, "stage1_sell_done": True, "entry_strategy": "rsi"}
+    position = Position.from_dict(legacy)
+    for key, value in legacy.items():
+        assert position[key] == value and position.get(key) == value
+    # None인 선택 필드는 없는 키처럼 동작 (기존 .get(key, 기본값) 의미)
+    assert position.get("atr", 1.5) == 1.5 and position.get("initial_quantity") is None
+    with pytest.raises(KeyError):
+        position["atr"]
+    with pytest.raises(KeyError):
+        position["unknown"]
+    assert position.get("half_cut_done") is False
+
+
+def test_to_dict_round_trips_state_file_format():
+    held = {"bought": True, "purchase_price": 70000.0, "quantity": 10, "stop_price": 67900.0, "atr": 900.0,
+            "stage1_sell_done": False, "stage2_sell_done": False, "half_cut_done": False, "entry_strategy": "rsi"}
+    assert Position.from_dict(held).to_dict() == held
+    # 미보유 상태는 단계 플래그를 기록하지 않음
+    assert Position().to_dict() == {"bought": False, "purchase_price": 0.0, "quantity": 0, "stop_price": 0.0}
+    clone = Position.from_dict(held).copy()
+    clone.update({"entry_strategy": "ma"})
+    assert held["entry_strategy"] == "rsi"
+
+
+def test_book_keeps_held_index_in_sync():
+    book = PositionBook.from_dict({
+        "005930": {"bought": True, "purchase_price": 70000.0, "quantity": 10, "stop_price": 67900.0},
+        "000660": {"bought": False, "purchase_price": 0.0, "quantity": 0, "stop_price": 0.0},
+    })
+    assert book.held_symbols() == ["005930"] and list(book) == ["005930", "000660"] and "000660" in book
+
+    book.update("000660", {"bought": True, "quantity": 5})
+    assert book.held_count() == 2
+    book.reset("005930")
+    assert book.held_symbols() == ["000660"] and not book.get("005930").bought
+    book.update("000660", {"pending_buy": {"odno": "1"}})
+    assert [s for s, _ in book.pending()] == ["000660"]
+    book.remove("000660")
+    assert book.held_count() == 0 and book.update("000660", {"bought": True}) is None
+    assert book.watch("035720") is book.watch("035720")
+    assert PositionBook.from_dict(book.to_dict()).to_dict() == book.to_dict()
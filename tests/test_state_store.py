@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.db.state_store import TradeStateStore, _apply
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "STATE_COMPACT_SEC", 3600.0)  # 테스트 중 타이머 압축 없음
+    monkeypatch.setattr(settings, "STATE_JOURNAL_MAX_RECORDS", 1_000_000)
+    stores = []
+
+    def _open() -> TradeStateStore:
+        s = TradeStateStore(tmp_path / "trade_status.json")
+        stores.append(s)
+        return s
+
+    yield _open
+    for s in stores:
+        if s._timer is not None:
+            s._timer.cancel()
+        if s._journal is not None:
+            s._journal.close()
+
+
+def _mutate(store: TradeStateStore, state: dict) -> None:
+    """같은 변경을 저널과 메모리 상태에 적용."""
+    records = [
+        {"op": "put", "s": "005930", "v": {"bought": True, "purchase_price": 70000, "quantity": 10, "stop_price": 67900}},
+        {"op": "put", "s": "000660", "v": {"bought": False, "purchase_price": 0, "quantity": 0, "stop_price": 0}},
+        {"op": "set", "s": "005930", "v": {"high_price": 72000, "stop_price": 69840}},
+        {"op": "set", "s": "005930", "v": {"quantity": 7, "stage1_sell_done": True}},
+        {"op": "del", "s": "000660"},
+        {"op": "set", "s": "035720", "v": {"bought": False}},
+    ]
+    for record in records:
+        _apply(state, record)
+        if record["op"] == "put":
+            store.put(record["s"], record["v"], durable=True)
+        elif record["op"] == "set":
+            store.update(record["s"], record["v"])
+        else:
+            store.delete(record["s"])
+
+
+def test_journal_replay_matches_in_memory_state(store):
+    writer, state = store(), {}
+    _mutate(writer, state)
+    assert not writer.path.exists() and writer.journal_path.exists()
+
+    reader = store()
+    assert reader.load() == state
+    # 재생 후 바로 스냅샷으로 압축 → 저널 비움
+    assert json.loads(reader.path.read_text(encoding="utf-8")) == state
+    assert reader.journal_path.read_text(encoding="utf-8") == ""
+    assert store().load() == state
+
+
+def test_torn_last_journal_line_is_ignored(store):
+    writer, state = store(), {}
+    _mutate(writer, state)
+    writer._journal.write('{"op":"set","s":"005930","v":{"quan')  # 기록 중 종료
+    writer._journal.flush()
+    assert store().load() == state
+
+
+def test_compaction_and_replay_over_newer_snapshot(store):
+    writer, state = store(), {}
+    writer.attach(lambda: state)
+    _mutate(writer, state)
+    journal = writer.journal_path.read_text(encoding="utf-8")
+
+    writer.compact()
+    assert json.loads(writer.path.read_text(encoding="utf-8")) == state
+    assert writer.journal_path.read_text(encoding="utf-8") == ""
+    assert writer.stats()["pendingRecords"] == 0
+
+    # 스냅샷 교체 후 저널 정리 전에 종료된 경우: 같은 저널을 새 스냅샷 위에 다시 재생해도 결과가 같음
+    writer.journal_path.write_text(journal, encoding="utf-8")
+    assert store().load() == state
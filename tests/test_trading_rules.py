@@ -0,0 +1,160 @@
+from datetime import time as dtime
+
+import pytest
+
+from app.services import trading_rules
+from app.services.backtest import Backtester
+from app.services.market_data import ReplayMarketData
+from app.services.trading_rules import ExitRules, decide_exit
+
+RULES = ExitRules(stage1_pct=7.0, stage2_pct=9.0, breakeven_offset_pct=-1.5, max_loss_half=-3.5, max_loss_full=-8.0,
+                  use_atr=False)
+
+
+def _pos(**fields) -> dict:
+    pos = {"bought": True, "purchase_price": 10000.0, "quantity": 30, "initial_quantity": 30,
+           "high_price": 10000.0, "stop_price": 9700.0, "stage1_sell_done": False, "stage2_sell_done": False}
+    pos.update(fields)
+    return pos
+
+
+# --- decide_exit 단위 판단 ---
+def test_stage1_sells_a_third_and_moves_stop_to_breakeven_guard():
+    decision = decide_exit(_pos(), 10700.0, 3.0, rules=RULES)
+    assert (decision.kind, decision.reason, decision.quantity, decision.close) == ("sell", "stage1", 10, False)
+    assert decision.updates == {"stop_price": 9850.0, "stage1_sell_done": True}
+    assert decision.high_price == 10700.0
+
+
+def test_stage2_after_stage1():
+    decision = decide_exit(_pos(quantity=20, stage1_sell_done=True, stop_price=9850.0), 10900.0, 3.0, rules=RULES)
+    assert (decision.kind, decision.reason, decision.quantity) == ("sell", "stage2", 10)
+    assert decision.updates == {"stage2_sell_done": True}
+
+
+def test_max_loss_half_then_full():
+    half = decide_exit(_pos(stop_price=0.0), 9640.0, 3.0, rules=RULES)
+    assert (half.reason, half.quantity, half.updates) == ("max_loss_half", 15, {"half_cut_done": True})
+    # 반절 손절 후에는 전량 손절 기준까지 보유
+    assert decide_exit(_pos(stop_price=0.0, quantity=15, half_cut_done=True), 9640.0, 3.0, rules=RULES).kind == "hold"
+    full = decide_exit(_pos(stop_price=0.0, quantity=15, half_cut_done=True), 9190.0, 3.0, rules=RULES)
+    assert (full.reason, full.quantity, full.close) == ("max_loss_full", 15, True)
+
+
+def test_stop_hit_closes_position():
+    decision = decide_exit(_pos(), 9700.0, 3.0, rules=RULES)
+    assert (decision.kind, decision.reason, decision.quantity, decision.close) == ("sell", "stop", 30, True)
+
+
+def test_trailing_raise_only_after_stage1():
+    # stage1 전에는 (ATR 미사용 시) 손절가 유지
+    assert decide_exit(_pos(high_price=10500.0), 10500.0, 3.0, rules=RULES).reason == "none"
+    after = decide_exit(_pos(stage1_sell_done=True, quantity=20, stop_price=9850.0), 10600.0, 3.0, rules=RULES)
+    assert after.reason == "trail_raise"
+    assert after.updates["stop_price"] == pytest.approx(10600.0 * 0.97)
+
+
+def test_atr_floor_from_high_applies_before_stage1():
+    rules = ExitRules(**{**RULES.to_dict(), "use_atr": True, "atr_mult": 1.5})
+    # 저장된 손절가(9700)보다 최고가 기준 ATR 하한(10400 - 200*1.5)이 우선
+    decision = decide_exit(_pos(atr=200.0, high_price=10400.0), 10090.0, 3.0, rules=rules)
+    assert (decision.reason, decision.close, decision.label) == ("stop", True, "ATR 손절")
+    assert decide_exit(_pos(atr=200.0, high_price=10400.0), 10090.0, 3.0, rules=RULES).kind == "hold"
+
+
+def test_sell_signal_closes_small_position_and_tightens_large_one():
+    small = decide_exit(_pos(quantity=2, initial_quantity=2), 10200.0, 3.0, signal_fn=lambda: "SELL", rules=RULES)
+    assert (small.reason, small.quantity, small.close) == ("signal", 2, True)
+    large = decide_exit(_pos(high_price=10400.0), 10200.0, 3.0, signal_fn=lambda: "SELL", rules=RULES)
+    assert large.kind == "hold" and large.updates["stop_price"] == pytest.approx(10400.0 * 0.985)
+
+
+def test_signal_not_consulted_when_stage_take_profit_fires():
+    def signal_fn():
+        raise AssertionError("단계 익절 시 전략 신호를 조회하면 안 됨")
+
+    assert decide_exit(_pos(), 10700.0, 3.0, signal_fn=signal_fn, rules=RULES).reason == "stage1"
+
+
+# --- 실거래 엔진(main._evaluate_holding) ↔ 백테스터 청산 동일성 ---
+class _StubStrategy:
+    """두 엔진에 같은 파라미터·신호를 주는 전략 대역."""
+
+    def __init__(self, signals: dict[float, str] | None = None):
+        self.signals = signals or {}
+
+    def get_parameters(self) -> dict:
+        return {"trailing_stop_pct": 3.0}
+
+    def check_signal(self, symbol, current_price=None):
+        return self.signals.get(current_price, "HOLD"), current_price
+
+
+def _live_engine(monkeypatch, rules: ExitRules):
+    import app.main as main
+    from app.services.positions import PositionBook
+
+    sells = []
+    monkeypatch.setattr(main, "trade_status", PositionBook())
+    monkeypatch.setattr(main, "_daily_sold_symbols", set())
+    monkeypatch.setattr(main, "_resolve_sell_quantity", lambda symbol, qty: qty)
+    monkeypatch.setattr(main.kis_order, "place_order", lambda **kwargs: {"rt_cd": "0"})
+    monkeypatch.setattr(main, "_log_trade", lambda symbol, side, price, qty, *args, **kwargs: sells.append((price, qty)))
+    monkeypatch.setattr(main, "send_slack_notification", lambda message: None)
+    monkeypatch.setattr(main, "queue_broadcast", lambda message: None)
+    monkeypatch.setattr(trading_rules.ExitRules, "from_settings", classmethod(lambda cls, *a, **kw: rules))
+    return main, sells
+
+
+def _backtester(rules: ExitRules, strategy: _StubStrategy) -> Backtester:
+    bar = {"stck_bsop_date": "20260105", "stck_oprc": "10000", "stck_hgpr": "10000", "stck_lwpr": "10000",
+           "stck_clpr": "10000", "acml_vol": "1000"}
+    tester = Backtester(ReplayMarketData({"005930": [bar]}), exit_rules=rules, slippage_ticks=0)
+    tester.strategy = strategy
+    tester.trailing_pct = 3.0
+    tester._reset()
+    tester._day = "20260105"
+    return tester
+
+
+PATHS = {
+    # 단계 익절 1/3 → 2/3 → 최고가 기준 트레일링 스톱
+    "take_profit_then_trail": [10100, 10300, 10750, 10800, 10950, 11200, 11500, 11300, 11100, 10900],
+    # 반절 손절 → 전량 손절 (ATR 사용 시 매수가 기준 ATR 하한이 먼저)
+    "loss_cuts": [9900, 9800, 9640, 9500, 9300, 9150, 9000],
+    # RSI 매도 신호 → 타이트닝 후 스톱
+    "signal_tighten": [10200, 10400, 10350, 10300, 10250, 10150, 10000],
+}
+
+
+@pytest.mark.parametrize("use_atr", [False, True])
+@pytest.mark.parametrize("path_name", sorted(PATHS))
+def test_live_engine_and_backtester_exit_identically(monkeypatch, path_name, use_atr):
+    from app.services.positions import Position
+
+    rules = ExitRules(**{**RULES.to_dict(), "use_atr": use_atr, "atr_mult": 1.5})
+    strategy = _StubStrategy({10350: "SELL"})
+    entry = _pos(stop_price=0.0 if path_name == "loss_cuts" else 9700.0, atr=200.0)
+    main, live_sells = _live_engine(monkeypatch, rules)
+    main.trade_status.set("005930", Position.from_dict(entry))
+    tester = _backtester(rules, strategy)
+    tester.positions["005930"] = dict(entry)
+
+    for price in PATHS[path_name]:
+        price = float(price)
+        live = main._position_snapshot("005930")
+        if live.bought:
+            main._evaluate_holding("005930", live, strategy, price, 3.0)
+        if "005930" in tester.positions:
+            tester._evaluate_holding("005930", price, dtime(10, 0))
+        live = main._position_snapshot("005930")
+        replay = tester.positions.get("005930")
+        assert live.bought == (replay is not None), f"{price}: 보유 여부 불일치"
+        if replay is not None:
+            for field in ("quantity", "stop_price", "high_price", "stage1_sell_done", "stage2_sell_done"):
+                assert live.get(field) == pytest.approx(replay.get(field)), f"{price}: {field} 불일치"
+            assert live.get("half_cut_done", False) == replay.get("half_cut_done", False)
+
+    assert live_sells == [(t["price"], t["quantity"]) for t in tester.trades]
+    assert live_sells, "경로가 청산을 한 번도 일으키지 않음"
+    assert sum(q for _, q in live_sells) <= entry["quantity"]